@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "axes.middleware.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -136,6 +137,49 @@ STATICFILES_DIRS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Härledda bildversioner (WebP) skapas i bakgrunden, se
+# axes/services/image_derivatives.py. "thread" = trådpool i processen,
+# "queue" = separat worker (manage.py process_image_derivatives --loop),
+# "sync" = direkt i save().
+IMAGE_DERIVATIVE_MODE = "thread"
+IMAGE_DERIVATIVE_WORKERS = 2
+
+# Bilder från URL:er och auktioner hämtas parallellt, se
+# axes/services/remote_images.py. Större svar än REMOTE_IMAGE_MAX_BYTES avbryts.
+REMOTE_IMAGE_WORKERS = 4
+REMOTE_IMAGE_MAX_BYTES = 20 * 1024 * 1024
+
+# Alla utgående HTTP-anrop går via en delad klient med anslutningspool per
+# värd, omförsök och samtidighetsgränser, se axes/utils/http_client.py.
+HTTP_POOL_HOSTS = 10
+HTTP_MAX_CONCURRENCY = 16
+HTTP_PER_HOST_CONCURRENCY = 4
+HTTP_RETRIES = 2
+HTTP_RETRY_BACKOFF = 0.5
+
+# Mätning av SQL-frågor, DB-tid, mallrendering och total tid per request
+# (Server-Timing-huvud och sidan Inställningar -> Svarstider per vy), se
+# axes.middleware.RequestTimingMiddleware. Requester som tar minst
+# REQUEST_TIMING_SLOW_MS loggas med sina REQUEST_TIMING_TOP_QUERIES
+# långsammaste frågor. Percentilerna räknas på de senaste
+# REQUEST_TIMING_WINDOW requesterna per vy.
+REQUEST_TIMING_ENABLED = False
+REQUEST_TIMING_SLOW_MS = 500
+REQUEST_TIMING_TOP_QUERIES = 5
+REQUEST_TIMING_WINDOW = 500
+
+# Ändringsloggens poster äldre än AUDIT_RETENTION_DAYS dagar flyttas till
+# komprimerade JSONL-filer per dag i AUDIT_ARCHIVE_DIR av
+# manage.py archive_audit_log (sök i dem med search_audit_archive).
+AUDIT_RETENTION_DAYS = 365
+AUDIT_ARCHIVE_DIR = BASE_DIR / "audit_archive"
+
+# Valutakurser hålls i processen och förnyas utanför requesten, se
+# axes/utils/currency_converter.py. "thread" = bakgrundstråd när kurserna
+# blivit för gamla, "command" = bara manage.py refresh_currency_rates.
+CURRENCY_REFRESH_MODE = "thread"
+CURRENCY_CACHE_FILE = BASE_DIR / "currency_cache.json"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
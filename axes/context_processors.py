@@ -1,8 +1,15 @@
-from .models import Settings, Comment
+from .services.site_cache import get_pending_comments_count, get_site_settings
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+import json
 import subprocess
 from django.conf import settings as django_settings
 
+# Skrivs av `manage.py write_build_info` när Docker-imagen byggs (där finns
+# ingen .git-katalog). Saknas filen läses versionen från git en gång per process.
+BUILD_INFO_PATH = Path(__file__).resolve().parent / "build_info.json"
+
 
 def get_git_version():
     """Hämta Git version/commit hash"""
@@ -47,10 +54,24 @@ def get_build_date():
     return datetime.now().strftime("%Y-%m-%d")
 
 
+@lru_cache(maxsize=1)
+def get_build_info():
+    """Version och byggdatum för sidfoten, beräknat en gång per process"""
+    try:
+        with open(BUILD_INFO_PATH, encoding="utf-8") as f:
+            info = json.load(f)
+        if info.get("app_version") and info.get("build_date"):
+            return info
+    except (OSError, ValueError):
+        pass
+    return {"app_version": get_git_version(), "build_date": get_build_date()}
+
+
 def settings_processor(request):
     """Context processor som gör inställningar tillgängliga i alla templates"""
     try:
-        settings = Settings.get_settings()
+        settings = get_site_settings()
+        build_info = get_build_info()
         return {
             "public_settings": {
                 "show_contacts": settings.show_contacts_public,
@@ -81,15 +102,13 @@ def settings_processor(request):
             },
             # Footer information
             "current_year": datetime.now().year,
-            "build_date": get_build_date(),
-            "app_version": get_git_version(),
+            "build_date": build_info["build_date"],
+            "app_version": build_info["app_version"],
             # Demo mode
             "demo_mode": getattr(django_settings, "DEMO_MODE", False),
             # Antal väntande kommentarer (badge i headern, bara för inloggade)
             "pending_comments_count": (
-                Comment.objects.filter(status="PENDING").count()
-                if request.user.is_authenticated
-                else 0
+                get_pending_comments_count() if request.user.is_authenticated else 0
             ),
         }
     except Exception as e:
@@ -23,6 +23,7 @@ from .models import (
     AxeImage,
 )
 from .templatetags.axe_filters import country_flag
+from .services import manufacturer_tree
 
 # Lista med länder (ISO 3166-1 alpha-2, namn, flagg-emoji)
 COUNTRIES = [
@@ -413,43 +414,7 @@ class AxeForm(forms.ModelForm):
         # Sortera tillverkare hierarkiskt för dropdown-menyn
         all_manufacturers = Manufacturer.objects.all().order_by("name")
 
-        def _is_descendant(manufacturer, ancestor):
-            """Kontrollera om manufacturer är en efterkommande till ancestor"""
-            current = manufacturer
-            while current.parent:
-                if current.parent == ancestor:
-                    return True
-                current = current.parent
-            return False
-
-        def sort_hierarchically(manufacturers):
-            """Sorterar tillverkare hierarkiskt: huvudtillverkare först, sedan undertillverkare i korrekt ordning"""
-            main_manufacturers = [m for m in manufacturers if m.hierarchy_level == 0]
-            sorted_list = []
-
-            for main in main_manufacturers:
-                sorted_list.append(main)
-                # Sortera undertillverkare hierarkiskt
-
-                def sort_children_recursive(parent=None):
-                    """Sorterar barn rekursivt under en förälder"""
-                    children = [m for m in manufacturers if m.parent == parent]
-                    children.sort(key=lambda x: x.name)  # Sortera barn alfabetiskt
-                    result = []
-                    for child in children:
-                        result.append(child)
-                        # Lägg till alla barn till detta barn rekursivt
-                        result.extend(sort_children_recursive(child))
-                    return result
-
-                # Sortera alla undertillverkare rekursivt
-                sorted_subs = sort_children_recursive(main)
-                sorted_list.extend(sorted_subs)
-
-            return sorted_list
-
-        # Sortera tillverkare hierarkiskt
-        sorted_manufacturers = sort_hierarchically(all_manufacturers)
+        sorted_manufacturers = manufacturer_tree.sort_hierarchically(all_manufacturers)
 
         # Skapa choices för dropdown-menyn med hierarkisk indentering
         choices = [("", "Välj tillverkare...")]
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from axes.services import audit_archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Flytta ändringsloggposter äldre än retentionstiden till komprimerade "
+        "JSONL-filer per dag (sökbara med search_audit_archive)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help=(
+                "Arkivera poster äldre än så många dagar "
+                "(standard: AUDIT_RETENTION_DAYS, 365)"
+            ),
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=None,
+            help="Mapp för arkivfilerna (standard: AUDIT_ARCHIVE_DIR)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Visa bara hur många poster som skulle arkiveras",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days is None:
+            days = audit_archive.retention_days()
+        directory = options["archive_dir"] or audit_archive.archive_dir()
+        count = audit_archive.archive_expired(
+            days=days, directory=directory, dry_run=options["dry_run"]
+        )
+        if options["dry_run"]:
+            self.stdout.write(
+                f"{count} poster äldre än {days} dagar skulle arkiveras till "
+                f"{directory}."
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Arkiverade {count} poster äldre än {days} dagar till "
+                    f"{directory}."
+                )
+            )
@@ -6,6 +6,8 @@ from datetime import datetime
 from django.core.management.base import BaseCommand
 from django.conf import settings
 
+from axes.services import backups
+
 
 class Command(BaseCommand):
     help = "Skapa automatisk backup av databasen och media-filer"
@@ -21,6 +23,14 @@ class Command(BaseCommand):
             action="store_true",
             help="Komprimera backup-filen",
         )
+        parser.add_argument(
+            "--embed-media",
+            action="store_true",
+            help=(
+                "Packa in media-filerna i ZIP-filen i stället för ett manifest "
+                "(fristående backup, t.ex. för flytt till en annan server)"
+            ),
+        )
         parser.add_argument(
             "--keep-days",
             type=int,
@@ -55,25 +65,45 @@ class Command(BaseCommand):
         # Skapa statistik för backup
         stats = self.create_backup_stats()
 
-        # Skapa backup av media-filer om begärt
+        # Skapa backup av media-filer om begärt. Standard är ett manifest
+        # mot det innehållsadresserade lagret; --embed-media (med --compress)
+        # ger den gamla fristående ZIP:en med alla filer
         media_backup_path = None
+        media_files = None
         if options["include_media"]:
-            media_backup_path = self.backup_media_files(backup_dir, timestamp)
+            if options["embed_media"] and options["compress"]:
+                media_backup_path = self.backup_media_files(backup_dir, timestamp)
+            else:
+                media_files, stats["media"] = self.snapshot_media_files(backup_dir)
             stats["media_files"] = self.count_media_files()
 
         # Skapa komprimerad backup om begärt
         if options["compress"]:
             self.create_compressed_backup(
-                backup_dir, timestamp, db_backup_path, media_backup_path, stats
+                backup_dir,
+                timestamp,
+                db_backup_path,
+                media_backup_path,
+                stats,
+                media_files,
             )
         else:
-            # Spara statistik-fil för icke-komprimerade backuper
-            stats_path = os.path.join(backup_dir, f"stats_{timestamp}.json")
+            if media_files is not None:
+                backups.write_manifest(
+                    backups.manifest_path_for(db_backup_path),
+                    media_files,
+                    stats["media"],
+                )
+            # Statistik-filen läses av inställningssidan (get_backup_stats)
+            stats_path = db_backup_path.replace(".sqlite3", "_stats.json")
             with open(stats_path, "w", encoding="utf-8") as f:
                 json.dump(stats, f, indent=2, ensure_ascii=False)
 
-        # Rensa gamla backuper
+        # Rensa gamla backuper och media som inget manifest längre använder
         self.cleanup_old_backups(backup_dir, options["keep_days"], options["keep_last"])
+        removed_blobs = backups.collect_garbage(backup_dir)
+        if removed_blobs:
+            self.stdout.write(f"  Rensade {removed_blobs} oanvända media-filer")
 
         self.stdout.write(
             self.style.SUCCESS(f"Backup slutförd! Timestamp: {timestamp}")
@@ -138,25 +168,48 @@ class Command(BaseCommand):
         return count
 
     def backup_database(self, backup_dir, timestamp):
-        """Skapa backup av databasen"""
+        """Skapa backup av databasen med SQLites online backup-API (säkert
+        även medan appen skriver till databasen)"""
         db_name = settings.DATABASES["default"]["NAME"]
         db_backup_name = f"db_backup_{timestamp}.sqlite3"
         db_backup_path = os.path.join(backup_dir, db_backup_name)
 
-        # Kopiera databasfilen
-        shutil.copy2(db_name, db_backup_path)
+        backups.backup_sqlite(db_name, db_backup_path)
 
         self.stdout.write(f"  Databas backup: {db_backup_name}")
         return db_backup_path
 
+    def snapshot_media_files(self, backup_dir):
+        """Lägg in nya och ändrade media-filer i det innehållsadresserade
+        lagret. Returnerar (manifest-filer, statistik)."""
+        if not os.path.exists(settings.MEDIA_ROOT):
+            self.stdout.write("  Media-mapp finns inte, hoppar över media-backup")
+            return {}, {"files": 0, "new_blobs": 0, "new_bytes": 0}
+
+        files, media_stats = backups.snapshot_media(
+            settings.MEDIA_ROOT, backups.store_dir_for(backup_dir)
+        )
+        self.stdout.write(
+            f"  Media backup: {media_stats['files']} filer, "
+            f"{media_stats['new_blobs']} nya ({media_stats['new_bytes']} bytes)"
+        )
+        return files, media_stats
+
     def backup_media_files(self, backup_dir, timestamp):
-        """Skapa backup av media-filer"""
+        """Skapa fristående kopia av media-filer (för --embed-media)"""
         media_backup_name = f"media_backup_{timestamp}"
         media_backup_path = os.path.join(backup_dir, media_backup_name)
 
         # Kopiera media-mappen
         if os.path.exists(settings.MEDIA_ROOT):
-            shutil.copytree(settings.MEDIA_ROOT, media_backup_path)
+            # Bildvarianterna är en cache som återskapas vid behov
+            shutil.copytree(
+                settings.MEDIA_ROOT,
+                media_backup_path,
+                ignore=lambda path, names: (
+                    ["variants"] if os.path.samefile(path, settings.MEDIA_ROOT) else []
+                ),
+            )
             self.stdout.write(f"  Media backup: {media_backup_name}")
         else:
             self.stdout.write("  Media-mapp finns inte, hoppar över media-backup")
@@ -165,7 +218,13 @@ class Command(BaseCommand):
         return media_backup_path
 
     def create_compressed_backup(
-        self, backup_dir, timestamp, db_backup_path, media_backup_path, stats
+        self,
+        backup_dir,
+        timestamp,
+        db_backup_path,
+        media_backup_path,
+        stats,
+        media_files=None,
     ):
         """Skapa komprimerad backup-fil"""
         zip_name = f"full_backup_{timestamp}.zip"
@@ -184,6 +243,13 @@ class Command(BaseCommand):
                         arc_name = os.path.relpath(file_path, media_backup_path)
                         zipf.write(file_path, f"media/{arc_name}")
 
+            # Lägg till media-manifest (innehållsadresserad media)
+            if media_files is not None:
+                manifest = backups.manifest_data(media_files, stats.get("media"))
+                zipf.writestr(
+                    backups.ZIP_MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False)
+                )
+
             # Lägg till statistik-fil
             stats_content = json.dumps(stats, indent=2, ensure_ascii=False)
             zipf.writestr("backup_stats.json", stats_content)
@@ -0,0 +1,101 @@
+import importlib.util
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from axes.utils import parser_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Mät tid och träffsäkerhet per fält för eBay- och Tradera-parsrarna "
+        "över sparade auktionssidor, med och utan strukturerad data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--corpus",
+            default=None,
+            help="Mapp med <namn>.html + <namn>.json (standard: testkorpusen)",
+        )
+        parser.add_argument(
+            "--rounds", type=int, default=5, help="Körningar per sida (standard 5)"
+        )
+        parser.add_argument(
+            "--html-parser",
+            choices=["html.parser", "lxml"],
+            default=None,
+            help="BeautifulSoup-parser (standard: lxml om installerat)",
+        )
+        parser.add_argument("--json", dest="json_path", help="Spara rapporten som JSON")
+
+    def _accuracy(self, stats):
+        if not stats["total"]:
+            return "-"
+        return f"{stats['correct']}/{stats['total']}"
+
+    def handle(self, *args, **options):
+        html_parser = options["html_parser"]
+        if html_parser == "lxml" and not importlib.util.find_spec("lxml"):
+            raise CommandError("lxml är inte installerat.")
+
+        pages = parser_benchmark.load_corpus(options["corpus"])
+        if not pages:
+            raise CommandError("Inga sidor hittades i korpusen.")
+
+        reports = {
+            "strukturerad": parser_benchmark.run(
+                pages, options["rounds"], structured=True, html_parser=html_parser
+            ),
+            "heuristik": parser_benchmark.run(
+                pages, options["rounds"], structured=False, html_parser=html_parser
+            ),
+        }
+        fast, slow = reports["strukturerad"], reports["heuristik"]
+
+        self.stdout.write(
+            f"{fast['pages']} sidor, {fast['rounds']} körningar per sida, "
+            f"parser {fast['html_parser']}. Tid i ms per sida."
+        )
+        self.stdout.write(
+            f"{'Fält':<18}{'strukturerad':>14}{'heuristik':>12}"
+            f"{'rätt':>8}{'rätt (heur.)':>14}"
+        )
+        totals = {"strukturerad": 0.0, "heuristik": 0.0}
+        for field, stats in fast["parser"].items():
+            baseline = slow["parser"][field]
+            totals["strukturerad"] += stats["seconds"]
+            totals["heuristik"] += baseline["seconds"]
+            self.stdout.write(
+                f"{field:<18}{stats['seconds'] * 1000:>14.2f}"
+                f"{baseline['seconds'] * 1000:>12.2f}"
+                f"{self._accuracy(stats):>8}{self._accuracy(baseline):>14}"
+            )
+        self.stdout.write(
+            f"{'parse_html totalt':<18}{totals['strukturerad'] * 1000:>14.2f}"
+            f"{totals['heuristik'] * 1000:>12.2f}"
+        )
+
+        listing = fast["listing"]
+        accuracy = ", ".join(
+            f"{field} {self._accuracy(stats)}"
+            for field, stats in listing["fields"].items()
+            if stats["total"]
+        )
+        self.stdout.write(
+            f"parse_*_listing: {listing['seconds'] * 1000:.2f} ms per sida ({accuracy})"
+        )
+
+        for name, field, value in fast["failures"]:
+            self.stdout.write(self.style.WARNING(f"Fel i {name}: {field} = {value!r}"))
+
+        if options["json_path"]:
+            with open(options["json_path"], "w", encoding="utf-8") as f:
+                json.dump(reports, f, ensure_ascii=False, indent=2, default=str)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Klart: {totals['heuristik'] / max(totals['strukturerad'], 1e-9):.1f}x "
+                "snabbare med strukturerad data."
+            )
+        )
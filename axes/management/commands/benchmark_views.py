@@ -0,0 +1,139 @@
+import json
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from axes.services import view_benchmark
+
+SIZE_KEYS = ("axes", "transactions", "stamps", "contacts")
+
+
+class Command(BaseCommand):
+    help = (
+        "Mät väggtid, SQL-frågor och minnestopp för de tunga vyerna över en "
+        "genererad stor samling i en egen testdatabas. Resultatet kan sparas "
+        "som JSON och jämföras med en tidigare körning."
+    )
+
+    def add_arguments(self, parser):
+        sizes = view_benchmark.DEFAULT_SIZES
+        parser.add_argument("--axes", type=int, default=sizes["axes"])
+        parser.add_argument("--transactions", type=int, default=sizes["transactions"])
+        parser.add_argument("--stamps", type=int, default=sizes["stamps"])
+        parser.add_argument("--contacts", type=int, default=sizes["contacts"])
+        parser.add_argument("--seed", type=int, default=1, help="Frö för datamängden")
+        parser.add_argument(
+            "--repeats", type=int, default=5, help="Varma anrop per vy (standard 5)"
+        )
+        parser.add_argument(
+            "--only", nargs="+", help="Mät bara dessa mätpunkter (namn i ENDPOINTS)"
+        )
+        parser.add_argument("--output", help="Spara resultatet som JSON")
+        parser.add_argument("--compare", help="Jämför med ett tidigare JSON-resultat")
+        parser.add_argument(
+            "--db",
+            help=(
+                "SQLite-fil för testdatabasen. Behålls mellan körningar så att "
+                "datamängden bara byggs om när storlekar eller frö ändrats "
+                "(standard: i minnet)."
+            ),
+        )
+        parser.add_argument(
+            "--diff",
+            nargs=2,
+            metavar=("FÖRE", "EFTER"),
+            help="Jämför bara två sparade resultat, utan att mäta",
+        )
+
+    def _load(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Kunde inte läsa {path}: {e}")
+
+    def _write_diff(self, before, after):
+        self.stdout.write(
+            f"{'Mätpunkt':<24}{'fält':<11}{'före':>11}{'efter':>11}{'ändring':>10}"
+        )
+        for name, field, old, new, change in view_benchmark.compare(before, after):
+            change_text = "-" if change is None else f"{change:+.1f}%"
+            line = f"{name:<24}{field:<11}{old:>11}{new:>11}{change_text:>10}"
+            if change is not None and change > 10:
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
+
+    def _dataset_ready(self, marker, built_with):
+        """Datamängden i en behållen databas återanvänds bara om den byggts
+        med samma storlekar och frö (sparat i en fil bredvid databasen)."""
+        try:
+            with open(marker, encoding="utf-8") as f:
+                if json.load(f) != built_with:
+                    return False
+        except (OSError, ValueError):
+            return False
+        counts = view_benchmark.dataset_counts()
+        return all(counts[key] == built_with[key] for key in SIZE_KEYS)
+
+    def handle(self, *args, **options):
+        if options["diff"]:
+            before, after = (self._load(path) for path in options["diff"])
+            self._write_diff(before, after)
+            return
+
+        sizes = {key: options[key] for key in SIZE_KEYS}
+        built_with = dict(sizes, seed=options["seed"])
+        keepdb = bool(options["db"])
+        if keepdb:
+            connection.settings_dict["TEST"]["NAME"] = options["db"]
+            marker = f"{options['db']}.dataset.json"
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=keepdb
+        )
+        try:
+            if not (keepdb and self._dataset_ready(marker, built_with)):
+                call_command("flush", interactive=False, verbosity=0)
+                self.stdout.write(
+                    f"Bygger datamängd: {sizes['axes']} yxor, "
+                    f"{sizes['transactions']} transaktioner, {sizes['stamps']} "
+                    f"stämplar, {sizes['contacts']} kontakter..."
+                )
+                view_benchmark.build_dataset(seed=options["seed"], **sizes)
+                if keepdb:
+                    with open(marker, "w", encoding="utf-8") as f:
+                        json.dump(built_with, f)
+            report = view_benchmark.run(
+                repeats=options["repeats"], only=options["only"]
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+            teardown_test_environment()
+
+        report["meta"]["seed"] = options["seed"]
+        self.stdout.write(
+            f"{'Mätpunkt':<24}{'status':>7}{'första ms':>11}{'median ms':>11}"
+            f"{'frågor':>8}{'SQL ms':>9}{'minne kB':>10}"
+        )
+        for name, result in report["results"].items():
+            self.stdout.write(
+                f"{name:<24}{result['status']:>7}{result['first_ms']:>11}"
+                f"{result['median_ms']:>11}{result['queries']:>8}"
+                f"{result['query_ms']:>9}{result['peak_kb']:>10}"
+            )
+
+        if options["compare"]:
+            self.stdout.write("")
+            self._write_diff(self._load(options["compare"]), report)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f"Resultatet sparades i {options['output']}")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("Mätningen är klar."))
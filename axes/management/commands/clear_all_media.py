@@ -31,6 +31,7 @@ class Command(BaseCommand):
             "stamps",
             "unlinked_images",
             "stamp_images",
+            "variants",
         ]
 
         total_removed = 0
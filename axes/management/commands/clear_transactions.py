@@ -1,8 +1,9 @@
 from django.core.management.base import BaseCommand
 from axes.models import Transaction
+from axes.services import audit_buffer
 
 
-class Command(BaseCommand):
+class Command(audit_buffer.ScopedCommandMixin, BaseCommand):
     help = "Rensa alla transaktioner från databasen"
 
     def add_arguments(self, parser):
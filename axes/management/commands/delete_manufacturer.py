@@ -4,9 +4,10 @@ from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from django.utils import timezone
 from axes.models import Manufacturer
+from axes.services import audit_buffer
 
 
-class Command(BaseCommand):
+class Command(audit_buffer.ScopedCommandMixin, BaseCommand):
     help = "Ta bort tillverkare och hantera deras bilder och yxor"
 
     def add_arguments(self, parser):
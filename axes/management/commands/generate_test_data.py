@@ -30,9 +30,10 @@ from axes.models import (
     StampImage,
     StampSymbol,
 )
+from axes.services import audit_buffer
 
 
-class Command(BaseCommand):
+class Command(audit_buffer.ScopedCommandMixin, BaseCommand):
     help = "Generera realistisk testdata för AxeCollection"
 
     def add_arguments(self, parser):
@@ -3,13 +3,14 @@ import os
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from axes.models import Manufacturer, Axe, Contact, Platform, Transaction, Measurement
+from axes.services import audit_buffer
 from decimal import Decimal
 from datetime import datetime
 import re
 import shutil
 
 
-class Command(BaseCommand):
+class Command(audit_buffer.ScopedCommandMixin, BaseCommand):
     help = "Importera data från CSV-filer med ID-referenser"
 
     def add_arguments(self, parser):
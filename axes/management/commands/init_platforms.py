@@ -1,8 +1,9 @@
 from django.core.management.base import BaseCommand
 from axes.models import Platform
+from axes.services import audit_buffer
 
 
-class Command(BaseCommand):
+class Command(audit_buffer.ScopedCommandMixin, BaseCommand):
     help = "Skapa standardplattformarna Tradera och eBay"
 
     def handle(self, *args, **options):
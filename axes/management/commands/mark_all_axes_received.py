@@ -1,8 +1,9 @@
 from django.core.management.base import BaseCommand
 from axes.models import Axe
+from axes.services import audit_buffer
 
 
-class Command(BaseCommand):
+class Command(audit_buffer.ScopedCommandMixin, BaseCommand):
     help = "Sätt status till MOTTAGEN för alla yxor i databasen."
 
     def handle(self, *args, **options):
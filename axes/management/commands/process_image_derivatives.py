@@ -0,0 +1,66 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from axes.services.image_derivatives import (
+    backfill_missing_derivatives,
+    process_pending_jobs,
+    reset_stale_jobs,
+    retry_failed_jobs,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Kör köade bildjobb (WebP-versioner). Med --backfill köas först alla "
+        "bilder som saknar versioner, med --loop körs kommandot som worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="Köa jobb för alla befintliga bilder som saknar versioner",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Köa om misslyckade jobb",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Fortsätt vänta på nya jobb (worker-läge)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Sekunder mellan kontroller i worker-läge (standard: 5)",
+        )
+
+    def handle(self, *args, **options):
+        # Jobb som fastnat i PROCESSING efter en krasch tas upp igen
+        stale = reset_stale_jobs(timedelta(minutes=10))
+        if stale:
+            self.stdout.write(f"Köade om {stale} jobb som fastnat.")
+
+        if options["retry_failed"]:
+            retried = retry_failed_jobs()
+            self.stdout.write(f"Köade om {retried} misslyckade jobb.")
+
+        if options["backfill"]:
+            queued = backfill_missing_derivatives()
+            self.stdout.write(f"Köade {queued} bilder som saknar versioner.")
+
+        processed = process_pending_jobs()
+        self.stdout.write(self.style.SUCCESS(f"Bearbetade {processed} bildjobb."))
+
+        while options["loop"]:
+            time.sleep(options["interval"])
+            processed = process_pending_jobs()
+            if processed:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Bearbetade {processed} bildjobb.")
+                )
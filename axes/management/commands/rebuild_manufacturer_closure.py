@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from axes.services.manufacturer_tree import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = (
+        "Bygg om tillverkarhierarkins closure-tabell från parent-fälten "
+        "(t.ex. efter import som gått förbi signalerna)."
+    )
+
+    def handle(self, *args, **options):
+        link_count = rebuild_closure()
+        self.stdout.write(
+            self.style.SUCCESS(f"Byggde om tillverkarhierarkin: {link_count} länkar.")
+        )
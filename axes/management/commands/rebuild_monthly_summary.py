@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from axes.services.monthly_summary import rebuild_monthly_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Bygg om månadssummeringen för statistiksidan från alla transaktioner "
+        "(t.ex. efter import som gått förbi signalerna)."
+    )
+
+    def handle(self, *args, **options):
+        month_count = rebuild_monthly_summary()
+        self.stdout.write(
+            self.style.SUCCESS(f"Byggde om månadssummeringen: {month_count} månader.")
+        )
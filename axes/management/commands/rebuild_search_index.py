@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from axes.services import search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Bygg om fulltextindexet för den globala sökningen "
+        "(t.ex. efter import som gått förbi signalerna)."
+    )
+
+    def handle(self, *args, **options):
+        if not search_index.is_available():
+            raise CommandError(
+                "Sökindexet finns inte - det kräver SQLite med FTS5 och migrationerna."
+            )
+        document_count = search_index.rebuild_search_index()
+        self.stdout.write(
+            self.style.SUCCESS(f"Byggde om sökindexet: {document_count} dokument.")
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from axes.services.axe_financials import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Kontrollera yxornas summeringsfält (köp-/säljvärde, frakt, senaste "
+        "transaktion, såld) mot transaktionerna och rätta avvikelser."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Visa bara avvikande yxor, rätta dem inte",
+        )
+
+    def handle(self, *args, **options):
+        drifted = reconcile(repair=not options["dry_run"])
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Alla yxors summering stämmer."))
+            return
+        ids = ", ".join(str(axe_id) for axe_id in drifted)
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"{len(drifted)} yxor avviker: {ids}"))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Rättade summeringen för {len(drifted)} yxor: {ids}"
+                )
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from axes.utils import currency_converter
+
+
+class Command(BaseCommand):
+    help = (
+        "Hämta aktuella valutakurser och spara dem i valutacachen "
+        "(för CURRENCY_REFRESH_MODE = 'command', t.ex. från cron)."
+    )
+
+    def handle(self, *args, **options):
+        rates = currency_converter.get_live_rates()
+        if currency_converter.LAST_LIVE_RATES_FAILED:
+            raise CommandError("Kunde inte hämta valutakurser - cachen är oförändrad.")
+        summary = ", ".join(
+            f"1 {currency} = {rates[currency]['SEK']:.2f} SEK"
+            for currency in ("USD", "EUR", "GBP")
+            if "SEK" in rates.get(currency, {})
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Valutakurser uppdaterade i {currency_converter.cache_file()}: "
+                f"{summary}"
+            )
+        )
@@ -1,9 +1,13 @@
 import os
 import zipfile
 import shutil
+from datetime import datetime
+
 from django.core.management.base import BaseCommand
 from django.conf import settings
 
+from axes.services import backups
+
 
 class Command(BaseCommand):
     help = "Återställ databas och media från backup"
@@ -50,6 +54,11 @@ class Command(BaseCommand):
             self.restore_from_zip(backup_file, options["include_media"])
         elif backup_file.endswith(".sqlite3"):
             self.restore_database(backup_file)
+            if options["include_media"]:
+                # Okomprimerad backup: manifestet ligger bredvid databasfilen
+                manifest = backups.read_manifest(backups.manifest_path_for(backup_file))
+                if manifest:
+                    self.restore_media_from_manifest(manifest, backup_file)
         else:
             self.stdout.write(
                 self.style.ERROR("Backup-filen måste vara .zip eller .sqlite3")
@@ -81,7 +90,12 @@ class Command(BaseCommand):
                 self.restore_database(db_backup_path)
 
             # Återställ media om begärt
-            if include_media:
+            manifest_path = os.path.join(backup_dir, backups.ZIP_MANIFEST_NAME)
+            if include_media and os.path.exists(manifest_path):
+                manifest = backups.read_manifest(manifest_path)
+                if manifest:
+                    self.restore_media_from_manifest(manifest, zip_path)
+            elif include_media:
                 media_backup_dir = os.path.join(backup_dir, "media")
                 if os.path.exists(media_backup_dir):
                     self.restore_media_files(media_backup_dir)
@@ -94,23 +108,78 @@ class Command(BaseCommand):
                 shutil.rmtree(backup_dir)
 
     def restore_database(self, db_backup_path):
-        """Återställ databas"""
+        """Återställ databas.
+
+        Både säkerhetskopian och återställningen går via SQLites online
+        backup-API, så att en process som har databasen öppen aldrig ser en
+        halvt kopierad fil.
+        """
         db_name = settings.DATABASES["default"]["NAME"]
 
         # Skapa backup av nuvarande databas
         current_backup = f"{db_name}.backup"
         if os.path.exists(db_name):
-            shutil.copy2(db_name, current_backup)
+            if os.path.exists(current_backup):
+                os.remove(current_backup)
+            backups.backup_sqlite(db_name, current_backup)
             self.stdout.write(
                 f"  Skapade backup av nuvarande databas: {current_backup}"
             )
 
         # Kopiera backup-databasen
-        shutil.copy2(db_backup_path, db_name)
+        backups.backup_sqlite(db_backup_path, db_name)
         self.stdout.write(
             f"  Återställde databas från: {os.path.basename(db_backup_path)}"
         )
 
+    def restore_media_from_manifest(self, manifest, backup_path):
+        """Återställ media från det innehållsadresserade lagret.
+
+        Nuvarande media sparas först som ett eget manifest i samma lager
+        (billigt, bara nya filer kopieras) i stället för en full kopia.
+        """
+        backup_dir = os.path.join(settings.BASE_DIR, "backups")
+        store_dir = backups.store_dir_for(backup_dir)
+        missing = [
+            relative
+            for relative, digest in manifest["files"].items()
+            if not os.path.exists(backups.blob_path(store_dir, digest))
+        ]
+        if missing:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"  {len(missing)} media-filer i {os.path.basename(backup_path)} "
+                    f"saknas i {store_dir} - media återställs inte"
+                )
+            )
+            return
+
+        if os.path.exists(settings.MEDIA_ROOT):
+            files, stats = backups.snapshot_media(settings.MEDIA_ROOT, store_dir)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            before_path = os.path.join(
+                backup_dir, f"{backups.MANIFEST_PREFIX}pre_restore_{timestamp}.json"
+            )
+            backups.write_manifest(before_path, files, stats)
+            self.stdout.write(
+                f"  Sparade nuvarande media som manifest: {os.path.basename(before_path)}"
+            )
+            self._clear_directory(settings.MEDIA_ROOT)
+
+        backups.restore_media(manifest["files"], store_dir, settings.MEDIA_ROOT)
+        self.stdout.write(
+            f"  Återställde {len(manifest['files'])} media-filer från manifest"
+        )
+
+    def _clear_directory(self, directory):
+        # Mappen kan vara en Docker-volym - rensa innehållet, inte mappen
+        for item in os.listdir(directory):
+            item_path = os.path.join(directory, item)
+            if os.path.isdir(item_path):
+                shutil.rmtree(item_path)
+            else:
+                os.unlink(item_path)
+
     def restore_media_files(self, media_backup_dir):
         """Återställ media-filer"""
         if os.path.exists(settings.MEDIA_ROOT):
@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from axes.services import audit_archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Sök i arkiverade ändringsloggposter. Skriver en JSON-rad per "
+        "matchande post."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", help="Från datum (ÅÅÅÅ-MM-DD)")
+        parser.add_argument("--to", dest="date_to", help="Till datum (ÅÅÅÅ-MM-DD)")
+        parser.add_argument("--model", dest="model_name", help="Modellnamn, t.ex. Axe")
+        parser.add_argument("--action", help="CREATE, UPDATE eller DELETE")
+        parser.add_argument("--user", type=int, dest="user_id", help="Användar-ID")
+        parser.add_argument("--object-id", help="Objektets ID")
+        parser.add_argument("--text", help="Fritext i objektbeskrivning och ändringar")
+        parser.add_argument(
+            "--archive-dir",
+            default=None,
+            help="Mapp med arkivfilerna (standard: AUDIT_ARCHIVE_DIR)",
+        )
+
+    def _date(self, value, option):
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f"Ogiltigt datum för {option}: {value}")
+        return parsed
+
+    def handle(self, *args, **options):
+        entries = audit_archive.search(
+            directory=options["archive_dir"],
+            date_from=self._date(options["date_from"], "--from"),
+            date_to=self._date(options["date_to"], "--to"),
+            model_name=options["model_name"],
+            action=options["action"],
+            user_id=options["user_id"],
+            object_id=options["object_id"],
+            text=options["text"],
+        )
+        count = 0
+        for entry in entries:
+            self.stdout.write(json.dumps(entry, ensure_ascii=False))
+            count += 1
+        self.stderr.write(f"{count} poster hittades.")
@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from axes.context_processors import (
+    BUILD_INFO_PATH,
+    get_build_date,
+    get_git_version,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Skriv version och byggdatum till axes/build_info.json så att sidfoten "
+        "inte behöver fråga git vid körning (körs när Docker-imagen byggs)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--app-version",
+            default="",
+            help="Version att visa (standard: senaste git-tag eller commit)",
+        )
+        parser.add_argument(
+            "--build-date",
+            default="",
+            help="Byggdatum YYYY-MM-DD (standard: senaste commit eller idag)",
+        )
+
+    def handle(self, *args, **options):
+        info = {
+            "app_version": options["app_version"] or get_git_version(),
+            "build_date": options["build_date"] or get_build_date(),
+        }
+        with open(BUILD_INFO_PATH, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Skrev {info['app_version']} ({info['build_date']}) till "
+                f"{BUILD_INFO_PATH.name}"
+            )
+        )
@@ -1,4 +1,15 @@
+import logging
 import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.backends.django import Template as DjangoTemplate
+
+from .services import audit_buffer, request_metrics
+
+logger = logging.getLogger(__name__)
 
 _thread_locals = threading.local()
 
@@ -10,7 +21,10 @@ def get_current_user():
 class CurrentUserMiddleware:
     """Sparar den inloggade användaren i en thread-local variabel så att
     signal-handlers (som saknar tillgång till request) kan avgöra vem som
-    utförde en ändring."""
+    utförde en ändring.
+
+    Requesten körs också i ett audit-scope, så att ändringsloggens poster
+    skrivs med en INSERT när requesten är klar."""
 
     def __init__(self, get_response):
         self.get_response = get_response
@@ -18,7 +32,113 @@ class CurrentUserMiddleware:
     def __call__(self, request):
         _thread_locals.user = getattr(request, "user", None)
         try:
-            response = self.get_response(request)
+            with audit_buffer.scope():
+                response = self.get_response(request)
         finally:
             _thread_locals.user = None
         return response
+
+
+class _RequestTiming:
+    """Mätvärden för en request. Anropas som execute_wrapper för varje
+    SQL-fråga och sparar dess tid och text."""
+
+    def __init__(self):
+        self.queries = []
+        self.template = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - start, sql))
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        timing = getattr(_thread_locals, "timing", None)
+        # Bara yttersta renderingen räknas, render_to_string i en mall
+        # skulle annars räknas två gånger
+        if timing is None or timing.rendering:
+            return render(self, *args, **kwargs)
+        timing.rendering = True
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timing.template += time.perf_counter() - start
+            timing.rendering = False
+
+    wrapper.timed = True
+    return wrapper
+
+
+def _install_template_timer():
+    if not getattr(DjangoTemplate.render, "timed", False):
+        DjangoTemplate.render = _timed_render(DjangoTemplate.render)
+
+
+class RequestTimingMiddleware:
+    """Mäter SQL-frågor, DB-tid, mallrendering och total tid per request.
+
+    Aktiveras med REQUEST_TIMING_ENABLED. Värdena skickas i ett
+    Server-Timing-huvud (syns under Network i webbläsarens utvecklarverktyg)
+    och sparas per URL-namn i services.request_metrics för prestandasidan.
+    Requester som tar minst REQUEST_TIMING_SLOW_MS loggas med sina
+    REQUEST_TIMING_TOP_QUERIES långsammaste frågor.
+
+    Frågor som körs medan en mall renderas (lata querysets) räknas både i
+    DB-tiden och i malltiden. Strömmade svar mäts fram till att
+    strömningen börjar.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_TIMING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, "REQUEST_TIMING_SLOW_MS", 500)
+        self.top_queries = getattr(settings, "REQUEST_TIMING_TOP_QUERIES", 5)
+        _install_template_timer()
+
+    def __call__(self, request):
+        timing = _RequestTiming()
+        _thread_locals.timing = timing
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timing):
+                response = self.get_response(request)
+        finally:
+            _thread_locals.timing = None
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = sum(seconds for seconds, _ in timing.queries) * 1000
+        template_ms = timing.template * 1000
+
+        response["Server-Timing"] = (
+            f'db;desc="{len(timing.queries)} SQL";dur={db_ms:.1f}, '
+            f"tpl;dur={template_ms:.1f}, total;dur={total_ms:.1f}"
+        )
+
+        match = getattr(request, "resolver_match", None)
+        name = match.view_name if match else "(okänd)"
+        request_metrics.record(name, total_ms, db_ms, template_ms, len(timing.queries))
+
+        if total_ms >= self.slow_ms:
+            slowest = sorted(timing.queries, key=lambda query: query[0], reverse=True)
+            logger.warning(
+                "Långsam request %s %s (%s): %.0f ms, %d frågor på %.0f ms, "
+                "mallar %.0f ms%s",
+                request.method,
+                request.get_full_path(),
+                name,
+                total_ms,
+                len(timing.queries),
+                db_ms,
+                template_ms,
+                "".join(
+                    f"\n  {seconds * 1000:.1f} ms: {sql[:500]}"
+                    for seconds, sql in slowest[: self.top_queries]
+                ),
+            )
+        return response
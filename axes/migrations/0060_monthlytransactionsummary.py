@@ -0,0 +1,118 @@
+# Generated by Django 5.2.3 on 2026-10-17 22:46
+
+from django.db import migrations, models
+
+
+def populate_monthly_summary(apps, schema_editor):
+    """Bygg första versionen av summeringen från befintliga transaktioner"""
+    Transaction = apps.get_model("axes", "Transaction")
+    MonthlyTransactionSummary = apps.get_model("axes", "MonthlyTransactionSummary")
+
+    months = {}
+    for transaction_date, transaction_type, price, shipping_cost in (
+        Transaction.objects.order_by("transaction_date").values_list(
+            "transaction_date", "type", "price", "shipping_cost"
+        )
+    ):
+        if transaction_type not in ("KÖP", "SÄLJ"):
+            continue
+        month = transaction_date.replace(day=1)
+        row = months.setdefault(month, MonthlyTransactionSummary(month=month))
+        prefix = "buy" if transaction_type == "KÖP" else "sale"
+        setattr(row, f"{prefix}_count", getattr(row, f"{prefix}_count") + 1)
+        setattr(row, f"{prefix}_value", getattr(row, f"{prefix}_value") + price)
+        setattr(
+            row,
+            f"{prefix}_shipping",
+            getattr(row, f"{prefix}_shipping") + (shipping_cost or 0),
+        )
+
+    cumulative_buys = 0
+    collection_size = 0
+    for month in sorted(months):
+        row = months[month]
+        cumulative_buys += row.buy_count
+        collection_size += row.buy_count - row.sale_count
+        row.cumulative_buys = cumulative_buys
+        row.collection_size = collection_size
+    MonthlyTransactionSummary.objects.bulk_create(months.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("axes", "0059_settings_ntfy_token"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlyTransactionSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(unique=True, verbose_name="Månad")),
+                ("buy_count", models.IntegerField(default=0, verbose_name="Antal köp")),
+                (
+                    "sale_count",
+                    models.IntegerField(default=0, verbose_name="Antal försäljningar"),
+                ),
+                (
+                    "buy_value",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Köpvärde",
+                    ),
+                ),
+                (
+                    "sale_value",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Försäljningsvärde",
+                    ),
+                ),
+                (
+                    "buy_shipping",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Frakt köp",
+                    ),
+                ),
+                (
+                    "sale_shipping",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Frakt försäljning",
+                    ),
+                ),
+                (
+                    "cumulative_buys",
+                    models.IntegerField(default=0, verbose_name="Antal köp totalt"),
+                ),
+                (
+                    "collection_size",
+                    models.IntegerField(default=0, verbose_name="Samlingens storlek"),
+                ),
+            ],
+            options={
+                "verbose_name": "Månadssummering",
+                "verbose_name_plural": "Månadssummeringar",
+                "ordering": ["month"],
+            },
+        ),
+        migrations.RunPython(populate_monthly_summary, migrations.RunPython.noop),
+    ]
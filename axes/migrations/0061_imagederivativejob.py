@@ -0,0 +1,64 @@
+# Generated by Django 5.2.3 on 2026-10-17 22:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("axes", "0060_monthlytransactionsummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageDerivativeJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model_label",
+                    models.CharField(max_length=100, verbose_name="Bildmodell"),
+                ),
+                ("object_id", models.PositiveIntegerField(verbose_name="Bild-ID")),
+                (
+                    "image_name",
+                    models.CharField(max_length=255, verbose_name="Bildfil"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Väntar"),
+                            ("PROCESSING", "Bearbetas"),
+                            ("DONE", "Klar"),
+                            ("FAILED", "Misslyckades"),
+                        ],
+                        db_index=True,
+                        default="PENDING",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="Försök"),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Felmeddelande")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Bildbearbetning",
+                "verbose_name_plural": "Bildbearbetningar",
+                "ordering": ["created_at"],
+                "unique_together": {("model_label", "object_id")},
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+from django.db import migrations
+
+CREATE_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS axes_search_index USING fts5(
+    kind UNINDEXED,
+    object_id UNINDEXED,
+    status UNINDEXED,
+    title,
+    body,
+    contact,
+    platform,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+POPULATE = [
+    """
+    INSERT INTO axes_search_index (kind, object_id, status, title, body, contact, platform)
+    SELECT 'axe', a.id, a.status, m.name || ' ' || a.model, COALESCE(a.comment, ''), '', ''
+    FROM axes_axe a JOIN axes_manufacturer m ON m.id = a.manufacturer_id
+    """,
+    """
+    INSERT INTO axes_search_index (kind, object_id, status, title, body, contact, platform)
+    SELECT 'contact', c.id, '', c.name,
+           TRIM(COALESCE(c.alias, '') || ' ' || COALESCE(c.email, '')), '', ''
+    FROM axes_contact c
+    """,
+    """
+    INSERT INTO axes_search_index (kind, object_id, status, title, body, contact, platform)
+    SELECT 'manufacturer', m.id, '', m.name, COALESCE(m.information, ''), '', ''
+    FROM axes_manufacturer m
+    """,
+    """
+    INSERT INTO axes_search_index (kind, object_id, status, title, body, contact, platform)
+    SELECT 'transaction', t.id, '', COALESCE(m.name || ' ' || a.model, ''), '',
+           COALESCE(c.name, ''), COALESCE(p.name, '')
+    FROM axes_transaction t
+    LEFT JOIN axes_axe a ON a.id = t.axe_id
+    LEFT JOIN axes_manufacturer m ON m.id = a.manufacturer_id
+    LEFT JOIN axes_contact c ON c.id = t.contact_id
+    LEFT JOIN axes_platform p ON p.id = t.platform_id
+    """,
+    """
+    INSERT INTO axes_search_index (kind, object_id, status, title, body, contact, platform)
+    SELECT 'stamp', s.id, '', s.name,
+           TRIM(COALESCE(s.description, '') || ' ' || COALESCE(m.name, '') || ' ' ||
+                COALESCE((SELECT GROUP_CONCAT(st.text, ' ')
+                          FROM axes_stamptranscription st
+                          WHERE st.stamp_id = s.id), '')),
+           '', ''
+    FROM axes_stamp s LEFT JOIN axes_manufacturer m ON m.id = s.manufacturer_id
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 finns bara i SQLite - på andra databaser används icontains-sökningen
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(CREATE_TABLE)
+    for statement in POPULATE:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS axes_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("axes", "0061_imagederivativejob"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
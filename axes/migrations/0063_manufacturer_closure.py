@@ -0,0 +1,80 @@
+# Generated by Django 5.2.3 on 2026-10-17 23:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_manufacturer_closure(apps, schema_editor):
+    """Bygg closure-tabellen från befintliga parent-relationer"""
+    Manufacturer = apps.get_model("axes", "Manufacturer")
+    ManufacturerClosure = apps.get_model("axes", "ManufacturerClosure")
+
+    parents = dict(Manufacturer.objects.values_list("id", "parent_id"))
+    links = []
+    for manufacturer_id in parents:
+        depth = 0
+        current = manufacturer_id
+        seen = set()
+        while current is not None and current in parents and current not in seen:
+            seen.add(current)
+            links.append(
+                ManufacturerClosure(
+                    ancestor_id=current, descendant_id=manufacturer_id, depth=depth
+                )
+            )
+            current = parents[current]
+            depth += 1
+    ManufacturerClosure.objects.bulk_create(links, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("axes", "0062_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ManufacturerClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("depth", models.PositiveIntegerField(verbose_name="Avstånd")),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="axes.manufacturer",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="axes.manufacturer",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tillverkarhierarki",
+                "verbose_name_plural": "Tillverkarhierarki",
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "depth"],
+                        name="axes_manufa_descend_c3bed7_idx",
+                    )
+                ],
+                "unique_together": {("ancestor", "descendant")},
+            },
+        ),
+        migrations.RunPython(populate_manufacturer_closure, migrations.RunPython.noop),
+    ]
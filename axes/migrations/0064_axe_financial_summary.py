@@ -0,0 +1,113 @@
+# Generated by Django 5.2.3 on 2026-10-18 00:01
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Exists, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_axe_financial_summary(apps, schema_editor):
+    """Fyll summeringsfälten från befintliga transaktioner"""
+    Axe = apps.get_model("axes", "Axe")
+    Transaction = apps.get_model("axes", "Transaction")
+    money = models.DecimalField(max_digits=12, decimal_places=2)
+
+    def transaction_sum(field, transaction_type):
+        return Coalesce(
+            Subquery(
+                Transaction.objects.filter(axe=OuterRef("pk"), type=transaction_type)
+                .order_by()
+                .values("axe")
+                .annotate(total=Sum(field))
+                .values("total")
+            ),
+            Value(Decimal("0"), output_field=money),
+            output_field=money,
+        )
+
+    Axe.objects.update(
+        total_buy_value=transaction_sum("price", "KÖP"),
+        total_buy_shipping=transaction_sum("shipping_cost", "KÖP"),
+        total_sale_value=transaction_sum("price", "SÄLJ"),
+        total_sale_shipping=transaction_sum("shipping_cost", "SÄLJ"),
+        last_transaction_date=Subquery(
+            Transaction.objects.filter(axe=OuterRef("pk"))
+            .order_by()
+            .values("axe")
+            .annotate(latest=Max("transaction_date"))
+            .values("latest")
+        ),
+        is_sold=Exists(Transaction.objects.filter(axe=OuterRef("pk"), type="SÄLJ")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("axes", "0063_manufacturer_closure"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="axe",
+            name="is_sold",
+            field=models.BooleanField(
+                default=False, editable=False, verbose_name="Såld"
+            ),
+        ),
+        migrations.AddField(
+            model_name="axe",
+            name="last_transaction_date",
+            field=models.DateField(
+                blank=True,
+                editable=False,
+                null=True,
+                verbose_name="Senaste transaktion",
+            ),
+        ),
+        migrations.AddField(
+            model_name="axe",
+            name="total_buy_shipping",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0"),
+                editable=False,
+                max_digits=12,
+                verbose_name="Frakt vid köp",
+            ),
+        ),
+        migrations.AddField(
+            model_name="axe",
+            name="total_buy_value",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0"),
+                editable=False,
+                max_digits=12,
+                verbose_name="Köpvärde",
+            ),
+        ),
+        migrations.AddField(
+            model_name="axe",
+            name="total_sale_shipping",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0"),
+                editable=False,
+                max_digits=12,
+                verbose_name="Frakt vid försäljning",
+            ),
+        ),
+        migrations.AddField(
+            model_name="axe",
+            name="total_sale_value",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0"),
+                editable=False,
+                max_digits=12,
+                verbose_name="Försäljningsvärde",
+            ),
+        ),
+        migrations.RunPython(populate_axe_financial_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 00:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("axes", "0065_auditlog_timestamp_default"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["model_name", "timestamp"],
+                name="axes_auditl_model_n_beb43e_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["user", "timestamp"], name="axes_auditl_user_id_fd45ed_idx"
+            ),
+        ),
+    ]
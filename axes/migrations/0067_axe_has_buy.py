@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-18 02:52
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def populate_has_buy(apps, schema_editor):
+    """Fyll has_buy från befintliga transaktioner"""
+    Axe = apps.get_model("axes", "Axe")
+    Transaction = apps.get_model("axes", "Transaction")
+    Axe.objects.update(
+        has_buy=Exists(Transaction.objects.filter(axe=OuterRef("pk"), type="KÖP"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("axes", "0066_auditlog_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="axe",
+            name="has_buy",
+            field=models.BooleanField(
+                default=False, editable=False, verbose_name="Har köp"
+            ),
+        ),
+        migrations.RunPython(populate_has_buy, migrations.RunPython.noop),
+    ]
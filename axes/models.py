@@ -1,13 +1,82 @@
 from django.db import models
-from PIL import Image, ImageOps
+import copy
 import os
+from decimal import Decimal
 from django.conf import settings
 from django.db.models import Sum, Max
 from django.core.exceptions import ValidationError
+from django.utils.functional import cached_property
+from django.utils import timezone
 
 # Create your models here.
 
 
+class TrackedFieldsMixin:
+    """Minns fältvärdena som instansen senast lästes från eller skrevs till
+    databasen med.
+
+    Ändringsloggen (axes/signals.py) jämför mot ögonblicksbilden i stället
+    för att läsa om raden före varje sparning. Bilden tas i from_db och
+    förnyas efter save() och refresh_from_db(); för fält som sparas med
+    update_fields uppdateras bara de fälten.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: _snapshot_value(value) for name, value in zip(field_names, values)
+        }
+        return instance
+
+    def save_base(self, *args, **kwargs):
+        super().save_base(*args, **kwargs)
+        self.remember_field_values(kwargs.get("update_fields"))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self.remember_field_values(fields)
+
+    def remember_field_values(self, fields=None):
+        """Tar en ny ögonblicksbild av fälten (namn eller attname), eller av
+        alla inlästa fält om fields är None."""
+        if fields is None:
+            deferred = self.get_deferred_fields()
+            attnames = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if field.attname not in deferred
+            ]
+            snapshot = {}
+        else:
+            attnames = [
+                field.attname
+                for field in map(self._meta.get_field, fields)
+                if field.concrete
+            ]
+            snapshot = getattr(self, "_loaded_values", None) or {}
+        for attname in attnames:
+            snapshot[attname] = _snapshot_value(getattr(self, attname))
+        self._loaded_values = snapshot
+
+    def loaded_field_values(self):
+        """Ögonblicksbilden {attname: värde}, eller None om den saknas eller
+        inte täcker alla fält (t.ex. för en ny instans eller med only())."""
+        snapshot = getattr(self, "_loaded_values", None)
+        if snapshot is None or any(
+            field.attname not in snapshot for field in self._meta.concrete_fields
+        ):
+            return None
+        return snapshot
+
+
+def _snapshot_value(value):
+    # Föränderliga värden (JSON) kopieras så att ändringar på plats syns
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+
 class NextAxeID(models.Model):
     """Håller reda på nästa ID som ska användas för nya yxor"""
 
@@ -42,7 +111,7 @@ class NextAxeID(models.Model):
         return obj.next_id
 
 
-class Manufacturer(models.Model):
+class Manufacturer(TrackedFieldsMixin, models.Model):
     MANUFACTURER_TYPE_CHOICES = [
         ("TILLVERKARE", "Tillverkare"),
         ("SMED", "Smed"),
@@ -92,12 +161,9 @@ class Manufacturer(models.Model):
     @property
     def hierarchy_level(self):
         """Returnerar hierarkinivån för tillverkaren (0 för huvudtillverkare, 1+ för undertillverkare)"""
-        level = 0
-        current = self
-        while current.parent:
-            level += 1
-            current = current.parent
-        return level
+        from axes.services.manufacturer_tree import hierarchy_level
+
+        return hierarchy_level(self)
 
     @property
     def full_name(self):
@@ -109,18 +175,16 @@ class Manufacturer(models.Model):
     @property
     def all_sub_manufacturers(self):
         """Returnerar alla undertillverkare (rekursivt)"""
-        sub_manufacturers = list(self.sub_manufacturers.all())
-        for sub in self.sub_manufacturers.all():
-            sub_manufacturers.extend(sub.all_sub_manufacturers)
-        return sub_manufacturers
+        from axes.services.manufacturer_tree import descendants
+
+        return list(descendants(self))
 
     @property
     def all_axes_including_sub_manufacturers(self):
         """Returnerar alla yxor från denna tillverkare och alla undertillverkare"""
-        axes = list(self.axe_set.all())
-        for sub_manufacturer in self.all_sub_manufacturers:
-            axes.extend(sub_manufacturer.axe_set.all())
-        return axes
+        from axes.services.manufacturer_tree import subtree_axes
+
+        return list(subtree_axes(self))
 
     @property
     def axes(self):
@@ -138,7 +202,9 @@ class Manufacturer(models.Model):
     @property
     def axe_count_including_sub_manufacturers(self):
         """Antal yxor inklusive undertillverkare"""
-        return len(self.all_axes_including_sub_manufacturers)
+        from axes.services.manufacturer_tree import subtree_axes
+
+        return subtree_axes(self).count()
 
     @property
     def transactions(self):
@@ -149,11 +215,9 @@ class Manufacturer(models.Model):
     @property
     def transactions_including_sub_manufacturers(self):
         """Transaktioner inklusive undertillverkare"""
-        from axes.models import Transaction
+        from axes.services.manufacturer_tree import subtree_transactions
 
-        all_axes = self.all_axes_including_sub_manufacturers
-        axe_ids = [axe.id for axe in all_axes]
-        return Transaction.objects.filter(axe_id__in=axe_ids)
+        return subtree_transactions(self)
 
     @property
     def buy_count(self):
@@ -238,7 +302,30 @@ class Manufacturer(models.Model):
         )
 
 
-class Axe(models.Model):
+class ManufacturerClosure(models.Model):
+    """Tillverkarhierarkin som closure-tabell: en rad per par (förfader,
+    ättling), inklusive tillverkaren själv på avstånd 0. Underhålls av
+    signalerna via axes/services/manufacturer_tree.py."""
+
+    ancestor = models.ForeignKey(
+        Manufacturer, on_delete=models.CASCADE, related_name="descendant_links"
+    )
+    descendant = models.ForeignKey(
+        Manufacturer, on_delete=models.CASCADE, related_name="ancestor_links"
+    )
+    depth = models.PositiveIntegerField(verbose_name="Avstånd")
+
+    class Meta:
+        unique_together = ("ancestor", "descendant")
+        indexes = [models.Index(fields=["descendant", "depth"])]
+        verbose_name = "Tillverkarhierarki"
+        verbose_name_plural = "Tillverkarhierarki"
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
+class Axe(TrackedFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ("KÖPT", "Köpt"),
         ("MOTTAGEN", "Mottagen/Ägd"),
@@ -251,10 +338,66 @@ class Axe(models.Model):
     comment = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="KÖPT")
 
+    # Summering av yxans transaktioner. Skrivs bara av transaktionssignalerna
+    # (axes/services/axe_financials.py) så att listor kan visa, sortera och
+    # filtrera på ekonomin i SQL utan att hämta transaktionerna.
+    total_buy_value = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0"),
+        editable=False,
+        verbose_name="Köpvärde",
+    )
+    total_buy_shipping = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0"),
+        editable=False,
+        verbose_name="Frakt vid köp",
+    )
+    total_sale_value = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0"),
+        editable=False,
+        verbose_name="Försäljningsvärde",
+    )
+    total_sale_shipping = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0"),
+        editable=False,
+        verbose_name="Frakt vid försäljning",
+    )
+    last_transaction_date = models.DateField(
+        blank=True, null=True, editable=False, verbose_name="Senaste transaktion"
+    )
+    is_sold = models.BooleanField(default=False, editable=False, verbose_name="Såld")
+    has_buy = models.BooleanField(default=False, editable=False, verbose_name="Har köp")
+
+    FINANCIAL_SUMMARY_FIELDS = (
+        "total_buy_value",
+        "total_buy_shipping",
+        "total_sale_value",
+        "total_sale_shipping",
+        "last_transaction_date",
+        "is_sold",
+        "has_buy",
+    )
+
     def save(self, *args, **kwargs):
         # Om det är en ny yxa (ingen ID än), använd nästa ID
         if not self.pk:
             self.id = NextAxeID.get_next_id()
+        elif not self._state.adding and kwargs.get("update_fields") is None:
+            # Skriv inte tillbaka summeringsfälten - instansen kan ha lästs
+            # innan en transaktion sparades
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.FINANCIAL_SUMMARY_FIELDS
+            ]
         super().save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
@@ -277,43 +420,6 @@ class Axe(models.Model):
     def transactions(self):
         return self.transaction_set.all()
 
-    def _sum_transactions(self, transaction_type, field):
-        """Summerar ett fält på transaktioner av given typ, i Python.
-
-        Itererar self.transactions.all() istället för att göra
-        .filter().aggregate() - det senare ignorerar alltid
-        prefetch-cachen och gör en ny query även när transactions
-        redan är prefetchade. Hoppar transaktioner där fältet är NULL,
-        precis som SQL-aggregatet gör vid summering.
-        """
-        from decimal import Decimal
-
-        total = None
-        for t in self.transactions.all():
-            if t.type != transaction_type:
-                continue
-            value = getattr(t, field)
-            if value is None:
-                continue
-            total = value if total is None else total + value
-        return total if total is not None else Decimal("0")
-
-    @property
-    def total_buy_value(self):
-        return self._sum_transactions("KÖP", "price")
-
-    @property
-    def total_buy_shipping(self):
-        return self._sum_transactions("KÖP", "shipping_cost")
-
-    @property
-    def total_sale_value(self):
-        return self._sum_transactions("SÄLJ", "price")
-
-    @property
-    def total_sale_shipping(self):
-        return self._sum_transactions("SÄLJ", "shipping_cost")
-
     @property
     def net_value(self):
         return self.total_sale_value - self.total_buy_value
@@ -373,18 +479,11 @@ class AxeImage(models.Model):
         return None
 
     def save(self, *args, **kwargs):
+        from axes.services.image_derivatives import enqueue_image_derivatives
+
         super().save(*args, **kwargs)
-        if self.image and self.image.name:
-            img_path = self.image.path
-            webp_path = os.path.splitext(img_path)[0] + ".webp"
-            try:
-                img = Image.open(img_path)
-                # Rotera enligt EXIF-orientering (telefonbilder) så webp:en
-                # visas rättvänd - webbläsare auto-roterar JPEG men inte webp
-                img = ImageOps.exif_transpose(img)
-                img.save(webp_path, "WEBP", quality=85)
-            except Exception:
-                pass  # Kan logga fel om så önskas
+        # WebP-versionen skapas i bakgrunden, inte i request-tråden
+        enqueue_image_derivatives(self)
 
     def delete(self, *args, **kwargs):
         # Ta bort både originalfilen och .webp-filen
@@ -457,18 +556,11 @@ class ManufacturerImage(models.Model):
         return None
 
     def save(self, *args, **kwargs):
+        from axes.services.image_derivatives import enqueue_image_derivatives
+
         super().save(*args, **kwargs)
-        if self.image and self.image.name:
-            img_path = self.image.path
-            webp_path = os.path.splitext(img_path)[0] + ".webp"
-            try:
-                img = Image.open(img_path)
-                # Rotera enligt EXIF-orientering (telefonbilder) så webp:en
-                # visas rättvänd - webbläsare auto-roterar JPEG men inte webp
-                img = ImageOps.exif_transpose(img)
-                img.save(webp_path, "WEBP", quality=85)
-            except Exception:
-                pass  # Kan logga fel om så önskas
+        # WebP-versionen skapas i bakgrunden, inte i request-tråden
+        enqueue_image_derivatives(self)
 
     def delete(self, *args, **kwargs):
         # Ta bort både originalfilen och .webp-filen (annars blir de kvar på disk)
@@ -591,7 +683,7 @@ class MeasurementTemplateItem(models.Model):
         return f"{self.template.name} - {self.measurement_type.name}"
 
 
-class Measurement(models.Model):
+class Measurement(TrackedFieldsMixin, models.Model):
     axe = models.ForeignKey(Axe, related_name="measurements", on_delete=models.CASCADE)
     name = models.CharField(max_length=100)  # t.ex. "Vikt"
     value = models.DecimalField(max_digits=10, decimal_places=2)  # t.ex. 1800.00
@@ -601,7 +693,7 @@ class Measurement(models.Model):
         return f"{self.axe}: {self.name} är {self.value} {self.unit}"
 
 
-class Contact(models.Model):
+class Contact(TrackedFieldsMixin, models.Model):
     name = models.CharField(max_length=200)
     email = models.EmailField(blank=True, null=True)
     phone = models.CharField(max_length=50, blank=True, null=True)
@@ -628,53 +720,60 @@ class Contact(models.Model):
 
         return Transaction.objects.filter(contact=self)
 
-    @property
+    # Summeringarna är cached_property så att en annotation med samma namn
+    # (statistics.contacts_with_totals) ersätter dem utan extra queries
+
+    @cached_property
     def total_transactions(self):
         return self.transactions.count()
 
-    @property
+    @cached_property
     def buy_count(self):
         return self.transactions.filter(type="KÖP").count()
 
-    @property
+    @cached_property
     def sale_count(self):
         return self.transactions.filter(type="SÄLJ").count()
 
-    @property
-    def total_buy_value(self):
-        from decimal import Decimal
-
-        result = self.transactions.filter(type="KÖP").aggregate(total=Sum("price"))[
-            "total"
-        ]
+    def _transaction_sum(self, field, transaction_type):
+        result = self.transactions.filter(type=transaction_type).aggregate(
+            total=Sum(field)
+        )["total"]
         return result if result is not None else Decimal("0")
 
-    @property
+    @cached_property
+    def total_buy_value(self):
+        return self._transaction_sum("price", "KÖP")
+
+    @cached_property
     def total_sale_value(self):
-        from decimal import Decimal
+        return self._transaction_sum("price", "SÄLJ")
 
-        result = self.transactions.filter(type="SÄLJ").aggregate(total=Sum("price"))[
-            "total"
-        ]
-        return result if result is not None else Decimal("0")
+    @cached_property
+    def total_buy_shipping(self):
+        return self._transaction_sum("shipping_cost", "KÖP")
 
-    @property
+    @cached_property
+    def total_sale_shipping(self):
+        return self._transaction_sum("shipping_cost", "SÄLJ")
+
+    @cached_property
     def net_value(self):
         return self.total_sale_value - self.total_buy_value
 
-    @property
+    @cached_property
     def latest_transaction_date(self):
         """Returnerar datum för senaste transaktionen"""
         latest_transaction = self.transactions.order_by("-transaction_date").first()
         return latest_transaction.transaction_date if latest_transaction else None
 
-    @property
+    @cached_property
     def unique_axes_count(self):
         """Returnerar antalet unika yxor som kontakten är kopplad till"""
         return self.transactions.values("axe").distinct().count()
 
 
-class Platform(models.Model):
+class Platform(TrackedFieldsMixin, models.Model):
     COLOR_CHOICES = [
         # Bootstrap 5.2 standardfärger
         ("bg-primary", "Blå (Primary)"),
@@ -810,7 +909,7 @@ class Platform(models.Model):
         return self.transaction_set.filter(type="SÄLJ").count()
 
 
-class Transaction(models.Model):
+class Transaction(TrackedFieldsMixin, models.Model):
     TRANSACTION_TYPES = [
         ("KÖP", "Köp"),
         ("SÄLJ", "Sälj"),
@@ -832,7 +931,45 @@ class Transaction(models.Model):
         return f"{self.type} av {self.axe} på {self.transaction_date}"
 
 
-class Settings(models.Model):
+class MonthlyTransactionSummary(models.Model):
+    """Förberäknad månadssummering av transaktionerna för statistiksidan.
+
+    En rad per månad som har minst en transaktion. Hålls uppdaterad
+    inkrementellt av signal-handlers i axes/signals.py och kan byggas om
+    från grunden med `manage.py rebuild_monthly_summary`.
+    """
+
+    month = models.DateField(unique=True, verbose_name="Månad")  # Första dagen
+    buy_count = models.IntegerField(default=0, verbose_name="Antal köp")
+    sale_count = models.IntegerField(default=0, verbose_name="Antal försäljningar")
+    buy_value = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, verbose_name="Köpvärde"
+    )
+    sale_value = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, verbose_name="Försäljningsvärde"
+    )
+    buy_shipping = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, verbose_name="Frakt köp"
+    )
+    sale_shipping = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, verbose_name="Frakt försäljning"
+    )
+    # Löpande summor till och med denna månad
+    cumulative_buys = models.IntegerField(default=0, verbose_name="Antal köp totalt")
+    collection_size = models.IntegerField(
+        default=0, verbose_name="Samlingens storlek"
+    )  # Köp minus försäljningar
+
+    class Meta:
+        ordering = ["month"]
+        verbose_name = "Månadssummering"
+        verbose_name_plural = "Månadssummeringar"
+
+    def __str__(self):
+        return f"{self.month:%Y-%m}: {self.buy_count} köp, {self.sale_count} sälj"
+
+
+class Settings(TrackedFieldsMixin, models.Model):
     """Globala inställningar för systemet"""
 
     # Publika inställningar
@@ -1126,7 +1263,7 @@ class Comment(models.Model):
 
 
 # Stämpelregister-modeller
-class Stamp(models.Model):
+class Stamp(TrackedFieldsMixin, models.Model):
     """Stämpel - huvudmodell för stämplar"""
 
     STAMP_TYPE_CHOICES = [
@@ -1580,22 +1717,12 @@ class StampImage(models.Model):
 
     @property
     def webp_url(self):
-        """Returnerar URL för WebP-version av bilden"""
+        """Returnerar URL för WebP-version av bilden, eller originalets URL
+        tills bakgrundsjobbet har skapat den"""
         if self.image:
-            # Skapa WebP-version om den inte finns
-            image_path = self.image.path
-            webp_path = image_path.rsplit(".", 1)[0] + ".webp"
-
+            webp_path = os.path.splitext(self.image.path)[0] + ".webp"
             if not os.path.exists(webp_path):
-                try:
-                    with Image.open(image_path) as img:
-                        # Konvertera till RGB om nödvändigt
-                        if img.mode in ("RGBA", "LA", "P"):
-                            img = img.convert("RGB")
-                        img.save(webp_path, "WEBP", quality=85)
-                except Exception as e:
-                    # Om WebP-konvertering misslyckas, returnera original
-                    return self.image.url
+                return self.image.url
 
             # Returnera WebP-URL
             webp_url = self.image.url.rsplit(".", 1)[0] + ".webp"
@@ -1712,26 +1839,10 @@ class StampImage(models.Model):
 
         super().save(*args, **kwargs)
 
-        # Skapa WebP-version om det är en ny bild
-        if not hasattr(self, "_webp_created"):
-            self._create_webp_version()
-            self._webp_created = True
+        # WebP-versionen skapas i bakgrunden, inte i request-tråden
+        from axes.services.image_derivatives import enqueue_image_derivatives
 
-    def _create_webp_version(self):
-        """Skapa WebP-version av bilden"""
-        if self.image:
-            try:
-                image_path = self.image.path
-                webp_path = image_path.rsplit(".", 1)[0] + ".webp"
-
-                if not os.path.exists(webp_path):
-                    with Image.open(image_path) as img:
-                        if img.mode in ("RGBA", "LA", "P"):
-                            img = img.convert("RGB")
-                        img.save(webp_path, "WEBP", quality=85)
-            except Exception:
-                # Ignorera fel vid WebP-konvertering
-                pass
+        enqueue_image_derivatives(self)
 
     def delete(self, *args, **kwargs):
         # Ta bort både originalfilen och .webp-filen
@@ -1977,7 +2088,11 @@ class AuditLog(models.Model):
         ("DELETE", "Borttagen"),
     ]
 
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Sätts när posten skapas, inte när den skrivs - poster kan buffras
+    # (services/audit_buffer.py)
+    timestamp = models.DateTimeField(
+        default=timezone.now, editable=False, db_index=True
+    )
     user = models.ForeignKey(
         "auth.User",
         null=True,
@@ -1995,8 +2110,55 @@ class AuditLog(models.Model):
 
     class Meta:
         ordering = ["-timestamp"]
+        # Filtren i ändringsloggens vy är modell/användare plus ett
+        # tidsintervall, sorterat på tid
+        indexes = [
+            models.Index(fields=["model_name", "timestamp"]),
+            models.Index(fields=["user", "timestamp"]),
+        ]
         verbose_name = "Ändringslogg"
         verbose_name_plural = "Ändringsloggar"
 
     def __str__(self):
         return f"{self.get_action_display()} {self.model_name} #{self.object_id} ({self.timestamp:%Y-%m-%d %H:%M})"
+
+
+class ImageDerivativeJob(models.Model):
+    """Kö och status för härledda bildversioner (rättvänd WebP m.fl.).
+
+    En rad per bild (AxeImage, ManufacturerImage eller StampImage). Jobben
+    läggs i kö när bilden sparas och körs av en trådpool eller av
+    management-kommandot process_image_derivatives, se
+    axes/services/image_derivatives.py.
+    """
+
+    STATUS_CHOICES = [
+        ("PENDING", "Väntar"),
+        ("PROCESSING", "Bearbetas"),
+        ("DONE", "Klar"),
+        ("FAILED", "Misslyckades"),
+    ]
+
+    model_label = models.CharField(max_length=100, verbose_name="Bildmodell")
+    object_id = models.PositiveIntegerField(verbose_name="Bild-ID")
+    image_name = models.CharField(max_length=255, verbose_name="Bildfil")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default="PENDING",
+        db_index=True,
+        verbose_name="Status",
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Försök")
+    error = models.TextField(blank=True, verbose_name="Felmeddelande")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        unique_together = ["model_label", "object_id"]
+        verbose_name = "Bildbearbetning"
+        verbose_name_plural = "Bildbearbetningar"
+
+    def __str__(self):
+        return f"{self.model_label} #{self.object_id} ({self.get_status_display()})"
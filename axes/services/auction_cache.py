@@ -0,0 +1,86 @@
+"""Processcache för tolkade auktionssidor (Tradera/eBay).
+
+"Hämta data" i formuläret för ny yxa hämtar och tolkar hela auktionssidan,
+vilket tar flera sekunder. Användaren klickar ofta igen på samma auktion
+efter att ha rättat ett fält, så resultatet sparas per (plattform,
+objekt-id) i AUCTION_PARSE_CACHE_TTL sekunder (standard 15 minuter). Cachen
+rymmer högst AUCTION_PARSE_CACHE_SIZE auktioner; när den är full kastas den
+som använts minst nyligen.
+
+Resultaten kopieras in och ut, så vyn kan lägga till fält i sitt svar
+utan att ändra det cachade. Misslyckade tolkningar cachas inte.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _ttl():
+    return getattr(settings, "AUCTION_PARSE_CACHE_TTL", 15 * 60)
+
+
+def _max_size():
+    return getattr(settings, "AUCTION_PARSE_CACHE_SIZE", 128)
+
+
+def _get(key, now):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del _entries[key]
+            return None
+        _entries.move_to_end(key)
+        return entry[0]
+
+
+def _put(key, data):
+    with _lock:
+        _entries[key] = (data, time.monotonic() + _ttl())
+        _entries.move_to_end(key)
+        while len(_entries) > _max_size():
+            _entries.popitem(last=False)
+
+
+def get_or_parse(platform, item_id, parse, force_refresh=False):
+    """Returnerar (data, från_cache) för auktionen.
+
+    parse() anropas vid miss, när force_refresh är satt eller när item_id
+    saknas (då cachas inget). Undantag från parse skickas vidare.
+    """
+    key = (platform, item_id)
+    if item_id and not force_refresh:
+        data = _get(key, time.monotonic())
+        if data is not None:
+            with _lock:
+                _stats["hits"] += 1
+            return copy.deepcopy(data), True
+
+    with _lock:
+        _stats["misses"] += 1
+    data = parse()
+    if item_id:
+        _put(key, copy.deepcopy(data))
+    return data, False
+
+
+def stats():
+    """Träffar, missar och antal cachade auktioner sedan processen startade."""
+    with _lock:
+        return {**_stats, "size": len(_entries)}
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+        _stats["hits"] = 0
+        _stats["misses"] = 0
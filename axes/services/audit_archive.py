@@ -0,0 +1,179 @@
+"""Arkivering av gamla ändringsloggposter till komprimerade JSONL-filer.
+
+Poster äldre än retentionstiden flyttas från AuditLog-tabellen till en
+fil per dag, <arkiv>/<år>/<månad>/auditlog-<datum>.jsonl.gz, med en
+JSON-rad per post. Posterna läses i id-ordning i omgångar, skrivs till
+filerna och tas sedan bort i samma omgång, så tabellen krymper utan att
+hela urvalet behöver hållas i minnet. Varje omgång läggs till som en egen
+gzip-medlem, vilket gzip läser som en sammanhängande fil.
+
+search läser bara filerna inom datumintervallet och filtrerar raderna med
+samma fält som vyn för ändringsloggen (manage.py search_audit_archive).
+"""
+
+import gzip
+import json
+import os
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from axes.models import AuditLog
+
+FILE_PREFIX = "auditlog-"
+FILE_SUFFIX = ".jsonl.gz"
+BATCH_SIZE = 1000
+
+
+def archive_dir():
+    return os.fspath(
+        getattr(settings, "AUDIT_ARCHIVE_DIR", settings.BASE_DIR / "audit_archive")
+    )
+
+
+def retention_days():
+    return getattr(settings, "AUDIT_RETENTION_DAYS", 365)
+
+
+def archive_path(directory, day):
+    return os.path.join(
+        directory,
+        f"{day:%Y}",
+        f"{day:%m}",
+        f"{FILE_PREFIX}{day:%Y-%m-%d}{FILE_SUFFIX}",
+    )
+
+
+def entry_to_dict(entry):
+    return {
+        "id": entry.id,
+        "timestamp": entry.timestamp.isoformat(),
+        "user_id": entry.user_id,
+        "username": entry.user.username if entry.user_id else None,
+        "action": entry.action,
+        "model_name": entry.model_name,
+        "object_id": entry.object_id,
+        "object_repr": entry.object_repr,
+        "changes": entry.changes,
+    }
+
+
+def _write_batch(directory, entries):
+    by_day = {}
+    for entry in entries:
+        by_day.setdefault(timezone.localdate(entry.timestamp), []).append(entry)
+    for day, day_entries in by_day.items():
+        path = archive_path(directory, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as raw:
+            with gzip.open(raw, "at", encoding="utf-8") as f:
+                for entry in day_entries:
+                    f.write(json.dumps(entry_to_dict(entry), ensure_ascii=False))
+                    f.write("\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+
+
+def archive_older_than(cutoff, directory=None, dry_run=False):
+    """Flyttar poster med timestamp före cutoff till arkivet.
+
+    Returnerar antalet (vid dry_run: antalet som skulle flyttas).
+    """
+    directory = directory or archive_dir()
+    old_entries = AuditLog.objects.filter(timestamp__lt=cutoff)
+    if dry_run:
+        return old_entries.count()
+
+    archived = 0
+    last_id = 0
+    while True:
+        batch = list(
+            old_entries.filter(id__gt=last_id)
+            .select_related("user")
+            .order_by("id")[:BATCH_SIZE]
+        )
+        if not batch:
+            return archived
+        with transaction.atomic():
+            # Filen skrivs och synkas innan raderna tas bort; avbryts
+            # körningen däremellan finns posterna kvar i tabellen och kan som
+            # mest arkiveras två gånger (search hoppar över dubbletter)
+            _write_batch(directory, batch)
+            AuditLog.objects.filter(id__in=[entry.id for entry in batch]).delete()
+        archived += len(batch)
+        last_id = batch[-1].id
+
+
+def archive_expired(days=None, directory=None, dry_run=False):
+    """Arkiverar poster äldre än days dagar (standard AUDIT_RETENTION_DAYS)."""
+    days = retention_days() if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    return archive_older_than(cutoff, directory=directory, dry_run=dry_run)
+
+
+def _archive_files(directory, date_from=None, date_to=None):
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            if not (name.startswith(FILE_PREFIX) and name.endswith(FILE_SUFFIX)):
+                continue
+            try:
+                day = date.fromisoformat(name[len(FILE_PREFIX) : -len(FILE_SUFFIX)])
+            except ValueError:
+                continue
+            if date_from and day < date_from:
+                continue
+            if date_to and day > date_to:
+                continue
+            yield os.path.join(root, name)
+
+
+def _searchable_text(entry):
+    changes = json.dumps(entry["changes"], ensure_ascii=False)
+    return f"{entry['object_repr']} {changes}".lower()
+
+
+def search(
+    directory=None,
+    date_from=None,
+    date_to=None,
+    model_name=None,
+    action=None,
+    user_id=None,
+    object_id=None,
+    text=None,
+):
+    """Arkiverade poster (dicts) som matchar filtren, äldst först.
+
+    date_from/date_to är datum (inklusive) och avgör vilka filer som läses.
+    text söks skiftlägesokänsligt i objektbeskrivningen och ändringarna.
+    """
+    directory = directory or archive_dir()
+    if not os.path.isdir(directory):
+        return
+    text = text.lower() if text else None
+    for path in _archive_files(directory, date_from, date_to):
+        # En post hamnar alltid i filen för sitt datum, så dubbletter från en
+        # avbruten arkivering finns i samma fil
+        seen = set()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry["id"] in seen:
+                    continue
+                if model_name and entry["model_name"] != model_name:
+                    continue
+                if action and entry["action"] != action:
+                    continue
+                if user_id is not None and entry["user_id"] != user_id:
+                    continue
+                if object_id is not None and entry["object_id"] != str(object_id):
+                    continue
+                if text and text not in _searchable_text(entry):
+                    continue
+                seen.add(entry["id"])
+                yield entry
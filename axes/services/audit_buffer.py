@@ -0,0 +1,94 @@
+"""Buffrade skrivningar till ändringsloggen (AuditLog).
+
+Inom ett scope - en request (CurrentUserMiddleware) eller ett
+management-kommando (ScopedCommandMixin) - samlas loggposterna
+och skrivs med en enda bulk_create när scopet avslutas, i stället för en
+INSERT och ett eget skrivlås i SQLite per sparning.
+
+En post hamnar i bufferten först när transaktionen den skapades i har
+committats (transaction.on_commit). Rullas transaktionen eller en savepoint
+tillbaka släpper Django callbacken, och posten försvinner tillsammans med
+ändringen den beskrev. Utanför ett scope skrivs posten direkt, som förut.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import transaction
+
+from axes.models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+# Långa kommandon skriver ut bufferten i omgångar
+FLUSH_SIZE = 500
+
+_local = threading.local()
+
+
+class _Buffer:
+    def __init__(self):
+        self.entries = []
+        self.open = True
+
+
+def _flush(buffer):
+    entries, buffer.entries = buffer.entries, []
+    if not entries:
+        return
+    try:
+        AuditLog.objects.bulk_create(entries)
+    except Exception:
+        # En bugg i loggningen får aldrig fälla requesten/kommandot
+        logger.exception("Kunde inte skriva %d audit-poster", len(entries))
+
+
+def _committed(buffer, entry):
+    if not buffer.open:
+        # Transaktionen committades först efter att scopet avslutats
+        entry.save()
+        return
+    buffer.entries.append(entry)
+    if len(buffer.entries) >= FLUSH_SIZE:
+        _flush(buffer)
+
+
+def is_active():
+    return getattr(_local, "buffer", None) is not None
+
+
+def record(entry):
+    """Skriver en (osparad) AuditLog-post, buffrad om ett scope är aktivt."""
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None:
+        entry.save()
+        return
+    transaction.on_commit(partial(_committed, buffer, entry))
+
+
+@contextmanager
+def scope():
+    """Buffrar AuditLog-poster tills blocket lämnas. Ett nästlat scope
+    använder det yttre scopets buffert."""
+    if is_active():
+        yield
+        return
+    buffer = _Buffer()
+    _local.buffer = buffer
+    try:
+        yield
+    finally:
+        _local.buffer = None
+        _flush(buffer)
+        buffer.open = False
+
+
+class ScopedCommandMixin:
+    """Blandas in före BaseCommand i kommandon som skriver många objekt, så
+    att hela kommandot körs i ett scope."""
+
+    def execute(self, *args, **options):
+        with scope():
+            return super().execute(*args, **options)
@@ -0,0 +1,129 @@
+"""Summeringsfälten på Axe (köp-/säljvärde, frakt, senaste transaktion,
+såld, har köp).
+
+Fälten räknas om från yxans transaktioner med en enda UPDATE med
+korrelerade subqueries, så uppdateringen är atomär i databasen och kan
+inte tappa en samtidig ändring som en läs-ändra-skriv i Python skulle
+kunna göra. Signal-handlers i axes/signals.py anropar refresh_axes när en
+transaktion sparas, flyttas till en annan yxa eller tas bort.
+
+reconcile hittar yxor vars summering inte stämmer med transaktionerna
+(t.ex. efter import som gått förbi signalerna) och rättar dem
+(manage.py reconcile_axe_financials).
+"""
+
+from decimal import Decimal
+
+from django.db.models import (
+    BooleanField,
+    DecimalField,
+    Exists,
+    F,
+    Max,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+
+from axes.models import Axe, Transaction
+
+_ZERO = Value(Decimal("0"), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def _transaction_sum(field, transaction_type):
+    total = (
+        Transaction.objects.filter(axe=OuterRef("pk"), type=transaction_type)
+        .order_by()
+        .values("axe")
+        .annotate(total=Sum(field))
+        .values("total")
+    )
+    return Coalesce(
+        Subquery(total),
+        _ZERO,
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def summary_expressions():
+    """Uttryck per summeringsfält, beräknade från transaktionerna."""
+    return {
+        "total_buy_value": _transaction_sum("price", "KÖP"),
+        "total_buy_shipping": _transaction_sum("shipping_cost", "KÖP"),
+        "total_sale_value": _transaction_sum("price", "SÄLJ"),
+        "total_sale_shipping": _transaction_sum("shipping_cost", "SÄLJ"),
+        "last_transaction_date": Subquery(
+            Transaction.objects.filter(axe=OuterRef("pk"))
+            .order_by()
+            .values("axe")
+            .annotate(latest=Max("transaction_date"))
+            .values("latest")
+        ),
+        "is_sold": Exists(
+            Transaction.objects.filter(axe=OuterRef("pk"), type="SÄLJ"),
+            output_field=BooleanField(),
+        ),
+        "has_buy": Exists(
+            Transaction.objects.filter(axe=OuterRef("pk"), type="KÖP"),
+            output_field=BooleanField(),
+        ),
+    }
+
+
+def profit_expression():
+    """Vinst/förlust inklusive frakt, som Axe.profit_loss, för ORDER BY."""
+    return (F("total_sale_value") + F("total_sale_shipping")) - (
+        F("total_buy_value") + F("total_buy_shipping")
+    )
+
+
+def net_expression():
+    """Netto utan frakt, som Axe.net_value, för ORDER BY."""
+    return F("total_sale_value") - F("total_buy_value")
+
+
+def refresh_axes(axe_ids):
+    """Räknar om summeringen för yxorna med id i axe_ids."""
+    axe_ids = {axe_id for axe_id in axe_ids if axe_id is not None}
+    if not axe_ids:
+        return 0
+    return Axe.objects.filter(pk__in=axe_ids).update(**summary_expressions())
+
+
+def refresh_instance(axe):
+    """Läser om summeringsfälten på en redan hämtad Axe-instans."""
+    values = Axe.objects.filter(pk=axe.pk).values(*Axe.FINANCIAL_SUMMARY_FIELDS).first()
+    if values is not None:
+        for field, value in values.items():
+            setattr(axe, field, value)
+        axe.remember_field_values(Axe.FINANCIAL_SUMMARY_FIELDS)
+
+
+def drifted_axe_ids():
+    """Id för yxor vars sparade summering inte stämmer med transaktionerna."""
+    expected = {
+        f"expected_{field}": expr for field, expr in summary_expressions().items()
+    }
+    drifted = []
+    for row in (
+        Axe.objects.order_by()
+        .annotate(**expected)
+        .values("id", *Axe.FINANCIAL_SUMMARY_FIELDS, *expected)
+    ):
+        if any(
+            row[field] != row[f"expected_{field}"]
+            for field in Axe.FINANCIAL_SUMMARY_FIELDS
+        ):
+            drifted.append(row["id"])
+    return drifted
+
+
+def reconcile(repair=True):
+    """Returnerar id för yxor med felaktig summering och rättar dem
+    (om inte repair=False)."""
+    drifted = drifted_axe_ids()
+    if repair and drifted:
+        refresh_axes(drifted)
+    return drifted
@@ -0,0 +1,254 @@
+"""Databas- och mediabackup: SQLite online backup och innehållsadresserad media.
+
+Databasen kopieras med SQLites online backup-API i stället för en filkopia.
+En filkopia av en databas som skrivs till samtidigt kan bli trasig (halvt
+skrivna sidor, WAL som inte följer med); backup-API:t läser en konsistent
+ögonblicksbild och släpper låset mellan stegen så att appen kan fortsätta
+skriva.
+
+Media lagras innehållsadresserat under backups/media_store/<ab>/<sha256>.
+Varje fil hashas en gång - index.json minns storlek, mtime och hash per
+sökväg, så oförändrade filer varken läses eller kopieras igen. En backup
+av media är därmed bara ett manifest (sökväg -> hash), och varje körning
+skriver bara de filer som är nya eller ändrade. Blobbar som inget kvarvarande
+manifest refererar till tas bort av collect_garbage när gamla backuper rensas.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import zipfile
+from datetime import datetime
+
+MANIFEST_FORMAT = "cas-v1"
+MANIFEST_PREFIX = "media_manifest_"
+ZIP_MANIFEST_NAME = "media_manifest.json"
+STORE_DIRNAME = "media_store"
+INDEX_NAME = "index.json"
+# Cachen med bildvarianter återskapas vid behov och backas inte upp
+EXCLUDED_MEDIA_DIRS = ("variants",)
+
+CHUNK_SIZE = 1024 * 1024
+# Sidor per steg i online backup - låset släpps mellan stegen
+BACKUP_PAGES_PER_STEP = 1024
+
+
+# --- Databas ---
+
+
+def backup_sqlite(source_path, target_path):
+    """Konsistent kopia av SQLite-databasen source_path till target_path."""
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(source_path)
+    source = sqlite3.connect(source_path)
+    try:
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target, pages=BACKUP_PAGES_PER_STEP)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+# --- Blob-lager ---
+
+
+def store_dir_for(backup_dir):
+    return os.path.join(backup_dir, STORE_DIRNAME)
+
+
+def blob_path(store_dir, digest):
+    return os.path.join(store_dir, digest[:2], digest)
+
+
+def _load_index(store_dir):
+    try:
+        with open(os.path.join(store_dir, INDEX_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(store_dir, index):
+    path = os.path.join(store_dir, INDEX_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, path)
+
+
+def _ingest(path, store_dir):
+    """Kopierar filen till lagret och hashar i samma läsning.
+
+    Returnerar (hash, storlek, ny blob?). Hashen gäller det som faktiskt
+    kopierades, även om filen ändras under tiden.
+    """
+    tmp_path = os.path.join(
+        store_dir, f"incoming-{os.getpid()}-{threading.get_ident()}.tmp"
+    )
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as source, open(tmp_path, "wb") as target:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            target.write(chunk)
+            size += len(chunk)
+    shutil.copystat(path, tmp_path)
+
+    digest = digest.hexdigest()
+    destination = blob_path(store_dir, digest)
+    if os.path.exists(destination):
+        os.remove(tmp_path)
+        return digest, size, False
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(tmp_path, destination)
+    return digest, size, True
+
+
+def _iter_media_files(media_root):
+    for root, dirs, names in os.walk(media_root):
+        if os.path.samefile(root, media_root):
+            dirs[:] = [d for d in dirs if d not in EXCLUDED_MEDIA_DIRS]
+        for name in names:
+            path = os.path.join(root, name)
+            yield path, os.path.relpath(path, media_root).replace(os.sep, "/")
+
+
+def snapshot_media(media_root, store_dir):
+    """Lägger in alla mediafiler i lagret. Returnerar (files, stats).
+
+    files är manifestets innehåll {relativ sökväg: sha256}.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    index = _load_index(store_dir)
+    new_index = {}
+    files = {}
+    stats = {"files": 0, "new_blobs": 0, "new_bytes": 0}
+
+    for path, relative in _iter_media_files(media_root):
+        try:
+            stat = os.stat(path)
+            cached = index.get(relative)
+            if (
+                cached
+                and cached[0] == stat.st_size
+                and cached[1] == stat.st_mtime_ns
+                and os.path.exists(blob_path(store_dir, cached[2]))
+            ):
+                digest = cached[2]
+            else:
+                digest, size, created = _ingest(path, store_dir)
+                if created:
+                    stats["new_blobs"] += 1
+                    stats["new_bytes"] += size
+        except OSError:
+            # Filen togs bort medan backupen kördes
+            continue
+        new_index[relative] = [stat.st_size, stat.st_mtime_ns, digest]
+        files[relative] = digest
+
+    _save_index(store_dir, new_index)
+    stats["files"] = len(files)
+    return files, stats
+
+
+# --- Manifest ---
+
+
+def manifest_data(files, stats=None):
+    return {
+        "format": MANIFEST_FORMAT,
+        "created": datetime.now().isoformat(),
+        "stats": stats or {},
+        "files": files,
+    }
+
+
+def write_manifest(path, files, stats=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest_data(files, stats), f, ensure_ascii=False)
+
+
+def read_manifest(path):
+    """Manifestet från en .json-fil eller en backup-zip, eller None."""
+    try:
+        if path.endswith(".zip"):
+            with zipfile.ZipFile(path) as archive:
+                if ZIP_MANIFEST_NAME not in archive.namelist():
+                    return None
+                data = json.loads(archive.read(ZIP_MANIFEST_NAME).decode("utf-8"))
+        else:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+    except (OSError, ValueError, zipfile.BadZipFile):
+        return None
+    if data.get("format") != MANIFEST_FORMAT:
+        return None
+    return data
+
+
+def manifest_path_for(db_backup_path):
+    """Manifestet som hör till en okomprimerad databasbackup
+    (db_backup_<tid>.sqlite3 -> media_manifest_<tid>.json)."""
+    directory, name = os.path.split(db_backup_path)
+    timestamp = name[len("db_backup_") :].rsplit(".", 1)[0]
+    return os.path.join(directory, f"{MANIFEST_PREFIX}{timestamp}.json")
+
+
+def restore_media(files, store_dir, media_root):
+    """Skriver manifestets filer till media_root. Returnerar saknade sökvägar."""
+    missing = []
+    for relative, digest in files.items():
+        source = blob_path(store_dir, digest)
+        if not os.path.exists(source):
+            missing.append(relative)
+            continue
+        destination = os.path.join(media_root, *relative.split("/"))
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copy2(source, destination)
+    return missing
+
+
+# --- Städning ---
+
+
+def _backup_manifests(backup_dir):
+    for name in os.listdir(backup_dir):
+        path = os.path.join(backup_dir, name)
+        if not os.path.isfile(path):
+            continue
+        if name.endswith(".zip") or (
+            name.startswith(MANIFEST_PREFIX) and name.endswith(".json")
+        ):
+            manifest = read_manifest(path)
+            if manifest is not None:
+                yield manifest
+
+
+def collect_garbage(backup_dir):
+    """Tar bort blobbar som inget manifest i backup_dir refererar till.
+
+    Returnerar antalet borttagna blobbar.
+    """
+    store_dir = store_dir_for(backup_dir)
+    if not os.path.isdir(store_dir):
+        return 0
+
+    referenced = set()
+    for manifest in _backup_manifests(backup_dir):
+        referenced.update(manifest["files"].values())
+
+    removed = 0
+    for prefix in os.listdir(store_dir):
+        prefix_dir = os.path.join(store_dir, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for digest in os.listdir(prefix_dir):
+            if digest not in referenced:
+                os.remove(os.path.join(prefix_dir, digest))
+                removed += 1
+    return removed
@@ -0,0 +1,261 @@
+"""Härledda bildversioner för uppladdade bilder.
+
+Tidigare öppnade AxeImage/ManufacturerImage/StampImage.save originalet med
+Pillow och kodade WebP direkt i request-tråden, så en uppladdning med tio
+telefonbilder tog flera sekunder och fel försvann tyst. Nu lägger save()
+bara ett ImageDerivativeJob i kö och hur kön töms styrs av inställningen
+IMAGE_DERIVATIVE_MODE:
+
+- "thread" (standard): jobbet skickas till en trådpool i processen när
+  databastransaktionen har committats.
+- "queue": jobben ligger kvar tills en separat worker kör
+  `manage.py process_image_derivatives --loop`.
+- "sync": jobbet körs direkt (t.ex. i tester och skript).
+
+Vyer som flyttar eller döper om bildfilerna efter att bilderna sparats
+(yxans skapa/redigera-flöde) kör i deferred(), så att jobben köas först
+när filerna ligger på sina slutliga platser.
+
+Vilka versioner som skapas styrs av DERIVATIVES, så fler format kan läggas
+till utan att röra modellerna. Saknade versioner för befintliga bilder
+köas med `manage.py process_image_derivatives --backfill`.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from axes.models import ImageDerivativeJob
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MODELS = ("axes.AxeImage", "axes.ManufacturerImage", "axes.StampImage")
+
+_executor = None
+_executor_lock = threading.Lock()
+_deferred = threading.local()
+
+
+def _save_webp(img, path):
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    img.save(path, "WEBP", quality=85)
+
+
+# Filändelse -> funktion som sparar den (redan rättvända) bilden
+DERIVATIVES = {
+    ".webp": _save_webp,
+}
+
+
+def derivative_path(image_path, extension=".webp"):
+    return os.path.splitext(image_path)[0] + extension
+
+
+def _is_fresh(source_path, target_path):
+    return os.path.exists(target_path) and os.path.getmtime(
+        target_path
+    ) >= os.path.getmtime(source_path)
+
+
+def missing_derivatives(image_path):
+    """Filändelser vars version saknas eller är äldre än originalet."""
+    return [
+        extension
+        for extension in DERIVATIVES
+        if not _is_fresh(image_path, derivative_path(image_path, extension))
+    ]
+
+
+def generate_derivatives(image_path, force=False):
+    """Skapar alla versioner för en bildfil. Undantag skickas vidare.
+
+    Bilden roteras enligt EXIF-orientering (telefonbilder) så att
+    versionerna visas rättvända - webbläsare auto-roterar JPEG men inte
+    WebP. Returnerar de filändelser som skapades.
+    """
+    extensions = list(DERIVATIVES) if force else missing_derivatives(image_path)
+    if not extensions:
+        return []
+    with Image.open(image_path) as original:
+        img = ImageOps.exif_transpose(original)
+        for extension in extensions:
+            DERIVATIVES[extension](img, derivative_path(image_path, extension))
+    return extensions
+
+
+def _label(instance):
+    return instance._meta.label
+
+
+def enqueue_image_derivatives(instance):
+    """Lägger (om) bildens jobb i kö. Anropas från bildmodellernas save()."""
+    if not instance.pk or not instance.image or not instance.image.name:
+        return None
+    pending = getattr(_deferred, "pending", None)
+    if pending is not None:
+        pending[(_label(instance), instance.pk)] = None
+        return None
+    job, _ = ImageDerivativeJob.objects.update_or_create(
+        model_label=_label(instance),
+        object_id=instance.pk,
+        defaults={"image_name": instance.image.name, "status": "PENDING", "error": ""},
+    )
+
+    mode = getattr(settings, "IMAGE_DERIVATIVE_MODE", "thread")
+    if mode == "sync":
+        process_job(job.pk)
+    elif mode == "thread":
+        transaction.on_commit(lambda: _submit(job.pk))
+    return job
+
+
+@contextmanager
+def deferred():
+    """Samlar bilderna som sparas i blocket och köar dem en gång när blocket
+    är klart, med bildens slutliga filnamn.
+
+    Utan ATOMIC_REQUESTS körs on_commit direkt, så en worker-tråd kunde
+    annars börja läsa en fil som vyn höll på att döpa om. Bilder som tagits
+    bort i blocket hoppas över, och vid ett undantag köas ingenting.
+    """
+    if getattr(_deferred, "pending", None) is not None:
+        # Redan inne i ett yttre block - det köar när det är klart
+        yield
+        return
+    _deferred.pending = pending = {}
+    try:
+        yield
+    finally:
+        _deferred.pending = None
+    for label, pk in pending:
+        instance = apps.get_model(label).objects.filter(pk=pk).first()
+        if instance is not None:
+            enqueue_image_derivatives(instance)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "IMAGE_DERIVATIVE_WORKERS", 2),
+                thread_name_prefix="image-derivatives",
+            )
+        return _executor
+
+
+def _submit(job_id):
+    _get_executor().submit(_process_in_thread, job_id)
+
+
+def _process_in_thread(job_id):
+    try:
+        process_job(job_id)
+    except Exception:
+        logger.exception("Bildbearbetning misslyckades för jobb %s", job_id)
+    finally:
+        # Trådens egen databasanslutning stängs när jobbet är klart
+        close_old_connections()
+
+
+def process_job(job_id):
+    """Kör ett jobb. Returnerar True om det kördes av den här anroparen.
+
+    Jobbet reserveras med en villkorad UPDATE, så samma jobb kan inte köras
+    av två trådar/workers samtidigt.
+    """
+    claimed = ImageDerivativeJob.objects.filter(pk=job_id, status="PENDING").update(
+        status="PROCESSING", updated_at=timezone.now()
+    )
+    if not claimed:
+        return False
+
+    job = ImageDerivativeJob.objects.get(pk=job_id)
+    model = apps.get_model(job.model_label)
+    instance = model.objects.filter(pk=job.object_id).first()
+    if instance is None or not instance.image or not instance.image.name:
+        # Bilden har tagits bort efter att jobbet köades
+        job.delete()
+        return True
+
+    try:
+        generate_derivatives(instance.image.path)
+    except Exception as exc:
+        logger.warning(
+            "Kunde inte skapa bildversioner för %s #%s: %s",
+            job.model_label,
+            job.object_id,
+            exc,
+        )
+        # Filtret på PROCESSING gör att ett jobb som köats om under tiden
+        # (bilden sparades igen) ligger kvar som PENDING och körs en gång till
+        ImageDerivativeJob.objects.filter(pk=job_id, status="PROCESSING").update(
+            status="FAILED",
+            attempts=job.attempts + 1,
+            error=str(exc),
+            updated_at=timezone.now(),
+        )
+    else:
+        ImageDerivativeJob.objects.filter(pk=job_id, status="PROCESSING").update(
+            status="DONE",
+            attempts=job.attempts + 1,
+            error="",
+            image_name=instance.image.name,
+            updated_at=timezone.now(),
+        )
+    return True
+
+
+def process_pending_jobs(limit=None):
+    """Kör väntande jobb i köordning. Returnerar antalet körda jobb."""
+    job_ids = ImageDerivativeJob.objects.filter(status="PENDING").values_list(
+        "pk", flat=True
+    )
+    if limit:
+        job_ids = job_ids[:limit]
+    return sum(1 for job_id in list(job_ids) if process_job(job_id))
+
+
+def retry_failed_jobs():
+    return ImageDerivativeJob.objects.filter(status="FAILED").update(
+        status="PENDING", updated_at=timezone.now()
+    )
+
+
+def reset_stale_jobs(older_than):
+    """Jobb som fastnat i PROCESSING (t.ex. om processen dog) köas om."""
+    return ImageDerivativeJob.objects.filter(
+        status="PROCESSING", updated_at__lt=timezone.now() - older_than
+    ).update(status="PENDING")
+
+
+def backfill_missing_derivatives():
+    """Köar jobb för alla bilder vars versioner saknas på disk.
+
+    Returnerar antalet köade jobb. Jobben körs inte här, utan av
+    process_pending_jobs (eller trådpoolen).
+    """
+    queued = 0
+    for label in IMAGE_MODELS:
+        model = apps.get_model(label)
+        images = model.objects.exclude(image="").exclude(image__isnull=True)
+        for pk, name in images.values_list("pk", "image").iterator():
+            path = os.path.join(settings.MEDIA_ROOT, name)
+            if not os.path.exists(path) or not missing_derivatives(path):
+                continue
+            ImageDerivativeJob.objects.update_or_create(
+                model_label=label,
+                object_id=pk,
+                defaults={"image_name": name, "status": "PENDING", "error": ""},
+            )
+            queued += 1
+    return queued
@@ -0,0 +1,142 @@
+"""Nedskalade WebP-varianter av bilder för listor, gallerier och stämpelsidor.
+
+Telefonbilder är ofta 4000 px breda, men listor och gallerier visar dem i
+några hundra pixlar. Varianterna finns i en fast uppsättning bredder
+(VARIANT_WIDTHS) och sparas under MEDIA_ROOT/variants/<bredd>/ med samma
+relativa sökväg som originalet. De skapas först när de efterfrågas (vyn
+image_variant) och återanvänds sedan direkt från disk så länge de är
+nyare än originalet. Template-taggarna i axe_filters (image_variant_url,
+image_srcset) väljer mellan färdig fil och generering via vyn.
+"""
+
+import os
+import threading
+
+from django.conf import settings
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+VARIANT_WIDTHS = (160, 480, 1024)
+VARIANT_ROOT = "variants"
+
+# URL-nyckel -> modell, för vyn som skapar varianter vid behov
+VARIANT_MODELS = {
+    "yxa": "axes.AxeImage",
+    "tillverkare": "axes.ManufacturerImage",
+    "stampel": "axes.StampImage",
+}
+_KEYS_BY_LABEL = {label: key for key, label in VARIANT_MODELS.items()}
+
+
+def variant_name(image_name, width):
+    """Variantens namn relativt MEDIA_ROOT."""
+    base = os.path.splitext(image_name)[0]
+    return f"{VARIANT_ROOT}/{width}/{base}.webp"
+
+
+def _variant_path(image_name, width):
+    return os.path.join(settings.MEDIA_ROOT, variant_name(image_name, width))
+
+
+def _source_path(image_name):
+    return os.path.join(settings.MEDIA_ROOT, image_name)
+
+
+def variant_is_fresh(image_name, width):
+    """True om varianten finns och är nyare än originalet.
+
+    Bildfilerna byter namn när bildordningen ändras, så ett gammalt
+    variantnamn kan peka på en annan bild - därför jämförs mtime.
+    """
+    variant_path = _variant_path(image_name, width)
+    try:
+        return os.path.getmtime(variant_path) >= os.path.getmtime(
+            _source_path(image_name)
+        )
+    except OSError:
+        return False
+
+
+def generate_variant(image_name, width):
+    """Skapar varianten om den saknas eller är inaktuell. Returnerar sökvägen.
+
+    Bilden roteras enligt EXIF-orientering och skalas aldrig upp.
+    """
+    variant_path = _variant_path(image_name, width)
+    if variant_is_fresh(image_name, width):
+        return variant_path
+
+    os.makedirs(os.path.dirname(variant_path), exist_ok=True)
+    with Image.open(_source_path(image_name)) as original:
+        img = ImageOps.exif_transpose(original)
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        # Skriv till temporär fil först så att en halvfärdig variant aldrig
+        # serveras av en parallell request
+        tmp_path = f"{variant_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        img.save(tmp_path, "WEBP", quality=80)
+    os.replace(tmp_path, variant_path)
+    return variant_path
+
+
+def delete_variants(image_name):
+    for width in VARIANT_WIDTHS:
+        try:
+            os.remove(_variant_path(image_name, width))
+        except OSError:
+            pass
+
+
+def pick_width(display_width):
+    """Minsta variantbredd som räcker för display_width, eller None om
+    originalet behövs."""
+    for width in VARIANT_WIDTHS:
+        if width >= display_width:
+            return width
+    return None
+
+
+def cached_variant_url(image, width):
+    """URL till den cachade variantfilen, med cache-busting."""
+    timestamp = int(image.cache_busting_timestamp.timestamp())
+    name = variant_name(image.image.name, width)
+    return f"{settings.MEDIA_URL}{name}?v={timestamp}"
+
+
+def variant_url(image, width):
+    """URL till en variant av bilden (AxeImage/ManufacturerImage/StampImage).
+
+    Färdiga varianter länkas direkt under MEDIA_URL. Annars pekar URL:en på
+    vyn image_variant som skapar varianten och skickar vidare till den.
+    """
+    if not image or not image.image or not image.image.name:
+        return None
+    if variant_is_fresh(image.image.name, width):
+        return cached_variant_url(image, width)
+    key = _KEYS_BY_LABEL[image._meta.label]
+    return reverse("image_variant", args=[key, image.pk, width])
+
+
+def _original_width(image):
+    try:
+        # Läser bara filhuvudet, inte hela bilden
+        return image.image.width
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def srcset(image, full_size_url=None):
+    """srcset-värde med alla varianter, minst först.
+
+    Med full_size_url läggs originalet (eller dess WebP) till sist när det
+    är bredare än största varianten, så att stora skärmar får full upplösning.
+    """
+    candidates = [(variant_url(image, width), width) for width in VARIANT_WIDTHS]
+    if full_size_url:
+        original_width = _original_width(image)
+        if original_width and original_width > VARIANT_WIDTHS[-1]:
+            candidates.append((full_size_url, original_width))
+    return ", ".join(f"{url} {width}w" for url, width in candidates if url)
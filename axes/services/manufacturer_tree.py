@@ -0,0 +1,205 @@
+"""Tillverkarhierarkin som closure-tabell (ManufacturerClosure).
+
+Tabellen har en rad per par (förfader, ättling) med avståndet mellan dem,
+inklusive varje tillverkare som sin egen förfader på avstånd 0. "Alla
+undertillverkare till X" och "alla yxor i X:s delträd" blir därmed en
+indexerad join i stället för en query per nod i trädet, och hierarkinivån
+är största avståndet till en förfader.
+
+Tabellen underhålls av signalerna i axes/signals.py när en tillverkare
+skapas, flyttas (ny parent) eller tas bort. rebuild_closure bygger om den
+från parent-fälten (manage.py rebuild_manufacturer_closure).
+"""
+
+from django.db import transaction
+from django.db.models import Max
+
+from axes.models import Axe, Manufacturer, ManufacturerClosure, Transaction
+
+# --- Frågor ---
+
+
+def subtree(manufacturer, include_self=True):
+    """Tillverkaren och alla dess undertillverkare (rekursivt)."""
+    queryset = Manufacturer.objects.filter(ancestor_links__ancestor=manufacturer)
+    if not include_self:
+        queryset = queryset.filter(ancestor_links__depth__gt=0)
+    return queryset
+
+
+def descendants(manufacturer):
+    """Alla undertillverkare (rekursivt), närmast först och sedan på namn."""
+    return Manufacturer.objects.filter(
+        ancestor_links__ancestor=manufacturer, ancestor_links__depth__gt=0
+    ).order_by("ancestor_links__depth", "name")
+
+
+def ancestors(manufacturer):
+    """Alla överordnade tillverkare, närmaste först."""
+    return Manufacturer.objects.filter(
+        descendant_links__descendant=manufacturer, descendant_links__depth__gt=0
+    ).order_by("descendant_links__depth")
+
+
+def subtree_axes(manufacturer):
+    """Yxor från tillverkaren och alla dess undertillverkare."""
+    return Axe.objects.filter(manufacturer__ancestor_links__ancestor=manufacturer)
+
+
+def subtree_transactions(manufacturer):
+    """Transaktioner för yxor från tillverkaren och dess undertillverkare."""
+    return Transaction.objects.filter(
+        axe__manufacturer__ancestor_links__ancestor=manufacturer
+    )
+
+
+def is_descendant(manufacturer, ancestor):
+    """True om manufacturer ligger under ancestor i hierarkin."""
+    return ManufacturerClosure.objects.filter(
+        ancestor=ancestor, descendant=manufacturer, depth__gt=0
+    ).exists()
+
+
+def hierarchy_level(manufacturer):
+    """Antal nivåer under huvudtillverkaren (0 för en huvudtillverkare)."""
+    if manufacturer.parent_id is None:
+        return 0
+    level = manufacturer.ancestor_links.aggregate(level=Max("depth"))["level"]
+    return level or 0
+
+
+def hierarchy_levels():
+    """{tillverkar-id: hierarkinivå} för alla tillverkare i en query."""
+    return dict(
+        ManufacturerClosure.objects.values("descendant_id")
+        .annotate(level=Max("depth"))
+        .values_list("descendant_id", "level")
+    )
+
+
+def sort_hierarchically(manufacturers, root=None):
+    """Sorterar tillverkare som trädet visas: varje huvudtillverkare följd av
+    sina undertillverkare, syskon i namnordning.
+
+    Med root sorteras i stället root:s undertillverkare, med root:s barn
+    överst. Tillverkare vars förälder inte finns i listan (och inte är root)
+    utelämnas (liksom hela deras delträd). Varje tillverkares .parent sätts till objektet i listan,
+    så att mallfilter som går uppåt i trädet inte behöver fråga databasen.
+    """
+    manufacturers = list(manufacturers)
+    by_id = {manufacturer.id: manufacturer for manufacturer in manufacturers}
+    children = {}
+    for manufacturer in manufacturers:
+        if manufacturer.parent_id in by_id:
+            manufacturer.parent = by_id[manufacturer.parent_id]
+        elif root is not None and manufacturer.parent_id == root.id:
+            manufacturer.parent = root
+        children.setdefault(manufacturer.parent_id, []).append(manufacturer)
+
+    sorted_list = []
+
+    def add_children(parent_id):
+        for child in sorted(children.get(parent_id, []), key=lambda m: m.name):
+            sorted_list.append(child)
+            add_children(child.id)
+
+    add_children(root.id if root is not None else None)
+    return sorted_list
+
+
+# --- Underhåll ---
+
+
+def insert_node(manufacturer):
+    """Lägger till en ny tillverkare under sin parent."""
+    links = [
+        ManufacturerClosure(
+            ancestor_id=manufacturer.pk, descendant_id=manufacturer.pk, depth=0
+        )
+    ]
+    if manufacturer.parent_id is not None:
+        links.extend(
+            ManufacturerClosure(
+                ancestor_id=link.ancestor_id,
+                descendant_id=manufacturer.pk,
+                depth=link.depth + 1,
+            )
+            for link in ManufacturerClosure.objects.filter(
+                descendant_id=manufacturer.parent_id
+            )
+        )
+    ManufacturerClosure.objects.bulk_create(links, ignore_conflicts=True)
+
+
+def detach_subtree(manufacturer):
+    """Kopplar loss tillverkarens delträd från alla dess förfäder."""
+    subtree_ids = list(
+        ManufacturerClosure.objects.filter(ancestor=manufacturer).values_list(
+            "descendant_id", flat=True
+        )
+    )
+    ancestor_ids = list(
+        ManufacturerClosure.objects.filter(
+            descendant=manufacturer, depth__gt=0
+        ).values_list("ancestor_id", flat=True)
+    )
+    ManufacturerClosure.objects.filter(
+        descendant_id__in=subtree_ids, ancestor_id__in=ancestor_ids
+    ).delete()
+
+
+def move_subtree(manufacturer):
+    """Flyttar tillverkaren och dess delträd till manufacturer.parent_id."""
+    with transaction.atomic():
+        links = ManufacturerClosure.objects.filter(ancestor=manufacturer)
+        if not links.exists():
+            # Tillverkaren saknas i tabellen (t.ex. skapad via raw/fixture)
+            rebuild_closure()
+            return
+        if links.filter(descendant_id=manufacturer.parent_id).exists():
+            raise ValueError(
+                f"{manufacturer} kan inte flyttas till sin egen undertillverkare"
+            )
+        detach_subtree(manufacturer)
+        if manufacturer.parent_id is None:
+            return
+        subtree_links = list(links.values_list("descendant_id", "depth"))
+        new_links = [
+            ManufacturerClosure(
+                ancestor_id=parent_link.ancestor_id,
+                descendant_id=descendant_id,
+                depth=parent_link.depth + depth + 1,
+            )
+            for parent_link in ManufacturerClosure.objects.filter(
+                descendant_id=manufacturer.parent_id
+            )
+            for descendant_id, depth in subtree_links
+        ]
+        ManufacturerClosure.objects.bulk_create(new_links, ignore_conflicts=True)
+
+
+def rebuild_closure():
+    """Bygger om hela tabellen från parent-fälten. Returnerar antal rader.
+
+    Cykler i parent-kedjan (som aldrig ska förekomma) bryts vid första
+    återbesöket i stället för att loopa.
+    """
+    parents = dict(Manufacturer.objects.values_list("id", "parent_id"))
+    links = []
+    for manufacturer_id in parents:
+        depth = 0
+        current = manufacturer_id
+        seen = set()
+        while current is not None and current in parents and current not in seen:
+            seen.add(current)
+            links.append(
+                ManufacturerClosure(
+                    ancestor_id=current, descendant_id=manufacturer_id, depth=depth
+                )
+            )
+            current = parents[current]
+            depth += 1
+    with transaction.atomic():
+        ManufacturerClosure.objects.all().delete()
+        ManufacturerClosure.objects.bulk_create(links, batch_size=500)
+    return len(links)
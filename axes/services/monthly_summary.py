@@ -0,0 +1,171 @@
+"""Underhåll av MonthlyTransactionSummary - statistiksidans månadssummering.
+
+Signal-handlers i axes/signals.py anropar apply_transaction_change vid
+varje sparad eller borttagen transaktion. Bara de berörda månadsraderna
+(och de löpande summorna för senare månader) uppdateras, med F-uttryck i
+databasen. rebuild_monthly_summary bygger om hela tabellen från
+transaktionerna och används av management-kommandot med samma namn, t.ex.
+efter massimport som gått förbi signalerna.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils.dateparse import parse_date
+
+from axes.models import MonthlyTransactionSummary, Transaction
+
+
+def _to_date(value):
+    # Vyer kan sätta transaction_date direkt från POST-data (sträng)
+    if isinstance(value, str):
+        return parse_date(value)
+    return value
+
+
+def _to_decimal(value):
+    if value is None:
+        return Decimal("0")
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def transaction_state(transaction_date, transaction_type, price, shipping_cost):
+    """Det som behövs för att räkna ut en transaktions bidrag till
+    summeringen, eller None om datumet saknas."""
+    transaction_date = _to_date(transaction_date)
+    if not transaction_date or transaction_type not in ("KÖP", "SÄLJ"):
+        return None
+    return (
+        transaction_date.replace(day=1),
+        transaction_type,
+        _to_decimal(price),
+        _to_decimal(shipping_cost),
+    )
+
+
+def state_of(instance):
+    return transaction_state(
+        instance.transaction_date,
+        instance.type,
+        instance.price,
+        instance.shipping_cost,
+    )
+
+
+def _add_contribution(deltas, state, sign):
+    month, transaction_type, price, shipping_cost = state
+    prefix = "buy" if transaction_type == "KÖP" else "sale"
+    month_deltas = deltas[month]
+    month_deltas[f"{prefix}_count"] += sign
+    month_deltas[f"{prefix}_value"] += sign * price
+    month_deltas[f"{prefix}_shipping"] += sign * shipping_cost
+
+
+def apply_transaction_change(old_state, new_state):
+    """Flyttar en transaktions bidrag från old_state till new_state.
+
+    old_state är None för nya transaktioner, new_state är None för
+    borttagna. Tillstånden kommer från transaction_state/state_of.
+    """
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    if old_state is not None:
+        _add_contribution(deltas, old_state, -1)
+    if new_state is not None:
+        _add_contribution(deltas, new_state, 1)
+
+    with transaction.atomic():
+        for month, month_deltas in sorted(deltas.items()):
+            if any(month_deltas.values()):
+                _apply_month_delta(month, month_deltas)
+
+
+def _apply_month_delta(month, month_deltas):
+    row = MonthlyTransactionSummary.objects.filter(month=month).first()
+    if row is None:
+        # Ny månad - börja från föregående månads löpande summor
+        previous = (
+            MonthlyTransactionSummary.objects.filter(month__lt=month)
+            .order_by("-month")
+            .first()
+        )
+        row = MonthlyTransactionSummary.objects.create(
+            month=month,
+            cumulative_buys=previous.cumulative_buys if previous else 0,
+            collection_size=previous.collection_size if previous else 0,
+        )
+
+    buys = int(month_deltas["buy_count"])
+    sales = int(month_deltas["sale_count"])
+    MonthlyTransactionSummary.objects.filter(pk=row.pk).update(
+        buy_count=F("buy_count") + buys,
+        sale_count=F("sale_count") + sales,
+        buy_value=F("buy_value") + month_deltas["buy_value"],
+        sale_value=F("sale_value") + month_deltas["sale_value"],
+        buy_shipping=F("buy_shipping") + month_deltas["buy_shipping"],
+        sale_shipping=F("sale_shipping") + month_deltas["sale_shipping"],
+    )
+
+    collection = buys - sales
+    if buys or collection:
+        MonthlyTransactionSummary.objects.filter(month__gte=month).update(
+            cumulative_buys=F("cumulative_buys") + buys,
+            collection_size=F("collection_size") + collection,
+        )
+
+    # Månader utan transaktioner visas inte i graferna
+    MonthlyTransactionSummary.objects.filter(
+        pk=row.pk, buy_count=0, sale_count=0
+    ).delete()
+
+
+def rebuild_monthly_summary():
+    """Bygger om hela månadssummeringen från transaktionerna.
+
+    En grupperad query över transaktionerna, löpande summor i Python och
+    en bulk_create. Returnerar antalet månadsrader.
+    """
+    buy = Q(type="KÖP")
+    sale = Q(type="SÄLJ")
+    zero = Decimal("0")
+    months = (
+        Transaction.objects.annotate(month=TruncMonth("transaction_date"))
+        .values("month")
+        .annotate(
+            buy_count=Count("id", filter=buy),
+            sale_count=Count("id", filter=sale),
+            buy_value=Coalesce(
+                Sum("price", filter=buy), zero, output_field=DecimalField()
+            ),
+            sale_value=Coalesce(
+                Sum("price", filter=sale), zero, output_field=DecimalField()
+            ),
+            buy_shipping=Coalesce(
+                Sum("shipping_cost", filter=buy), zero, output_field=DecimalField()
+            ),
+            sale_shipping=Coalesce(
+                Sum("shipping_cost", filter=sale), zero, output_field=DecimalField()
+            ),
+        )
+        .order_by("month")
+    )
+
+    rows = []
+    cumulative_buys = 0
+    collection_size = 0
+    for values in months:
+        if not values["buy_count"] and not values["sale_count"]:
+            continue
+        cumulative_buys += values["buy_count"]
+        collection_size += values["buy_count"] - values["sale_count"]
+        values.update(cumulative_buys=cumulative_buys, collection_size=collection_size)
+        rows.append(MonthlyTransactionSummary(**values))
+
+    with transaction.atomic():
+        MonthlyTransactionSummary.objects.all().delete()
+        MonthlyTransactionSummary.objects.bulk_create(rows)
+    return len(rows)
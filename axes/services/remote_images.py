@@ -0,0 +1,172 @@
+"""Hämtning av yxbilder från URL:er (inklistrade länkar och auktionsbilder).
+
+Tidigare hämtade varje vy bilderna en i taget med requests.get och höll
+hela svaret i minnet, så en auktion med tolv bilder kunde låsa requesten i
+minuter. Här hämtas bilderna parallellt (REMOTE_IMAGE_WORKERS trådar) via
+den delade HTTP-klienten i axes/utils/http_client.py, med dess
+anslutningspool och gränser per värd. Svaren strömmas till temporära
+filer och avbryts om de inte är bilder eller blir större än
+REMOTE_IMAGE_MAX_BYTES. AxeImage-raderna skapas sedan i anroparens tråd i
+samma ordning som URL:erna, så bildordningen blir densamma som förut.
+
+ingest_axe_images returnerar ett resultat per URL så att vyn kan berätta
+vilka bilder som inte gick att hämta.
+"""
+
+import logging
+import os
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.files import File
+
+from axes.models import AxeImage
+from axes.utils import http_client
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = 15
+CHUNK_SIZE = 64 * 1024
+
+CONTENT_TYPE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+
+class ImageDownloadError(Exception):
+    """Bilden kunde inte hämtas (fel status, inte en bild, för stor)."""
+
+
+def _workers():
+    return getattr(settings, "REMOTE_IMAGE_WORKERS", 4)
+
+
+def _max_bytes():
+    return getattr(settings, "REMOTE_IMAGE_MAX_BYTES", 20 * 1024 * 1024)
+
+
+def _extension(url, content_type):
+    extension = os.path.splitext(urlparse(url).path)[1]
+    if extension:
+        return extension.lower()
+    return CONTENT_TYPE_EXTENSIONS.get(content_type, ".jpg")
+
+
+def download(url, max_bytes=None):
+    """Strömmar en bild till en temporär fil.
+
+    Returnerar (fil, filändelse) med filen spolad till början; anroparen
+    stänger filen. Kastar ImageDownloadError eller requests-undantag.
+    """
+    max_bytes = max_bytes or _max_bytes()
+    response = http_client.get(url, timeout=TIMEOUT, stream=True)
+    try:
+        if response.status_code != 200:
+            raise ImageDownloadError(f"HTTP {response.status_code}")
+
+        content_type = (
+            response.headers.get("content-type", "").split(";")[0].strip().lower()
+        )
+        if content_type and not content_type.startswith("image/"):
+            raise ImageDownloadError(f"Inte en bild ({content_type})")
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise ImageDownloadError(f"För stor ({declared} byte)")
+
+        tmp = tempfile.TemporaryFile()
+        try:
+            size = 0
+            for chunk in response.iter_content(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageDownloadError(f"För stor (över {max_bytes} byte)")
+                tmp.write(chunk)
+            if not size:
+                raise ImageDownloadError("Tomt svar")
+            tmp.seek(0)
+        except BaseException:
+            tmp.close()
+            raise
+        return tmp, _extension(url, content_type)
+    finally:
+        response.close()
+
+
+def download_all(urls, max_workers=None, max_bytes=None):
+    """Hämtar alla URL:er parallellt.
+
+    Returnerar en lista i samma ordning som urls med (fil, filändelse,
+    felmeddelande) per URL, där fil och filändelse är None vid fel.
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+    workers = max(1, min(max_workers or _workers(), len(urls)))
+
+    def fetch(url):
+        try:
+            tmp, extension = download(url, max_bytes)
+            return tmp, extension, None
+        except Exception as e:
+            return None, None, str(e) or e.__class__.__name__
+
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="remote-image"
+    ) as executor:
+        return list(executor.map(fetch, urls))
+
+
+def ingest_axe_images(axe, urls, start_order=None, description=None):
+    """Hämtar bilderna i urls och sparar dem som AxeImage på axe.
+
+    Poster som inte är http(s)-URL:er hoppas över. Med start_order får
+    bilden på position i (från 1) ordningen start_order + i, annars lämnas
+    ordningen åt modellen. description är en formatsträng som får
+    positionen som {index}.
+
+    Returnerar en lista med {"url", "image", "error"} per hämtad URL, i
+    samma ordning som urls.
+    """
+    positions = [
+        (index, url)
+        for index, url in enumerate(urls, 1)
+        if url and url.startswith("http")
+    ]
+    downloads = download_all([url for _, url in positions])
+
+    results = []
+    for (index, url), (tmp, extension, error) in zip(positions, downloads):
+        image = None
+        if tmp is not None:
+            try:
+                filename = f"{axe.id}_{uuid.uuid4().hex[:8]}{extension}"
+                image = AxeImage(axe=axe, image=File(tmp, name=filename))
+                if start_order is not None:
+                    image.order = start_order + index
+                if description:
+                    image.description = description.format(index=index)
+                image.save()
+            except Exception as e:
+                logger.exception(
+                    "Fel vid sparning av URL-bild för yxa %s: %s", axe.id, url
+                )
+                image, error = None, str(e) or e.__class__.__name__
+            finally:
+                tmp.close()
+        if error:
+            logger.warning(
+                "Kunde inte hämta bild för yxa %s från %s: %s", axe.id, url, error
+            )
+        results.append({"url": url, "image": image, "error": error})
+    return results
+
+
+def failed_urls(results):
+    return [result["url"] for result in results if result["error"]]
@@ -0,0 +1,74 @@
+"""Löpande svarstider per vy för RequestTimingMiddleware.
+
+Varje request registreras under sitt URL-namn med total tid, DB-tid,
+mallrenderingstid och antal SQL-frågor. De senaste REQUEST_TIMING_WINDOW
+requesterna per URL-namn sparas i processen, och snapshot() räknar fram
+percentilerna som visas på prestandasidan. Värdena gäller bara den egna
+processen och nollställs vid omstart.
+"""
+
+import threading
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_samples = {}
+_counts = defaultdict(int)
+
+
+def _window():
+    return getattr(settings, "REQUEST_TIMING_WINDOW", 500)
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def record(name, total_ms, db_ms, template_ms, queries):
+    with _lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = deque(maxlen=_window())
+        samples.append((total_ms, db_ms, template_ms, queries))
+        _counts[name] += 1
+
+
+def snapshot():
+    """Percentiler per URL-namn, långsammast (p95) först.
+
+    Tider i ms. "requests" är antalet sedan start, percentilerna och
+    medelvärdena gäller de sparade requesterna ("samples").
+    """
+    with _lock:
+        data = {name: list(samples) for name, samples in _samples.items()}
+        counts = dict(_counts)
+
+    rows = []
+    for name, samples in data.items():
+        totals = [sample[0] for sample in samples]
+        rows.append(
+            {
+                "name": name,
+                "requests": counts[name],
+                "samples": len(samples),
+                "p50_ms": round(_percentile(totals, 0.5), 1),
+                "p95_ms": round(_percentile(totals, 0.95), 1),
+                "p99_ms": round(_percentile(totals, 0.99), 1),
+                "max_ms": round(max(totals), 1),
+                "avg_db_ms": round(sum(s[1] for s in samples) / len(samples), 1),
+                "avg_template_ms": round(sum(s[2] for s in samples) / len(samples), 1),
+                "avg_queries": round(sum(s[3] for s in samples) / len(samples), 1),
+                "max_queries": max(sample[3] for sample in samples),
+            }
+        )
+    rows.sort(key=lambda row: row["p95_ms"], reverse=True)
+    return rows
+
+
+def clear():
+    with _lock:
+        _samples.clear()
+        _counts.clear()
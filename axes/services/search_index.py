@@ -0,0 +1,260 @@
+"""Fulltextindex (SQLite FTS5) för den globala sökningen i headern.
+
+Tabellen axes_search_index skapas av en migration och innehåller ett
+dokument per yxa, kontakt, tillverkare, transaktion och stämpel:
+
+- kind, object_id, status: oindexerade kolumner för att hitta objektet och
+  för publik filtrering (bara mottagna yxor).
+- title, body: sökbar text.
+- contact, platform: transaktionens kontakt/plattform i egna kolumner, så
+  att de kan uteslutas ur sökningen när de inte visas publikt.
+
+Dokumenten hålls uppdaterade av signal-handlers i axes/signals.py. Ändringar
+som går förbi signalerna (queryset.update, massimport) repareras med
+`manage.py rebuild_search_index`. På andra databaser än SQLite finns ingen
+tabell, och global_search använder då de gamla icontains-frågorna.
+"""
+
+import re
+from collections import defaultdict
+
+from django.db import connection
+
+from axes.models import (
+    Axe,
+    Contact,
+    Manufacturer,
+    Stamp,
+    StampTranscription,
+    Transaction,
+)
+
+TABLE = "axes_search_index"
+KINDS = ("axe", "contact", "manufacturer", "transaction", "stamp")
+RESULTS_PER_KIND = 5
+# Vikter per kolumn för bm25 (kind, object_id, status, title, body, contact,
+# platform) - träff i titeln väger tyngst
+_BM25_WEIGHTS = "0, 0, 0, 10.0, 1.0, 2.0, 2.0"
+
+_available = False
+
+
+def is_available():
+    """True om FTS5-tabellen finns. Ett positivt svar cachas i processen."""
+    global _available
+    if not _available and connection.vendor == "sqlite":
+        _available = TABLE in connection.introspection.table_names()
+    return _available
+
+
+# --- Dokument ---
+
+
+def _join(*parts):
+    return " ".join(part for part in parts if part)
+
+
+def _axe_document(axe):
+    title = _join(axe.manufacturer.name, axe.model)
+    return ("axe", axe.pk, axe.status, title, axe.comment or "", "", "")
+
+
+def _contact_document(contact):
+    body = _join(contact.alias, contact.email)
+    return ("contact", contact.pk, "", contact.name, body, "", "")
+
+
+def _manufacturer_document(manufacturer):
+    body = manufacturer.information or ""
+    return ("manufacturer", manufacturer.pk, "", manufacturer.name, body, "", "")
+
+
+def _transaction_document(transaction):
+    axe = transaction.axe
+    return (
+        "transaction",
+        transaction.pk,
+        "",
+        _join(axe.manufacturer.name, axe.model) if axe else "",
+        "",
+        transaction.contact.name if transaction.contact else "",
+        transaction.platform.name if transaction.platform else "",
+    )
+
+
+def _stamp_documents(stamps):
+    stamps = list(stamps)
+    texts = defaultdict(list)
+    transcriptions = StampTranscription.objects.filter(stamp__in=stamps).exclude(
+        text__isnull=True
+    )
+    for stamp_id, text in transcriptions.values_list("stamp_id", "text"):
+        texts[stamp_id].append(text)
+    return [
+        (
+            "stamp",
+            stamp.pk,
+            "",
+            stamp.name,
+            _join(
+                stamp.description,
+                stamp.manufacturer.name if stamp.manufacturer else "",
+                *texts[stamp.pk],
+            ),
+            "",
+            "",
+        )
+        for stamp in stamps
+    ]
+
+
+def _axe_documents(axes):
+    return [_axe_document(axe) for axe in axes.select_related("manufacturer")]
+
+
+def _contact_documents(contacts):
+    return [_contact_document(contact) for contact in contacts]
+
+
+def _manufacturer_documents(manufacturers):
+    return [_manufacturer_document(manufacturer) for manufacturer in manufacturers]
+
+
+def _transaction_documents(transactions):
+    transactions = transactions.select_related(
+        "axe__manufacturer", "contact", "platform"
+    )
+    return [_transaction_document(transaction) for transaction in transactions]
+
+
+_INSERT = (
+    f"INSERT INTO {TABLE} (kind, object_id, status, title, body, contact, platform) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s)"
+)
+
+
+def _replace(kind, ids, documents):
+    """Byter ut dokumenten för ids (borttagna objekt får inget nytt)."""
+    ids = list(ids)
+    if not ids or not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {TABLE} WHERE kind = %s AND object_id = %s",
+            [(kind, object_id) for object_id in ids],
+        )
+        if documents:
+            cursor.executemany(_INSERT, documents)
+
+
+# --- Uppdatering från signalerna ---
+
+
+def index_axes(ids):
+    ids = list(ids)
+    _replace("axe", ids, _axe_documents(Axe.objects.filter(pk__in=ids)))
+
+
+def index_contacts(ids):
+    ids = list(ids)
+    _replace("contact", ids, _contact_documents(Contact.objects.filter(pk__in=ids)))
+
+
+def index_manufacturers(ids):
+    ids = list(ids)
+    _replace(
+        "manufacturer",
+        ids,
+        _manufacturer_documents(Manufacturer.objects.filter(pk__in=ids)),
+    )
+
+
+def index_transactions(ids):
+    ids = list(ids)
+    _replace(
+        "transaction",
+        ids,
+        _transaction_documents(Transaction.objects.filter(pk__in=ids)),
+    )
+
+
+def index_stamps(ids):
+    ids = list(ids)
+    stamps = Stamp.objects.filter(pk__in=ids).select_related("manufacturer")
+    _replace("stamp", ids, _stamp_documents(stamps))
+
+
+def remove(kind, object_id):
+    _replace(kind, [object_id], [])
+
+
+def rebuild_search_index():
+    """Bygger om hela indexet. Returnerar antalet dokument."""
+    documents = (
+        _axe_documents(Axe.objects.all())
+        + _contact_documents(Contact.objects.all())
+        + _manufacturer_documents(Manufacturer.objects.all())
+        + _transaction_documents(Transaction.objects.all())
+        + _stamp_documents(Stamp.objects.select_related("manufacturer"))
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        cursor.executemany(_INSERT, documents)
+    return len(documents)
+
+
+# --- Sökning ---
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(query, columns):
+    """FTS5-uttryck där varje ord i query matchas som prefix i columns.
+
+    Användarens text citeras ord för ord, så operatorer och specialtecken
+    (AND, *, ", :) tolkas aldrig som FTS5-syntax.
+    """
+    tokens = _TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    terms = " ".join(f'"{token}"*' for token in tokens)
+    return f"{{{' '.join(columns)}}} : ({terms})"
+
+
+def search(query, kinds, columns, only_received_axes=False):
+    """Rankade träffar, högst RESULTS_PER_KIND per typ, i EN query.
+
+    Returnerar {kind: [object_id, ...]} med bästa träff först.
+    """
+    match = build_match_query(query, columns)
+    if match is None or not kinds:
+        return {}
+
+    conditions = [f"{TABLE} MATCH %s"]
+    params = [match]
+    conditions.append(f"kind IN ({', '.join(['%s'] * len(kinds))})")
+    params.extend(kinds)
+    if only_received_axes:
+        conditions.append("(kind != 'axe' OR status = 'MOTTAGEN')")
+
+    sql = f"""
+        SELECT kind, object_id FROM (
+            SELECT kind, object_id,
+                   ROW_NUMBER() OVER (PARTITION BY kind ORDER BY score) AS position
+            FROM (
+                SELECT kind, object_id, bm25({TABLE}, {_BM25_WEIGHTS}) AS score
+                FROM {TABLE}
+                WHERE {' AND '.join(conditions)}
+            )
+        )
+        WHERE position <= %s
+        ORDER BY kind, position
+    """
+    params.append(RESULTS_PER_KIND)
+
+    hits = defaultdict(list)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for kind, object_id in cursor.fetchall():
+            hits[kind].append(int(object_id))
+    return dict(hits)
@@ -0,0 +1,90 @@
+"""Processcache för värden som läses på varje sida men ändras sällan.
+
+settings_processor körs vid varje renderad sida och behöver Settings-raden
+och (för inloggade) antalet väntande kommentarer. Detaljsidorna för yxa,
+tillverkare och stämpel bygger dessutom kommentarsträdet för sitt mål, en
+gång per besökarklass (anonym/inloggad). Allt detta cachas i processen och
+töms av signal-handlers i axes/signals.py när Settings eller Comment sparas
+eller tas bort - även moderering sker via Comment.save().
+
+Signalerna når bara den egna processen. Med flera gunicorn-workers gäller
+därför också en maxålder (SITE_CACHE_TTL sekunder, standard 30), så andra
+workers ser ändringen senast efter så lång tid.
+
+Inne i en öppen databastransaktion används aldrig cachen - ett värde som
+lästs där kan rullas tillbaka (det gäller t.ex. alla Django-TestCase).
+"""
+
+import threading
+import time
+
+from django.conf import settings as django_settings
+from django.db import connection
+
+from axes.models import Comment, Settings
+from axes.services.comments import build_comment_tree
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _ttl():
+    return getattr(django_settings, "SITE_CACHE_TTL", 30)
+
+
+def _cached(key, loader):
+    if connection.in_atomic_block:
+        return loader()
+
+    now = time.monotonic()
+    entry = _cache.get(key)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+
+    value = loader()
+    with _lock:
+        _cache[key] = (value, now + _ttl())
+    return value
+
+
+def invalidate(key=None):
+    """Tömmer en nyckel, eller hela cachen om key är None."""
+    with _lock:
+        if key is None:
+            _cache.clear()
+        else:
+            _cache.pop(key, None)
+
+
+def get_site_settings():
+    """Settings-raden, delad i processen. Får inte ändras av anroparen -
+    använd Settings.get_settings() för att ändra inställningar."""
+    return _cached("settings", Settings.get_settings)
+
+
+def get_pending_comments_count():
+    return _cached(
+        "pending_comments", lambda: Comment.objects.filter(status="PENDING").count()
+    )
+
+
+def _comment_tree_key(model_name, pk, is_staff):
+    return ("comment_tree", model_name, pk, bool(is_staff))
+
+
+def get_comment_tree(target, is_staff):
+    """build_comment_tree(target, is_staff), delad i processen per mål och
+    besökarklass. Noderna delas mellan requests och får inte ändras."""
+    return _cached(
+        _comment_tree_key(target._meta.model_name, target.pk, is_staff),
+        lambda: build_comment_tree(target, is_staff),
+    )
+
+
+def invalidate_comment_tree(comment):
+    """Tömmer de cachade träden för kommentarens mål."""
+    for model_name in ("axe", "manufacturer", "stamp"):
+        pk = getattr(comment, f"{model_name}_id")
+        if pk is not None:
+            for is_staff in (False, True):
+                invalidate(_comment_tree_key(model_name, pk, is_staff))
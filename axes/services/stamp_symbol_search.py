@@ -0,0 +1,65 @@
+"""Symbolsökning för stämplar - delas av stamp_list och stamp_search.
+
+En stämpel "har" en symbol om någon av dess transkriberingar har den. Alla
+varianter av söklogiken löses med EN grupperad query mot M2M-tabellen
+mellan transkriberingar och symboler (stamp_id, antal valda symboler):
+
+- and: stämplar där antalet olika valda symboler är lika med antalet valda
+  (HAVING COUNT(DISTINCT symbol) = n)
+- or: stämplar med minst en av de valda symbolerna
+- not: stämplar som inte har någon av de valda symbolerna
+
+Tidigare byggdes en ny join per vald symbol för AND, vilket gav en n-vägs
+nästlad query plus DISTINCT över hela stämpelfrågan.
+"""
+
+from django.db.models import Count
+
+from axes.models import StampTranscription
+
+SEARCH_LOGICS = ("and", "or", "not")
+
+_Posting = StampTranscription.symbols.through
+
+
+def parse_symbol_ids(values):
+    """Symbol-id:n från GET-parametrar; ogiltiga värden ignoreras."""
+    symbol_ids = set()
+    for value in values:
+        try:
+            symbol_ids.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return sorted(symbol_ids)
+
+
+def stamp_ids_with_symbols(symbol_ids, require_all=True):
+    """Subquery (values_list) med id för stämplar som har de valda symbolerna.
+
+    Med require_all=False räcker en av symbolerna.
+    """
+    postings = _Posting.objects.filter(stampsymbol_id__in=symbol_ids).values(
+        "stamptranscription__stamp_id"
+    )
+    if require_all:
+        postings = postings.annotate(
+            symbol_count=Count("stampsymbol_id", distinct=True)
+        ).filter(symbol_count=len(set(symbol_ids)))
+    return postings.values_list("stamptranscription__stamp_id", flat=True).distinct()
+
+
+def filter_stamps_by_symbols(stamps, symbol_values, logic="and"):
+    """Filtrerar stamps på symbolerna i symbol_values enligt logic.
+
+    Okänd logik tolkas som "and" (standard i gränssnittet).
+    """
+    symbol_ids = parse_symbol_ids(symbol_values)
+    if not symbol_ids:
+        return stamps
+    if logic == "not":
+        return stamps.exclude(
+            pk__in=stamp_ids_with_symbols(symbol_ids, require_all=False)
+        )
+    return stamps.filter(
+        pk__in=stamp_ids_with_symbols(symbol_ids, require_all=logic != "or")
+    )
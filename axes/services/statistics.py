@@ -0,0 +1,102 @@
+"""Summeringar för yxlistan, transaktionslistan och kontakterna.
+
+Yx- och transaktionslistan visar samma statistik-kort (antal köp/
+försäljningar, pris- och fraktsummor, vinst) över det filtrerade urvalet.
+Här räknas allt ut med villkorad aggregering i EN query per urval, i
+stället för en .count()/.aggregate() per siffra. Kontakternas summeringar
+läggs på som annotationer, en query för hela kontaktlistan.
+"""
+
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, Max, Q, Sum
+from django.db.models.functions import Coalesce
+
+from axes.models import Axe, Contact
+
+ZERO = Decimal("0")
+
+
+def _decimal_sum(field, condition):
+    return Coalesce(Sum(field, filter=condition), ZERO, output_field=DecimalField())
+
+
+def _add_profit(totals):
+    totals["total_profit"] = totals["total_sale_value"] - totals["total_buy_value"]
+    totals["total_profit_with_shipping"] = (
+        totals["total_sale_value"] + totals["total_sale_shipping"]
+    ) - (totals["total_buy_value"] + totals["total_buy_shipping"])
+    return totals
+
+
+def transaction_totals(transactions):
+    """Summeringar över ett (filtrerat) Transaction-queryset.
+
+    Returnerar en dict med filtered_count, total_buys, total_sales,
+    total_buy_value, total_sale_value, total_buy_shipping,
+    total_sale_shipping, total_profit och total_profit_with_shipping.
+    """
+    buy = Q(type="KÖP")
+    sale = Q(type="SÄLJ")
+    totals = transactions.order_by().aggregate(
+        filtered_count=Count("id"),
+        total_buys=Count("id", filter=buy),
+        total_sales=Count("id", filter=sale),
+        total_buy_value=_decimal_sum("price", buy),
+        total_sale_value=_decimal_sum("price", sale),
+        total_buy_shipping=_decimal_sum("shipping_cost", buy),
+        total_sale_shipping=_decimal_sum("shipping_cost", sale),
+    )
+    return _add_profit(totals)
+
+
+def axe_totals(axes):
+    """Summeringar över ett (filtrerat) Axe-queryset och yxornas transaktioner.
+
+    Det filtrerade querysetet används bara som `id IN (subquery)`, så
+    eventuella joins från filtren (plattform, mått) kan inte dubblera
+    summorna. Utöver nycklarna från transaction_totals returneras
+    bought_count och received_count (yxor per status); filtered_count
+    är här antalet yxor.
+    """
+    buy = Q(transactions__type="KÖP")
+    sale = Q(transactions__type="SÄLJ")
+    totals = Axe.objects.filter(id__in=axes.order_by().values("id")).aggregate(
+        filtered_count=Count("id", distinct=True),
+        bought_count=Count("id", filter=Q(status="KÖPT"), distinct=True),
+        received_count=Count("id", filter=Q(status="MOTTAGEN"), distinct=True),
+        total_buys=Count("transactions", filter=buy),
+        total_sales=Count("transactions", filter=sale),
+        total_buy_value=_decimal_sum("transactions__price", buy),
+        total_sale_value=_decimal_sum("transactions__price", sale),
+        total_buy_shipping=_decimal_sum("transactions__shipping_cost", buy),
+        total_sale_shipping=_decimal_sum("transactions__shipping_cost", sale),
+    )
+    return _add_profit(totals)
+
+
+def contacts_with_totals(contacts=None):
+    """Kontakter annoterade med sina transaktionssummeringar.
+
+    Annotationerna har samma namn som summeringarna på Contact
+    (total_transactions, buy_count, sale_count, total_buy_value,
+    total_sale_value, total_buy_shipping, total_sale_shipping, net_value,
+    latest_transaction_date, unique_axes_count) och ersätter dem, så att
+    kontaktlistan inte gör några queries per kontakt. Kontakter utan
+    transaktioner får 0 respektive None.
+    """
+    if contacts is None:
+        contacts = Contact.objects.all()
+    buy = Q(transaction__type="KÖP")
+    sale = Q(transaction__type="SÄLJ")
+    return contacts.annotate(
+        total_transactions=Count("transaction"),
+        buy_count=Count("transaction", filter=buy),
+        sale_count=Count("transaction", filter=sale),
+        total_buy_value=_decimal_sum("transaction__price", buy),
+        total_sale_value=_decimal_sum("transaction__price", sale),
+        total_buy_shipping=_decimal_sum("transaction__shipping_cost", buy),
+        total_sale_shipping=_decimal_sum("transaction__shipping_cost", sale),
+        latest_transaction_date=Max("transaction__transaction_date"),
+        unique_axes_count=Count("transaction__axe", distinct=True),
+    ).annotate(net_value=F("total_sale_value") - F("total_buy_value"))
@@ -0,0 +1,331 @@
+"""Prestandamätning av de tunga vyerna över en stor, genererad samling.
+
+generate_test_data skapar en demosamling med några tiotal yxor, vilket
+inte säger något om hur listorna och statistiken skalar. build_dataset
+bygger i stället en deterministisk samling i storleksordningen 10 000
+yxor, 30 000 transaktioner, 2 000 stämplar och ett tillverkarträd i fyra
+nivåer. Samma frö ger samma data, så två körningar kan jämföras.
+
+run mäter varje vy i ENDPOINTS med Djangos testklient: väggtid för första
+(kalla) anropet och median/min för de följande, antal SQL-frågor och
+deras tid, samt högsta minnesanvändning (tracemalloc, i ett separat anrop
+så att mätningen inte påverkar tiderna). compare jämför två sparade
+resultat.
+
+Används av `manage.py benchmark_views`, som kör mot en egen testdatabas.
+"""
+
+import gc
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+import django
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from axes.models import (
+    Axe,
+    AxeStamp,
+    Contact,
+    Manufacturer,
+    NextAxeID,
+    Platform,
+    Stamp,
+    Transaction,
+)
+from axes.services import axe_financials, manufacturer_tree, monthly_summary
+from axes.services import search_index
+
+DEFAULT_SIZES = {
+    "axes": 10000,
+    "transactions": 30000,
+    "stamps": 2000,
+    "contacts": 1000,
+}
+# Antal barn per nod på varje nivå i tillverkarträdet (fyra nivåer)
+DEFAULT_TREE = (12, 4, 3, 2)
+
+USERNAME = "benchmark"
+BATCH_SIZE = 2000
+
+# (namn, URL-namn, GET-parametrar, inloggad)
+ENDPOINTS = [
+    ("axe_list", "axe_list", {}, True),
+    ("axe_list_public", "axe_list", {}, False),
+    (
+        "axe_list_data",
+        "axe_list_data",
+        {"draw": 1, "start": 0, "length": 50, "order[0][column]": 0},
+        True,
+    ),
+    (
+        "axe_list_data_search",
+        "axe_list_data",
+        {"draw": 1, "start": 0, "length": 50, "search[value]": "Modell 12"},
+        True,
+    ),
+    ("manufacturer_list", "manufacturer_list", {}, True),
+    ("statistics_dashboard", "statistics_dashboard", {}, True),
+    ("transaction_list", "transaction_list", {}, True),
+    ("stamp_list", "stamp_list", {}, True),
+    ("stamp_statistics", "stamp_statistics", {}, True),
+    ("contact_list_data", "contact_list_data", {"draw": 1, "length": 50}, True),
+    ("global_search", "global_search", {"q": "Hult"}, True),
+]
+
+MANUFACTURER_NAMES = [
+    "Hults Bruk",
+    "Gränsfors Bruk",
+    "Wetterlings",
+    "Säters",
+    "Mora",
+    "Kellogg",
+    "Plumb",
+    "Kelly",
+    "Collins",
+    "Mann",
+    "Billnäs",
+    "Fiskars",
+]
+AXE_MODELS = ["Modell", "Snickaryxa", "Tälja", "Klyvyxa", "Bila", "Handyxa"]
+PLATFORM_NAMES = ["Tradera", "eBay", "Blocket", "Facebook", "Auctionet", "Loppis"]
+STAMP_TYPES = ["text", "symbol", "text_symbol", "label"]
+
+
+def _batches(objects):
+    for start in range(0, len(objects), BATCH_SIZE):
+        yield objects[start : start + BATCH_SIZE]
+
+
+def _bulk(model, objects):
+    for batch in _batches(objects):
+        model.objects.bulk_create(batch)
+
+
+def build_dataset(
+    axes=DEFAULT_SIZES["axes"],
+    transactions=DEFAULT_SIZES["transactions"],
+    stamps=DEFAULT_SIZES["stamps"],
+    contacts=DEFAULT_SIZES["contacts"],
+    tree=DEFAULT_TREE,
+    seed=1,
+):
+    """Bygger samlingen i en tom databas och returnerar antal per modell.
+
+    Raderna skapas med bulk_create (förbi signalerna), så de härledda
+    tabellerna - tillverkarträdets closure, yxornas ekonomisummering,
+    månadssammanställningen och sökindexet - byggs om efteråt.
+    """
+    rng = random.Random(seed)
+
+    manufacturers = []
+    level = [None]
+    for depth, children in enumerate(tree):
+        next_level = []
+        for parent in level:
+            for index in range(children):
+                if parent is None:
+                    name = MANUFACTURER_NAMES[index % len(MANUFACTURER_NAMES)]
+                    if index >= len(MANUFACTURER_NAMES):
+                        name = f"{name} {index}"
+                else:
+                    name = f"{parent.name} {'ABCDEFGH'[index]}"
+                next_level.append(
+                    Manufacturer(
+                        name=name,
+                        parent=parent,
+                        manufacturer_type="TILLVERKARE" if depth == 0 else "SMED",
+                    )
+                )
+        # En nivå i taget så att föräldrarna har fått sina id
+        Manufacturer.objects.bulk_create(next_level)
+        manufacturers.extend(next_level)
+        level = next_level
+
+    _bulk(Platform, [Platform(name=name) for name in PLATFORM_NAMES])
+    platforms = list(Platform.objects.all())
+    _bulk(
+        Contact,
+        [
+            Contact(
+                name=f"Kontakt {index}",
+                alias=f"samlare{index}",
+                city=rng.choice(["Stockholm", "Umeå", "Malmö", "Mora", "Boston"]),
+                country_code=rng.choice(["SE", "SE", "FI", "US"]),
+            )
+            for index in range(1, contacts + 1)
+        ],
+    )
+    contact_ids = list(Contact.objects.values_list("id", flat=True))
+
+    _bulk(
+        Axe,
+        [
+            Axe(
+                id=index,
+                manufacturer=rng.choice(manufacturers),
+                model=f"{rng.choice(AXE_MODELS)} {index}",
+                status="MOTTAGEN" if rng.random() < 0.8 else "KÖPT",
+            )
+            for index in range(1, axes + 1)
+        ],
+    )
+    NextAxeID.objects.update_or_create(id=1, defaults={"next_id": axes + 1})
+
+    start_date = date(2015, 1, 1)
+    rows = []
+    for index in range(transactions):
+        axe_id = index % axes + 1
+        # Första varvet är köpen, därefter slumpvis försäljningar och köp
+        kind = "KÖP" if index < axes or rng.random() < 0.4 else "SÄLJ"
+        rows.append(
+            Transaction(
+                axe_id=axe_id,
+                contact_id=rng.choice(contact_ids) if contact_ids else None,
+                platform=rng.choice(platforms),
+                transaction_date=start_date + timedelta(days=rng.randrange(3650)),
+                type=kind,
+                price=Decimal(rng.randrange(50, 5000)),
+                shipping_cost=Decimal(rng.choice([0, 49, 79, 120])),
+            )
+        )
+    _bulk(Transaction, rows)
+
+    _bulk(
+        Stamp,
+        [
+            Stamp(
+                name=f"Stämpel {index}",
+                manufacturer=rng.choice(manufacturers),
+                stamp_type=rng.choice(STAMP_TYPES),
+                year_from=rng.randrange(1850, 1980),
+            )
+            for index in range(1, stamps + 1)
+        ],
+    )
+    stamp_ids = list(Stamp.objects.values_list("id", flat=True))
+    if stamp_ids:
+        _bulk(
+            AxeStamp,
+            [
+                AxeStamp(axe_id=axe_id, stamp_id=rng.choice(stamp_ids))
+                for axe_id in range(1, axes + 1)
+                if rng.random() < 0.5
+            ],
+        )
+
+    manufacturer_tree.rebuild_closure()
+    axe_financials.refresh_axes(list(range(1, axes + 1)))
+    monthly_summary.rebuild_monthly_summary()
+    if search_index.is_available():
+        search_index.rebuild_search_index()
+
+    User.objects.filter(username=USERNAME).delete()
+    User.objects.create_superuser(USERNAME, "benchmark@example.com", "benchmark")
+
+    return dataset_counts()
+
+
+def dataset_counts():
+    return {
+        "manufacturers": Manufacturer.objects.count(),
+        "axes": Axe.objects.count(),
+        "transactions": Transaction.objects.count(),
+        "stamps": Stamp.objects.count(),
+        "contacts": Contact.objects.count(),
+    }
+
+
+def _request(client, url, params):
+    started = time.perf_counter()
+    response = client.get(url, params)
+    # Strömmade svar räknas först när hela kroppen är läst
+    body = b"".join(response) if response.streaming else response.content
+    return response, body, time.perf_counter() - started
+
+
+def measure(client, url, params=None, repeats=5):
+    """Mäter ett anrop: tider (ms), SQL-frågor, svarsstorlek och minnestopp."""
+    params = params or {}
+    with CaptureQueriesContext(connection) as queries:
+        response, body, first = _request(client, url, params)
+    query_times = [float(query["time"]) for query in queries.captured_queries]
+
+    timings = []
+    for _ in range(repeats):
+        timings.append(_request(client, url, params)[2])
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _request(client, url, params)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "status": response.status_code,
+        "bytes": len(body),
+        "queries": len(query_times),
+        "query_ms": round(sum(query_times) * 1000, 1),
+        "first_ms": round(first * 1000, 1),
+        "median_ms": round(statistics.median(timings or [first]) * 1000, 1),
+        "min_ms": round(min(timings or [first]) * 1000, 1),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run(endpoints=None, repeats=5, only=None):
+    """Kör alla (eller de namngivna i only) mätpunkter och returnerar resultatet."""
+    anonymous = Client()
+    staff = Client()
+    staff.force_login(User.objects.get(username=USERNAME))
+
+    results = {}
+    for name, url_name, params, logged_in in endpoints or ENDPOINTS:
+        if only and name not in only:
+            continue
+        client = staff if logged_in else anonymous
+        results[name] = measure(client, reverse(url_name), params, repeats)
+    return {
+        "meta": {
+            "dataset": dataset_counts(),
+            "repeats": repeats,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+COMPARED_FIELDS = ("median_ms", "queries", "peak_kb")
+
+
+def compare(before, after):
+    """Skillnaden mellan två körningar per mätpunkt och fält.
+
+    Returnerar en lista med (namn, fält, före, efter, förändring i procent)
+    för mätpunkter som finns i båda.
+    """
+    rows = []
+    for name, new in after["results"].items():
+        old = before["results"].get(name)
+        if old is None:
+            continue
+        for field in COMPARED_FIELDS:
+            old_value, new_value = old.get(field), new.get(field)
+            if old_value is None or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value * 100 if old_value else None
+            rows.append((name, field, old_value, new_value, change))
+    return rows
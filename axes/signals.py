@@ -3,10 +3,28 @@
 Fångar skapande, ändring och borttagning av de åtta kärnmodellerna via
 pre_save/post_save/post_delete, oavsett om ändringen görs via vyer, admin
 eller Django-shell. AuditLog självt registreras aldrig, för att undvika
-oändlig loop.
+oändlig loop. Ändringarna räknas fram mot fältvärdena som modellen lästes
+in med (TrackedFieldsMixin i models.py), så en sparning kostar ingen extra
+SELECT, och posterna skrivs buffrat per request/kommando
+(services/audit_buffer.py).
 
 En bugg i loggningen får aldrig hindra den riktiga spara/ta bort-operationen,
 så varje handler är helt inkapslad i try/except.
+
+Här registreras också handlers som håller statistiksidans månadssummering
+(MonthlyTransactionSummary) uppdaterad när transaktioner sparas eller tas
+bort - samma princip gäller där, liksom för städningen av bildjobb
+(ImageDerivativeJob) och bildvarianterna när bilder tas bort, och för
+tömningen av processcachen för Settings och väntande kommentarer.
+
+Sist finns handlers som håller fulltextindexet för den globala sökningen
+(axes_search_index) i takt med yxor, kontakter, tillverkare, transaktioner
+och stämplar, inklusive dokument som visar namn från relaterade objekt.
+
+Tillverkarhierarkins closure-tabell (ManufacturerClosure) följer med när en
+tillverkare skapas, får ny överordnad tillverkare eller tas bort, och
+yxornas summeringsfält (köp-/säljvärde m.m.) räknas om när deras
+transaktioner ändras.
 """
 
 import logging
@@ -14,20 +32,40 @@ from datetime import date
 from decimal import Decimal
 from uuid import UUID
 
-from django.db.models.signals import post_delete, post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 
 from .middleware import get_current_user
 from .models import (
     Axe,
     AuditLog,
+    AxeImage,
+    Comment,
     Contact,
+    ImageDerivativeJob,
     Manufacturer,
+    ManufacturerImage,
     Measurement,
     Platform,
     Settings,
     Stamp,
+    StampImage,
+    StampTranscription,
     Transaction,
 )
+from .services.image_variants import delete_variants
+from .services import (
+    audit_buffer,
+    axe_financials,
+    manufacturer_tree,
+    search_index,
+    site_cache,
+)
+from .services.monthly_summary import (
+    apply_transaction_change,
+    state_of,
+    transaction_state,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -60,15 +98,19 @@ def _serialize_value(value):
             return None
 
 
-def _build_field_diff(old_instance, new_instance):
-    """Jämför konkreta fält mellan gammal och ny instans, returnerar en
-    diff-dict {fältnamn: [gammalt, nytt]} för endast de fält som ändrats."""
+def _build_field_diff(old_values, new_instance, update_fields=None):
+    """Jämför konkreta fält mellan gamla värden {attname: värde} och den nya
+    instansen, returnerar en diff-dict {fältnamn: [gammalt, nytt]} för
+    endast de fält som ändrats. Med update_fields jämförs bara de fält som
+    faktiskt skrivs."""
     diff = {}
     for field in new_instance._meta.concrete_fields:
         if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
             continue
+        if update_fields is not None and field.name not in update_fields:
+            continue
         attname = field.attname  # ger FK:s _id-fält istället för related-objektet
-        old_value = getattr(old_instance, attname, None)
+        old_value = old_values.get(attname)
         new_value = getattr(new_instance, attname, None)
         if old_value != new_value:
             diff[field.name] = [
@@ -78,6 +120,24 @@ def _build_field_diff(old_instance, new_instance):
     return diff
 
 
+def _previous_field_values(sender, instance):
+    """Fältvärdena {attname: värde} som raden hade innan sparningen.
+
+    Tas från instansens ögonblicksbild (TrackedFieldsMixin) utan query;
+    databasen läses bara om när bilden saknas, t.ex. för en instans som
+    skapats med ett befintligt pk eller hämtats med only()/defer().
+    Returnerar None om raden inte finns.
+    """
+    snapshot = instance.loaded_field_values()
+    if snapshot is not None:
+        return snapshot
+    return (
+        sender.objects.filter(pk=instance.pk)
+        .values(*(field.attname for field in sender._meta.concrete_fields))
+        .first()
+    )
+
+
 def _safe_repr(sender, instance):
     try:
         return str(instance)[:255]
@@ -100,14 +160,15 @@ def audit_pre_save(sender, instance, **kwargs):
             instance._audit_is_create = True
             instance._audit_changes = {}
             return
-        try:
-            old_instance = sender.objects.get(pk=instance.pk)
-        except sender.DoesNotExist:
+        old_values = _previous_field_values(sender, instance)
+        if old_values is None:
             instance._audit_is_create = True
             instance._audit_changes = {}
             return
         instance._audit_is_create = False
-        instance._audit_changes = _build_field_diff(old_instance, instance)
+        instance._audit_changes = _build_field_diff(
+            old_values, instance, kwargs.get("update_fields")
+        )
     except Exception:
         logger.exception(
             "Fel vid audit pre_save-hantering för %s",
@@ -123,13 +184,15 @@ def audit_post_save(sender, instance, created, **kwargs):
         is_create = created or getattr(instance, "_audit_is_create", False)
         action = "CREATE" if is_create else "UPDATE"
         changes = {} if is_create else getattr(instance, "_audit_changes", {})
-        AuditLog.objects.create(
-            user=_resolve_user(),
-            action=action,
-            model_name=sender.__name__,
-            object_id=str(instance.pk),
-            object_repr=_safe_repr(sender, instance),
-            changes=changes,
+        audit_buffer.record(
+            AuditLog(
+                user=_resolve_user(),
+                action=action,
+                model_name=sender.__name__,
+                object_id=str(instance.pk),
+                object_repr=_safe_repr(sender, instance),
+                changes=changes,
+            )
         )
     except Exception:
         logger.exception(
@@ -146,13 +209,15 @@ def audit_post_save(sender, instance, created, **kwargs):
 
 def audit_post_delete(sender, instance, **kwargs):
     try:
-        AuditLog.objects.create(
-            user=_resolve_user(),
-            action="DELETE",
-            model_name=sender.__name__,
-            object_id=str(instance.pk),
-            object_repr=_safe_repr(sender, instance),
-            changes={},
+        audit_buffer.record(
+            AuditLog(
+                user=_resolve_user(),
+                action="DELETE",
+                model_name=sender.__name__,
+                object_id=str(instance.pk),
+                object_repr=_safe_repr(sender, instance),
+                changes={},
+            )
         )
     except Exception:
         logger.exception(
@@ -176,3 +241,430 @@ def _register_audit_signals():
 
 
 _register_audit_signals()
+
+
+# --- Månadssummering för statistiksidan ---
+
+
+def monthly_summary_pre_save(sender, instance, **kwargs):
+    """Kommer ihåg transaktionens tidigare bidrag till månadssummeringen,
+    så att post_save kan flytta det i stället för att bygga om månaden."""
+    instance._monthly_summary_previous = None
+    if kwargs.get("raw") or not instance.pk:
+        return
+    try:
+        previous = _previous_field_values(sender, instance)
+        if previous is not None:
+            instance._monthly_summary_previous = transaction_state(
+                previous["transaction_date"],
+                previous["type"],
+                previous["price"],
+                previous["shipping_cost"],
+            )
+    except Exception:
+        logger.exception("Fel vid månadssummering (pre_save) för transaktion")
+
+
+def monthly_summary_post_save(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        # Fixtures/loaddata innehåller redan summeringstabellen
+        return
+    try:
+        apply_transaction_change(
+            getattr(instance, "_monthly_summary_previous", None), state_of(instance)
+        )
+    except Exception:
+        logger.exception("Fel vid månadssummering (post_save) för transaktion")
+    finally:
+        if hasattr(instance, "_monthly_summary_previous"):
+            del instance._monthly_summary_previous
+
+
+def monthly_summary_post_delete(sender, instance, **kwargs):
+    try:
+        apply_transaction_change(state_of(instance), None)
+    except Exception:
+        logger.exception("Fel vid månadssummering (post_delete) för transaktion")
+
+
+pre_save.connect(
+    monthly_summary_pre_save,
+    sender=Transaction,
+    dispatch_uid="monthly_summary_pre_save",
+)
+post_save.connect(
+    monthly_summary_post_save,
+    sender=Transaction,
+    dispatch_uid="monthly_summary_post_save",
+)
+post_delete.connect(
+    monthly_summary_post_delete,
+    sender=Transaction,
+    dispatch_uid="monthly_summary_post_delete",
+)
+
+
+# --- Bildjobb ---
+
+
+def image_derivative_job_post_delete(sender, instance, **kwargs):
+    """Tar bort bildens jobb, även när bilden försvinner via cascade."""
+    try:
+        ImageDerivativeJob.objects.filter(
+            model_label=sender._meta.label, object_id=instance.pk
+        ).delete()
+    except Exception:
+        logger.exception(
+            "Fel vid borttagning av bildjobb för %s",
+            getattr(sender, "__name__", sender),
+        )
+
+
+def image_variants_post_delete(sender, instance, **kwargs):
+    """Tar bort bildens cachade storleksvarianter från disk."""
+    try:
+        if instance.image and instance.image.name:
+            delete_variants(instance.image.name)
+    except Exception:
+        logger.exception(
+            "Fel vid borttagning av bildvarianter för %s",
+            getattr(sender, "__name__", sender),
+        )
+
+
+for _image_model in (AxeImage, ManufacturerImage, StampImage):
+    post_delete.connect(
+        image_derivative_job_post_delete,
+        sender=_image_model,
+        dispatch_uid=f"image_derivative_job_post_delete_{_image_model.__name__}",
+    )
+    post_delete.connect(
+        image_variants_post_delete,
+        sender=_image_model,
+        dispatch_uid=f"image_variants_post_delete_{_image_model.__name__}",
+    )
+
+
+# --- Processcache för context processorn ---
+
+
+# Cachen töms först när transaktionen committats - töms den direkt kan en
+# samtidig request hinna läsa och cacha den gamla raden igen.
+
+
+def site_cache_settings_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: site_cache.invalidate("settings"))
+
+
+def _invalidate_comment(comment):
+    site_cache.invalidate("pending_comments")
+    site_cache.invalidate_comment_tree(comment)
+
+
+def site_cache_comment_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: _invalidate_comment(instance))
+
+
+post_save.connect(
+    site_cache_settings_changed,
+    sender=Settings,
+    dispatch_uid="site_cache_settings_post_save",
+)
+post_delete.connect(
+    site_cache_settings_changed,
+    sender=Settings,
+    dispatch_uid="site_cache_settings_post_delete",
+)
+post_save.connect(
+    site_cache_comment_changed,
+    sender=Comment,
+    dispatch_uid="site_cache_comment_post_save",
+)
+post_delete.connect(
+    site_cache_comment_changed,
+    sender=Comment,
+    dispatch_uid="site_cache_comment_post_delete",
+)
+
+
+# --- Fulltextindex för global_search ---
+
+
+def _update_search_index(action, *args):
+    try:
+        action(*args)
+    except Exception:
+        logger.exception("Fel vid uppdatering av sökindexet")
+
+
+def search_index_axe_saved(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    _update_search_index(search_index.index_axes, [instance.pk])
+    # Transaktionerna visar yxans tillverkare och modell
+    _update_search_index(
+        search_index.index_transactions,
+        instance.transactions.values_list("pk", flat=True),
+    )
+
+
+def search_index_manufacturer_saved(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    _update_search_index(search_index.index_manufacturers, [instance.pk])
+    # Tillverkarnamnet ingår i yxornas, transaktionernas och stämplarnas text
+    _update_search_index(
+        search_index.index_axes,
+        Axe.objects.filter(manufacturer=instance).values_list("pk", flat=True),
+    )
+    _update_search_index(
+        search_index.index_transactions,
+        Transaction.objects.filter(axe__manufacturer=instance).values_list(
+            "pk", flat=True
+        ),
+    )
+    _update_search_index(
+        search_index.index_stamps,
+        Stamp.objects.filter(manufacturer=instance).values_list("pk", flat=True),
+    )
+
+
+def search_index_contact_saved(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    _update_search_index(search_index.index_contacts, [instance.pk])
+    _update_search_index(
+        search_index.index_transactions,
+        Transaction.objects.filter(contact=instance).values_list("pk", flat=True),
+    )
+
+
+def search_index_platform_saved(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    _update_search_index(
+        search_index.index_transactions,
+        Transaction.objects.filter(platform=instance).values_list("pk", flat=True),
+    )
+
+
+def search_index_transaction_saved(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    _update_search_index(search_index.index_transactions, [instance.pk])
+
+
+def search_index_stamp_saved(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    _update_search_index(search_index.index_stamps, [instance.pk])
+
+
+def search_index_transcription_changed(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    # Stämpeln kan redan vara borttagen (cascade) - då tas dokumentet bort
+    _update_search_index(search_index.index_stamps, [instance.stamp_id])
+
+
+def search_index_remember_dependents(sender, instance, **kwargs):
+    """Kontakter, plattformar och tillverkare nollställs (SET_NULL) på
+    transaktioner/stämplar innan post_delete - kom ihåg vilka som berörs."""
+    try:
+        if sender is Manufacturer:
+            instance._search_index_stamps = list(
+                Stamp.objects.filter(manufacturer=instance).values_list("pk", flat=True)
+            )
+        else:
+            field = "contact" if sender is Contact else "platform"
+            instance._search_index_transactions = list(
+                Transaction.objects.filter(**{field: instance}).values_list(
+                    "pk", flat=True
+                )
+            )
+    except Exception:
+        logger.exception("Fel vid uppdatering av sökindexet")
+
+
+def search_index_deleted(sender, instance, **kwargs):
+    # Plattformar har inga egna dokument, bara transaktioner som visar namnet
+    if sender in SEARCH_INDEX_KINDS:
+        _update_search_index(
+            search_index.remove, SEARCH_INDEX_KINDS[sender], instance.pk
+        )
+    _update_search_index(
+        search_index.index_transactions,
+        getattr(instance, "_search_index_transactions", []),
+    )
+    _update_search_index(
+        search_index.index_stamps, getattr(instance, "_search_index_stamps", [])
+    )
+
+
+SEARCH_INDEX_KINDS = {
+    Axe: "axe",
+    Contact: "contact",
+    Manufacturer: "manufacturer",
+    Transaction: "transaction",
+    Stamp: "stamp",
+}
+
+for _model, _handler in (
+    (Axe, search_index_axe_saved),
+    (Manufacturer, search_index_manufacturer_saved),
+    (Contact, search_index_contact_saved),
+    (Platform, search_index_platform_saved),
+    (Transaction, search_index_transaction_saved),
+    (Stamp, search_index_stamp_saved),
+    (StampTranscription, search_index_transcription_changed),
+):
+    post_save.connect(
+        _handler,
+        sender=_model,
+        dispatch_uid=f"search_index_post_save_{_model.__name__}",
+    )
+
+for _model in (Manufacturer, Contact, Platform):
+    pre_delete.connect(
+        search_index_remember_dependents,
+        sender=_model,
+        dispatch_uid=f"search_index_pre_delete_{_model.__name__}",
+    )
+
+for _model in (*SEARCH_INDEX_KINDS, Platform):
+    post_delete.connect(
+        search_index_deleted,
+        sender=_model,
+        dispatch_uid=f"search_index_post_delete_{_model.__name__}",
+    )
+
+post_delete.connect(
+    search_index_transcription_changed,
+    sender=StampTranscription,
+    dispatch_uid="search_index_post_delete_StampTranscription",
+)
+
+
+# --- Tillverkarhierarki (closure-tabell) ---
+
+
+def manufacturer_tree_pre_save(sender, instance, **kwargs):
+    """Kommer ihåg tidigare parent så att post_save vet om delträdet flyttats."""
+    instance._manufacturer_tree_previous_parent = None
+    if kwargs.get("raw") or not instance.pk:
+        return
+    try:
+        previous = _previous_field_values(sender, instance)
+        if previous is not None:
+            instance._manufacturer_tree_previous_parent = previous["parent_id"]
+    except Exception:
+        logger.exception("Fel vid tillverkarhierarki (pre_save)")
+
+
+def manufacturer_tree_post_save(sender, instance, created, **kwargs):
+    if kwargs.get("raw"):
+        return
+    try:
+        if created:
+            manufacturer_tree.insert_node(instance)
+        elif (
+            getattr(instance, "_manufacturer_tree_previous_parent", None)
+            != instance.parent_id
+        ):
+            manufacturer_tree.move_subtree(instance)
+    except Exception:
+        logger.exception("Fel vid tillverkarhierarki (post_save) för %s", instance.pk)
+    finally:
+        if hasattr(instance, "_manufacturer_tree_previous_parent"):
+            del instance._manufacturer_tree_previous_parent
+
+
+def manufacturer_tree_pre_delete(sender, instance, **kwargs):
+    """Undertillverkarna blir huvudtillverkare (SET_NULL) - koppla loss dem
+    från den borttagna tillverkarens förfäder."""
+    try:
+        manufacturer_tree.detach_subtree(instance)
+    except Exception:
+        logger.exception("Fel vid tillverkarhierarki (pre_delete) för %s", instance.pk)
+
+
+pre_save.connect(
+    manufacturer_tree_pre_save,
+    sender=Manufacturer,
+    dispatch_uid="manufacturer_tree_pre_save",
+)
+post_save.connect(
+    manufacturer_tree_post_save,
+    sender=Manufacturer,
+    dispatch_uid="manufacturer_tree_post_save",
+)
+pre_delete.connect(
+    manufacturer_tree_pre_delete,
+    sender=Manufacturer,
+    dispatch_uid="manufacturer_tree_pre_delete",
+)
+
+
+# --- Summeringsfält på Axe ---
+
+
+def axe_financials_pre_save(sender, instance, **kwargs):
+    """Kommer ihåg vilken yxa transaktionen hörde till, så att båda yxorna
+    räknas om om den flyttas."""
+    instance._axe_financials_previous_axe = None
+    if kwargs.get("raw") or not instance.pk:
+        return
+    try:
+        previous = _previous_field_values(sender, instance)
+        if previous is not None:
+            instance._axe_financials_previous_axe = previous["axe_id"]
+    except Exception:
+        logger.exception("Fel vid yxsummering (pre_save) för transaktion")
+
+
+def _refresh_axe_financials(instance, *axe_ids):
+    axe_financials.refresh_axes(axe_ids)
+    # Håll en redan hämtad yxa (t.ex. transaction.axe i vyn) i takt
+    if Transaction.axe.is_cached(instance):
+        axe_financials.refresh_instance(instance.axe)
+
+
+def axe_financials_post_save(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        # Fixtures/loaddata innehåller redan summeringsfälten
+        return
+    try:
+        _refresh_axe_financials(
+            instance,
+            instance.axe_id,
+            getattr(instance, "_axe_financials_previous_axe", None),
+        )
+    except Exception:
+        logger.exception("Fel vid yxsummering (post_save) för transaktion")
+    finally:
+        if hasattr(instance, "_axe_financials_previous_axe"):
+            del instance._axe_financials_previous_axe
+
+
+def axe_financials_post_delete(sender, instance, **kwargs):
+    try:
+        _refresh_axe_financials(instance, instance.axe_id)
+    except Exception:
+        logger.exception("Fel vid yxsummering (post_delete) för transaktion")
+
+
+pre_save.connect(
+    axe_financials_pre_save,
+    sender=Transaction,
+    dispatch_uid="axe_financials_pre_save",
+)
+post_save.connect(
+    axe_financials_post_save,
+    sender=Transaction,
+    dispatch_uid="axe_financials_post_save",
+)
+post_delete.connect(
+    axe_financials_post_delete,
+    sender=Transaction,
+    dispatch_uid="axe_financials_post_delete",
+)
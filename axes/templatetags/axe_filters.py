@@ -1,5 +1,6 @@
 from django import template
 from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 import re
 import os
@@ -302,6 +303,43 @@ def basename(value):
     return os.path.basename(value)
 
 
+def _full_size_url(image):
+    return getattr(image, "webp_url", None) or image.image_url_with_cache_busting
+
+
+@register.simple_tag
+def image_variant_url(image, display_width):
+    """URL till minsta bildvariant som räcker för display_width pixlar.
+
+    Användning: <img src="{% image_variant_url img 130 %}">. Faller tillbaka
+    på WebP/originalet när bilden visas bredare än största varianten.
+    """
+    from axes.services.image_variants import pick_width, variant_url
+
+    if not image or not image.image:
+        return ""
+    width = pick_width(int(display_width))
+    if width is None:
+        return _full_size_url(image) or ""
+    return variant_url(image, width) or ""
+
+
+@register.simple_tag
+def image_srcset(image, sizes="100vw"):
+    """srcset- och sizes-attribut med bildvarianterna och originalet.
+
+    Användning: <source {% image_srcset img "(max-width: 768px) 50vw, 300px" %}
+    type="image/webp"> eller på en <img> med src från image_variant_url.
+    """
+    from axes.services.image_variants import srcset
+
+    if not image or not image.image:
+        return ""
+    return format_html(
+        'srcset="{}" sizes="{}"', srcset(image, _full_size_url(image)), sizes
+    )
+
+
 @register.filter
 def country_flag(country_code):
     """Returnera flagg-emoji för landskod"""
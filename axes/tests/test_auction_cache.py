@@ -0,0 +1,136 @@
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from axes.services import auction_cache
+
+AUCTION = {
+    "title": "Yxa Säw",
+    "seller_alias": "yxsamlaren",
+    "prices": [{"label": "Slutpris", "amount": 450, "currency": "SEK"}],
+    "images": ["https://img.tradera.net/1.jpg"],
+    "auction_end_date": "2025-07-27",
+}
+
+
+class AuctionCacheTest(SimpleTestCase):
+    def setUp(self):
+        auction_cache.clear()
+        self.addCleanup(auction_cache.clear)
+        self.parse = MagicMock(side_effect=lambda: dict(AUCTION))
+
+    def test_second_lookup_is_a_hit(self):
+        first, first_cached = auction_cache.get_or_parse("tradera", "1", self.parse)
+        second, second_cached = auction_cache.get_or_parse("tradera", "1", self.parse)
+
+        self.assertEqual(first, second)
+        self.assertFalse(first_cached)
+        self.assertTrue(second_cached)
+        self.parse.assert_called_once()
+        self.assertEqual(auction_cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+
+    def test_key_includes_platform(self):
+        auction_cache.get_or_parse("tradera", "1", self.parse)
+        _, cached = auction_cache.get_or_parse("ebay", "1", self.parse)
+
+        self.assertFalse(cached)
+        self.assertEqual(self.parse.call_count, 2)
+
+    def test_force_refresh_parses_again(self):
+        auction_cache.get_or_parse("tradera", "1", self.parse)
+        _, cached = auction_cache.get_or_parse(
+            "tradera", "1", self.parse, force_refresh=True
+        )
+
+        self.assertFalse(cached)
+        self.assertEqual(self.parse.call_count, 2)
+
+    def test_cached_result_is_not_shared(self):
+        data, _ = auction_cache.get_or_parse("tradera", "1", self.parse)
+        data["matching_contacts"] = []
+        data["prices"][0]["amount"] = 1
+
+        cached, _ = auction_cache.get_or_parse("tradera", "1", self.parse)
+
+        self.assertNotIn("matching_contacts", cached)
+        self.assertEqual(cached["prices"][0]["amount"], 450)
+
+    @override_settings(AUCTION_PARSE_CACHE_TTL=0)
+    def test_expired_entry_is_parsed_again(self):
+        auction_cache.get_or_parse("tradera", "1", self.parse)
+        _, cached = auction_cache.get_or_parse("tradera", "1", self.parse)
+
+        self.assertFalse(cached)
+        self.assertEqual(self.parse.call_count, 2)
+
+    @override_settings(AUCTION_PARSE_CACHE_SIZE=2)
+    def test_least_recently_used_is_evicted(self):
+        auction_cache.get_or_parse("tradera", "1", self.parse)
+        auction_cache.get_or_parse("tradera", "2", self.parse)
+        auction_cache.get_or_parse("tradera", "1", self.parse)
+        auction_cache.get_or_parse("tradera", "3", self.parse)
+
+        _, one_cached = auction_cache.get_or_parse("tradera", "1", self.parse)
+        _, two_cached = auction_cache.get_or_parse("tradera", "2", self.parse)
+
+        self.assertTrue(one_cached)
+        self.assertFalse(two_cached)
+
+    def test_missing_item_id_is_not_cached(self):
+        auction_cache.get_or_parse("tradera", None, self.parse)
+        auction_cache.get_or_parse("tradera", None, self.parse)
+
+        self.assertEqual(self.parse.call_count, 2)
+        self.assertEqual(auction_cache.stats()["size"], 0)
+
+    def test_failed_parse_is_not_cached(self):
+        self.parse.side_effect = [ValueError("Kunde inte hämta"), dict(AUCTION)]
+
+        with self.assertRaises(ValueError):
+            auction_cache.get_or_parse("tradera", "1", self.parse)
+        data, cached = auction_cache.get_or_parse("tradera", "1", self.parse)
+
+        self.assertFalse(cached)
+        self.assertEqual(data["title"], "Yxa Säw")
+
+
+class AxeCreateParseCacheTest(TestCase):
+    URL = "https://www.tradera.com/item/343327/683953821/yxa-saw"
+
+    def setUp(self):
+        auction_cache.clear()
+        self.addCleanup(auction_cache.clear)
+        user = User.objects.create_user(username="parser", password="x" * 12)
+        self.client.force_login(user)
+        patcher = patch("axes.utils.tradera_parser.TraderaParser")
+        self.parser = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.parser.extract_item_id.return_value = "683953821"
+        self.parser.parse_tradera_page.side_effect = lambda url: dict(AUCTION)
+
+    def _parse(self, **extra):
+        response = self.client.post(
+            reverse("axe_create"),
+            {"parse_only": "true", "auction_url": self.URL, **extra},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_reparse_uses_cache(self):
+        first = self._parse()
+        second = self._parse()
+
+        self.assertFalse(first["from_cache"])
+        self.assertTrue(second["from_cache"])
+        self.assertEqual(second["auction_data"]["title"], "Yxa Säw")
+        self.assertIn("matching_contacts", second["auction_data"])
+        self.parser.parse_tradera_page.assert_called_once_with(self.URL)
+
+    def test_force_refresh_bypasses_cache(self):
+        self._parse()
+        data = self._parse(force_refresh="true")
+
+        self.assertFalse(data["from_cache"])
+        self.assertEqual(self.parser.parse_tradera_page.call_count, 2)
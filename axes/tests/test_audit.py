@@ -1,9 +1,23 @@
+from datetime import date
+from io import StringIO
+
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from axes.middleware import _thread_locals
-from axes.models import Axe, AuditLog, Contact, Manufacturer
+from axes.models import (
+    Axe,
+    AuditLog,
+    Contact,
+    Manufacturer,
+    MonthlyTransactionSummary,
+    Transaction,
+)
+from axes.services import audit_buffer, manufacturer_tree
 from axes.signals import audit_post_save
 
 
@@ -74,21 +88,24 @@ class AuditLogSignalTest(TestCase):
         user = User.objects.create_user(username="klientanvandare", password="pass1234")
         self.client.force_login(user)
 
-        response = self.client.post(
-            reverse("contact_create"),
-            {
-                "name": "Ny kontakt",
-                "email": "",
-                "phone": "",
-                "alias": "",
-                "street": "",
-                "postal_code": "",
-                "city": "",
-                "country": "",
-                "country_code": "",
-                "comment": "",
-            },
-        )
+        # Posterna buffras tills transaktionen committas, vilket TestCase
+        # bara gör via captureOnCommitCallbacks
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("contact_create"),
+                {
+                    "name": "Ny kontakt",
+                    "email": "",
+                    "phone": "",
+                    "alias": "",
+                    "street": "",
+                    "postal_code": "",
+                    "city": "",
+                    "country": "",
+                    "country_code": "",
+                    "comment": "",
+                },
+            )
         self.assertEqual(response.status_code, 302)
 
         contact = Contact.objects.get(name="Ny kontakt")
@@ -107,3 +124,225 @@ class AuditLogSignalTest(TestCase):
         audit_post_save(sender=Axe, instance=axe, created=False, raw=True)
 
         self.assertEqual(AuditLog.objects.count(), count_before)
+
+
+class AuditSnapshotTest(TestCase):
+    """Diffen räknas mot fältvärdena som instansen lästes in med
+    (TrackedFieldsMixin), utan att raden läses om före sparningen."""
+
+    def setUp(self):
+        self.manufacturer = Manufacturer.objects.create(name="Testtillverkare")
+        self.contacts = [Contact.objects.create(name=f"Kontakt {i}") for i in range(5)]
+
+    def _update_log(self, instance):
+        return AuditLog.objects.get(
+            model_name=type(instance).__name__,
+            object_id=str(instance.pk),
+            action="UPDATE",
+        )
+
+    def _queries_for_save(self, instance):
+        with CaptureQueriesContext(connection) as queries:
+            instance.save()
+        return len(queries)
+
+    def test_saving_loaded_instance_skips_reread(self):
+        """Jämförelse av antalet queries per sparning med och utan
+        ögonblicksbild - skillnaden är audit-loggens SELECT."""
+        with_snapshot = [
+            self._queries_for_save(contact)
+            for contact in Contact.objects.order_by("id")
+        ]
+        without_snapshot = [
+            self._queries_for_save(Contact(pk=contact.pk, name=contact.name))
+            for contact in self.contacts
+        ]
+
+        self.assertEqual(
+            [a - b for a, b in zip(without_snapshot, with_snapshot)],
+            [1] * len(self.contacts),
+        )
+
+    def _reads_before_update(self, instance):
+        """SELECT mot modellens egen tabell innan raden uppdateras, dvs.
+        omläsningar av den tidigare raden i pre_save-handlers."""
+        table = f'"{instance._meta.db_table}"'
+        with CaptureQueriesContext(connection) as queries:
+            instance.save()
+        reads = []
+        for query in queries.captured_queries:
+            if query["sql"].startswith(f"UPDATE {table}"):
+                break
+            if query["sql"].startswith("SELECT") and f"FROM {table}" in query["sql"]:
+                reads.append(query["sql"])
+        return reads
+
+    def test_saving_loaded_transaction_skips_reread(self):
+        axe = Axe.objects.create(manufacturer=self.manufacturer, model="A")
+        other = Axe.objects.create(manufacturer=self.manufacturer, model="B")
+        created = Transaction.objects.create(
+            axe=axe, type="KÖP", price=100, transaction_date=date(2024, 1, 5)
+        )
+        loaded = Transaction.objects.get(pk=created.pk)
+        loaded.axe = other
+        loaded.price = 150
+        loaded.transaction_date = date(2024, 2, 5)
+
+        self.assertEqual(self._reads_before_update(loaded), [])
+        axe.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(axe.total_buy_value, 0)
+        self.assertEqual(other.total_buy_value, 150)
+        self.assertEqual(
+            list(
+                MonthlyTransactionSummary.objects.filter(buy_count__gt=0).values_list(
+                    "month", flat=True
+                )
+            ),
+            [date(2024, 2, 1)],
+        )
+
+    def test_saving_loaded_manufacturer_skips_reread(self):
+        parent = Manufacturer.objects.create(name="Förälder")
+        loaded = Manufacturer.objects.get(pk=self.manufacturer.pk)
+        loaded.parent = parent
+
+        self.assertEqual(self._reads_before_update(loaded), [])
+        self.assertEqual(list(manufacturer_tree.ancestors(loaded)), [parent])
+
+    def test_loaded_instance_diff(self):
+        contact = Contact.objects.get(pk=self.contacts[0].pk)
+        contact.city = "Umeå"
+        contact.save()
+
+        self.assertEqual(self._update_log(contact).changes, {"city": [None, "Umeå"]})
+
+    def test_repeated_saves_diff_against_previous_save(self):
+        axe = Axe.objects.get(
+            pk=Axe.objects.create(manufacturer=self.manufacturer, model="A").pk
+        )
+        axe.model = "B"
+        axe.save()
+        axe.model = "C"
+        axe.save()
+
+        changes = AuditLog.objects.filter(
+            model_name="Axe", object_id=str(axe.pk), action="UPDATE"
+        ).values_list("changes", flat=True)
+        self.assertCountEqual(changes, [{"model": ["A", "B"]}, {"model": ["B", "C"]}])
+
+    def test_falls_back_to_database_without_snapshot(self):
+        contact = self.contacts[0]
+        Contact(pk=contact.pk, name=contact.name, city="Luleå").save()
+
+        self.assertEqual(self._update_log(contact).changes, {"city": [None, "Luleå"]})
+
+    def test_deferred_fields_fall_back_to_database(self):
+        contact = Contact.objects.only("name").get(pk=self.contacts[0].pk)
+        contact.name = "Nytt namn"
+        contact.save()
+
+        self.assertEqual(
+            self._update_log(contact).changes, {"name": ["Kontakt 0", "Nytt namn"]}
+        )
+
+    def test_update_fields_limits_diff(self):
+        contact = Contact.objects.get(pk=self.contacts[0].pk)
+        contact.name = "Sparas"
+        contact.city = "Sparas inte"
+        contact.save(update_fields=["name"])
+
+        self.assertEqual(
+            self._update_log(contact).changes, {"name": ["Kontakt 0", "Sparas"]}
+        )
+
+
+class AuditBufferTest(TestCase):
+    """Poster inom ett audit-scope skrivs med en bulk_create när scopet
+    avslutas, och bara för ändringar som committats."""
+
+    def _audit_inserts(self, queries):
+        return [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "axes_auditlog"')
+        ]
+
+    def test_entries_are_written_in_one_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            with audit_buffer.scope():
+                with self.captureOnCommitCallbacks(execute=True):
+                    contacts = [
+                        Contact.objects.create(name=f"Kontakt {i}") for i in range(3)
+                    ]
+                    contacts[0].city = "Umeå"
+                    contacts[0].save()
+                self.assertEqual(AuditLog.objects.count(), 0)
+
+        self.assertEqual(len(self._audit_inserts(queries)), 1)
+        self.assertEqual(
+            list(AuditLog.objects.order_by("id").values_list("action", flat=True)),
+            ["CREATE", "CREATE", "CREATE", "UPDATE"],
+        )
+
+    def test_rolled_back_changes_are_not_logged(self):
+        with audit_buffer.scope():
+            with self.captureOnCommitCallbacks(execute=True):
+                kept = Contact.objects.create(name="Behålls")
+                try:
+                    with transaction.atomic():
+                        Contact.objects.create(name="Rullas tillbaka")
+                        raise ValueError
+                except ValueError:
+                    pass
+
+        self.assertEqual(
+            list(AuditLog.objects.values_list("object_id", flat=True)),
+            [str(kept.pk)],
+        )
+
+    def test_uncommitted_entries_are_dropped(self):
+        with audit_buffer.scope():
+            with self.captureOnCommitCallbacks(execute=False):
+                Contact.objects.create(name="Aldrig committad")
+
+        self.assertEqual(AuditLog.objects.count(), 0)
+
+    def test_commit_after_scope_writes_directly(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with audit_buffer.scope():
+                contact = Contact.objects.create(name="Sen commit")
+
+        self.assertTrue(
+            AuditLog.objects.filter(
+                model_name="Contact", object_id=str(contact.pk)
+            ).exists()
+        )
+
+    def test_without_scope_entries_are_written_directly(self):
+        self.assertFalse(audit_buffer.is_active())
+        contact = Contact.objects.create(name="Direkt")
+
+        self.assertTrue(
+            AuditLog.objects.filter(
+                model_name="Contact", object_id=str(contact.pk)
+            ).exists()
+        )
+
+
+class AuditScopedCommandTest(TransactionTestCase):
+    """Kommandon med ScopedCommandMixin skriver sina poster i en omgång."""
+
+    def test_command_entries_are_written_in_one_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            call_command("init_platforms", stdout=StringIO())
+
+        inserts = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "axes_auditlog"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            AuditLog.objects.filter(model_name="Platform", action="CREATE").count(), 2
+        )
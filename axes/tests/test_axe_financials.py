@@ -0,0 +1,168 @@
+import json
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from axes.models import Axe, Settings, Transaction
+from axes.services import axe_financials
+from axes.tests.factories import make_axe, make_platform, make_transaction
+
+
+class AxeFinancialSummaryTest(TestCase):
+    def setUp(self):
+        self.axe = make_axe()
+
+    def _reloaded(self):
+        return Axe.objects.get(pk=self.axe.pk)
+
+    def test_transactions_update_summary(self):
+        make_transaction(
+            axe=self.axe, price=Decimal("300"), shipping_cost=Decimal("50")
+        )
+        make_transaction(
+            axe=self.axe,
+            type="SÄLJ",
+            price=Decimal("500"),
+            shipping_cost=Decimal("20"),
+            transaction_date=date(2024, 3, 1),
+        )
+
+        axe = self._reloaded()
+        self.assertEqual(axe.total_buy_value, Decimal("300"))
+        self.assertEqual(axe.total_buy_shipping, Decimal("50"))
+        self.assertEqual(axe.total_sale_value, Decimal("500"))
+        self.assertEqual(axe.total_sale_shipping, Decimal("20"))
+        self.assertEqual(axe.last_transaction_date, date(2024, 3, 1))
+        self.assertTrue(axe.is_sold)
+        self.assertTrue(axe.has_buy)
+        self.assertEqual(axe.net_value, Decimal("200"))
+        self.assertEqual(axe.profit_loss, Decimal("170"))
+
+    def test_cached_axe_instance_is_refreshed(self):
+        make_transaction(axe=self.axe, price=Decimal("120"))
+        self.assertEqual(self.axe.total_buy_value, Decimal("120"))
+
+    def test_moving_transaction_updates_both_axes(self):
+        other = make_axe()
+        transaction = make_transaction(axe=self.axe, type="SÄLJ")
+
+        transaction.axe = other
+        transaction.save()
+
+        self.assertFalse(self._reloaded().is_sold)
+        self.assertIsNone(self._reloaded().last_transaction_date)
+        self.assertTrue(Axe.objects.get(pk=other.pk).is_sold)
+
+    def test_delete_updates_summary(self):
+        transaction = make_transaction(axe=self.axe, price=Decimal("300"))
+        transaction.delete()
+
+        self.assertEqual(self._reloaded().total_buy_value, Decimal("0"))
+
+    def test_saving_stale_axe_keeps_summary(self):
+        stale = self._reloaded()
+        make_transaction(axe=self._reloaded(), price=Decimal("300"))
+
+        stale.comment = "Ändrad"
+        stale.save()
+
+        axe = self._reloaded()
+        self.assertEqual(axe.comment, "Ändrad")
+        self.assertEqual(axe.total_buy_value, Decimal("300"))
+
+
+class ReconcileAxeFinancialsTest(TestCase):
+    def setUp(self):
+        self.axe = make_axe()
+        self.other = make_axe()
+        make_transaction(axe=self.axe, price=Decimal("300"))
+        make_transaction(axe=self.other, price=Decimal("100"))
+        # Ändring som går förbi signalerna
+        Transaction.objects.filter(axe=self.axe).update(price=Decimal("400"))
+
+    def test_finds_drift(self):
+        self.assertEqual(axe_financials.drifted_axe_ids(), [self.axe.id])
+
+    def test_dry_run_reports_without_repairing(self):
+        out = StringIO()
+        call_command("reconcile_axe_financials", "--dry-run", stdout=out)
+
+        self.assertIn(f"1 yxor avviker: {self.axe.id}", out.getvalue())
+        self.assertEqual(axe_financials.drifted_axe_ids(), [self.axe.id])
+
+    def test_command_repairs_drift(self):
+        out = StringIO()
+        call_command("reconcile_axe_financials", stdout=out)
+
+        self.assertIn("Rättade summeringen för 1 yxor", out.getvalue())
+        self.assertEqual(axe_financials.drifted_axe_ids(), [])
+        self.assertEqual(
+            Axe.objects.get(pk=self.axe.pk).total_buy_value, Decimal("400")
+        )
+
+
+class AxeListFinancialColumnsTest(TestCase):
+    def setUp(self):
+        Settings.objects.create(id=1, show_platforms_public=True)
+        platform = make_platform(name="Tradera")
+        self.loss = make_axe(model="Förlust")
+        make_transaction(axe=self.loss, price=Decimal("500"), platform=platform)
+        make_transaction(axe=self.loss, type="SÄLJ", price=Decimal("200"))
+        self.profit = make_axe(model="Vinst")
+        make_transaction(axe=self.profit, price=Decimal("100"))
+        make_transaction(
+            axe=self.profit,
+            type="SÄLJ",
+            price=Decimal("400"),
+            shipping_cost=Decimal("50"),
+        )
+
+    def _get(self, **params):
+        response = self.client.get(reverse("axe_list_data"), params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)["data"]
+
+    def test_orders_by_profit_in_sql(self):
+        rows = self._get(
+            **{
+                "columns[7][data]": "economy",
+                "order[0][column]": "7",
+                "order[0][dir]": "desc",
+            }
+        )
+        self.assertEqual(
+            [row["id"] for row in rows], [str(self.profit.id), str(self.loss.id)]
+        )
+        self.assertIn("350", rows[0]["economy"])
+        self.assertEqual(rows[0]["DT_RowClass"], "sold-axe")
+
+    def test_rows_do_not_load_transactions(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            rows = self._get()
+        transaction_selects = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('SELECT "axes_transaction"')
+        ]
+        self.assertEqual(transaction_selects, [])
+        loss_row = next(row for row in rows if row["id"] == str(self.loss.id))
+        self.assertIn("Tradera", loss_row["platform"])
+
+    def test_sale_only_axe_has_no_buy_badge(self):
+        sold = make_axe(model="Bara sälj")
+        make_transaction(axe=sold, type="SÄLJ", price=Decimal("250"))
+
+        rows = self._get()
+
+        economy = next(row for row in rows if row["id"] == str(sold.id))["economy"]
+        self.assertNotIn("KÖP", economy)
+        self.assertIn("SÄLJ", economy)
+        loss_row = next(row for row in rows if row["id"] == str(self.loss.id))
+        self.assertIn("KÖP", loss_row["economy"])
@@ -0,0 +1,169 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from axes.services import backups
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+class SqliteOnlineBackupTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_backup_includes_committed_data_while_writer_is_open(self):
+        source = os.path.join(self.directory, "db.sqlite3")
+        writer = sqlite3.connect(source)
+        writer.execute("PRAGMA journal_mode=WAL")
+        writer.execute("CREATE TABLE yxa (namn TEXT)")
+        writer.execute("INSERT INTO yxa VALUES ('Gränsfors')")
+        writer.commit()
+        # Ej committad ändring ska inte följa med
+        writer.execute("INSERT INTO yxa VALUES ('Halvfärdig')")
+
+        target = os.path.join(self.directory, "backup.sqlite3")
+        backups.backup_sqlite(source, target)
+        writer.rollback()
+        writer.close()
+
+        copy = sqlite3.connect(target)
+        self.assertEqual(
+            copy.execute("SELECT namn FROM yxa").fetchall(), [("Gränsfors",)]
+        )
+        copy.close()
+
+
+class MediaStoreTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.media_root = os.path.join(self.directory, "media")
+        self.backup_dir = os.path.join(self.directory, "backups")
+        self.store_dir = backups.store_dir_for(self.backup_dir)
+        _write(os.path.join(self.media_root, "axe_images", "a.jpg"), b"a" * 100)
+        _write(os.path.join(self.media_root, "axe_images", "kopia.jpg"), b"a" * 100)
+        _write(os.path.join(self.media_root, "stamps", "b.jpg"), b"b" * 50)
+        _write(os.path.join(self.media_root, "variants", "160", "a.webp"), b"v")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_identical_files_share_one_blob(self):
+        files, stats = backups.snapshot_media(self.media_root, self.store_dir)
+        self.assertEqual(
+            sorted(files), ["axe_images/a.jpg", "axe_images/kopia.jpg", "stamps/b.jpg"]
+        )
+        self.assertEqual(stats["new_blobs"], 2)
+        self.assertEqual(stats["new_bytes"], 150)
+
+    def test_second_snapshot_only_writes_changed_files(self):
+        backups.snapshot_media(self.media_root, self.store_dir)
+        with patch.object(backups, "_ingest", wraps=backups._ingest) as ingest:
+            _, stats = backups.snapshot_media(self.media_root, self.store_dir)
+        ingest.assert_not_called()
+        self.assertEqual(stats["new_blobs"], 0)
+
+        _write(os.path.join(self.media_root, "stamps", "b.jpg"), b"c" * 60)
+        _, stats = backups.snapshot_media(self.media_root, self.store_dir)
+        self.assertEqual(stats["new_blobs"], 1)
+        self.assertEqual(stats["new_bytes"], 60)
+
+    def test_restore_from_manifest(self):
+        files, stats = backups.snapshot_media(self.media_root, self.store_dir)
+        os.makedirs(self.backup_dir, exist_ok=True)
+        manifest_path = os.path.join(self.backup_dir, "media_manifest_1.json")
+        backups.write_manifest(manifest_path, files, stats)
+
+        target = os.path.join(self.directory, "återställd")
+        manifest = backups.read_manifest(manifest_path)
+        missing = backups.restore_media(manifest["files"], self.store_dir, target)
+        self.assertEqual(missing, [])
+        with open(os.path.join(target, "stamps", "b.jpg"), "rb") as f:
+            self.assertEqual(f.read(), b"b" * 50)
+
+    def test_collect_garbage_keeps_referenced_blobs(self):
+        files, _ = backups.snapshot_media(self.media_root, self.store_dir)
+        os.makedirs(self.backup_dir, exist_ok=True)
+        backups.write_manifest(
+            os.path.join(self.backup_dir, "media_manifest_1.json"),
+            {"stamps/b.jpg": files["stamps/b.jpg"]},
+        )
+        self.assertEqual(backups.collect_garbage(self.backup_dir), 1)
+        self.assertTrue(
+            os.path.exists(backups.blob_path(self.store_dir, files["stamps/b.jpg"]))
+        )
+
+
+class BackupCommandManifestTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.media_root = os.path.join(self.directory, "media")
+        self.db_path = os.path.join(self.directory, "db.sqlite3")
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("CREATE TABLE test (value TEXT)")
+        connection.commit()
+        connection.close()
+        _write(os.path.join(self.media_root, "axe_images", "a.jpg"), b"jpeg")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _run_backup(self, **options):
+        with patch("axes.management.commands.backup_database.settings") as settings:
+            settings.BASE_DIR = self.directory
+            settings.MEDIA_ROOT = self.media_root
+            settings.DATABASES = {"default": {"NAME": self.db_path}}
+            call_command("backup_database", stdout=StringIO(), **options)
+        return os.path.join(self.directory, "backups")
+
+    def test_compressed_backup_contains_manifest_instead_of_media(self):
+        backup_dir = self._run_backup(include_media=True, compress=True)
+        (zip_name,) = [name for name in os.listdir(backup_dir) if name.endswith(".zip")]
+        with zipfile.ZipFile(os.path.join(backup_dir, zip_name)) as archive:
+            names = archive.namelist()
+            stats = json.loads(archive.read("backup_stats.json"))
+        self.assertIn(backups.ZIP_MANIFEST_NAME, names)
+        self.assertFalse(any(name.startswith("media/") for name in names))
+        self.assertEqual(stats["media"]["files"], 1)
+
+    def test_restore_uses_manifest(self):
+        backup_dir = self._run_backup(include_media=True)
+        (db_backup,) = [n for n in os.listdir(backup_dir) if n.endswith(".sqlite3")]
+        self.assertTrue(
+            os.path.exists(
+                backups.manifest_path_for(os.path.join(backup_dir, db_backup))
+            )
+        )
+
+        os.remove(os.path.join(self.media_root, "axe_images", "a.jpg"))
+        with (
+            override_settings(
+                BASE_DIR=self.directory,
+                MEDIA_ROOT=self.media_root,
+                DATABASES={"default": {"NAME": self.db_path}},
+            ),
+            patch("axes.management.commands.restore_backup.Command.fix_image_paths"),
+        ):
+            call_command(
+                "restore_backup",
+                os.path.join(backup_dir, db_backup),
+                confirm=True,
+                include_media=True,
+                stdout=StringIO(),
+            )
+        with open(os.path.join(self.media_root, "axe_images", "a.jpg"), "rb") as f:
+            self.assertEqual(f.read(), b"jpeg")
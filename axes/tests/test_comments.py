@@ -1,12 +1,15 @@
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from django.contrib.auth.models import User
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from axes.models import Comment, Settings
+from axes.services import site_cache
 from axes.services.comments import build_comment_tree
 from axes.tests.factories import make_axe, make_manufacturer, make_stamp
 
@@ -432,7 +435,7 @@ class SubmitCommentNotificationTest(TestCase):
     def tearDown(self):
         cache.clear()
 
-    @patch("axes.utils.notifications.requests.post")
+    @patch("axes.utils.notifications.http_client.post")
     def test_pending_comment_triggers_notification(self, mock_post):
         response = self.client.post(
             self.url, {"author_name": "Kalle", "body": "Fin yxa!", "website": ""}
@@ -448,7 +451,7 @@ class SubmitCommentNotificationTest(TestCase):
         # Utan token satt ska ingen Authorization-header skickas
         self.assertNotIn("Authorization", kwargs["headers"])
 
-    @patch("axes.utils.notifications.requests.post")
+    @patch("axes.utils.notifications.http_client.post")
     def test_token_adds_authorization_header(self, mock_post):
         settings = Settings.get_settings()
         settings.ntfy_token = "tk_hemligt"
@@ -462,7 +465,7 @@ class SubmitCommentNotificationTest(TestCase):
         _, kwargs = mock_post.call_args
         self.assertEqual(kwargs["headers"]["Authorization"], "Bearer tk_hemligt")
 
-    @patch("axes.utils.notifications.requests.post")
+    @patch("axes.utils.notifications.http_client.post")
     def test_honeypot_spam_does_not_trigger_notification(self, mock_post):
         self.client.post(
             self.url,
@@ -475,7 +478,7 @@ class SubmitCommentNotificationTest(TestCase):
 
         mock_post.assert_not_called()
 
-    @patch("axes.utils.notifications.requests.post")
+    @patch("axes.utils.notifications.http_client.post")
     def test_authenticated_auto_approved_comment_does_not_trigger_notification(
         self, mock_post
     ):
@@ -488,7 +491,7 @@ class SubmitCommentNotificationTest(TestCase):
 
         mock_post.assert_not_called()
 
-    @patch("axes.utils.notifications.requests.post")
+    @patch("axes.utils.notifications.http_client.post")
     def test_empty_topic_url_does_not_trigger_notification(self, mock_post):
         settings = Settings.get_settings()
         settings.ntfy_topic_url = ""
@@ -500,7 +503,7 @@ class SubmitCommentNotificationTest(TestCase):
 
         mock_post.assert_not_called()
 
-    @patch("axes.utils.notifications.requests.post")
+    @patch("axes.utils.notifications.http_client.post")
     def test_notification_failure_does_not_break_submit(self, mock_post):
         mock_post.side_effect = Exception("ntfy nere")
 
@@ -519,7 +522,7 @@ class TestNtfyNotificationViewTest(TestCase):
         user = User.objects.create_user(username="admin", password="pass1234")
         self.client.force_login(user)
 
-    @patch("axes.utils.notifications.requests.post")
+    @patch("axes.utils.notifications.http_client.post")
     def test_sends_with_form_values(self, mock_post):
         response = self.client.post(
             self.url,
@@ -540,7 +543,7 @@ class TestNtfyNotificationViewTest(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertFalse(response.json()["success"])
 
-    @patch("axes.utils.notifications.requests.post")
+    @patch("axes.utils.notifications.http_client.post")
     def test_publish_failure_is_reported(self, mock_post):
         mock_post.side_effect = Exception("403 forbidden")
 
@@ -849,3 +852,91 @@ class CommentModerationViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"success": True, "deleted": True})
         self.assertFalse(Comment.objects.filter(pk=comment.pk).exists())
+
+
+class CommentTreeCacheTest(TestCase):
+    """Varm cache: detaljsidan gör inga kommentarsfrågor"""
+
+    def setUp(self):
+        # TestCase kör allt i en transaktion, där cachen annars är avstängd
+        patcher = patch.object(
+            site_cache, "connection", MagicMock(in_atomic_block=False)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        site_cache.invalidate()
+        self.addCleanup(site_cache.invalidate)
+        Settings.objects.create(id=1, comments_enabled_public=True)
+        self.axe = make_axe()
+        self.url = reverse("axe_detail", args=[self.axe.pk])
+
+    def _comment_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, [
+            query["sql"]
+            for query in ctx.captured_queries
+            if "axes_comment" in query["sql"]
+        ]
+
+    def test_warm_anonymous_page_makes_no_comment_queries(self):
+        Comment.objects.create(axe=self.axe, body="Fin yxa", status="APPROVED")
+        self.client.get(self.url)
+
+        response, queries = self._comment_queries()
+
+        self.assertEqual(queries, [])
+        self.assertContains(response, "Fin yxa")
+
+    def test_trees_are_cached_per_viewer_class(self):
+        Comment.objects.create(axe=self.axe, body="Väntande", status="PENDING")
+        self.client.get(self.url)
+
+        user = User.objects.create_user(username="staff", password="x" * 12)
+        self.client.force_login(user)
+        response = self.client.get(self.url)
+
+        self.assertContains(response, "Väntande")
+
+    def test_new_comment_invalidates_tree(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(axe=self.axe, body="Ny kommentar", status="APPROVED")
+
+        response, queries = self._comment_queries()
+
+        self.assertNotEqual(queries, [])
+        self.assertContains(response, "Ny kommentar")
+
+    def test_moderation_invalidates_tree(self):
+        comment = Comment.objects.create(
+            axe=self.axe, body="Granskas", status="PENDING"
+        )
+        self.assertNotContains(self.client.get(self.url), "Granskas")
+
+        comment.status = "APPROVED"
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.save()
+
+        self.assertContains(self.client.get(self.url), "Granskas")
+
+    def test_delete_invalidates_tree(self):
+        comment = Comment.objects.create(
+            axe=self.axe, body="Raderas", status="APPROVED"
+        )
+        self.assertContains(self.client.get(self.url), "Raderas")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.delete()
+
+        self.assertNotContains(self.client.get(self.url), "Raderas")
+
+    def test_other_targets_stay_cached(self):
+        other = make_axe()
+        self.client.get(self.url)
+        Comment.objects.create(axe=other, body="Annan yxa", status="APPROVED")
+
+        _, queries = self._comment_queries()
+
+        self.assertEqual(queries, [])
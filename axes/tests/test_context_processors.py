@@ -2,16 +2,24 @@
 Tester för context_processors.py
 """
 
+import json
 import subprocess
+import tempfile
+from pathlib import Path
 from unittest.mock import patch, MagicMock
-from django.test import TestCase, RequestFactory
+from django.db import connection
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from axes.context_processors import (
+    get_build_info,
     get_git_version,
     get_build_date,
     settings_processor,
 )
-from axes.models import Settings
+from axes.models import Comment, Settings
+from axes.services import site_cache
+from axes.tests.factories import make_axe
 
 
 class ContextProcessorsTest(TestCase):
@@ -254,3 +262,89 @@ class ContextProcessorsTest(TestCase):
         self.assertEqual(context["display_settings"]["transactions_rows"], 30)
         self.assertEqual(context["display_settings"]["manufacturers_rows"], 50)
         self.assertEqual(context["site_settings"]["title"], "AxeCollection")
+
+
+class BuildInfoTest(TestCase):
+    """Versionsinfo läses en gång per process, inte via git per sida"""
+
+    def setUp(self):
+        get_build_info.cache_clear()
+        self.addCleanup(get_build_info.cache_clear)
+
+    def test_build_info_file_is_preferred(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "build_info.json"
+            path.write_text(
+                json.dumps({"app_version": "v2.0.0", "build_date": "2025-05-01"})
+            )
+            with (
+                patch("axes.context_processors.BUILD_INFO_PATH", path),
+                patch("subprocess.run") as mock_run,
+            ):
+                info = get_build_info()
+        self.assertEqual(info["app_version"], "v2.0.0")
+        self.assertEqual(info["build_date"], "2025-05-01")
+        mock_run.assert_not_called()
+
+    @patch("subprocess.run")
+    def test_git_fallback_runs_once(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0, stdout="v1.2.3\n")
+        request = RequestFactory().get("/")
+        request.user = User()
+        with patch("axes.context_processors.BUILD_INFO_PATH", Path("/finns/inte.json")):
+            settings_processor(request)
+            calls = mock_run.call_count
+            settings_processor(request)
+        self.assertEqual(mock_run.call_count, calls)
+
+
+class SiteCacheTest(TestCase):
+    """Varm process: context processorn gör inga databasfrågor"""
+
+    def setUp(self):
+        # TestCase kör allt i en transaktion, där cachen annars är avstängd
+        patcher = patch.object(
+            site_cache, "connection", MagicMock(in_atomic_block=False)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        site_cache.invalidate()
+        self.addCleanup(site_cache.invalidate)
+        self.user = User.objects.create_user(username="cache", password="x" * 12)
+        self.request = RequestFactory().get("/")
+        self.request.user = self.user
+
+    def test_warm_cache_makes_no_queries(self):
+        settings_processor(self.request)
+        with CaptureQueriesContext(connection) as ctx:
+            settings_processor(self.request)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_settings_save_invalidates_on_commit(self):
+        settings_processor(self.request)
+        settings = Settings.get_settings()
+        settings.site_title = "Ny titel"
+        with self.captureOnCommitCallbacks() as callbacks:
+            settings.save()
+        # Före commit ska cachen inte tömmas - en samtidig request skulle
+        # annars kunna cacha den gamla raden igen
+        context = settings_processor(self.request)
+        self.assertNotEqual(context["site_settings"]["title"], "Ny titel")
+
+        for callback in callbacks:
+            callback()
+        context = settings_processor(self.request)
+        self.assertEqual(context["site_settings"]["title"], "Ny titel")
+
+    def test_new_comment_invalidates_pending_count(self):
+        self.assertEqual(settings_processor(self.request)["pending_comments_count"], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(axe=make_axe(), body="Hej")
+        self.assertEqual(settings_processor(self.request)["pending_comments_count"], 1)
+
+    def test_expired_entry_is_reloaded(self):
+        with override_settings(SITE_CACHE_TTL=0):
+            settings_processor(self.request)
+            with CaptureQueriesContext(connection) as ctx:
+                settings_processor(self.request)
+        self.assertGreater(len(ctx.captured_queries), 0)
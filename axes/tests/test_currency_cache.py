@@ -0,0 +1,215 @@
+import json
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+
+from axes.utils import currency_converter
+from axes.utils.currency_converter import (
+    FALLBACK_RATES,
+    clear_cache,
+    convert_currency,
+    get_exchange_rates,
+    get_live_rates,
+)
+
+USD_RATES = {"USD": 1, "EUR": 0.85, "GBP": 0.75, "SEK": 9.5}
+
+
+def _api_response(rates=USD_RATES):
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"base": "USD", "rates": rates}
+    return response
+
+
+class CurrencyRateCacheTest(SimpleTestCase):
+    """Kurser i processen: inga fil- eller nätverksanrop per konvertering"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_path = os.path.join(tmp.name, "kurser.json")
+        override = override_settings(
+            CURRENCY_CACHE_FILE=self.cache_path, CURRENCY_REFRESH_MODE="command"
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        clear_cache()
+        self.addCleanup(clear_cache)
+
+    def _forget_process_cache(self):
+        """Som en nystartad process: bara cache-filen finns kvar."""
+        currency_converter._store(None, None)
+        currency_converter._disk_loaded = False
+
+    @patch("axes.utils.currency_converter.http_client.get")
+    def test_single_request_gives_cross_rates(self, mock_get):
+        mock_get.return_value = _api_response()
+
+        rates = get_live_rates()
+
+        mock_get.assert_called_once()
+        self.assertTrue(mock_get.call_args.args[0].endswith("/USD"))
+        self.assertAlmostEqual(rates["USD"]["SEK"], 9.5)
+        self.assertAlmostEqual(rates["EUR"]["SEK"], 9.5 / 0.85)
+        self.assertAlmostEqual(rates["SEK"]["GBP"], 0.75 / 9.5)
+        self.assertNotIn("USD", rates["USD"])
+
+    @patch("axes.utils.currency_converter.http_client.get")
+    def test_incomplete_response_keeps_previous_rates(self, mock_get):
+        mock_get.return_value = _api_response()
+        get_live_rates()
+        mock_get.return_value = _api_response({"SEK": 10.0})
+
+        get_live_rates()
+
+        self.assertTrue(currency_converter.LAST_LIVE_RATES_FAILED)
+        self.assertEqual(convert_currency(100, "EUR", "SEK"), 1117.65)
+
+    @patch("axes.utils.currency_converter.http_client.get")
+    def test_warm_cache_reads_neither_file_nor_network(self, mock_get):
+        mock_get.return_value = _api_response()
+        get_live_rates()
+        mock_get.reset_mock()
+
+        with patch.object(currency_converter, "_read_cache_file") as mock_read:
+            for _ in range(100):
+                self.assertEqual(convert_currency(100, "USD", "SEK"), 950.0)
+
+        mock_read.assert_not_called()
+        mock_get.assert_not_called()
+
+    @patch("axes.utils.currency_converter.http_client.get")
+    def test_new_process_loads_cache_file_once(self, mock_get):
+        mock_get.return_value = _api_response()
+        get_live_rates()
+        self._forget_process_cache()
+
+        with patch.object(
+            currency_converter,
+            "_read_cache_file",
+            wraps=currency_converter._read_cache_file,
+        ) as mock_read:
+            self.assertEqual(convert_currency(100, "USD", "SEK"), 950.0)
+            self.assertEqual(convert_currency(100, "EUR", "SEK"), 1117.65)
+
+        self.assertEqual(mock_read.call_count, 1)
+
+    @patch("axes.utils.currency_converter.http_client.get")
+    def test_command_mode_never_fetches_on_lookup(self, mock_get):
+        rates = get_exchange_rates()
+
+        self.assertEqual(rates, FALLBACK_RATES)
+        self.assertEqual(currency_converter.LAST_RATES_SOURCE, "fallback")
+        mock_get.assert_not_called()
+
+    @patch("axes.utils.currency_converter.http_client.get")
+    def test_stale_rates_are_used_until_refreshed(self, mock_get):
+        with open(self.cache_path, "w") as f:
+            json.dump(
+                {
+                    "timestamp": "2020-01-01T00:00:00",
+                    "rates": {"USD": {"SEK": 9.0}},
+                },
+                f,
+            )
+
+        self.assertEqual(convert_currency(100, "USD", "SEK"), 900.0)
+        self.assertFalse(currency_converter.is_cache_valid())
+        mock_get.assert_not_called()
+
+    @patch("axes.utils.currency_converter.http_client.get")
+    def test_thread_mode_refreshes_in_background(self, mock_get):
+        mock_get.return_value = _api_response()
+
+        with override_settings(CURRENCY_REFRESH_MODE="thread"):
+            self.assertEqual(get_exchange_rates(), FALLBACK_RATES)
+            thread = currency_converter._refresh_thread
+            self.assertIsNotNone(thread)
+            thread.join(timeout=5)
+            # Kurserna är färska - ingen ny tråd startas
+            self.assertAlmostEqual(get_exchange_rates()["USD"]["SEK"], 9.5)
+            self.assertFalse(currency_converter.schedule_refresh())
+
+        mock_get.assert_called_once()
+
+    @patch("axes.utils.currency_converter.http_client.get")
+    def test_failed_refresh_is_not_retried_immediately(self, mock_get):
+        mock_get.side_effect = Exception("Nätverksfel")
+
+        with override_settings(CURRENCY_REFRESH_MODE="thread"):
+            get_exchange_rates()
+            currency_converter._refresh_thread.join(timeout=5)
+            self.assertEqual(get_exchange_rates(), FALLBACK_RATES)
+
+        self.assertIsNone(currency_converter._refresh_thread)
+        mock_get.assert_called_once()
+
+    @patch("axes.utils.currency_converter.http_client.get")
+    def test_refresh_command_writes_configured_file(self, mock_get):
+        mock_get.return_value = _api_response()
+        out = StringIO()
+
+        call_command("refresh_currency_rates", stdout=out)
+
+        self.assertIn("1 USD = 9.50 SEK", out.getvalue())
+        with open(self.cache_path) as f:
+            self.assertAlmostEqual(json.load(f)["rates"]["GBP"]["SEK"], 9.5 / 0.75)
+
+    @patch("axes.utils.currency_converter.http_client.get")
+    def test_refresh_command_reports_failure(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=500)
+
+        with self.assertRaises(CommandError):
+            call_command("refresh_currency_rates", stdout=StringIO())
+        self.assertFalse(os.path.exists(self.cache_path))
+
+
+@pytest.mark.slow
+class ConvertCurrencyBenchmarkTest(SimpleTestCase):
+    """Konverteringar per sekund med varm cache, jämfört med den tidigare
+    vägen som läste och tolkade cache-filen vid varje anrop. Körs med
+    `pytest -m slow -s` för att se siffrorna."""
+
+    ROUNDS = 20000
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(
+            CURRENCY_CACHE_FILE=os.path.join(tmp.name, "kurser.json"),
+            CURRENCY_REFRESH_MODE="command",
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        clear_cache()
+        self.addCleanup(clear_cache)
+        with patch("axes.utils.currency_converter.http_client.get") as mock_get:
+            mock_get.return_value = _api_response()
+            get_live_rates()
+
+    def _per_second(self, convert):
+        start = time.perf_counter()
+        for i in range(self.ROUNDS):
+            convert(i, "EUR", "SEK")
+        return self.ROUNDS / (time.perf_counter() - start)
+
+    def test_convert_currency_throughput(self):
+        def convert_from_file(amount, from_currency, to_currency):
+            # Den tidigare implementationen: cache-filen lästes per anrop
+            rates = currency_converter.load_cache()
+            return round(amount * rates[from_currency][to_currency], 2)
+
+        cached = self._per_second(convert_currency)
+        from_file = self._per_second(convert_from_file)
+
+        print(
+            f"\nconvert_currency: {cached:,.0f}/s med processcache, "
+            f"{from_file:,.0f}/s med cache-fil per anrop"
+        )
+        self.assertGreater(cached, from_file)
@@ -15,7 +15,7 @@ class LiveCurrencyConverterTestCase(SimpleTestCase):
 
     def test_get_live_rates_success(self):
         """Testa hämtning av live-kurser"""
-        with patch("axes.utils.currency_converter.requests.get") as mock_get:
+        with patch("axes.utils.currency_converter.http_client.get") as mock_get:
             # Mock API-svar
             mock_response = MagicMock()
             mock_response.status_code = 200
@@ -41,7 +41,7 @@ class LiveCurrencyConverterTestCase(SimpleTestCase):
 
     def test_get_live_rates_api_failure(self):
         """Testa fallback när API misslyckas"""
-        with patch("axes.utils.currency_converter.requests.get") as mock_get:
+        with patch("axes.utils.currency_converter.http_client.get") as mock_get:
             # Mock API-fel
             mock_response = MagicMock()
             mock_response.status_code = 500
@@ -127,7 +127,7 @@ class LiveCurrencyConverterTestCase(SimpleTestCase):
 
     def test_api_timeout_handling(self):
         """Testa hantering av API-timeout"""
-        with patch("axes.utils.currency_converter.requests.get") as mock_get:
+        with patch("axes.utils.currency_converter.http_client.get") as mock_get:
             # Mock timeout
             mock_get.side_effect = Exception("Timeout")
 
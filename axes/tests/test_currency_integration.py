@@ -33,7 +33,7 @@ class CurrencyIntegrationTestCase(TestCase):
         </html>
         """
 
-        with patch("axes.utils.ebay_parser.requests.Session") as mock_session:
+        with patch("axes.utils.ebay_parser.http_client.get_client") as mock_session:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.content = mock_html.encode("utf-8")
@@ -82,7 +82,7 @@ class CurrencyIntegrationTestCase(TestCase):
         </html>
         """
 
-        with patch("axes.utils.tradera_parser.requests.Session") as mock_session:
+        with patch("axes.utils.tradera_parser.http_client.get_client") as mock_session:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.content = mock_html.encode("utf-8")
@@ -342,7 +342,7 @@ class CurrencyParserTestCase(TestCase):
         parser = EbayParser()
 
         # Mock session för att undvika faktiska HTTP-anrop
-        with patch("axes.utils.ebay_parser.requests.Session") as mock_session:
+        with patch("axes.utils.ebay_parser.http_client.get_client") as mock_session:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.content = """
@@ -382,7 +382,7 @@ class CurrencyParserTestCase(TestCase):
         parser = TraderaParser()
 
         # Mock session för att undvika faktiska HTTP-anrop
-        with patch("axes.utils.tradera_parser.requests.Session") as mock_session:
+        with patch("axes.utils.tradera_parser.http_client.get_client") as mock_session:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.content = """
@@ -46,7 +46,7 @@ class EbayParserTestCase(SimpleTestCase):
             with self.subTest(url=url):
                 self.assertEqual(self.parser.extract_item_id(url), expected_id)
 
-    @patch("axes.utils.ebay_parser.requests.Session")
+    @patch("axes.utils.ebay_parser.http_client.get_client")
     def test_parse_ebay_page_success(self, mock_session):
         """Testa lyckad parsning av eBay-sida"""
         # Mock response
@@ -86,13 +86,13 @@ class EbayParserTestCase(SimpleTestCase):
         self.assertEqual(result["item_id"], "123456789012")
         self.assertEqual(result["url"], "https://www.ebay.com/itm/123456789012")
 
-    @patch("axes.utils.ebay_parser.requests.Session")
+    @patch("axes.utils.ebay_parser.http_client.get_client")
     def test_parse_ebay_page_invalid_url(self, mock_session):
         """Testa att ogiltig URL ger fel"""
         with self.assertRaises(ValueError, msg="Ogiltig eBay URL"):
             self.parser.parse_ebay_page("https://www.tradera.com/item/123")
 
-    @patch("axes.utils.ebay_parser.requests.Session")
+    @patch("axes.utils.ebay_parser.http_client.get_client")
     def test_parse_ebay_page_request_error(self, mock_session):
         """Testa hantering av nätverksfel"""
         mock_session_instance = MagicMock()
@@ -100,7 +100,7 @@ class EbayParserTestCase(SimpleTestCase):
         mock_session.return_value = mock_session_instance
 
         with self.assertRaises(ValueError):
-            self.parser.parse_ebay_page("https://www.ebay.com/itm/123456789012")
+            EbayParser().parse_ebay_page("https://www.ebay.com/itm/123456789012")
 
     def test_extract_prices(self):
         """Testa extrahering av priser"""
@@ -237,7 +237,7 @@ class EbayParserTestCase(SimpleTestCase):
 
     def test_parse_ebay_page_with_title_as_description(self):
         """Testa att parsning använder titeln som beskrivning"""
-        with patch("axes.utils.ebay_parser.requests.Session") as mock_session:
+        with patch("axes.utils.ebay_parser.http_client.get_client") as mock_session:
             # Mock response
             mock_response = MagicMock()
             mock_response.content = """
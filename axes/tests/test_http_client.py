@@ -0,0 +1,131 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase, override_settings
+
+from axes.utils import http_client
+from axes.utils.http_client import HttpClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def _reply(self, status):
+        body = b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        server = self.server
+        with server.lock:
+            server.hits.append((self.command, self.path))
+            server.ports.add(self.client_address[1])
+        if self.path == "/flaky":
+            with server.lock:
+                server.failures_left -= 1
+                failing = server.failures_left >= 0
+            self._reply(503 if failing else 200)
+        elif self.path == "/slow":
+            with server.lock:
+                server.active += 1
+                server.peak = max(server.peak, server.active)
+            time.sleep(0.05)
+            with server.lock:
+                server.active -= 1
+            self._reply(200)
+        else:
+            self._reply(404 if self.path == "/saknas" else 200)
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTest(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.lock = threading.Lock()
+        self.server.hits = []
+        self.server.ports = set()
+        self.server.failures_left = 0
+        self.server.active = 0
+        self.server.peak = 0
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.host = f"127.0.0.1:{self.server.server_port}"
+        self.client = HttpClient(per_host_concurrency=2, retries=2, backoff=0)
+        self.addCleanup(self.client.close)
+
+    def url(self, path):
+        return f"http://{self.host}{path}"
+
+    def test_connection_is_kept_alive(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get(self.url("/ok")).status_code, 200)
+
+        self.assertEqual(len(self.server.hits), 5)
+        self.assertEqual(len(self.server.ports), 1)
+
+    def test_server_errors_are_retried(self):
+        self.server.failures_left = 2
+
+        response = self.client.get(self.url("/flaky"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.hits), 3)
+
+    def test_post_is_not_retried_after_response(self):
+        self.server.failures_left = 1
+
+        response = self.client.post(self.url("/flaky"), json={"a": 1})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.server.hits), 1)
+
+    def test_per_host_concurrency_is_limited(self):
+        threads = [
+            threading.Thread(target=self.client.get, args=(self.url("/slow"),))
+            for _ in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(len(self.server.hits), 6)
+        self.assertLessEqual(self.server.peak, 2)
+
+    def test_metrics_per_host(self):
+        self.client.get(self.url("/ok"))
+        self.client.get(self.url("/ok"))
+        self.client.get(self.url("/saknas"))
+
+        metrics = self.client.metrics()[self.host]
+
+        self.assertEqual(metrics["requests"], 3)
+        self.assertEqual(metrics["errors"], 1)
+        self.assertGreaterEqual(metrics["p95_ms"], metrics["p50_ms"])
+        self.client.reset_metrics()
+        self.assertEqual(self.client.metrics(), {})
+
+
+class SharedClientTest(SimpleTestCase):
+    def setUp(self):
+        http_client.reset_client()
+        self.addCleanup(http_client.reset_client)
+
+    @override_settings(HTTP_PER_HOST_CONCURRENCY=3)
+    def test_one_client_per_process_from_settings(self):
+        client = http_client.get_client()
+
+        self.assertIs(http_client.get_client(), client)
+        self.assertEqual(client.per_host_concurrency, 3)
+        adapter = client.session.get_adapter("https://www.tradera.com/")
+        self.assertEqual(adapter._pool_maxsize, 3)
@@ -0,0 +1,178 @@
+import io
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from axes.models import Axe, AxeImage, ImageDerivativeJob, ManufacturerImage
+from axes.services import image_derivatives
+from axes.services.image_derivatives import process_job, process_pending_jobs
+from axes.tests.factories import make_axe, make_manufacturer
+
+
+def _jpeg(name="bild.jpg", size=(40, 30)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, "blue").save(buf, format="JPEG")
+    return SimpleUploadedFile(name, buf.getvalue(), content_type="image/jpeg")
+
+
+def _webp_path(image):
+    return os.path.splitext(image.image.path)[0] + ".webp"
+
+
+class ImageDerivativeTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, IMAGE_DERIVATIVE_MODE="queue"
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+
+class EnqueueOnSaveTest(ImageDerivativeTestCase):
+    def test_save_queues_job_without_converting(self):
+        """save() lägger bara ett jobb i kö - ingen WebP i request-tråden"""
+        image = AxeImage.objects.create(axe=make_axe(), image=_jpeg())
+        job = ImageDerivativeJob.objects.get(
+            model_label="axes.AxeImage", object_id=image.pk
+        )
+        self.assertEqual(job.status, "PENDING")
+        self.assertFalse(os.path.exists(_webp_path(image)))
+
+    def test_resave_reuses_job(self):
+        image = AxeImage.objects.create(axe=make_axe(), image=_jpeg())
+        process_pending_jobs()
+        image.order = 2
+        image.save()
+        job = ImageDerivativeJob.objects.get()
+        self.assertEqual(job.status, "PENDING")
+
+    def test_thread_mode_submits_after_commit(self):
+        with override_settings(IMAGE_DERIVATIVE_MODE="thread"):
+            with self.captureOnCommitCallbacks() as callbacks:
+                AxeImage.objects.create(axe=make_axe(), image=_jpeg())
+        self.assertEqual(len(callbacks), 1)
+
+
+class DeferredEnqueueTest(ImageDerivativeTestCase):
+    """Skapa-flödet döper om bilderna efter att de sparats - jobben får inte
+    starta förrän filerna ligger på sina slutliga platser."""
+
+    def setUp(self):
+        super().setUp()
+        User.objects.create_user(username="bilder", password="x" * 12)
+        self.client.login(username="bilder", password="x" * 12)
+        self.processed = []
+
+    def _process_now(self, job_id):
+        # Som en worker-tråd som hinner starta direkt
+        self.processed.append(ImageDerivativeJob.objects.get(pk=job_id).image_name)
+        process_job(job_id)
+
+    @patch("axes.services.remote_images.http_client.get")
+    def test_axe_create_with_url_images_in_thread_mode(self, mock_get):
+        response = MagicMock(status_code=200, headers={"content-type": "image/jpeg"})
+        response.iter_content.return_value = [_jpeg().read()]
+        mock_get.return_value = response
+        # Utan ATOMIC_REQUESTS körs on_commit direkt
+        immediate = MagicMock()
+        immediate.on_commit.side_effect = lambda callback: callback()
+
+        with override_settings(IMAGE_DERIVATIVE_MODE="thread"):
+            with patch.object(image_derivatives, "transaction", immediate):
+                with patch.object(
+                    image_derivatives, "_submit", side_effect=self._process_now
+                ):
+                    self.client.post(
+                        reverse("axe_create"),
+                        {
+                            "manufacturer": make_manufacturer().pk,
+                            "model": "URL-bilder",
+                            "status": "KÖPT",
+                            "image_urls": [
+                                "http://example.com/1.jpg",
+                                "http://example.com/2.jpg",
+                            ],
+                        },
+                    )
+
+        axe = Axe.objects.get(model="URL-bilder")
+        self.assertEqual(
+            self.processed, [f"axe_images/{axe.id}a.jpg", f"axe_images/{axe.id}b.jpg"]
+        )
+        for image in axe.images.all():
+            self.assertTrue(os.path.exists(_webp_path(image)))
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.media_root, "axe_images"))),
+            [f"{axe.id}a.jpg", f"{axe.id}a.webp", f"{axe.id}b.jpg", f"{axe.id}b.webp"],
+        )
+
+    def test_nothing_is_queued_when_block_fails(self):
+        with self.assertRaises(ValueError):
+            with image_derivatives.deferred():
+                AxeImage.objects.create(axe=make_axe(), image=_jpeg())
+                raise ValueError
+        self.assertEqual(ImageDerivativeJob.objects.count(), 0)
+
+
+class ProcessJobTest(ImageDerivativeTestCase):
+    def test_worker_creates_webp(self):
+        image = ManufacturerImage.objects.create(
+            manufacturer=make_manufacturer(), image=_jpeg()
+        )
+        self.assertEqual(process_pending_jobs(), 1)
+        self.assertTrue(os.path.exists(_webp_path(image)))
+        job = ImageDerivativeJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ("DONE", 1))
+
+    def test_job_is_only_claimed_once(self):
+        AxeImage.objects.create(axe=make_axe(), image=_jpeg())
+        job = ImageDerivativeJob.objects.get()
+        self.assertTrue(process_job(job.pk))
+        self.assertFalse(process_job(job.pk))
+
+    def test_broken_image_marks_job_failed(self):
+        """Fel sväljs inte längre tyst utan syns på jobbet"""
+        broken = SimpleUploadedFile("trasig.jpg", b"inte en bild")
+        AxeImage.objects.create(axe=make_axe(), image=broken)
+        with self.assertLogs("axes.services.image_derivatives", "WARNING"):
+            process_pending_jobs()
+        job = ImageDerivativeJob.objects.get()
+        self.assertEqual(job.status, "FAILED")
+        self.assertTrue(job.error)
+
+    def test_deleting_image_removes_job(self):
+        axe = make_axe()
+        AxeImage.objects.create(axe=axe, image=_jpeg())
+        axe.delete()
+        self.assertFalse(ImageDerivativeJob.objects.exists())
+
+
+class ProcessImageDerivativesCommandTest(ImageDerivativeTestCase):
+    def test_backfill_creates_missing_webp(self):
+        image = AxeImage.objects.create(axe=make_axe(), image=_jpeg())
+        # Bild som finns sedan tidigare, utan jobb
+        ImageDerivativeJob.objects.all().delete()
+
+        out = StringIO()
+        call_command("process_image_derivatives", "--backfill", stdout=out)
+        self.assertIn("Köade 1 bilder", out.getvalue())
+        self.assertIn("Bearbetade 1 bildjobb", out.getvalue())
+        self.assertTrue(os.path.exists(_webp_path(image)))
+
+        # Andra körningen hittar inget att göra
+        out = StringIO()
+        call_command("process_image_derivatives", "--backfill", stdout=out)
+        self.assertIn("Köade 0 bilder", out.getvalue())
@@ -0,0 +1,122 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from axes.models import AxeImage
+from axes.services.image_variants import (
+    generate_variant,
+    pick_width,
+    variant_is_fresh,
+    variant_name,
+)
+from axes.tests.factories import make_axe
+
+
+def _jpeg(name="stor.jpg", size=(2000, 1000)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, "green").save(buf, format="JPEG")
+    return SimpleUploadedFile(name, buf.getvalue(), content_type="image/jpeg")
+
+
+class ImageVariantTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, IMAGE_DERIVATIVE_MODE="queue"
+        )
+        self.settings_override.enable()
+        self.image = AxeImage.objects.create(axe=make_axe(), image=_jpeg())
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _variant_path(self, width):
+        return os.path.join(self.media_root, variant_name(self.image.image.name, width))
+
+
+class GenerateVariantTest(ImageVariantTestCase):
+    def test_variant_is_scaled_down(self):
+        path = generate_variant(self.image.image.name, 480)
+        with Image.open(path) as variant:
+            self.assertEqual(variant.size, (480, 240))
+            self.assertEqual(variant.format, "WEBP")
+
+    def test_never_upscales(self):
+        small = AxeImage.objects.create(
+            axe=make_axe(), image=_jpeg("liten.jpg", (100, 50))
+        )
+        with Image.open(generate_variant(small.image.name, 1024)) as variant:
+            self.assertEqual(variant.size, (100, 50))
+
+    def test_replaced_original_makes_variant_stale(self):
+        generate_variant(self.image.image.name, 160)
+        self.assertTrue(variant_is_fresh(self.image.image.name, 160))
+        # Bildordningen byter namn/innehåll på originalfilerna
+        variant_mtime = os.path.getmtime(self._variant_path(160))
+        os.utime(self.image.image.path, (variant_mtime + 10, variant_mtime + 10))
+        self.assertFalse(variant_is_fresh(self.image.image.name, 160))
+
+    def test_pick_width(self):
+        self.assertEqual(pick_width(130), 160)
+        self.assertEqual(pick_width(300), 480)
+        self.assertIsNone(pick_width(1500))
+
+    def test_deleting_image_removes_variants(self):
+        generate_variant(self.image.image.name, 160)
+        self.image.delete()
+        self.assertFalse(os.path.exists(self._variant_path(160)))
+
+
+class ImageVariantViewTest(ImageVariantTestCase):
+    def test_first_request_generates_and_redirects(self):
+        url = reverse("image_variant", args=["yxa", self.image.pk, 160])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(variant_name(self.image.image.name, 160), response["Location"])
+        self.assertTrue(os.path.exists(self._variant_path(160)))
+
+    def test_unknown_width_or_kind_is_404(self):
+        response = self.client.get(
+            reverse("image_variant", args=["yxa", self.image.pk, 333])
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            reverse("image_variant", args=["okand", self.image.pk, 160])
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class ImageVariantTagTest(ImageVariantTestCase):
+    def _render(self, source):
+        template = Template("{% load axe_filters %}" + source)
+        return template.render(Context({"img": self.image}))
+
+    def test_variant_url_points_to_view_until_cached(self):
+        html = self._render("{% image_variant_url img 130 %}")
+        self.assertEqual(
+            html, reverse("image_variant", args=["yxa", self.image.pk, 160])
+        )
+
+        generate_variant(self.image.image.name, 160)
+        html = self._render("{% image_variant_url img 130 %}")
+        self.assertIn("/media/" + variant_name(self.image.image.name, 160), html)
+
+    def test_wide_display_uses_full_size(self):
+        html = self._render("{% image_variant_url img 2000 %}")
+        self.assertEqual(html, self.image.image_url_with_cache_busting)
+
+    def test_srcset_lists_variants_and_original(self):
+        html = self._render('{% image_srcset img "50vw" %}')
+        self.assertIn(" 160w", html)
+        self.assertIn(" 480w", html)
+        self.assertIn(" 1024w", html)
+        self.assertIn(" 2000w", html)
+        self.assertIn('sizes="50vw"', html)
@@ -4,6 +4,7 @@ import tempfile
 import shutil
 import zipfile
 import json
+import sqlite3
 from unittest.mock import patch, MagicMock
 from django.core.management import call_command
 from django.core.management.base import CommandError
@@ -30,6 +31,17 @@ from axes.models import Measurement, ManufacturerLink, AxeImage
 pytestmark = pytest.mark.slow
 
 
+def _create_sqlite_db(path):
+    """Minimal riktig SQLite-databas för backup/återställning"""
+    if os.path.exists(path):
+        os.remove(path)
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE test (value TEXT)")
+    connection.execute("INSERT INTO test VALUES ('test database content')")
+    connection.commit()
+    connection.close()
+
+
 class ClearTransactionsCommandTest(TestCase):
     def setUp(self):
         # Skapa testdata
@@ -457,10 +469,9 @@ class BackupDatabaseCommandTest(TestCase):
         }
         mock_settings.MEDIA_ROOT = os.path.join(temp_dir, "media")
 
-        # Skapa en temporär databasfil
+        # Skapa en temporär databasfil (backupen använder SQLites backup-API)
         temp_db_path = os.path.join(temp_dir, "test_db.sqlite3")
-        with open(temp_db_path, "w") as f:
-            f.write("test database content")
+        _create_sqlite_db(temp_db_path)
 
         backup_dir = os.path.join(temp_dir, "backups")
 
@@ -497,10 +508,9 @@ class BackupDatabaseCommandTest(TestCase):
         }
         mock_settings.MEDIA_ROOT = os.path.join(temp_dir, "media")
 
-        # Skapa en temporär databasfil
+        # Skapa en temporär databasfil (backupen använder SQLites backup-API)
         temp_db_path = os.path.join(temp_dir, "test_db.sqlite3")
-        with open(temp_db_path, "w") as f:
-            f.write("test database content")
+        _create_sqlite_db(temp_db_path)
 
         backup_dir = os.path.join(temp_dir, "backups")
 
@@ -550,10 +560,9 @@ class BackupDatabaseCommandTest(TestCase):
         with open(test_file2, "w") as f:
             f.write("test file 2")
 
-        # Skapa en temporär databasfil
+        # Skapa en temporär databasfil (backupen använder SQLites backup-API)
         temp_db_path = os.path.join(temp_dir, "test_db.sqlite3")
-        with open(temp_db_path, "w") as f:
-            f.write("test database content")
+        _create_sqlite_db(temp_db_path)
 
         backup_dir = os.path.join(temp_dir, "backups")
 
@@ -588,10 +597,9 @@ class BackupDatabaseCommandTest(TestCase):
         }
         mock_settings.MEDIA_ROOT = os.path.join(temp_dir, "media")
 
-        # Skapa en temporär databasfil
+        # Skapa en temporär databasfil (backupen använder SQLites backup-API)
         temp_db_path = os.path.join(temp_dir, "test_db.sqlite3")
-        with open(temp_db_path, "w") as f:
-            f.write("test database content")
+        _create_sqlite_db(temp_db_path)
 
         backup_dir = os.path.join(temp_dir, "backups")
 
@@ -972,12 +980,11 @@ class RestoreBackupCommandTest(TestCase):
         self.zip_backup_file = os.path.join(self.temp_dir, "test_backup.zip")
 
         # Skapa en test-databas
-        with open(self.backup_file, "w") as f:
-            f.write("test database content")
+        _create_sqlite_db(self.backup_file)
 
         # Skapa en test-zip-fil
         with zipfile.ZipFile(self.zip_backup_file, "w") as zipf:
-            zipf.writestr("test_db.sqlite3", "test database content")
+            zipf.write(self.backup_file, "test_db.sqlite3")
             zipf.writestr("media/test_image.jpg", "test image content")
 
     def tearDown(self):
@@ -986,7 +993,7 @@ class RestoreBackupCommandTest(TestCase):
     @override_settings(
         BASE_DIR="/tmp",
         MEDIA_ROOT="/tmp/media",
-        DATABASES={"default": {"NAME": "test_db.sqlite3"}},
+        DATABASES={"default": {"NAME": "/tmp/test_db.sqlite3"}},
     )
     def test_restore_backup_file_not_found(self):
         """Test att kommandot hanterar saknade backup-filer"""
@@ -1000,7 +1007,7 @@ class RestoreBackupCommandTest(TestCase):
     @override_settings(
         BASE_DIR="/tmp",
         MEDIA_ROOT="/tmp/media",
-        DATABASES={"default": {"NAME": "test_db.sqlite3"}},
+        DATABASES={"default": {"NAME": "/tmp/test_db.sqlite3"}},
     )
     def test_restore_backup_requires_confirmation(self):
         """Test att kommandot kräver bekräftelse"""
@@ -1013,7 +1020,7 @@ class RestoreBackupCommandTest(TestCase):
     @override_settings(
         BASE_DIR="/tmp",
         MEDIA_ROOT="/tmp/media",
-        DATABASES={"default": {"NAME": "test_db.sqlite3"}},
+        DATABASES={"default": {"NAME": "/tmp/test_db.sqlite3"}},
     )
     def test_restore_backup_invalid_file_type(self):
         """Test att kommandot hanterar ogiltiga filtyper"""
@@ -1029,10 +1036,10 @@ class RestoreBackupCommandTest(TestCase):
     @override_settings(
         BASE_DIR="/tmp",
         MEDIA_ROOT="/tmp/media",
-        DATABASES={"default": {"NAME": "test_db.sqlite3"}},
+        DATABASES={"default": {"NAME": "/tmp/test_db.sqlite3"}},
     )
-    @patch("shutil.copy2")
-    def test_restore_sqlite3_database(self, mock_copy2):
+    @patch("axes.services.backups.backup_sqlite")
+    def test_restore_sqlite3_database(self, mock_backup_sqlite):
         """Test återställning av sqlite3-databas"""
         out = StringIO()
         call_command("restore_backup", self.backup_file, confirm=True, stdout=out)
@@ -1040,15 +1047,15 @@ class RestoreBackupCommandTest(TestCase):
 
         self.assertIn("Startar återställning från backup...", output)
         self.assertIn("Återställning slutförd!", output)
-        mock_copy2.assert_called()
+        mock_backup_sqlite.assert_called()
 
     @override_settings(
         BASE_DIR="/tmp",
         MEDIA_ROOT="/tmp/media",
-        DATABASES={"default": {"NAME": "test_db.sqlite3"}},
+        DATABASES={"default": {"NAME": "/tmp/test_db.sqlite3"}},
     )
-    @patch("shutil.copy2")
-    def test_restore_from_zip_without_media(self, mock_copy2):
+    @patch("axes.services.backups.backup_sqlite")
+    def test_restore_from_zip_without_media(self, mock_backup_sqlite):
         """Test återställning från zip utan media"""
         out = StringIO()
         call_command("restore_backup", self.zip_backup_file, confirm=True, stdout=out)
@@ -1056,16 +1063,19 @@ class RestoreBackupCommandTest(TestCase):
 
         self.assertIn("Startar återställning från backup...", output)
         self.assertIn("Återställning slutförd!", output)
-        mock_copy2.assert_called()
+        mock_backup_sqlite.assert_called()
 
     @override_settings(
         BASE_DIR="/tmp",
         MEDIA_ROOT="/tmp/media",
-        DATABASES={"default": {"NAME": "test_db.sqlite3"}},
+        DATABASES={"default": {"NAME": "/tmp/test_db.sqlite3"}},
     )
+    @patch("axes.services.backups.backup_sqlite")
     @patch("shutil.copy2")
     @patch("shutil.copytree")
-    def test_restore_from_zip_with_media(self, mock_copytree, mock_copy2):
+    def test_restore_from_zip_with_media(
+        self, mock_copytree, mock_copy2, mock_backup_sqlite
+    ):
         """Test återställning från zip med media"""
         out = StringIO()
         call_command(
@@ -1084,10 +1094,11 @@ class RestoreBackupCommandTest(TestCase):
     @override_settings(
         BASE_DIR="/tmp",
         MEDIA_ROOT="/tmp/media",
-        DATABASES={"default": {"NAME": "test_db.sqlite3"}},
+        DATABASES={"default": {"NAME": "/tmp/test_db.sqlite3"}},
     )
+    @patch("axes.services.backups.backup_sqlite")
     @patch("django.db.connection")
-    def test_fix_image_paths(self, mock_connection):
+    def test_fix_image_paths(self, mock_connection, mock_backup_sqlite):
         """Test fix_image_paths-funktionen"""
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value = mock_cursor
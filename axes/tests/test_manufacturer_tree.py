@@ -0,0 +1,140 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from axes.models import ManufacturerClosure
+from axes.services import manufacturer_tree
+from axes.tests.factories import make_axe, make_manufacturer, make_transaction
+
+
+def _links():
+    return set(
+        ManufacturerClosure.objects.values_list("ancestor_id", "descendant_id", "depth")
+    )
+
+
+def _expected_links():
+    """Closure-tabellen som rebuild_closure bygger den från parent-fälten."""
+    manufacturer_tree.rebuild_closure()
+    return _links()
+
+
+class ManufacturerTreeMaintenanceTest(TestCase):
+    def setUp(self):
+        self.root = make_manufacturer(name="Gränsfors")
+        self.child = make_manufacturer(name="Smed A", parent=self.root)
+        self.grandchild = make_manufacturer(name="Lärling", parent=self.child)
+        self.other = make_manufacturer(name="Hults Bruk")
+
+    def assertClosureMatchesParents(self):
+        links = _links()
+        self.assertEqual(links, _expected_links())
+
+    def test_create_adds_links_to_all_ancestors(self):
+        self.assertIn((self.root.id, self.grandchild.id, 2), _links())
+        self.assertIn((self.child.id, self.grandchild.id, 1), _links())
+        self.assertIn((self.grandchild.id, self.grandchild.id, 0), _links())
+        self.assertClosureMatchesParents()
+
+    def test_move_subtree_to_other_parent(self):
+        self.child.parent = self.other
+        self.child.save()
+
+        self.assertIn((self.other.id, self.grandchild.id, 2), _links())
+        self.assertNotIn((self.root.id, self.grandchild.id, 2), _links())
+        self.assertClosureMatchesParents()
+
+    def test_move_subtree_to_root(self):
+        self.child.parent = None
+        self.child.save()
+
+        self.assertEqual(self.grandchild.hierarchy_level, 1)
+        self.assertClosureMatchesParents()
+
+    def test_save_without_parent_change_keeps_links(self):
+        before = _links()
+        self.child.name = "Smed B"
+        self.child.save()
+        self.assertEqual(_links(), before)
+
+    def test_move_into_own_subtree_is_refused(self):
+        self.root.parent = self.grandchild
+        with self.assertRaises(ValueError):
+            manufacturer_tree.move_subtree(self.root)
+
+    def test_delete_detaches_sub_manufacturers(self):
+        self.child.delete()
+
+        self.grandchild.refresh_from_db()
+        self.assertIsNone(self.grandchild.parent_id)
+        self.assertEqual(self.grandchild.hierarchy_level, 0)
+        self.assertClosureMatchesParents()
+
+    def test_rebuild_command(self):
+        ManufacturerClosure.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_manufacturer_closure", stdout=out)
+
+        self.assertIn("7 länkar", out.getvalue())
+        self.assertEqual(self.root.all_sub_manufacturers, [self.child, self.grandchild])
+
+
+class ManufacturerTreeQueryTest(TestCase):
+    def setUp(self):
+        self.root = make_manufacturer(name="Gränsfors")
+        self.child = make_manufacturer(name="Smed A", parent=self.root)
+        self.grandchild = make_manufacturer(name="Lärling", parent=self.child)
+        self.other = make_manufacturer(name="Hults Bruk")
+        self.axes = [
+            make_axe(manufacturer=manufacturer)
+            for manufacturer in (self.root, self.child, self.grandchild)
+            for _ in range(3)
+        ]
+        self.other_axe = make_axe(manufacturer=self.other)
+
+    def test_subtree_axes_is_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            axe_ids = {axe.id for axe in manufacturer_tree.subtree_axes(self.root)}
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(axe_ids, {axe.id for axe in self.axes})
+
+    def test_properties_use_closure(self):
+        make_transaction(axe=self.axes[-1], type="KÖP", price=100)
+        make_transaction(axe=self.other_axe, type="KÖP", price=50)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self.root.all_sub_manufacturers, [self.child, self.grandchild]
+            )
+        self.assertEqual(self.root.axe_count_including_sub_manufacturers, 9)
+        self.assertEqual(self.child.axe_count_including_sub_manufacturers, 6)
+        self.assertEqual(self.root.buy_count_including_sub_manufacturers, 1)
+        self.assertEqual(self.root.total_buy_value_including_sub_manufacturers, 100)
+        self.assertEqual(self.grandchild.hierarchy_level, 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.root.hierarchy_level, 0)
+
+    def test_ancestors_and_is_descendant(self):
+        self.assertEqual(
+            list(manufacturer_tree.ancestors(self.grandchild)),
+            [self.child, self.root],
+        )
+        self.assertTrue(manufacturer_tree.is_descendant(self.grandchild, self.root))
+        self.assertFalse(manufacturer_tree.is_descendant(self.root, self.grandchild))
+        self.assertFalse(manufacturer_tree.is_descendant(self.root, self.root))
+
+    def test_hierarchy_levels(self):
+        levels = manufacturer_tree.hierarchy_levels()
+        self.assertEqual(levels[self.root.id], 0)
+        self.assertEqual(levels[self.grandchild.id], 2)
+
+    def test_sort_hierarchically_links_parents_in_memory(self):
+        manufacturers = manufacturer_tree.sort_hierarchically(
+            manufacturer_tree.subtree(self.root)
+        )
+        self.assertEqual(manufacturers, [self.root, self.child, self.grandchild])
+        with self.assertNumQueries(0):
+            self.assertEqual(manufacturers[2].parent.parent, self.root)
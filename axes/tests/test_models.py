@@ -748,7 +748,7 @@ class AxeImageExifRotationTest(TestCase):
         img.save(buf, format="JPEG", exif=exif)
 
         with tempfile.TemporaryDirectory() as media_root:
-            with override_settings(MEDIA_ROOT=media_root):
+            with override_settings(MEDIA_ROOT=media_root, IMAGE_DERIVATIVE_MODE="sync"):
                 manufacturer = Manufacturer.objects.create(name="Test")
                 axe = Axe.objects.create(manufacturer=manufacturer, model="Test Axe")
                 axe_image = AxeImage.objects.create(
@@ -0,0 +1,155 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from axes.models import MonthlyTransactionSummary, Transaction
+from axes.tests.factories import make_axe, make_transaction
+
+
+def _summary():
+    return {
+        row.month: (
+            row.buy_count,
+            row.sale_count,
+            row.buy_value,
+            row.sale_value,
+            row.buy_shipping,
+            row.sale_shipping,
+            row.cumulative_buys,
+            row.collection_size,
+        )
+        for row in MonthlyTransactionSummary.objects.all()
+    }
+
+
+class MonthlySummarySignalTest(TestCase):
+    """Summeringen hålls uppdaterad inkrementellt av signalerna"""
+
+    def setUp(self):
+        self.axe = make_axe()
+
+    def test_create_adds_month(self):
+        make_transaction(
+            axe=self.axe,
+            transaction_date=date(2024, 3, 12),
+            price=Decimal("200"),
+            shipping_cost=Decimal("30"),
+        )
+        row = MonthlyTransactionSummary.objects.get(month=date(2024, 3, 1))
+        self.assertEqual(row.buy_count, 1)
+        self.assertEqual(row.buy_value, Decimal("200"))
+        self.assertEqual(row.buy_shipping, Decimal("30"))
+        self.assertEqual(row.cumulative_buys, 1)
+        self.assertEqual(row.collection_size, 1)
+
+    def test_earlier_month_updates_later_cumulative(self):
+        make_transaction(axe=self.axe, transaction_date=date(2024, 5, 1))
+        make_transaction(axe=self.axe, transaction_date=date(2024, 2, 1))
+        make_transaction(axe=self.axe, transaction_date=date(2024, 3, 1), type="SÄLJ")
+        may = MonthlyTransactionSummary.objects.get(month=date(2024, 5, 1))
+        self.assertEqual(may.cumulative_buys, 2)
+        self.assertEqual(may.collection_size, 1)
+        march = MonthlyTransactionSummary.objects.get(month=date(2024, 3, 1))
+        self.assertEqual(march.cumulative_buys, 1)
+        self.assertEqual(march.collection_size, 0)
+
+    def test_moving_transaction_between_months(self):
+        transaction = make_transaction(
+            axe=self.axe, transaction_date=date(2024, 1, 10), price=Decimal("100")
+        )
+        transaction.transaction_date = date(2024, 4, 10)
+        transaction.type = "SÄLJ"
+        transaction.save()
+        self.assertFalse(
+            MonthlyTransactionSummary.objects.filter(month=date(2024, 1, 1)).exists()
+        )
+        row = MonthlyTransactionSummary.objects.get(month=date(2024, 4, 1))
+        self.assertEqual((row.buy_count, row.sale_count), (0, 1))
+        self.assertEqual(row.sale_value, Decimal("100"))
+        self.assertEqual(row.collection_size, -1)
+
+    def test_string_date_from_view_data(self):
+        """api_transaction_update sätter datum som sträng direkt från POST"""
+        transaction = make_transaction(axe=self.axe, transaction_date=date(2024, 1, 10))
+        transaction.transaction_date = "2024-06-01"
+        transaction.price = 150.5
+        transaction.save()
+        row = MonthlyTransactionSummary.objects.get(month=date(2024, 6, 1))
+        self.assertEqual(row.buy_value, Decimal("150.5"))
+
+    def test_delete_removes_contribution(self):
+        keep = make_transaction(axe=self.axe, transaction_date=date(2024, 1, 10))
+        remove = make_transaction(axe=self.axe, transaction_date=date(2024, 1, 20))
+        make_transaction(axe=self.axe, transaction_date=date(2024, 2, 1))
+        remove.delete()
+        january = MonthlyTransactionSummary.objects.get(month=date(2024, 1, 1))
+        self.assertEqual(january.buy_count, 1)
+        february = MonthlyTransactionSummary.objects.get(month=date(2024, 2, 1))
+        self.assertEqual(february.cumulative_buys, 2)
+        keep.delete()
+        self.assertFalse(
+            MonthlyTransactionSummary.objects.filter(month=date(2024, 1, 1)).exists()
+        )
+
+    def test_cascade_delete_of_axe(self):
+        make_transaction(axe=self.axe, transaction_date=date(2024, 1, 10))
+        self.axe.delete()
+        self.assertFalse(MonthlyTransactionSummary.objects.exists())
+
+
+class RebuildMonthlySummaryCommandTest(TestCase):
+    def test_rebuild_matches_incremental(self):
+        axe = make_axe()
+        for month in (1, 1, 3, 7):
+            make_transaction(
+                axe=axe,
+                transaction_date=date(2024, month, 5),
+                price=Decimal("100") * month,
+                shipping_cost=Decimal("10"),
+            )
+        make_transaction(axe=axe, transaction_date=date(2024, 3, 9), type="SÄLJ")
+        incremental = _summary()
+
+        # Ändringar som går förbi signalerna ger drift som kommandot reparerar
+        Transaction.objects.filter(transaction_date__month=7).update(price=Decimal("1"))
+        out = StringIO()
+        call_command("rebuild_monthly_summary", stdout=out)
+        self.assertIn("3 månader", out.getvalue())
+
+        rebuilt = _summary()
+        self.assertEqual(rebuilt[date(2024, 7, 1)][2], Decimal("1"))
+        rebuilt[date(2024, 7, 1)] = incremental[date(2024, 7, 1)]
+        self.assertEqual(rebuilt, incremental)
+
+
+class StatisticsDashboardSeriesTest(TestCase):
+    def test_chart_series_come_from_summary(self):
+        axe = make_axe()
+        make_transaction(axe=axe, transaction_date=date(2024, 1, 5))
+        make_transaction(axe=axe, transaction_date=date(2024, 2, 5), type="SÄLJ")
+        response = self.client.get(reverse("statistics_dashboard"))
+        self.assertEqual(response.context["chart_labels"], ["Jan 2024", "Feb 2024"])
+        self.assertEqual(response.context["bought_data"], [1, 1])
+        self.assertEqual(response.context["collection_data"], [1, 0])
+        self.assertEqual(response.context["activity_sales"], [0, 1])
+
+    def test_query_count_independent_of_ledger_size(self):
+        axe = make_axe()
+        # Topplistorna på sidan visar upp till fem rader var
+        for day in range(1, 7):
+            make_transaction(axe=axe, transaction_date=date(2023, 12, day))
+            make_transaction(axe=axe, transaction_date=date(2023, 12, day), type="SÄLJ")
+        self.client.get(reverse("statistics_dashboard"))
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse("statistics_dashboard"))
+        for day in range(1, 28):
+            make_transaction(axe=axe, transaction_date=date(2024, 1, day))
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(reverse("statistics_dashboard"))
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
@@ -0,0 +1,128 @@
+import shutil
+import tempfile
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+
+from axes.services.remote_images import failed_urls, ingest_axe_images
+from axes.tests.factories import make_axe
+
+
+def _response(body=b"bilddata", status_code=200, content_type="image/jpeg", delay=0):
+    response = MagicMock(status_code=status_code)
+    response.headers = {"content-type": content_type}
+
+    def iter_content(chunk_size):
+        time.sleep(delay)
+        return [body[i : i + 4] for i in range(0, len(body), 4)]
+
+    response.iter_content.side_effect = iter_content
+    return response
+
+
+class RemoteImageIngestTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(
+            MEDIA_ROOT=self.media_root, IMAGE_DERIVATIVE_MODE="queue"
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        patcher = patch("axes.services.remote_images.http_client.get")
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.axe = make_axe()
+
+    def _serve(self, responses):
+        self.get.side_effect = lambda url, **kwargs: responses[url]
+
+    def test_keeps_order_when_downloads_finish_out_of_order(self):
+        urls = [f"http://bilder.example/{i}.jpg" for i in range(1, 5)]
+        self._serve(
+            {
+                url: _response(body=url.encode(), delay=0.05 * (4 - i))
+                for i, url in enumerate(urls)
+            }
+        )
+
+        results = ingest_axe_images(
+            self.axe, urls, start_order=10, description="Auktionsbild {index}"
+        )
+
+        images = [result["image"] for result in results]
+        self.assertEqual([image.order for image in images], [11, 12, 13, 14])
+        self.assertEqual(images[2].description, "Auktionsbild 3")
+        for url, image in zip(urls, images):
+            with image.image.open("rb") as f:
+                self.assertEqual(f.read(), url.encode())
+
+    def test_downloads_run_in_parallel(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def get(url, **kwargs):
+            with lock:
+                active.append(url)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(url)
+            return _response()
+
+        self.get.side_effect = get
+        urls = [f"http://bilder.example/{i}.jpg" for i in range(4)]
+
+        with override_settings(REMOTE_IMAGE_WORKERS=4):
+            ingest_axe_images(self.axe, urls)
+
+        self.assertGreater(max(peak), 1)
+        self.assertEqual(self.axe.images.count(), 4)
+
+    def test_reports_failures_per_image(self):
+        self._serve(
+            {
+                "http://bilder.example/ok.jpg": _response(),
+                "http://bilder.example/saknas.jpg": _response(status_code=404),
+                "http://bilder.example/sida": _response(content_type="text/html"),
+            }
+        )
+
+        results = ingest_axe_images(
+            self.axe,
+            [
+                "http://bilder.example/ok.jpg",
+                "http://bilder.example/saknas.jpg",
+                "ftp://bilder.example/hoppas-over.jpg",
+                "http://bilder.example/sida",
+            ],
+        )
+
+        self.assertEqual(len(results), 3)
+        self.assertIsNotNone(results[0]["image"])
+        self.assertEqual(results[1]["error"], "HTTP 404")
+        self.assertIn("text/html", results[2]["error"])
+        self.assertEqual(
+            failed_urls(results),
+            ["http://bilder.example/saknas.jpg", "http://bilder.example/sida"],
+        )
+        self.assertEqual(self.axe.images.count(), 1)
+
+    @override_settings(REMOTE_IMAGE_MAX_BYTES=10)
+    def test_oversized_body_is_aborted(self):
+        self._serve({"http://bilder.example/stor.jpg": _response(body=b"x" * 11)})
+
+        results = ingest_axe_images(self.axe, ["http://bilder.example/stor.jpg"])
+
+        self.assertIn("För stor", results[0]["error"])
+        self.assertEqual(self.axe.images.count(), 0)
+
+    def test_extension_from_content_type(self):
+        self._serve({"http://bilder.example/bild": _response(content_type="image/png")})
+
+        results = ingest_axe_images(self.axe, ["http://bilder.example/bild"])
+
+        self.assertTrue(results[0]["image"].image.name.endswith(".png"))
@@ -0,0 +1,113 @@
+import re
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from axes.services import request_metrics
+from axes.tests.factories import make_axe
+
+SERVER_TIMING = re.compile(
+    r'db;desc="(\d+) SQL";dur=[\d.]+, tpl;dur=([\d.]+), total;dur=[\d.]+'
+)
+
+
+@override_settings(REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_SLOW_MS=60000)
+class RequestTimingMiddlewareTest(TestCase):
+    def setUp(self):
+        request_metrics.clear()
+        self.addCleanup(request_metrics.clear)
+        for _ in range(3):
+            make_axe()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("axe_list"))
+
+        match = SERVER_TIMING.fullmatch(response["Server-Timing"])
+        self.assertIsNotNone(match, response["Server-Timing"])
+        self.assertGreater(int(match.group(1)), 0)
+        self.assertGreater(float(match.group(2)), 0)
+
+    def test_records_per_url_name(self):
+        self.client.get(reverse("axe_list"))
+        self.client.get(reverse("axe_list"))
+        self.client.get(reverse("axe_list_data"))
+
+        rows = {row["name"]: row for row in request_metrics.snapshot()}
+
+        self.assertEqual(rows["axe_list"]["requests"], 2)
+        self.assertEqual(rows["axe_list_data"]["requests"], 1)
+        self.assertGreater(rows["axe_list"]["avg_queries"], 0)
+
+    @override_settings(REQUEST_TIMING_SLOW_MS=0, REQUEST_TIMING_TOP_QUERIES=2)
+    def test_slow_request_is_logged_with_slowest_queries(self):
+        with self.assertLogs("axes.middleware", level="WARNING") as logs:
+            self.client.get(reverse("axe_list"))
+
+        message = logs.output[0]
+        self.assertIn("Långsam request GET", message)
+        self.assertIn("(axe_list)", message)
+        self.assertEqual(message.count(" ms: "), 2)
+
+    @override_settings(REQUEST_TIMING_ENABLED=False)
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse("axe_list"))
+
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(request_metrics.snapshot(), [])
+
+
+class RequestTimingPageTest(TestCase):
+    def setUp(self):
+        request_metrics.clear()
+        self.addCleanup(request_metrics.clear)
+        self.url = reverse("request_timing")
+
+    def test_requires_staff(self):
+        User.objects.create_user("vanlig", password="losenord12345")
+        self.client.login(username="vanlig", password="losenord12345")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 302)
+
+    def test_staff_sees_rows_and_can_reset(self):
+        User.objects.create_user("personal", password="losenord12345", is_staff=True)
+        self.client.login(username="personal", password="losenord12345")
+        request_metrics.record("axe_list", 120.0, 30.0, 40.0, 12)
+
+        response = self.client.get(self.url)
+
+        self.assertContains(response, "axe_list")
+        self.assertContains(response, "12.0 / 12")
+
+        response = self.client.post(self.url)
+
+        self.assertRedirects(response, self.url)
+        self.assertEqual(request_metrics.snapshot(), [])
+
+
+class RequestMetricsTest(SimpleTestCase):
+    def setUp(self):
+        request_metrics.clear()
+        self.addCleanup(request_metrics.clear)
+
+    @override_settings(REQUEST_TIMING_WINDOW=3)
+    def test_percentiles_over_rolling_window(self):
+        for total in (1000, 10, 20, 30):
+            request_metrics.record("axe_list", total, 1, 2, 3)
+
+        [row] = request_metrics.snapshot()
+
+        self.assertEqual(row["requests"], 4)
+        self.assertEqual(row["samples"], 3)
+        self.assertEqual(row["p50_ms"], 20)
+        self.assertEqual(row["max_ms"], 30)
+
+    def test_slowest_view_first(self):
+        request_metrics.record("snabb", 5, 0, 0, 1)
+        request_metrics.record("långsam", 500, 0, 0, 1)
+
+        self.assertEqual(
+            [row["name"] for row in request_metrics.snapshot()], ["långsam", "snabb"]
+        )
@@ -0,0 +1,151 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from axes.models import Settings, StampTranscription
+from axes.services import search_index
+from axes.tests.factories import (
+    make_axe,
+    make_contact,
+    make_manufacturer,
+    make_platform,
+    make_stamp,
+    make_transaction,
+)
+
+
+def _document_count(kind, object_id):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COUNT(*) FROM {search_index.TABLE} "
+            "WHERE kind = %s AND object_id = %s",
+            [kind, object_id],
+        )
+        return cursor.fetchone()[0]
+
+
+class BuildMatchQueryTest(TestCase):
+    def test_tokens_are_quoted_prefixes(self):
+        self.assertEqual(
+            search_index.build_match_query("Gränsfors br", ["title", "body"]),
+            '{title body} : ("Gränsfors"* "br"*)',
+        )
+
+    def test_fts_syntax_is_not_interpreted(self):
+        query = search_index.build_match_query('AND "x* :', ["title"])
+        self.assertEqual(query, '{title} : ("AND"* "x"*)')
+        self.assertIsNone(search_index.build_match_query('"* :', ["title"]))
+
+
+class SearchIndexSyncTest(TestCase):
+    def setUp(self):
+        self.manufacturer = make_manufacturer(name="Hultafors")
+        self.axe = make_axe(manufacturer=self.manufacturer, model="Åbyyxa")
+
+    def _search(self, query, kinds=search_index.KINDS, columns=("title", "body")):
+        return search_index.search(query, list(kinds), list(columns))
+
+    def test_prefix_match_ignores_diacritics(self):
+        self.assertEqual(self._search("hulta aby")["axe"], [self.axe.id])
+
+    def test_renamed_manufacturer_updates_axe_documents(self):
+        self.manufacturer.name = "Wetterlings"
+        self.manufacturer.save()
+        self.assertEqual(self._search("wetter")["axe"], [self.axe.id])
+        self.assertNotIn("axe", self._search("hultafors"))
+
+    def test_deleted_axe_is_removed(self):
+        axe_id = self.axe.id
+        self.axe.delete()
+        self.assertEqual(_document_count("axe", axe_id), 0)
+
+    def test_deleted_contact_updates_transactions(self):
+        contact = make_contact(name="Svensson")
+        transaction = make_transaction(axe=self.axe, contact=contact)
+        hits = self._search("svensson", columns=["contact"])
+        self.assertEqual(hits["transaction"], [transaction.id])
+
+        contact.delete()
+        self.assertEqual(self._search("svensson", columns=["contact"]), {})
+
+    def test_deleted_platform_updates_transactions(self):
+        platform = make_platform(name="Auktionstorget")
+        transaction = make_transaction(axe=self.axe, platform=platform)
+        hits = self._search("auktionstorget", columns=["platform"])
+        self.assertEqual(hits["transaction"], [transaction.id])
+
+        platform.delete()
+        self.assertEqual(self._search("auktionstorget", columns=["platform"]), {})
+        self.assertEqual(_document_count("transaction", transaction.id), 1)
+
+    def test_stamp_transcriptions_are_searchable(self):
+        stamp = make_stamp(manufacturer=self.manufacturer, name="Krona")
+        StampTranscription.objects.create(stamp=stamp, text="Made in Sweden")
+        self.assertEqual(self._search("sweden")["stamp"], [stamp.id])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search_index.TABLE}")
+        call_command("rebuild_search_index", stdout=open("/dev/null", "w"))
+        self.assertEqual(_document_count("axe", self.axe.id), 1)
+
+
+class GlobalSearchIndexTest(TestCase):
+    def setUp(self):
+        self.manufacturer = make_manufacturer(name="Mustad")
+        self.axe = make_axe(manufacturer=self.manufacturer, model="Bila")
+        self.contact = make_contact(name="Mustadsson")
+        self.platform = make_platform(name="Mustadtorget")
+        self.transaction = make_transaction(
+            axe=make_axe(model="Annan"), contact=self.contact, platform=self.platform
+        )
+        self.settings = Settings.get_settings()
+        self.settings.show_contacts_public = False
+        self.settings.show_platforms_public = False
+        self.settings.save()
+
+    def _results(self, query):
+        response = self.client.get(reverse("global_search"), {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)["results"]
+
+    def test_anonymous_user_does_not_match_hidden_columns(self):
+        results = self._results("mustad")
+        self.assertEqual([item["id"] for item in results["axes"]], [self.axe.id])
+        self.assertEqual(results["contacts"], [])
+        self.assertEqual(results["transactions"], [])
+
+    def test_logged_in_user_matches_contacts_and_platforms(self):
+        user = User.objects.create_user("sok", password="losen")
+        self.client.force_login(user)
+        results = self._results("mustad")
+        self.assertEqual(
+            [item["id"] for item in results["contacts"]], [self.contact.id]
+        )
+        self.assertEqual(
+            [item["id"] for item in results["transactions"]], [self.transaction.id]
+        )
+        self.assertEqual(results["manufacturers"][0]["subtitle"], "1 yxor")
+
+    def test_numeric_query_finds_axe_by_id(self):
+        results = self._results(str(self.axe.id))
+        self.assertEqual(results["axes"][0]["id"], self.axe.id)
+
+    def test_stamps_are_included(self):
+        stamp = make_stamp(manufacturer=self.manufacturer, name="Mustadkronan")
+        results = self._results("mustadkr")
+        self.assertEqual(results["stamps"][0]["id"], stamp.id)
+        self.assertEqual(
+            results["stamps"][0]["url"], reverse("stamp_detail", args=[stamp.id])
+        )
+
+    def test_fallback_without_index(self):
+        with patch.object(search_index, "is_available", return_value=False):
+            results = self._results("Bila")
+        self.assertEqual([item["id"] for item in results["axes"]], [self.axe.id])
+        self.assertEqual(results["stamps"], [])
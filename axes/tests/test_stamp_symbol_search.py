@@ -0,0 +1,150 @@
+import time
+
+import pytest
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from axes.models import Stamp, StampSymbol, StampTranscription
+from axes.services.stamp_symbol_search import (
+    filter_stamps_by_symbols,
+    parse_symbol_ids,
+)
+from axes.tests.factories import make_manufacturer, make_stamp
+
+
+def _transcribe(stamp, *symbols):
+    transcription = StampTranscription.objects.create(stamp=stamp, text=stamp.name)
+    transcription.symbols.set(symbols)
+    return transcription
+
+
+class FilterStampsBySymbolsTest(TestCase):
+    def setUp(self):
+        self.crown = StampSymbol.objects.create(name="Testkrona", symbol_type="crown")
+        self.star = StampSymbol.objects.create(name="Teststjärna", symbol_type="star")
+        manufacturer = make_manufacturer()
+        self.both = make_stamp(manufacturer=manufacturer, name="Båda")
+        # Symbolerna på olika transkriberingar räknas ändå som stämpelns
+        _transcribe(self.both, self.crown)
+        _transcribe(self.both, self.star)
+        self.crown_only = make_stamp(manufacturer=manufacturer, name="Krona")
+        _transcribe(self.crown_only, self.crown)
+        self.none = make_stamp(manufacturer=manufacturer, name="Ingen")
+        _transcribe(self.none)
+
+    def _ids(self, logic, *symbols):
+        stamps = Stamp.objects.filter(
+            pk__in=[self.both.pk, self.crown_only.pk, self.none.pk]
+        )
+        values = [str(symbol.pk) for symbol in symbols]
+        return set(
+            filter_stamps_by_symbols(stamps, values, logic).values_list("pk", flat=True)
+        )
+
+    def test_and_requires_all_symbols(self):
+        self.assertEqual(self._ids("and", self.crown, self.star), {self.both.pk})
+
+    def test_or_requires_any_symbol(self):
+        self.assertEqual(
+            self._ids("or", self.crown, self.star),
+            {self.both.pk, self.crown_only.pk},
+        )
+
+    def test_not_excludes_all_symbols(self):
+        self.assertEqual(
+            self._ids("not", self.star), {self.crown_only.pk, self.none.pk}
+        )
+
+    def test_parse_symbol_ids_ignores_invalid_values(self):
+        self.assertEqual(parse_symbol_ids(["3", "x", "", "3", "1"]), [1, 3])
+
+    def test_and_search_is_one_query(self):
+        stamps = filter_stamps_by_symbols(
+            Stamp.objects.all(), [self.crown.pk, self.star.pk], "and"
+        )
+        with CaptureQueriesContext(connection) as queries:
+            list(stamps)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("DISTINCT", queries[0]["sql"].split("WHERE")[0])
+
+    def test_stamp_list_filters_on_symbols(self):
+        response = self.client.get(
+            reverse("stamp_list"),
+            {"symbols": [self.crown.pk, self.star.pk], "search_logic": "and"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [stamp.pk for stamp in response.context["stamps"]], [self.both.pk]
+        )
+
+    def test_stamp_search_filters_on_symbols(self):
+        response = self.client.get(
+            reverse("stamp_search"),
+            {"symbols": [self.crown.pk], "search_logic": "not"},
+        )
+        ids = {result["id"] for result in response.json()["results"]}
+        self.assertNotIn(self.both.pk, ids)
+        self.assertNotIn(self.crown_only.pk, ids)
+        self.assertIn(self.none.pk, ids)
+
+
+@pytest.mark.slow
+class SymbolSearchBenchmarkTest(TestCase):
+    """Jämför den gamla kedjade AND-frågan med den grupperade på några
+    tusen stämplar. Körs med `pytest -m slow -s` för att se tiderna."""
+
+    STAMP_COUNT = 3000
+
+    @classmethod
+    def setUpTestData(cls):
+        manufacturer = make_manufacturer()
+        cls.symbols = [
+            StampSymbol.objects.create(name=f"Benchmark {i}", symbol_type="other")
+            for i in range(8)
+        ]
+        stamps = Stamp.objects.bulk_create(
+            Stamp(name=f"Bänk {i}", manufacturer=manufacturer)
+            for i in range(cls.STAMP_COUNT)
+        )
+        transcriptions = StampTranscription.objects.bulk_create(
+            StampTranscription(stamp=stamp, text="") for stamp in stamps
+        )
+        Posting = StampTranscription.symbols.through
+        Posting.objects.bulk_create(
+            Posting(stamptranscription=transcription, stampsymbol=symbol)
+            for i, transcription in enumerate(transcriptions)
+            for bit, symbol in enumerate(cls.symbols)
+            if i & (1 << bit)
+        )
+
+    def _chained_and(self, symbol_ids):
+        # Den tidigare implementationen: en join per symbol plus DISTINCT
+        stamps = Stamp.objects.all()
+        for symbol_id in symbol_ids:
+            transcription_ids = StampTranscription.objects.filter(
+                symbols__id=symbol_id
+            ).values_list("id", flat=True)
+            stamps = stamps.filter(transcriptions__id__in=transcription_ids)
+        return stamps.distinct()
+
+    def _timed(self, queryset, rounds=5):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            result = set(queryset.values_list("pk", flat=True))
+        return result, (time.perf_counter() - start) / rounds
+
+    def test_grouped_query_matches_chained_joins(self):
+        symbol_ids = [symbol.pk for symbol in self.symbols[:5]]
+        old, old_time = self._timed(self._chained_and(symbol_ids))
+        new, new_time = self._timed(
+            filter_stamps_by_symbols(Stamp.objects.all(), symbol_ids, "and")
+        )
+        print(
+            f"\n{self.STAMP_COUNT} stämplar, 5 symboler (AND): "
+            f"kedjade joins {old_time * 1000:.1f} ms, "
+            f"grupperad query {new_time * 1000:.1f} ms"
+        )
+        self.assertEqual(old, new)
+        self.assertEqual(len(new), self.STAMP_COUNT // 32)
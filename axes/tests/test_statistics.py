@@ -0,0 +1,121 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from axes.models import Axe, Transaction
+from axes.services.statistics import axe_totals, transaction_totals
+from axes.tests.factories import (
+    make_axe,
+    make_manufacturer,
+    make_measurement,
+    make_platform,
+    make_transaction,
+)
+
+
+class TransactionTotalsTest(TestCase):
+    def setUp(self):
+        axe = make_axe()
+        make_transaction(axe=axe, price=Decimal("100"), shipping_cost=Decimal("10"))
+        make_transaction(axe=axe, price=Decimal("50"), shipping_cost=Decimal("5"))
+        make_transaction(
+            axe=axe, type="SÄLJ", price=Decimal("300"), shipping_cost=Decimal("20")
+        )
+
+    def test_totals(self):
+        """Alla summor räknas ut korrekt"""
+        totals = transaction_totals(Transaction.objects.all())
+        self.assertEqual(totals["filtered_count"], 3)
+        self.assertEqual(totals["total_buys"], 2)
+        self.assertEqual(totals["total_sales"], 1)
+        self.assertEqual(totals["total_buy_value"], Decimal("150"))
+        self.assertEqual(totals["total_sale_value"], Decimal("300"))
+        self.assertEqual(totals["total_buy_shipping"], Decimal("15"))
+        self.assertEqual(totals["total_sale_shipping"], Decimal("20"))
+        self.assertEqual(totals["total_profit"], Decimal("150"))
+        self.assertEqual(totals["total_profit_with_shipping"], Decimal("155"))
+
+    def test_empty_queryset_gives_zero(self):
+        """Tomt urval ger nollor, inte None"""
+        totals = transaction_totals(Transaction.objects.none())
+        self.assertEqual(totals["total_buys"], 0)
+        self.assertEqual(totals["total_buy_value"], Decimal("0"))
+        self.assertEqual(totals["total_profit"], Decimal("0"))
+
+    def test_single_query(self):
+        """Allt räknas ut i en enda query"""
+        with CaptureQueriesContext(connection) as ctx:
+            transaction_totals(Transaction.objects.filter(type="KÖP"))
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+
+class AxeTotalsTest(TestCase):
+    def test_totals_per_status(self):
+        """Antal per status och transaktionssummor för filtrerade yxor"""
+        bought = make_axe(status="KÖPT")
+        received = make_axe(status="MOTTAGEN")
+        make_axe(status="MOTTAGEN")
+        make_transaction(axe=bought, price=Decimal("100"))
+        make_transaction(axe=received, type="SÄLJ", price=Decimal("250"))
+
+        totals = axe_totals(Axe.objects.all())
+        self.assertEqual(totals["filtered_count"], 3)
+        self.assertEqual(totals["bought_count"], 1)
+        self.assertEqual(totals["received_count"], 2)
+        self.assertEqual(totals["total_buys"], 1)
+        self.assertEqual(totals["total_sales"], 1)
+        self.assertEqual(totals["total_profit"], Decimal("150"))
+
+    def test_joined_filters_do_not_duplicate_sums(self):
+        """Filter som joinar mått/transaktioner får inte dubblera summorna"""
+        axe = make_axe()
+        make_measurement(axe=axe)
+        make_measurement(axe=axe)
+        platform = make_platform()
+        make_transaction(axe=axe, platform=platform, price=Decimal("100"))
+        make_transaction(axe=axe, platform=platform, price=Decimal("100"))
+
+        axes = (
+            Axe.objects.filter(measurements__isnull=False)
+            .filter(transactions__platform=platform)
+            .distinct()
+        )
+        totals = axe_totals(axes)
+        self.assertEqual(totals["filtered_count"], 1)
+        self.assertEqual(totals["total_buys"], 2)
+        self.assertEqual(totals["total_buy_value"], Decimal("200"))
+
+
+class ListStatisticsQueryCountTest(TestCase):
+    """Statistiken i listvyerna ska inte växa med antalet yxor"""
+
+    def _create_axes(self, count):
+        manufacturer = make_manufacturer()
+        for i in range(count):
+            axe = make_axe(manufacturer=manufacturer)
+            make_transaction(axe=axe, type="KÖP" if i % 2 else "SÄLJ")
+
+    def _count_queries(self, url_name):
+        # Första anropet skapar Settings-raden - mät på ett varmt anrop
+        self.client.get(reverse(url_name))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_axe_list_query_count_is_constant(self):
+        self._create_axes(3)
+        few = self._count_queries("axe_list")
+        self._create_axes(30)
+        many = self._count_queries("axe_list")
+        self.assertEqual(few, many)
+
+    def test_transaction_list_query_count_is_constant(self):
+        self._create_axes(3)
+        few = self._count_queries("transaction_list")
+        self._create_axes(30)
+        many = self._count_queries("transaction_list")
+        self.assertEqual(few, many)
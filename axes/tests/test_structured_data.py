@@ -0,0 +1,182 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from axes.utils import parser_benchmark, structured_data
+from axes.utils.ebay_parser import EbayParser, parse_ebay_listing
+from axes.utils.tradera_parser import TraderaParser, parse_tradera_listing
+
+EBAY_URL = "https://www.ebay.com/itm/335912345678"
+TRADERA_URL = "https://www.tradera.com/item/343327/683953821/yxa-saw"
+
+
+def _json_ld(data):
+    return (
+        '<html><head><script type="application/ld+json">'
+        f"{json.dumps(data)}</script></head><body><h1>DOM-titel</h1></body></html>"
+    )
+
+
+def _next_data(data):
+    return (
+        "<html><body><h1>DOM-titel</h1>"
+        '<script id="__NEXT_DATA__" type="application/json">'
+        f"{json.dumps(data)}</script></body></html>"
+    )
+
+
+PRODUCT = {
+    "@context": "https://schema.org",
+    "@type": "Product",
+    "name": "Plumb Boy Scout Hatchet",
+    "image": ["https://i.ebayimg.com/images/g/x/s-l500.jpg"],
+    "offers": {
+        "@type": "Offer",
+        "price": "42.00",
+        "priceCurrency": "USD",
+        "availabilityEnds": "2025-05-02T10:00:00Z",
+        "seller": {"@type": "Organization", "name": "axeman"},
+    },
+}
+
+
+class StructuredDataExtractTest(SimpleTestCase):
+    def test_json_ld_product_in_graph(self):
+        soup = structured_data.make_soup(
+            _json_ld({"@graph": [{"@type": "WebPage"}, PRODUCT]})
+        )
+
+        fields = structured_data.extract(soup)
+
+        self.assertEqual(fields["title"], "Plumb Boy Scout Hatchet")
+        self.assertEqual(fields["seller_alias"], "axeman")
+        self.assertEqual(fields["auction_end_date"], "2025-05-02")
+        self.assertEqual(fields["prices"][0]["amount"], 42.0)
+        self.assertEqual(fields["prices"][0]["currency"], "USD")
+
+    def test_next_data_item_matched_on_item_id(self):
+        soup = structured_data.make_soup(
+            _next_data(
+                {
+                    "props": {
+                        "related": [{"itemId": 1, "title": "Fel yxa"}],
+                        "item": {
+                            "itemId": 683953821,
+                            "title": "Yxa Säw",
+                            "price": 300,
+                            "seller": {"alias": "yxsamlaren"},
+                        },
+                    }
+                }
+            )
+        )
+
+        fields = structured_data.extract(soup, "683953821", default_currency="SEK")
+
+        self.assertEqual(fields["title"], "Yxa Säw")
+        self.assertEqual(fields["seller_alias"], "yxsamlaren")
+        self.assertEqual(fields["prices"][0]["currency"], "SEK")
+
+    def test_plain_and_broken_pages_give_nothing(self):
+        broken = '<script type="application/ld+json">{inte json</script>'
+
+        for html in ("<html><h1>Yxa</h1></html>", broken):
+            with self.subTest(html=html):
+                soup = structured_data.make_soup(html)
+                self.assertEqual(structured_data.extract(soup), {})
+
+
+class ParserStructuredFastPathTest(SimpleTestCase):
+    def test_ebay_skips_heuristics_for_structured_fields(self):
+        parser = EbayParser()
+
+        with patch.object(parser, "_extract_prices") as prices:
+            with patch.object(parser, "_extract_images") as images:
+                result = parser.parse_html(_json_ld(PRODUCT), EBAY_URL)
+
+        prices.assert_not_called()
+        images.assert_not_called()
+        self.assertEqual(result["title"], "Plumb Boy Scout Hatchet")
+        self.assertEqual(
+            result["images"], ["https://i.ebayimg.com/images/g/x/s-l2000.jpg"]
+        )
+
+    def test_missing_fields_fall_back_to_heuristics(self):
+        product = {**PRODUCT}
+        del product["offers"]
+        parser = EbayParser()
+
+        with patch.object(
+            parser, "_extract_prices", return_value=["heuristik"]
+        ) as prices:
+            result = parser.parse_html(_json_ld(product), EBAY_URL)
+
+        prices.assert_called_once()
+        self.assertEqual(result["prices"], ["heuristik"])
+
+    def test_ebay_page_uses_title_as_description(self):
+        parser = EbayParser()
+        response = MagicMock(content=_json_ld(PRODUCT).encode())
+
+        with patch.object(parser, "session") as session:
+            session.get.return_value = response
+            result = parser.parse_ebay_page(EBAY_URL)
+
+        self.assertEqual(result["description"], result["title"])
+
+    def test_tradera_images_from_next_data_use_full_size(self):
+        html = _next_data(
+            {
+                "item": {
+                    "itemId": "683953821",
+                    "title": "Yxa",
+                    "images": ["//img.tradera.net/1/2_medium-fit.jpg"],
+                }
+            }
+        )
+
+        result = TraderaParser().parse_html(html, TRADERA_URL)
+
+        self.assertEqual(result["images"], ["https://img.tradera.net/1/2_images.jpg"])
+
+    def test_listing_functions_prefer_structured_data(self):
+        ebay = parse_ebay_listing(_json_ld(PRODUCT))
+        tradera = parse_tradera_listing(
+            _next_data({"item": {"itemId": 5, "title": "Yxa", "price": 120}})
+        )
+
+        self.assertEqual(ebay["title"], "Plumb Boy Scout Hatchet")
+        self.assertEqual(ebay["price"], 42.0)
+        self.assertEqual((tradera["price"], tradera["currency"]), (120.0, "SEK"))
+
+
+class ParserBenchmarkCorpusTest(SimpleTestCase):
+    def test_corpus_is_fully_extracted(self):
+        pages = parser_benchmark.load_corpus()
+
+        report = parser_benchmark.run(pages, rounds=1)
+
+        self.assertGreaterEqual(report["pages"], 4)
+        self.assertEqual(report["failures"], [])
+        self.assertGreater(report["parser"]["structured_data"]["seconds"], 0)
+
+    def test_command_reports_fields_and_writes_json(self):
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rapport.json")
+
+            call_command(
+                "benchmark_auction_parsers", "--rounds", "1", "--json", path, stdout=out
+            )
+
+            with open(path) as f:
+                reports = json.load(f)
+
+        self.assertIn("auction_end_date", out.getvalue())
+        self.assertIn("snabbare med strukturerad data", out.getvalue())
+        self.assertEqual(set(reports), {"strukturerad", "heuristik"})
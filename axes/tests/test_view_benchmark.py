@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+
+from axes.management.commands.benchmark_views import Command
+
+from axes.models import Axe, Manufacturer, NextAxeID
+from axes.services import view_benchmark
+
+SMALL = {"axes": 40, "transactions": 90, "stamps": 10, "contacts": 8}
+TREE = (3, 2)
+
+
+class BuildDatasetTest(TestCase):
+    def test_builds_requested_sizes(self):
+        counts = view_benchmark.build_dataset(tree=TREE, **SMALL)
+
+        self.assertEqual(counts["axes"], 40)
+        self.assertEqual(counts["transactions"], 90)
+        self.assertEqual(counts["stamps"], 10)
+        self.assertEqual(counts["contacts"], 8)
+        self.assertEqual(counts["manufacturers"], 3 + 3 * 2)
+        self.assertEqual(NextAxeID.objects.get(id=1).next_id, 41)
+        self.assertEqual(Manufacturer.objects.filter(parent__isnull=False).count(), 6)
+
+    def test_same_seed_gives_same_data(self):
+        view_benchmark.build_dataset(tree=TREE, seed=7, **SMALL)
+        first = list(Axe.objects.order_by("id").values_list("model", "status"))
+        Axe.objects.all().delete()
+        Manufacturer.objects.all().delete()
+
+        view_benchmark.build_dataset(tree=TREE, seed=7, **SMALL)
+
+        self.assertEqual(
+            list(Axe.objects.order_by("id").values_list("model", "status")), first
+        )
+
+
+class RunTest(TestCase):
+    def setUp(self):
+        view_benchmark.build_dataset(tree=TREE, **SMALL)
+
+    def test_measures_every_endpoint(self):
+        report = view_benchmark.run(repeats=1)
+
+        self.assertEqual(report["meta"]["dataset"]["axes"], 40)
+        self.assertEqual(
+            set(report["results"]), {name for name, *_ in view_benchmark.ENDPOINTS}
+        )
+        for name, result in report["results"].items():
+            self.assertEqual(result["status"], 200, name)
+            self.assertGreater(result["queries"], 0, name)
+            self.assertGreater(result["bytes"], 0, name)
+
+    def test_only_limits_endpoints(self):
+        report = view_benchmark.run(repeats=1, only=["axe_list_data"])
+
+        self.assertEqual(list(report["results"]), ["axe_list_data"])
+
+
+class CompareTest(SimpleTestCase):
+    def test_reports_change_in_percent(self):
+        before = {"results": {"axe_list": {"median_ms": 100.0, "queries": 10}}}
+        after = {
+            "results": {
+                "axe_list": {"median_ms": 50.0, "queries": 10},
+                "new_view": {"median_ms": 5.0},
+            }
+        }
+
+        rows = view_benchmark.compare(before, after)
+
+        self.assertEqual(
+            rows,
+            [
+                ("axe_list", "median_ms", 100.0, 50.0, -50.0),
+                ("axe_list", "queries", 10, 10, 0.0),
+            ],
+        )
+
+    def test_zero_baseline_has_no_percentage(self):
+        rows = view_benchmark.compare(
+            {"results": {"a": {"queries": 0}}}, {"results": {"a": {"queries": 3}}}
+        )
+
+        self.assertEqual(rows, [("a", "queries", 0, 3, None)])
+
+
+class DatasetMarkerTest(SimpleTestCase):
+    """En behållen databas (--db) återanvänds bara med samma storlekar och frö."""
+
+    def setUp(self):
+        handle, self.marker = tempfile.mkstemp(suffix=".dataset.json")
+        os.close(handle)
+        self.addCleanup(os.remove, self.marker)
+        self.built_with = dict(SMALL, seed=1)
+        with open(self.marker, "w", encoding="utf-8") as f:
+            json.dump(self.built_with, f)
+        patcher = patch.object(
+            view_benchmark, "dataset_counts", return_value=dict(SMALL, manufacturers=9)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_sizes_and_seed_is_reused(self):
+        self.assertTrue(Command()._dataset_ready(self.marker, self.built_with))
+
+    def test_other_seed_is_rebuilt(self):
+        self.assertFalse(
+            Command()._dataset_ready(self.marker, dict(self.built_with, seed=2))
+        )
+
+    def test_missing_marker_is_rebuilt(self):
+        self.assertFalse(
+            Command()._dataset_ready(self.marker + ".saknas", self.built_with)
+        )
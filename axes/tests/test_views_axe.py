@@ -212,7 +212,7 @@ class AxeCreateViewTest(ViewsAxeTestCase):
         new_axe = Axe.objects.filter(model="New Test Axe").first()
         self.assertIsNone(new_axe)
 
-    @patch("axes.views_axe.requests.get")
+    @patch("axes.services.remote_images.http_client.get")
     def test_axe_create_view_with_url_images(self, mock_get):
         """Testa att skapa yxa med URL-bilder"""
         self.client.login(username="testuser", password="testpass123")
@@ -220,7 +220,8 @@ class AxeCreateViewTest(ViewsAxeTestCase):
         # Mock HTTP response för bild-URL
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.content = b"fake_image_content"
+        mock_response.headers = {"content-type": "image/jpeg"}
+        mock_response.iter_content.return_value = [b"fake_image_content"]
         mock_get.return_value = mock_response
 
         data = {
@@ -236,6 +237,7 @@ class AxeCreateViewTest(ViewsAxeTestCase):
         # Kontrollera att yxan skapades
         new_axe = Axe.objects.filter(model="URL Test Axe").first()
         self.assertIsNotNone(new_axe)
+        self.assertEqual(new_axe.images.count(), 1)
 
     def test_axe_create_view_with_contact_creation(self):
         """Testa att skapa yxa med ny kontakt"""
@@ -726,6 +728,111 @@ class AxeListViewTest(ViewsAxeTestCase):
         self.assertContains(response, "Finsk Tillverkare")
 
 
+class AxeListDataViewTest(ViewsAxeTestCase):
+    """Tester för JSON-källan till yxlistan (DataTables server-läge)"""
+
+    def _get(self, **params):
+        response = self.client.get(reverse("axe_list_data"), params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_returns_datatables_payload(self):
+        """Svaret följer DataTables server-protokoll"""
+        data = self._get(draw=3, start=0, length=10)
+        self.assertEqual(data["draw"], 3)
+        self.assertEqual(data["recordsTotal"], 1)
+        self.assertEqual(data["recordsFiltered"], 1)
+        row = data["data"][0]
+        self.assertEqual(row["id"], str(self.axe.id))
+        self.assertIn("Test Manufacturer", row["manufacturer"])
+        self.assertIn("Test Axe", row["model"])
+        self.assertEqual(row["DT_RowAttr"]["data-href"], f"/yxor/{self.axe.id}/")
+        self.assertIn("Test Platform", row["platform"])
+
+    def test_paginates_server_side(self):
+        """Endast efterfrågad sida returneras, senaste först som standard"""
+        for i in range(12):
+            Axe.objects.create(
+                manufacturer=self.manufacturer, model=f"Sida {i}", status="KÖPT"
+            )
+        data = self._get(start=10, length=5)
+        self.assertEqual(data["recordsTotal"], 13)
+        self.assertEqual(len(data["data"]), 3)
+        self.assertEqual(data["data"][-1]["id"], str(self.axe.id))
+
+    def test_search_filters_records(self):
+        """Fritextsökning matchar modell och räknas i recordsFiltered"""
+        Axe.objects.create(manufacturer=self.manufacturer, model="Annan", status="KÖPT")
+        data = self._get(**{"search[value]": "Test Axe"})
+        self.assertEqual(data["recordsTotal"], 2)
+        self.assertEqual(data["recordsFiltered"], 1)
+        self.assertEqual(data["data"][0]["id"], str(self.axe.id))
+
+    def test_ordering_by_column(self):
+        """Sortering sker i SQL utifrån columns[i][data]"""
+        other = Axe.objects.create(
+            manufacturer=self.manufacturer, model="AAA", status="KÖPT"
+        )
+        params = {
+            "columns[2][data]": "model",
+            "order[0][column]": "2",
+            "order[0][dir]": "asc",
+        }
+        data = self._get(**params)
+        self.assertEqual(
+            [row["id"] for row in data["data"]], [str(other.id), str(self.axe.id)]
+        )
+
+        params.update({"columns[7][data]": "economy", "order[0][column]": "7"})
+        data = self._get(**params)
+        # Yxan med ett köp har negativt netto och hamnar först
+        self.assertEqual(data["data"][0]["id"], str(self.axe.id))
+
+    def test_filters_match_axe_list(self):
+        """Samma filter som i axe_list (status, tillverkar-underträd, plattform)"""
+        sub = Manufacturer.objects.create(name="Sub", parent=self.manufacturer)
+        sub_axe = Axe.objects.create(
+            manufacturer=sub, model="Sub Axe", status="MOTTAGEN"
+        )
+        smith = Manufacturer.objects.create(name="Smed", parent=sub)
+        Axe.objects.create(manufacturer=smith, model="Smed Axe")
+
+        data = self._get(manufacturer=self.manufacturer.id)
+        self.assertEqual(data["recordsTotal"], 3)
+        data = self._get(manufacturer=sub.id)
+        self.assertEqual([row["id"] for row in data["data"]], [str(sub_axe.id)])
+        data = self._get(status="MOTTAGEN")
+        self.assertEqual(data["recordsTotal"], 1)
+        data = self._get(platform=self.platform.id)
+        self.assertEqual([row["id"] for row in data["data"]], [str(self.axe.id)])
+
+    def test_public_hides_platform_column(self):
+        """Plattformskolumnen utelämnas när plattformar inte visas publikt"""
+        self.settings.show_platforms_public = False
+        self.settings.save()
+        data = self._get()
+        self.assertNotIn("platform", data["data"][0])
+
+    def test_query_count_independent_of_collection_size(self):
+        """Antalet queries beror på sidstorleken, inte samlingens storlek"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        for i in range(30):
+            Axe.objects.create(
+                manufacturer=self.manufacturer, model=f"Fler {i}", status="KÖPT"
+            )
+        with CaptureQueriesContext(connection) as small:
+            self._get(length=10)
+        for i in range(30):
+            Axe.objects.create(
+                manufacturer=self.manufacturer, model=f"Ännu fler {i}", status="KÖPT"
+            )
+        with CaptureQueriesContext(connection) as large:
+            self._get(length=10)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
 class StatisticsDashboardViewTest(ViewsAxeTestCase):
     def test_statistics_dashboard_view_public(self):
         """Testa att statistikdashboard är tillgänglig för alla"""
@@ -814,7 +921,7 @@ class ReceivingWorkflowViewTest(ViewsAxeTestCase):
         self.axe.refresh_from_db()
         self.assertEqual(self.axe.status, "MOTTAGEN")
 
-    @patch("axes.views_axe.requests.get")
+    @patch("axes.services.remote_images.http_client.get")
     def test_receiving_workflow_view_post_with_url_images(self, mock_get):
         """Testa mottagningsarbetsflöde med URL-bilder"""
         self.client.login(username="testuser", password="testpass123")
@@ -822,7 +929,8 @@ class ReceivingWorkflowViewTest(ViewsAxeTestCase):
         # Mock HTTP response för bild-URL
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.content = b"fake_image_content"
+        mock_response.headers = {"content-type": "image/jpeg"}
+        mock_response.iter_content.return_value = [b"fake_image_content"]
         mock_get.return_value = mock_response
 
         data = {"image_urls": ["http://example.com/image.jpg"]}
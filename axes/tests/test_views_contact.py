@@ -5,6 +5,8 @@ from django.urls import reverse
 from axes.models import Axe, Contact, Manufacturer, Platform, Transaction, Settings
 from decimal import Decimal
 from django.utils import timezone
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 import json
 
 
@@ -271,3 +273,125 @@ class ContactDeleteViewTest(ViewsContactTestCase):
             "/kontakter/99999/ta-bort/", {"delete_transactions": "true"}
         )
         self.assertEqual(response.status_code, 404)
+
+
+class ContactTotalsAnnotationTest(TestCase):
+    def setUp(self):
+        from datetime import date
+
+        from axes.tests.factories import make_axe, make_contact, make_transaction
+
+        self.seller = make_contact(name="Bertil")
+        self.buyer = make_contact(name="Anna")
+        self.idle = make_contact(name="Cecilia")
+        axe = make_axe()
+        make_transaction(
+            axe=axe,
+            contact=self.seller,
+            price=Decimal("300"),
+            shipping_cost=Decimal("40"),
+            transaction_date=date(2024, 1, 1),
+        )
+        make_transaction(
+            axe=axe,
+            contact=self.buyer,
+            type="SÄLJ",
+            price=Decimal("500"),
+            transaction_date=date(2024, 6, 1),
+        )
+        make_transaction(
+            contact=self.buyer, price=Decimal("100"), transaction_date=date(2024, 2, 1)
+        )
+
+    def test_annotations_match_properties(self):
+        from axes.services.statistics import contacts_with_totals
+
+        annotated = {contact.id: contact for contact in contacts_with_totals()}
+        for contact in Contact.objects.all():
+            for name in (
+                "total_transactions",
+                "buy_count",
+                "sale_count",
+                "total_buy_value",
+                "total_sale_value",
+                "total_buy_shipping",
+                "total_sale_shipping",
+                "net_value",
+                "latest_transaction_date",
+                "unique_axes_count",
+            ):
+                self.assertEqual(
+                    getattr(annotated[contact.id], name), getattr(contact, name), name
+                )
+
+    def test_contact_list_query_count_is_constant(self):
+        from axes.tests.factories import make_contact, make_transaction
+
+        self.client.get(reverse("contact_list"))
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(reverse("contact_list"))
+        for _ in range(5):
+            make_transaction(contact=make_contact())
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(reverse("contact_list"))
+        self.assertEqual(len(after), len(before))
+
+    def test_sort_by_latest_transaction_in_sql(self):
+        response = self.client.get(reverse("contact_list"), {"sort": "senast"})
+        self.assertEqual(
+            [contact.name for contact in response.context["contacts"]],
+            ["Anna", "Bertil", "Cecilia"],
+        )
+
+    def test_contact_detail_uses_annotated_contact(self):
+        response = self.client.get(reverse("contact_detail", args=[self.buyer.id]))
+        self.assertEqual(response.context["total_transactions"], 2)
+        self.assertEqual(response.context["total_profit"], Decimal("400"))
+        self.assertEqual(len(response.context["unique_axes"]), 2)
+
+
+class ContactListDataTest(TestCase):
+    def setUp(self):
+        from axes.tests.factories import make_contact, make_transaction
+
+        self.contacts = [make_contact(name=f"Kontakt {i:02d}") for i in range(12)]
+        make_transaction(contact=self.contacts[3], type="SÄLJ", price=Decimal("900"))
+
+    def _get(self, **params):
+        response = self.client.get(reverse("contact_list_data"), params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_returns_requested_page(self):
+        payload = self._get(draw=3, start=10, length=5)
+        self.assertEqual(payload["draw"], 3)
+        self.assertEqual(payload["recordsTotal"], 12)
+        self.assertEqual(
+            [row["DT_RowId"] for row in payload["data"]],
+            [f"contact-{self.contacts[10].id}", f"contact-{self.contacts[11].id}"],
+        )
+        self.assertIn("Kontakt 10", payload["data"][0]["name"])
+
+    def test_search_and_order_by_economy(self):
+        payload = self._get(
+            **{
+                "search[value]": "kontakt 0",
+                "columns[7][data]": "economy",
+                "order[0][column]": "7",
+                "order[0][dir]": "desc",
+            }
+        )
+        # "0" matchar Kontakt 00-09 och Kontakt 10
+        self.assertEqual(payload["recordsFiltered"], 11)
+        first = payload["data"][0]
+        self.assertEqual(first["DT_RowId"], f"contact-{self.contacts[3].id}")
+        self.assertIn("900", first["economy"])
+
+    def test_list_switches_to_server_side_above_threshold(self):
+        from unittest import mock
+
+        with mock.patch("axes.views_contact.CONTACT_LIST_SERVER_SIDE_THRESHOLD", 10):
+            response = self.client.get(reverse("contact_list"))
+        self.assertTrue(response.context["server_side"])
+        self.assertEqual(response.context["contacts"], [])
+        self.assertContains(response, reverse("contact_list_data"))
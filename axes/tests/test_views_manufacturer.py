@@ -4,6 +4,8 @@ from decimal import Decimal
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from axes.models import (
     Manufacturer,
@@ -15,6 +17,13 @@ from axes.models import (
     Platform,
     Settings,
 )
+from axes.tests.factories import (
+    make_axe,
+    make_contact,
+    make_manufacturer,
+    make_platform,
+    make_transaction,
+)
 
 
 class ViewsManufacturerTestCase(TestCase):
@@ -189,6 +198,110 @@ class ManufacturerDetailViewTest(ViewsManufacturerTestCase):
         self.assertIn(self.sub_manufacturer, context["sub_smeder"])
 
 
+class ManufacturerDetailQueryCountTest(TestCase):
+    """Detaljsidan ska ha samma antal queries oavsett hur många yxor och
+    undertillverkare delträdet har."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="admin", password="pw")
+        self.client.force_login(self.user)
+        self.contact = make_contact()
+        self.platform = make_platform()
+        self.root = make_manufacturer(name="Gränsfors")
+        self.children = [
+            make_manufacturer(name=f"Smedja {i}", parent=self.root) for i in range(2)
+        ]
+        self.grandchildren = [
+            make_manufacturer(
+                name=f"Smed {i}{j}", parent=child, manufacturer_type="SMED"
+            )
+            for i, child in enumerate(self.children)
+            for j in range(2)
+        ]
+        self.manufacturers = [self.root, *self.children, *self.grandchildren]
+
+    def _add_axes(self, per_manufacturer):
+        for manufacturer in self.manufacturers:
+            for i in range(per_manufacturer):
+                # Var tredje yxa saknar status och får den från transaktionerna
+                axe = make_axe(
+                    manufacturer=manufacturer, status="" if i % 3 == 0 else "KÖPT"
+                )
+                make_transaction(
+                    axe=axe,
+                    type="KÖP",
+                    price=Decimal("100"),
+                    contact=self.contact,
+                    platform=self.platform,
+                )
+                if i % 2 == 0:
+                    make_transaction(
+                        axe=axe,
+                        type="SÄLJ",
+                        price=Decimal("150"),
+                        transaction_date=timezone.datetime(2024, 6, 1).date(),
+                    )
+
+    def _query_count(self):
+        url = reverse("manufacturer_detail", args=[self.root.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_is_constant(self):
+        self._add_axes(1)
+        # Första anropet fyller processcachen (inställningar m.m.)
+        self._query_count()
+        small_count, _ = self._query_count()
+
+        self._add_axes(60)
+        large_count, response = self._query_count()
+
+        self.assertEqual(large_count, small_count)
+        self.assertEqual(response.context["total_axes"], 61)
+        self.assertEqual(response.context["total_axes_including_sub"], 61 * 7)
+        self.assertEqual(len(response.context["sub_manufacturer_axes"]), 61 * 6)
+
+    def test_statistics_and_status(self):
+        self._add_axes(3)
+        _, response = self._query_count()
+        context = response.context
+
+        # Per tillverkare: 3 köp à 100 och 2 försäljningar à 150
+        self.assertEqual(context["buy_count"], 3)
+        self.assertEqual(context["sale_count"], 2)
+        self.assertEqual(context["total_transactions"], 5)
+        self.assertEqual(context["total_buy_value"], Decimal("300"))
+        self.assertEqual(context["total_profit"], Decimal("0"))
+        self.assertEqual(context["buy_count_including_sub"], 21)
+        self.assertEqual(context["sale_count_including_sub"], 14)
+        self.assertEqual(context["total_sale_value_including_sub"], Decimal("2100"))
+        self.assertEqual(context["total_profit_including_sub"], Decimal("0"))
+
+        # Yxor utan status: senaste transaktionen är en försäljning
+        statuses = {axe.status for axe in context["axes"]}
+        self.assertEqual(statuses, {"SÅLD", "KÖPT"})
+        first_sub = context["sub_manufacturer_axes"][0]
+        self.assertEqual(first_sub.sub_manufacturer_id, self.children[0].id)
+        self.assertEqual(
+            [m.name for m in context["sub_tillverkare"]], ["Smedja 0", "Smedja 1"]
+        )
+
+    def test_sub_manufacturer_axes_follow_tree_order(self):
+        self._add_axes(1)
+        _, response = self._query_count()
+
+        # Varje undertillverkare följs av sina egna undertillverkare
+        self.assertEqual(
+            [
+                axe.sub_manufacturer_name
+                for axe in response.context["sub_manufacturer_axes"]
+            ],
+            ["Smedja 0", "Smed 00", "Smed 01", "Smedja 1", "Smed 10", "Smed 11"],
+        )
+
+
 class ManufacturerCreateViewTest(ViewsManufacturerTestCase):
     def test_manufacturer_create_view_requires_login(self):
         """Testa att skapa tillverkare kräver inloggning"""
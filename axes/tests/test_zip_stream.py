@@ -0,0 +1,100 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from axes.models import AxeImage
+from axes.tests.factories import make_axe
+from axes.utils.zip_stream import iter_zip
+
+
+class IterZipTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _file(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def test_archive_is_valid_and_streamed_in_chunks(self):
+        jpeg = self._file("bild.jpg", os.urandom(200_000))
+        text = self._file("info.txt", b"yxa " * 10_000)
+        chunks = list(
+            iter_zip([(jpeg, "bild.jpg"), (text, "mapp/info.txt")], chunk_size=16_384)
+        )
+        self.assertGreater(len(chunks), 5)
+
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(
+                archive.getinfo("bild.jpg").compress_type, zipfile.ZIP_STORED
+            )
+            info = archive.getinfo("mapp/info.txt")
+            self.assertEqual(info.compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(archive.read(info), b"yxa " * 10_000)
+
+    def test_missing_file_is_skipped(self):
+        jpeg = self._file("bild.jpg", b"jpegdata")
+        missing = os.path.join(self.directory, "borta.jpg")
+        data = b"".join(iter_zip([(missing, "borta.jpg"), (jpeg, "bild.jpg")]))
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertEqual(archive.namelist(), ["bild.jpg"])
+
+
+class BulkDownloadStreamingTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, IMAGE_DERIVATIVE_MODE="queue"
+        )
+        self.settings_override.enable()
+        self.user = User.objects.create_user("zip", password="losen")
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_axe_images_are_streamed(self):
+        axe = make_axe()
+        images = [
+            AxeImage.objects.create(
+                axe=axe, image=SimpleUploadedFile("bild.jpg", b"data", "image/jpeg")
+            )
+            for _ in range(2)
+        ]
+        response = self.client.post(
+            reverse("bulk_download_axe_images"),
+            {"image_ids": [image.id for image in images]},
+        )
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertIn("yxbilder.zip", response["Content-Disposition"])
+
+        data = b"".join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertEqual(len(archive.namelist()), 2)
+
+    def test_unlinked_images_are_streamed(self):
+        folder = os.path.join(self.media_root, "unlinked_images", "axes")
+        os.makedirs(folder)
+        for name in ("a.jpg", "a.webp"):
+            with open(os.path.join(folder, name), "wb") as f:
+                f.write(b"data")
+
+        response = self.client.post(reverse("download_unlinked_images"))
+        data = b"".join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertEqual(archive.namelist(), ["axes/a.jpg"])
@@ -9,10 +9,12 @@ from . import views_platform
 from . import views_stamp
 from . import views_audit
 from . import views_comment
+from . import views_performance
 
 urlpatterns = [
     path("", views_axe.axe_list, name="axe_list"),
     path("yxor/", views_axe.axe_list, name="axe_list"),
+    path("api/yxor/", views_axe.axe_list_data, name="axe_list_data"),
     path("yxor/ny/", views_axe.axe_create, name="axe_create"),
     path("yxor/<int:pk>/", views_axe.axe_detail, name="axe_detail"),
     path("yxor/<int:pk>/redigera/", views_axe.axe_edit, name="axe_edit"),
@@ -43,6 +45,7 @@ urlpatterns = [
     path("galleri/", views_axe.axe_gallery, name="axe_gallery"),
     path("galleri/<int:pk>/", views_axe.axe_gallery, name="axe_gallery_detail"),
     path("kontakter/", views_contact.contact_list, name="contact_list"),
+    path("api/kontakter/", views_contact.contact_list_data, name="contact_list_data"),
     path("kontakter/ny/", views_contact.contact_create, name="contact_create"),
     path("kontakter/<int:pk>/", views_contact.contact_detail, name="contact_detail"),
     path(
@@ -186,6 +189,11 @@ urlpatterns = [
     path("api/search/contacts/", views.search_contacts, name="search_contacts"),
     path("api/search/platforms/", views.search_platforms, name="search_platforms"),
     path("api/search/global/", views.global_search, name="global_search"),
+    path(
+        "bild/<str:kind>/<int:pk>/<int:width>/",
+        views.image_variant,
+        name="image_variant",
+    ),
     path("statistik/", views_axe.statistics_dashboard, name="statistics_dashboard"),
     path(
         "yxor/senaste/info/", views_axe.get_latest_axe_info, name="get_latest_axe_info"
@@ -234,6 +242,11 @@ urlpatterns = [
         name="test_ntfy_notification",
     ),
     path("andringslogg/", views_audit.audit_log, name="audit_log"),
+    path(
+        "installningar/prestanda/",
+        views_performance.request_timing,
+        name="request_timing",
+    ),
     path(
         "yxor/<int:pk>/kommentar/",
         views_comment.submit_axe_comment,
@@ -1,13 +1,33 @@
 """
 Valutakonvertering för AxeCollection med live-kurser från exchangerate-api.com
+
+Kurserna hålls i processen och läses aldrig om från disk eller nätet i
+request-tråden. De hämtas med ett (1) anrop för basvalutan (USD) och
+korskurserna mellan övriga valutor räknas ut lokalt. När kurserna är äldre
+än CACHE_DURATION (eller saknas) förnyas de beroende på inställningen
+CURRENCY_REFRESH_MODE:
+
+- "thread" (standard): en bakgrundstråd hämtar nya kurser, högst en åt
+  gången och efter ett misslyckande tidigast efter RETRY_INTERVAL.
+- "command": bara `manage.py refresh_currency_rates` (t.ex. från cron)
+  hämtar nya kurser.
+
+Under tiden används de gamla kurserna, eller FALLBACK_RATES om inga finns.
+Senast hämtade kurser sparas i CURRENCY_CACHE_FILE så att en ny process
+har kurser direkt.
 """
 
-import requests
 from typing import Optional, Dict
 import logging
 from datetime import datetime, timedelta
 import json
 import os
+import threading
+import time
+
+from django.conf import settings
+
+from . import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -16,9 +36,12 @@ LAST_LIVE_RATES_FAILED = False
 # Senaste källa för kurser: "live", "cache", "fallback" eller "unknown"
 LAST_RATES_SOURCE = "unknown"
 
-# Cache-fil för valutakurser
-CACHE_FILE = "currency_cache.json"
+API_URL = "https://api.exchangerate-api.com/v4/latest/"
+BASE_CURRENCY = "USD"
+CURRENCIES = ("USD", "EUR", "GBP", "SEK")
+
 CACHE_DURATION = timedelta(hours=24)  # Uppdatera kurser var 24:e timme
+RETRY_INTERVAL = 300  # Sekunder mellan försök efter en misslyckad hämtning
 
 # Fallback-kurser (används om API:et inte fungerar)
 FALLBACK_RATES = {
@@ -28,109 +51,174 @@ FALLBACK_RATES = {
     "SEK": {"USD": 0.095, "EUR": 0.088, "GBP": 0.076},
 }
 
+# Processcachen: kurserna och när de hämtades. Ersätts i sin helhet vid
+# uppdatering och ändras aldrig på plats, så läsare behöver inget lås.
+_rates = None
+_fetched_at = None
+_disk_loaded = False
+_refresh_lock = threading.Lock()
+_refresh_thread = None
+_next_refresh_attempt = 0.0
+
+
+def cache_file() -> str:
+    """Absolut sökväg till cache-filen (CURRENCY_CACHE_FILE)."""
+    return os.fspath(
+        getattr(
+            settings, "CURRENCY_CACHE_FILE", settings.BASE_DIR / "currency_cache.json"
+        )
+    )
 
-def load_cache() -> Dict:
-    """Ladda cachade valutakurser från fil"""
+
+def _refresh_mode() -> str:
+    return getattr(settings, "CURRENCY_REFRESH_MODE", "thread")
+
+
+def _is_fresh(fetched_at) -> bool:
+    return fetched_at is not None and datetime.now() - fetched_at < CACHE_DURATION
+
+
+def _read_cache_file():
+    """(kurser, tidpunkt) från cache-filen, eller (None, None)."""
     try:
-        if os.path.exists(CACHE_FILE):
-            with open(CACHE_FILE, "r") as f:
-                cache_data = json.load(f)
-                cache_time = datetime.fromisoformat(cache_data["timestamp"])
-                if datetime.now() - cache_time < CACHE_DURATION:
-                    return cache_data["rates"]
+        with open(cache_file(), "r") as f:
+            cache_data = json.load(f)
+        return cache_data["rates"], datetime.fromisoformat(cache_data["timestamp"])
+    except FileNotFoundError:
+        pass
     except Exception as e:
         logger.warning(f"Kunde inte ladda valutacache: {e}")
+    return None, None
+
+
+def _store(rates: Dict, fetched_at: datetime):
+    global _rates, _fetched_at
+    _rates, _fetched_at = rates, fetched_at
+
+
+def load_cache() -> Dict:
+    """Ladda cachade valutakurser från fil (tom dict om de saknas eller är för gamla)"""
+    rates, fetched_at = _read_cache_file()
+    if rates and _is_fresh(fetched_at):
+        return rates
     return {}
 
 
 def save_cache(rates: Dict):
     """Spara valutakurser till cache-fil"""
+    path = cache_file()
+    tmp_path = f"{path}.tmp"
     try:
         cache_data = {"timestamp": datetime.now().isoformat(), "rates": rates}
-        with open(CACHE_FILE, "w") as f:
+        with open(tmp_path, "w") as f:
             json.dump(cache_data, f)
+        # Byt fil atomärt så att en samtidig läsare aldrig ser en halv fil
+        os.replace(tmp_path, path)
     except Exception as e:
         logger.warning(f"Kunde inte spara valutacache: {e}")
 
 
+def cross_rates(base_rates: Dict, base: str = BASE_CURRENCY) -> Dict:
+    """Kurser mellan alla CURRENCIES, uträknade från kurserna för basvalutan."""
+    per_base = {base: 1.0}
+    per_base.update(
+        {
+            currency: float(rate)
+            for currency, rate in base_rates.items()
+            if currency in CURRENCIES and rate
+        }
+    )
+    rates = {}
+    for from_currency in CURRENCIES:
+        if from_currency not in per_base:
+            continue
+        rates[from_currency] = {
+            to_currency: per_base[to_currency] / per_base[from_currency]
+            for to_currency in CURRENCIES
+            if to_currency != from_currency and to_currency in per_base
+        }
+    return rates
+
+
 def get_live_rates() -> Dict:
-    """Hämta live valutakurser från API"""
+    """Hämta live valutakurser från API (ett anrop för basvalutan)"""
+    global LAST_LIVE_RATES_FAILED, LAST_RATES_SOURCE
     try:
-        global LAST_LIVE_RATES_FAILED, LAST_RATES_SOURCE
-        LAST_LIVE_RATES_FAILED = False
-        LAST_RATES_SOURCE = "live"
-        import requests
-
-        # Använd exchangerate-api.com som fungerar bättre
-        base_url = "https://api.exchangerate-api.com/v4/latest/"
-        currencies = ["USD", "EUR", "GBP"]
-        rates = {}
-
-        for from_currency in currencies:
-            rates[from_currency] = {}
-            try:
-                # Hämta kurser för denna valuta
-                url = f"{base_url}{from_currency}"
-                response = requests.get(url, timeout=10)
-                # Hantera icke-200 som fel (tests använder status_code=500 utan raise)
-                if response.status_code != 200:
-                    raise Exception(f"HTTP {response.status_code}")
-                response.raise_for_status()
-
-                data = response.json()
-                currency_rates = data.get("rates", {})
-
-                # Lägg till kurser för de valutor vi behöver
-                for to_currency in ["USD", "EUR", "GBP", "SEK"]:
-                    if from_currency != to_currency and to_currency in currency_rates:
-                        rates[from_currency][to_currency] = currency_rates[to_currency]
-
-            except Exception as e:
-                logger.warning(f"Kunde inte hämta kurser för {from_currency}: {e}")
-                # Använd fallback-kurser om API-förfrågan misslyckas
-                LAST_LIVE_RATES_FAILED = True
-                LAST_RATES_SOURCE = "fallback"
-                # Fortsätt inte loopa – returnera en kopia av FALLBACK_RATES
-                return dict(FALLBACK_RATES)
-
-        # Lägg till SEK som basvaluta (använd inverterade kurser)
-        rates["SEK"] = {}
-        for to_currency in ["USD", "EUR", "GBP"]:
-            if to_currency in rates and "SEK" in rates[to_currency]:
-                # Invertera kursen
-                sek_rate = 1 / rates[to_currency]["SEK"]
-                rates["SEK"][to_currency] = sek_rate
-
-        # Spara till cache
-        save_cache(rates)
-        return rates
-
+        response = http_client.get(f"{API_URL}{BASE_CURRENCY}", timeout=10)
+        # Hantera icke-200 som fel (tests använder status_code=500 utan raise)
+        if response.status_code != 200:
+            raise Exception(f"HTTP {response.status_code}")
+        response.raise_for_status()
+
+        rates = cross_rates(response.json().get("rates", {}))
+        # Ett ofullständigt svar får inte ersätta en komplett kursuppsättning
+        missing = set(CURRENCIES) - set(rates)
+        if missing:
+            raise Exception(f"Svaret saknar kurser för {', '.join(sorted(missing))}")
     except Exception as e:
         logger.error(f"Fel vid hämtning av live-kurser: {e}")
         LAST_LIVE_RATES_FAILED = True
         LAST_RATES_SOURCE = "fallback"
         return dict(FALLBACK_RATES)
 
+    LAST_LIVE_RATES_FAILED = False
+    LAST_RATES_SOURCE = "live"
+    _store(rates, datetime.now())
+    save_cache(rates)
+    return rates
 
-def get_exchange_rates() -> Dict:
-    """Hämta valutakurser (cachade eller live)"""
-    # Försök ladda från cache först
-    global LAST_RATES_SOURCE
-    cached_rates = load_cache()
-    if cached_rates:
-        LAST_RATES_SOURCE = "cache"
-        return cached_rates
 
-    # Annars hämta live-kurser
+def _refresh_in_background():
     try:
-        rates = get_live_rates()
+        get_live_rates()
+    finally:
+        global _refresh_thread
+        with _refresh_lock:
+            _refresh_thread = None
+
+
+def schedule_refresh() -> bool:
+    """Startar en bakgrundshämtning om ingen redan pågår och det är dags.
+
+    Returnerar True om en tråd startades. Gör inget i läget "command".
+    """
+    global _refresh_thread, _next_refresh_attempt
+    if _refresh_mode() != "thread":
+        return False
+    with _refresh_lock:
+        now = time.monotonic()
+        if _refresh_thread is not None or now < _next_refresh_attempt:
+            return False
+        _next_refresh_attempt = now + RETRY_INTERVAL
+        _refresh_thread = threading.Thread(
+            target=_refresh_in_background, name="currency-refresh", daemon=True
+        )
+        _refresh_thread.start()
+    return True
+
+
+def get_exchange_rates() -> Dict:
+    """Hämta valutakurser ur processcachen - gör aldrig nätverksanrop.
+
+    Första anropet i en process läser cache-filen. Saknas kurser eller är
+    de för gamla schemaläggs en förnyelse och de gamla kurserna (eller
+    FALLBACK_RATES) används under tiden.
+    """
+    global LAST_RATES_SOURCE, _disk_loaded
+    if _rates is None and not _disk_loaded:
+        _disk_loaded = True
+        rates, fetched_at = _read_cache_file()
         if rates:
-            return rates
-        LAST_RATES_SOURCE = "fallback"
-        return FALLBACK_RATES
-    except Exception:
-        LAST_RATES_SOURCE = "fallback"
-        return FALLBACK_RATES
+            _store(rates, fetched_at)
+
+    rates, fetched_at = _rates, _fetched_at
+    if not _is_fresh(fetched_at):
+        schedule_refresh()
+    if rates:
+        LAST_RATES_SOURCE = "cache"
+        return rates
+    LAST_RATES_SOURCE = "fallback"
+    return FALLBACK_RATES
 
 
 def convert_currency(
@@ -297,24 +385,23 @@ def is_cache_valid() -> bool:
     Kontrollera om cache är giltig
 
     Returns:
-        True om cache finns och är giltig
+        True om det finns kurser som inte är äldre än CACHE_DURATION
     """
-    try:
-        if os.path.exists(CACHE_FILE):
-            with open(CACHE_FILE, "r") as f:
-                cache_data = json.load(f)
-                cache_time = datetime.fromisoformat(cache_data["timestamp"])
-                return datetime.now() - cache_time < CACHE_DURATION
-    except Exception:
-        pass
-    return False
+    if _is_fresh(_fetched_at):
+        return True
+    return bool(load_cache())
 
 
 def clear_cache():
-    """Rensa valutacache"""
+    """Rensa valutacache (både i processen och på disk)"""
+    global _disk_loaded, _next_refresh_attempt
+    _store(None, None)
+    _disk_loaded = False
+    _next_refresh_attempt = 0.0
     try:
-        if os.path.exists(CACHE_FILE):
-            os.remove(CACHE_FILE)
+        path = cache_file()
+        if os.path.exists(path):
+            os.remove(path)
             logger.info("Valutacache rensad")
     except Exception as e:
         logger.error(f"Fel vid rensning av cache: {e}")
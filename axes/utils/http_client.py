@@ -0,0 +1,211 @@
+"""Gemensam HTTP-klient för alla utgående anrop.
+
+Auktionsparsrarna, bildhämtningen, valutakurserna och ntfy-notiserna
+skapade tidigare en ny Session (eller använde requests.get/post) per anrop,
+så varje anrop betalade DNS-uppslag, TCP- och TLS-handskakning på nytt.
+Här delar alla en Session per process med keep-alive-pooler per värd.
+
+- Anslutningspool: HTTP_POOL_HOSTS värdar, HTTP_PER_HOST_CONCURRENCY
+  anslutningar per värd.
+- Omförsök: HTTP_RETRIES gånger med exponentiell väntan
+  (HTTP_RETRY_BACKOFF) vid anslutningsfel och 429/5xx. POST försöks bara
+  om vid anslutningsfel, så en notis inte skickas två gånger.
+- Samtidighet: högst HTTP_MAX_CONCURRENCY anrop totalt och
+  HTTP_PER_HOST_CONCURRENCY per värd; övriga väntar. Gränserna gäller
+  fram till att svarshuvudena kommit - en strömmad kropp läses utanför.
+- Mätvärden: antal anrop, fel och svarstider per värd via metrics().
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Antal svarstider per värd som percentilerna räknas på
+METRICS_WINDOW = 200
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class HttpClient:
+    """Tråd-säker klient med delad anslutningspool, gränser och mätvärden."""
+
+    def __init__(
+        self,
+        pool_hosts=10,
+        max_concurrency=16,
+        per_host_concurrency=4,
+        retries=2,
+        backoff=0.5,
+    ):
+        self.per_host_concurrency = per_host_concurrency
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        adapter = HTTPAdapter(
+            pool_connections=pool_hosts,
+            pool_maxsize=per_host_concurrency,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff,
+                status_forcelist=RETRY_STATUSES,
+                raise_on_status=False,
+                respect_retry_after_header=True,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._global_limit = threading.BoundedSemaphore(max_concurrency)
+        self._host_limits = {}
+        self._lock = threading.Lock()
+        self._metrics = defaultdict(
+            lambda: {
+                "requests": 0,
+                "errors": 0,
+                "seconds": deque(maxlen=METRICS_WINDOW),
+            }
+        )
+
+    def _host_limit(self, host):
+        with self._lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self.per_host_concurrency)
+                self._host_limits[host] = limit
+            return limit
+
+    def _record(self, host, seconds, failed):
+        with self._lock:
+            metrics = self._metrics[host]
+            metrics["requests"] += 1
+            metrics["errors"] += int(failed)
+            metrics["seconds"].append(seconds)
+
+    def request(self, method, url, **kwargs):
+        """Som Session.request, med timeout som standard och gränser per värd.
+
+        Svar med felstatus räknas som fel i mätvärdena men returneras som
+        vanligt; undantag från requests skickas vidare.
+        """
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        host = urlparse(url).netloc
+        with self._global_limit, self._host_limit(host):
+            start = time.perf_counter()
+            response = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+                return response
+            finally:
+                elapsed = time.perf_counter() - start
+                failed = response is None or response.status_code >= 400
+                self._record(host, elapsed, failed)
+                logger.debug(
+                    "%s %s -> %s på %.0f ms",
+                    method,
+                    url,
+                    response.status_code if response is not None else "fel",
+                    elapsed * 1000,
+                )
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def metrics(self):
+        """Anrop, fel och svarstider (ms: medel, p50, p95, max) per värd.
+
+        Tiderna gäller de senaste METRICS_WINDOW anropen mot värden.
+        """
+        with self._lock:
+            snapshot = {
+                host: (data["requests"], data["errors"], list(data["seconds"]))
+                for host, data in self._metrics.items()
+            }
+        result = {}
+        for host, (count, errors, seconds) in snapshot.items():
+            stats = {"requests": count, "errors": errors}
+            if seconds:
+                stats.update(
+                    {
+                        "avg_ms": round(sum(seconds) / len(seconds) * 1000, 1),
+                        "p50_ms": round(_percentile(seconds, 0.5) * 1000, 1),
+                        "p95_ms": round(_percentile(seconds, 0.95) * 1000, 1),
+                        "max_ms": round(max(seconds) * 1000, 1),
+                    }
+                )
+            result[host] = stats
+        return result
+
+    def reset_metrics(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Processens delade klient, skapad vid första anropet från inställningarna."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient(
+                    pool_hosts=getattr(settings, "HTTP_POOL_HOSTS", 10),
+                    max_concurrency=getattr(settings, "HTTP_MAX_CONCURRENCY", 16),
+                    per_host_concurrency=getattr(
+                        settings, "HTTP_PER_HOST_CONCURRENCY", 4
+                    ),
+                    retries=getattr(settings, "HTTP_RETRIES", 2),
+                    backoff=getattr(settings, "HTTP_RETRY_BACKOFF", 0.5),
+                )
+    return _client
+
+
+def reset_client():
+    """Stänger och glömmer den delade klienten (t.ex. efter ändrade inställningar)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+
+
+def request(method, url, **kwargs):
+    return get_client().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return get_client().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return get_client().post(url, **kwargs)
+
+
+def metrics():
+    return get_client().metrics()
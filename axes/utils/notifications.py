@@ -4,11 +4,10 @@ Push-notiser via ntfy.sh, t.ex. när en publik kommentar hamnar i moderering.
 
 import logging
 
-import requests
-
 from django.urls import reverse
 
 from ..models import Settings
+from . import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -47,7 +46,7 @@ def send_ntfy(topic_url, token, title, body, click=None):
         headers["Authorization"] = f"Bearer {token}"
 
     try:
-        resp = requests.post(base_url, json=payload, headers=headers, timeout=5)
+        resp = http_client.post(base_url, json=payload, headers=headers, timeout=5)
         resp.raise_for_status()
         return True, None
     except Exception as exc:
@@ -0,0 +1,156 @@
+"""Tid och träffsäkerhet per fält för auktionsparsrarna över sparade sidor.
+
+Korpusen är en katalog med par av filer: <namn>.html (den sparade sidan)
+och <namn>.json med plattform, URL och förväntat resultat:
+
+    {
+      "platform": "ebay" | "tradera",
+      "url": "...",
+      "expected": {"title": ..., "seller_alias": ..., "prices": [...],
+                   "images": [...], "auction_end_date": "YYYY-MM-DD"},
+      "listing": {"title": ..., "price": ..., "images": [...]}
+    }
+
+"expected" jämförs med parse_html (samma väg som "Hämta data" använder),
+"listing" med parse_ebay_listing/parse_tradera_listing. Fält som saknas i
+den förväntade datan räknas inte. Bilder jämförs utan hänsyn till ordning
+(Traderas heuristik returnerar dem i mängdordning).
+
+Används av benchmark_auction_parsers och av testerna, så en snabbare
+parser inte tyst blir sämre på att hitta fälten.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from . import structured_data
+from .ebay_parser import EbayParser, parse_ebay_listing
+from .tradera_parser import TraderaParser, parse_tradera_listing
+
+DEFAULT_CORPUS = (
+    Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "auction_pages"
+)
+
+PARSERS = {
+    "ebay": (EbayParser, parse_ebay_listing),
+    "tradera": (TraderaParser, parse_tradera_listing),
+}
+
+LISTING_FIELDS = ("title", "price", "currency", "images")
+
+
+def load_corpus(path=None):
+    """Läser alla sidor i korpusen, sorterade på namn."""
+    pages = []
+    for meta_path in sorted(Path(path or DEFAULT_CORPUS).glob("*.json")):
+        html_path = meta_path.with_suffix(".html")
+        if not html_path.exists():
+            continue
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        pages.append(
+            {
+                "name": meta_path.stem,
+                "platform": meta["platform"],
+                "url": meta["url"],
+                "html": html_path.read_bytes(),
+                "expected": meta.get("expected", {}),
+                "listing": meta.get("listing", {}),
+            }
+        )
+    return pages
+
+
+def field_matches(field, actual, expected):
+    if field == "images":
+        return sorted(actual or []) == sorted(expected or [])
+    if field == "prices":
+        found = {
+            (price["label"], float(price["amount"]), price["currency"])
+            for price in actual or []
+        }
+        return all(
+            (price["label"], float(price["amount"]), price["currency"]) in found
+            for price in expected
+        )
+    if field == "price" and actual is not None and expected is not None:
+        return float(actual) == float(expected)
+    return actual == expected
+
+
+@contextmanager
+def _html_parser(name):
+    if not name:
+        yield
+        return
+    previous = structured_data.HTML_PARSER
+    structured_data.HTML_PARSER = name
+    try:
+        yield
+    finally:
+        structured_data.HTML_PARSER = previous
+
+
+def _empty_fields(names):
+    return {name: {"seconds": 0.0, "correct": 0, "total": 0} for name in names}
+
+
+def run(pages, rounds=5, structured=True, html_parser=None):
+    """Kör parsrarna över korpusen.
+
+    Returnerar en rapport med medeltid per sida (sekunder) och antal rätt
+    per fält, för parse_html ("parser") och listningsfunktionerna
+    ("listing"). Med structured=False körs bara heuristiken, som jämförelse.
+    """
+    rounds = max(1, rounds)
+    parser_fields = _empty_fields(("soup", "structured_data", *structured_data.FIELDS))
+    listing_fields = _empty_fields(LISTING_FIELDS)
+    listing_seconds = 0.0
+    failures = []
+
+    with _html_parser(html_parser):
+        for page in pages:
+            parser_class, parse_listing = PARSERS[page["platform"]]
+            parser = parser_class()
+
+            timings = {}
+            for _ in range(rounds):
+                result = parser.parse_html(
+                    page["html"], page["url"], timings, structured=structured
+                )
+            for name, seconds in timings.items():
+                parser_fields[name]["seconds"] += seconds / rounds
+            for field, expected in page["expected"].items():
+                parser_fields[field]["total"] += 1
+                if field_matches(field, result.get(field), expected):
+                    parser_fields[field]["correct"] += 1
+                else:
+                    failures.append((page["name"], field, result.get(field)))
+
+            html = page["html"].decode("utf-8")
+            start = time.perf_counter()
+            for _ in range(rounds):
+                listing = parse_listing(html)
+            listing_seconds += (time.perf_counter() - start) / rounds
+            for field, expected in page["listing"].items():
+                listing_fields[field]["total"] += 1
+                if field_matches(field, listing.get(field), expected):
+                    listing_fields[field]["correct"] += 1
+                else:
+                    failures.append((page["name"], f"listing.{field}", listing))
+
+    count = max(1, len(pages))
+    for stats in (*parser_fields.values(), *listing_fields.values()):
+        stats["seconds"] /= count
+
+    return {
+        "pages": len(pages),
+        "rounds": rounds,
+        "structured": structured,
+        "html_parser": html_parser or structured_data.HTML_PARSER,
+        "parser": parser_fields,
+        "listing": {"seconds": listing_seconds / count, "fields": listing_fields},
+        "failures": failures,
+    }
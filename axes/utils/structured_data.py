@@ -0,0 +1,254 @@
+"""Strukturerad data i auktionssidor (JSON-LD och __NEXT_DATA__).
+
+Både eBay och Tradera bäddar in objektet som JSON i sidan: eBay som
+schema.org-Product i <script type="application/ld+json">, Tradera som
+Next.js-tillstånd i <script id="__NEXT_DATA__">. Att läsa de blocken är
+betydligt snabbare och säkrare än parsrarnas heuristik, som sveper över
+hela dokumentet med find_all och reguljära uttryck per fält. Parsrarna
+läser därför strukturerad data först och kör heuristiken bara för fält som
+saknas där.
+
+make_soup använder lxml om det är installerat, annars html.parser.
+"""
+
+import importlib.util
+import json
+import re
+import time
+from contextlib import contextmanager
+
+from bs4 import BeautifulSoup
+
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+FIELDS = ("title", "seller_alias", "prices", "images", "auction_end_date")
+
+ISO_DATE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})")
+
+
+def make_soup(markup, parser=None):
+    return BeautifulSoup(markup, parser or HTML_PARSER)
+
+
+@contextmanager
+def timed(timings, name):
+    """Lägger till tiden för blocket i timings[name] (om timings ges)."""
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def _script_json(script):
+    text = script.string or script.get_text()
+    if not text or not text.strip():
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def json_ld_objects(soup):
+    """Alla JSON-LD-objekt i sidan, med @graph och listor utplattade."""
+    objects = []
+    for script in soup.find_all("script", type="application/ld+json"):
+        pending = [_script_json(script)]
+        while pending:
+            data = pending.pop(0)
+            if isinstance(data, list):
+                pending.extend(data)
+            elif isinstance(data, dict):
+                if isinstance(data.get("@graph"), list):
+                    pending.extend(data["@graph"])
+                else:
+                    objects.append(data)
+    return objects
+
+
+def next_data(soup):
+    script = soup.find("script", id="__NEXT_DATA__")
+    return _script_json(script) if script else None
+
+
+def _is_product(obj):
+    types = obj.get("@type")
+    if isinstance(types, str):
+        types = [types]
+    return isinstance(types, list) and "Product" in types
+
+
+def _find_item(data, item_id):
+    """Första objektet i Next.js-tillståndet som ser ut som auktionen.
+
+    Med item_id krävs att itemId/id matchar; annars räcker ett objekt med
+    itemId och titel.
+    """
+    pending = [data]
+    while pending:
+        node = pending.pop(0)
+        if isinstance(node, dict):
+            node_id = node.get("itemId", node.get("id"))
+            has_title = node.get("title") or node.get("name")
+            if has_title and node_id is not None:
+                if str(node_id) == str(item_id) or (
+                    item_id is None and "itemId" in node
+                ):
+                    return node
+            pending.extend(node.values())
+        elif isinstance(node, list):
+            pending.extend(node)
+    return None
+
+
+def _text(value):
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, dict):
+        for key in ("alias", "name", "username", "displayName"):
+            if value.get(key):
+                return _text(value[key])
+    return None
+
+
+def _images(value):
+    if not value:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    images = []
+    for entry in value:
+        if isinstance(entry, dict):
+            entry = next(
+                (
+                    entry[key]
+                    for key in ("url", "contentUrl", "src", "href")
+                    if entry.get(key)
+                ),
+                None,
+            )
+        if isinstance(entry, str) and entry.strip():
+            url = entry.strip()
+            if url.startswith("//"):
+                url = "https:" + url
+            if url not in images:
+                images.append(url)
+    return images
+
+
+def _amount(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        cleaned = re.sub(r"[^\d.,]", "", value).replace(",", ".")
+        try:
+            return float(cleaned)
+        except ValueError:
+            return None
+    return None
+
+
+def _price(amount, currency):
+    return {
+        "label": "Slutpris",
+        "amount": amount,
+        "currency": currency,
+        "original_amount": amount,
+        "original_currency": currency,
+    }
+
+
+def _date(value):
+    if isinstance(value, str):
+        match = ISO_DATE_RE.match(value.strip())
+        if match:
+            return match.group(1)
+    return None
+
+
+def _from_json_ld(product, default_currency):
+    fields = {
+        "title": _text(product.get("name")),
+        "images": _images(product.get("image")),
+        "seller_alias": _text(product.get("seller")),
+    }
+
+    offers = product.get("offers")
+    if isinstance(offers, list):
+        offers = offers[0] if offers else None
+    if isinstance(offers, dict):
+        amount = _amount(offers.get("price", offers.get("lowPrice")))
+        currency = offers.get("priceCurrency") or default_currency
+        if amount and currency:
+            fields["prices"] = [_price(amount, currency)]
+        fields["seller_alias"] = fields["seller_alias"] or _text(offers.get("seller"))
+        fields["auction_end_date"] = _date(
+            offers.get("availabilityEnds") or offers.get("priceValidUntil")
+        )
+    return fields
+
+
+def _from_next_item(item, default_currency):
+    fields = {
+        "title": _text(item.get("title") or item.get("name")),
+        "images": _images(item.get("images") or item.get("imageUrls")),
+        "seller_alias": _text(
+            item.get("seller") or item.get("sellerAlias") or item.get("sellerName")
+        ),
+        "auction_end_date": _date(
+            item.get("endDate") or item.get("endTime") or item.get("endsAt")
+        ),
+    }
+
+    for key in ("finalPrice", "price", "leadingBid", "currentBid"):
+        value = item.get(key)
+        currency = item.get("currency") or default_currency
+        if isinstance(value, dict):
+            currency = value.get("currency") or currency
+            value = value.get("amount", value.get("value"))
+        amount = _amount(value)
+        if amount and currency:
+            fields["prices"] = [_price(amount, currency)]
+            break
+    return fields
+
+
+def extract(soup, item_id=None, default_currency=None):
+    """Fälten som gick att läsa ur sidans strukturerade data.
+
+    Returnerar en dict med de av FIELDS som hittades; fält som saknas
+    utelämnas så att anroparen kan falla tillbaka på heuristiken.
+    JSON-LD går före __NEXT_DATA__ fält för fält.
+    """
+    sources = [
+        _from_json_ld(obj, default_currency)
+        for obj in json_ld_objects(soup)
+        if _is_product(obj)
+    ]
+    data = next_data(soup)
+    if data is not None:
+        item = _find_item(data, item_id)
+        if item is not None:
+            sources.append(_from_next_item(item, default_currency))
+
+    fields = {}
+    for source in sources:
+        for field, value in source.items():
+            if value and field not in fields:
+                fields[field] = value
+    return fields
+
+
+def fill_missing(fields, extractors, soup, timings=None):
+    """Kör heuristiken i extractors för fält som saknas i fields."""
+    for field, extract_field in extractors.items():
+        if not fields.get(field):
+            with timed(timings, field):
+                fields[field] = extract_field(soup)
+    return fields
@@ -52,10 +52,132 @@ def search_platforms(request):
     return JsonResponse({"results": results})
 
 
+def _can_see_contacts(request):
+    return request.user.is_authenticated or getattr(request, "public_settings", {}).get(
+        "show_contacts", False
+    )
+
+
+def _can_see_platforms(request):
+    return request.user.is_authenticated or getattr(request, "public_settings", {}).get(
+        "show_platforms", True
+    )
+
+
+def _only_received_axes(request):
+    return not request.user.is_authenticated and getattr(
+        request, "public_settings", {}
+    ).get("show_only_received_axes", False)
+
+
+def _axe_result(axe):
+    return {
+        "id": axe.id,
+        "title": f"{axe.manufacturer.name} - {axe.model}",
+        "subtitle": f"ID: {axe.id}",
+        "url": f"/yxor/{axe.id}/",
+        "type": "axe",
+    }
+
+
+def _contact_result(contact):
+    flag_emoji = (
+        "🇸🇪"
+        if contact.country_code == "SE"
+        else "🇫🇮" if contact.country_code == "FI" else ""
+    )
+    return {
+        "id": contact.id,
+        "title": contact.name,
+        "subtitle": f"{contact.alias or ''} {flag_emoji}".strip(),
+        "url": f"/kontakter/{contact.id}/",
+        "type": "contact",
+    }
+
+
+def _manufacturer_result(manufacturer):
+    from .templatetags.axe_filters import country_flag
+
+    # Lägg till flaggemoji om country_code finns
+    flag_emoji = ""
+    if manufacturer.country_code:
+        flag_emoji = f"{country_flag(manufacturer.country_code)} "
+    return {
+        "id": manufacturer.id,
+        "title": f"{flag_emoji}{manufacturer.name}",
+        "subtitle": f"{manufacturer.search_axe_count} yxor",
+        "url": f"/tillverkare/{manufacturer.id}/",
+        "type": "manufacturer",
+    }
+
+
+def _transaction_result(transaction, request):
+    axe_title = (
+        f"{transaction.axe.manufacturer.name} - {transaction.axe.model}"
+        if transaction.axe
+        else "Okänd yxa"
+    )
+
+    # Skapa subtitle baserat på publika inställningar
+    if request.user.is_authenticated or getattr(request, "public_settings", {}).get(
+        "show_prices", True
+    ):
+        subtitle_parts = [
+            f"{transaction.price} kr",
+            transaction.transaction_date.strftime("%Y-%m-%d"),
+        ]
+    else:
+        subtitle_parts = ["***", transaction.transaction_date.strftime("%Y-%m-%d")]
+
+    # Lägg till kontaktinfo endast om kontakter visas publikt
+    if _can_see_contacts(request) and transaction.contact:
+        subtitle_parts.append(transaction.contact.name)
+
+    # Lägg till plattformsinfo endast om plattformar visas publikt
+    if _can_see_platforms(request) and transaction.platform:
+        subtitle_parts.append(transaction.platform.name)
+
+    return {
+        "id": transaction.id,
+        "title": f"{transaction.type} - {axe_title}",
+        "subtitle": " - ".join(subtitle_parts),
+        "url": f"/yxor/{transaction.axe.id}/" if transaction.axe else "#",
+        "type": "transaction",
+    }
+
+
+def _stamp_result(stamp):
+    return {
+        "id": stamp.id,
+        "title": stamp.name,
+        "subtitle": stamp.manufacturer.name if stamp.manufacturer else "",
+        "url": reverse("stamp_detail", args=[stamp.id]),
+        "type": "stamp",
+    }
+
+
+def _axes_queryset():
+    return Axe.objects.select_related("manufacturer")
+
+
+def _manufacturers_queryset():
+    return Manufacturer.objects.annotate(search_axe_count=Count("axe"))
+
+
+def _transactions_queryset():
+    return Transaction.objects.select_related(
+        "axe__manufacturer", "contact", "platform"
+    )
+
+
+def _stamps_queryset():
+    from .models import Stamp
+
+    return Stamp.objects.select_related("manufacturer")
+
+
 def _search_axes(query, request):
     """Sök i yxor med publik/privat filtrering"""
-    from .models import Axe, Settings
-
     text_query = (
         Q(manufacturer__name__icontains=query)
         | Q(model__icontains=query)
@@ -63,173 +185,133 @@ def _search_axes(query, request):
     )
 
     # Applicera publik filtrering om användaren inte är inloggad
-    if not request.user.is_authenticated:
-        try:
-            settings = Settings.get_settings()
-            if settings.show_only_received_axes_public:
-                text_query &= Q(status="MOTTAGEN")
-        except Exception:
-            # Fallback om Settings-modellen inte finns ännu
-            pass
+    if _only_received_axes(request):
+        text_query &= Q(status="MOTTAGEN")
 
     # Kontrollera om query är ett nummer för ID-sökning
     try:
         id_query = int(query)
-        axes = Axe.objects.filter(text_query | Q(id=id_query)).select_related(
-            "manufacturer"
-        )[:5]
+        axes = _axes_queryset().filter(text_query | Q(id=id_query))[:5]
     except ValueError:
         # Om query inte är ett nummer, sök bara i textfält
-        axes = Axe.objects.filter(text_query).select_related("manufacturer")[:5]
+        axes = _axes_queryset().filter(text_query)[:5]
 
-    results = []
-    for axe in axes:
-        results.append(
-            {
-                "id": axe.id,
-                "title": f"{axe.manufacturer.name} - {axe.model}",
-                "subtitle": f"ID: {axe.id}",
-                "url": f"/yxor/{axe.id}/",
-                "type": "axe",
-            }
-        )
-    return results
+    return [_axe_result(axe) for axe in axes]
 
 
 def _search_contacts(query, request):
     """Sök i kontakter med publik/privat filtrering"""
-    from .models import Contact
-
     # Sök endast om användaren är inloggad eller kontakter visas publikt
-    if not (
-        request.user.is_authenticated
-        or getattr(request, "public_settings", {}).get("show_contacts", False)
-    ):
+    if not _can_see_contacts(request):
         return []
 
     contacts = Contact.objects.filter(
         Q(name__icontains=query) | Q(alias__icontains=query) | Q(email__icontains=query)
     )[:5]
-
-    results = []
-    for contact in contacts:
-        flag_emoji = (
-            "🇸🇪"
-            if contact.country_code == "SE"
-            else "🇫🇮" if contact.country_code == "FI" else ""
-        )
-        results.append(
-            {
-                "id": contact.id,
-                "title": contact.name,
-                "subtitle": f"{contact.alias or ''} {flag_emoji}".strip(),
-                "url": f"/kontakter/{contact.id}/",
-                "type": "contact",
-            }
-        )
-    return results
+    return [_contact_result(contact) for contact in contacts]
 
 
 def _search_manufacturers(query):
     """Sök i tillverkare"""
-    from .models import Manufacturer
-    from .templatetags.axe_filters import country_flag
-
-    manufacturers = Manufacturer.objects.filter(
+    manufacturers = _manufacturers_queryset().filter(
         Q(name__icontains=query) | Q(information__icontains=query)
     )[:5]
-
-    results = []
-    for manufacturer in manufacturers:
-        axe_count = manufacturer.axes.count()
-        # Lägg till flaggemoji om country_code finns
-        flag_emoji = ""
-        if manufacturer.country_code:
-            flag_emoji = f"{country_flag(manufacturer.country_code)} "
-
-        results.append(
-            {
-                "id": manufacturer.id,
-                "title": f"{flag_emoji}{manufacturer.name}",
-                "subtitle": f"{axe_count} yxor",
-                "url": f"/tillverkare/{manufacturer.id}/",
-                "type": "manufacturer",
-            }
-        )
-    return results
+    return [_manufacturer_result(manufacturer) for manufacturer in manufacturers]
 
 
 def _search_transactions(query, request):
     """Sök i transaktioner med publik/privat filtrering"""
-    from .models import Transaction
-
     transaction_query = Q(axe__manufacturer__name__icontains=query) | Q(
         axe__model__icontains=query
     )
 
     # Lägg till kontaktsökning endast om kontakter visas publikt
-    if request.user.is_authenticated or getattr(request, "public_settings", {}).get(
-        "show_contacts", False
-    ):
+    if _can_see_contacts(request):
         transaction_query |= Q(contact__name__icontains=query)
 
     # Lägg till plattformssökning endast om plattformar visas publikt
-    if request.user.is_authenticated or getattr(request, "public_settings", {}).get(
-        "show_platforms", True
-    ):
+    if _can_see_platforms(request):
         transaction_query |= Q(platform__name__icontains=query)
 
-    transactions = Transaction.objects.filter(transaction_query).select_related(
-        "axe__manufacturer", "contact", "platform"
-    )[:5]
-
-    results = []
-    for transaction in transactions:
-        axe_title = (
-            f"{transaction.axe.manufacturer.name} - {transaction.axe.model}"
-            if transaction.axe
-            else "Okänd yxa"
-        )
+    transactions = _transactions_queryset().filter(transaction_query)[:5]
+    return [_transaction_result(transaction, request) for transaction in transactions]
 
-        # Skapa subtitle baserat på publika inställningar
-        if request.user.is_authenticated or getattr(request, "public_settings", {}).get(
-            "show_prices", True
-        ):
-            subtitle_parts = [
-                f"{transaction.price} kr",
-                transaction.transaction_date.strftime("%Y-%m-%d"),
-            ]
-        else:
-            subtitle_parts = ["***", transaction.transaction_date.strftime("%Y-%m-%d")]
-
-        # Lägg till kontaktinfo endast om kontakter visas publikt
-        if request.user.is_authenticated or getattr(request, "public_settings", {}).get(
-            "show_contacts", False
-        ):
-            if transaction.contact:
-                subtitle_parts.append(transaction.contact.name)
 
-        # Lägg till plattformsinfo endast om plattformar visas publikt
-        if request.user.is_authenticated or getattr(request, "public_settings", {}).get(
-            "show_platforms", True
-        ):
-            if transaction.platform:
-                subtitle_parts.append(transaction.platform.name)
-
-        results.append(
-            {
-                "id": transaction.id,
-                "title": f"{transaction.type} - {axe_title}",
-                "subtitle": " - ".join(subtitle_parts),
-                "url": f"/yxor/{transaction.axe.id}/" if transaction.axe else "#",
-                "type": "transaction",
-            }
+def _search_stamps(query):
+    """Sök i stämplar (namn, beskrivning och transkriptioner)"""
+    stamps = (
+        _stamps_queryset()
+        .filter(
+            Q(name__icontains=query)
+            | Q(description__icontains=query)
+            | Q(transcriptions__text__icontains=query)
         )
-    return results
+        .distinct()[:5]
+    )
+    return [_stamp_result(stamp) for stamp in stamps]
+
+
+def _in_order(queryset, ids):
+    """Hämtar objekten för ids och behåller ordningen från sökindexet."""
+    objects = queryset.in_bulk(ids)
+    return [objects[object_id] for object_id in ids if object_id in objects]
+
+
+def _search_index_results(query, request):
+    """Svarar från fulltextindexet (services.search_index) i en rankad query.
+
+    Samma synlighetsregler som icontains-sökningarna: kontakter och
+    kontakt-/plattformskolumnerna söks bara när de får visas.
+    """
+    from .services import search_index
+
+    kinds = ["axe", "manufacturer", "transaction", "stamp"]
+    columns = ["title", "body"]
+    if _can_see_contacts(request):
+        kinds.append("contact")
+        columns.append("contact")
+    if _can_see_platforms(request):
+        columns.append("platform")
+
+    only_received = _only_received_axes(request)
+    hits = search_index.search(query, kinds, columns, only_received)
+
+    axe_ids = hits.get("axe", [])
+    if query.isdigit():
+        # ID-sökning: yxan med exakt det ID:t visas först
+        id_match = _axes_queryset().filter(id=int(query))
+        if only_received:
+            id_match = id_match.filter(status="MOTTAGEN")
+        if id_match.exists():
+            axe_ids = [int(query)] + [pk for pk in axe_ids if pk != int(query)]
+            axe_ids = axe_ids[: search_index.RESULTS_PER_KIND]
+
+    transactions = _in_order(_transactions_queryset(), hits.get("transaction", []))
+    return {
+        "axes": [_axe_result(axe) for axe in _in_order(_axes_queryset(), axe_ids)],
+        "contacts": [
+            _contact_result(contact)
+            for contact in _in_order(Contact.objects.all(), hits.get("contact", []))
+        ],
+        "manufacturers": [
+            _manufacturer_result(manufacturer)
+            for manufacturer in _in_order(
+                _manufacturers_queryset(), hits.get("manufacturer", [])
+            )
+        ],
+        "transactions": [
+            _transaction_result(transaction, request) for transaction in transactions
+        ],
+        "stamps": [
+            _stamp_result(stamp)
+            for stamp in _in_order(_stamps_queryset(), hits.get("stamp", []))
+        ],
+    }
 
 
 def global_search(request):
-    """AJAX-endpoint för global sökning i yxor, kontakter, tillverkare och transaktioner"""
+    """AJAX-endpoint för global sökning i yxor, kontakter, tillverkare,
+    transaktioner och stämplar"""
     query = request.GET.get("q", "").strip()
 
     # Tillåt numeriska queries (som ID:n) oavsett längd
@@ -258,16 +340,18 @@ def global_search(request):
             "show_only_received_axes": False,
         }
 
-    axes_results = _search_axes(query, request)
-    contacts_results = _search_contacts(query, request)
-    manufacturers_results = _search_manufacturers(query)
-    transactions_results = _search_transactions(query, request)
+    from .services import search_index
+
+    if search_index.is_available():
+        return JsonResponse({"results": _search_index_results(query, request)})
 
+    # Utan fulltextindex (annan databas än SQLite): icontains-sökningar
     results = {
-        "axes": axes_results,
-        "contacts": contacts_results,
-        "manufacturers": manufacturers_results,
-        "transactions": transactions_results,
+        "axes": _search_axes(query, request),
+        "contacts": _search_contacts(query, request),
+        "manufacturers": _search_manufacturers(query),
+        "transactions": _search_transactions(query, request),
+        "stamps": _search_stamps(query),
     }
 
     return JsonResponse({"results": results})
@@ -962,7 +1046,9 @@ def get_backup_info(base_dir):
     if os.path.exists(backup_dir):
         for filename in os.listdir(backup_dir):
             file_path = os.path.join(backup_dir, filename)
-            if os.path.isfile(file_path):
+            # Statistik- och manifestfiler hör till en backup och visas inte
+            # separat (se get_backup_stats och services/backups.py)
+            if os.path.isfile(file_path) and not filename.endswith(".json"):
                 stat = os.stat(file_path)
                 from datetime import datetime
 
@@ -1038,6 +1124,22 @@ def create_backup(request):
     return redirect("settings")
 
 
+def remove_backup_companions(backup_path):
+    """Tar bort statistik- och manifestfilen som hör till en backup samt
+    media-filer i lagret som ingen kvarvarande backup längre använder"""
+    import os
+    from .services import backups
+
+    if backup_path.endswith(".sqlite3"):
+        for companion in (
+            backup_path.replace(".sqlite3", "_stats.json"),
+            backups.manifest_path_for(backup_path),
+        ):
+            if os.path.exists(companion):
+                os.remove(companion)
+    backups.collect_garbage(os.path.dirname(backup_path))
+
+
 def delete_backup(request):
     """Ta bort backup"""
     import os
@@ -1050,6 +1152,7 @@ def delete_backup(request):
         try:
             if os.path.exists(backup_path):
                 os.remove(backup_path)
+                remove_backup_companions(backup_path)
                 messages.success(request, f"Backup {filename} raderad")
             else:
                 messages.error(request, "Backup-filen finns inte")
@@ -1498,3 +1601,28 @@ def api_delete_measurement_template(request, template_id):
 
     except Exception as e:
         return JsonResponse({"success": False, "error": str(e)}, status=500)
+
+
+def image_variant(request, kind, pk, width):
+    """Skapar en nedskalad bildvariant vid första anropet och skickar vidare
+    till den cachade filen under MEDIA_URL (se services/image_variants.py)"""
+    from django.apps import apps
+    from django.http import Http404
+    from .services.image_variants import (
+        VARIANT_MODELS,
+        VARIANT_WIDTHS,
+        cached_variant_url,
+        generate_variant,
+    )
+
+    if kind not in VARIANT_MODELS or width not in VARIANT_WIDTHS:
+        raise Http404("Okänd bildvariant")
+    image = get_object_or_404(apps.get_model(VARIANT_MODELS[kind]), pk=pk)
+    if not image.image or not image.image.name:
+        raise Http404("Bilden saknas")
+    try:
+        generate_variant(image.image.name, width)
+    except (OSError, ValueError):
+        # Saknad eller trasig originalfil - visa originalet som förut
+        return redirect(image.image.url)
+    return redirect(cached_variant_url(image, width))
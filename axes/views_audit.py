@@ -1,16 +1,48 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.core.paginator import Paginator
+from django.db.models import Q
 from django.shortcuts import render
+from django.utils import timezone
 from django.utils.dateparse import parse_date
 
 from .models import AuditLog
 
+PAGE_SIZE = 50
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _encode_cursor(entry):
+    """Sidmarkör för en post: tidsstämpel i mikrosekunder och id."""
+    microseconds = (entry.timestamp - _EPOCH) // timedelta(microseconds=1)
+    return f"{microseconds}-{entry.id}"
+
+
+def _decode_cursor(value):
+    try:
+        microseconds, entry_id = value.split("-")
+        return _EPOCH + timedelta(microseconds=int(microseconds)), int(entry_id)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
 
 @login_required
 def audit_log(request):
-    """Vy för att visa ändringsloggen med filtreringsmöjligheter."""
-    logs = AuditLog.objects.select_related("user").all()
+    """Vy för att visa ändringsloggen med filtreringsmöjligheter.
+
+    Sidorna hämtas med keyset-paginering på (timestamp, id) i stället för
+    OFFSET och COUNT(*): ?before=<markör> ger äldre poster och ?after=
+    <markör> nyare, så varje sida är en indexerad intervallfråga oavsett
+    hur stor loggen är. Datumfiltren blir intervall på timestamp så att
+    indexen (model_name, timestamp) och (user, timestamp) kan användas.
+    """
+    logs = AuditLog.objects.select_related("user")
 
     model_name = request.GET.get("model_name", "")
     action = request.GET.get("action", "")
@@ -27,14 +59,47 @@ def audit_log(request):
 
     parsed_date_from = parse_date(date_from) if date_from else None
     if parsed_date_from:
-        logs = logs.filter(timestamp__date__gte=parsed_date_from)
+        logs = logs.filter(timestamp__gte=_start_of_day(parsed_date_from))
 
     parsed_date_to = parse_date(date_to) if date_to else None
     if parsed_date_to:
-        logs = logs.filter(timestamp__date__lte=parsed_date_to)
+        logs = logs.filter(
+            timestamp__lt=_start_of_day(parsed_date_to + timedelta(days=1))
+        )
+
+    before = _decode_cursor(request.GET.get("before"))
+    after = None if before else _decode_cursor(request.GET.get("after"))
+
+    if after:
+        timestamp, entry_id = after
+        page = list(
+            logs.filter(
+                Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=entry_id)
+            ).order_by("timestamp", "id")[: PAGE_SIZE + 1]
+        )
+        has_newer = len(page) > PAGE_SIZE
+        page = page[:PAGE_SIZE][::-1]
+        has_older = True
+        if not has_newer:
+            # Framme vid de senaste posterna - visa en hel första sida
+            after = None
+    if not after:
+        if before:
+            timestamp, entry_id = before
+            logs_page = logs.filter(
+                Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=entry_id)
+            )
+        else:
+            logs_page = logs
+        page = list(logs_page.order_by("-timestamp", "-id")[: PAGE_SIZE + 1])
+        has_older = len(page) > PAGE_SIZE
+        page = page[:PAGE_SIZE]
+        has_newer = before is not None
 
-    paginator = Paginator(logs, 50)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    # Sidlänkarna behåller filtren men inte markören
+    filter_params = request.GET.copy()
+    for key in ("before", "after", "page"):
+        filter_params.pop(key, None)
 
     model_names = (
         AuditLog.objects.values_list("model_name", flat=True)
@@ -49,7 +114,12 @@ def audit_log(request):
     log_users = User.objects.filter(id__in=log_user_ids).order_by("username")
 
     context = {
-        "page_obj": page_obj,
+        "logs": page,
+        "has_newer": has_newer and bool(page),
+        "has_older": has_older and bool(page),
+        "newer_cursor": _encode_cursor(page[0]) if page else "",
+        "older_cursor": _encode_cursor(page[-1]) if page else "",
+        "filter_query": filter_params.urlencode(),
         "model_names": model_names,
         "log_users": log_users,
         "action_choices": AuditLog.ACTION_CHOICES,
@@ -22,31 +22,33 @@ from .models import (
     AxeStamp,
     StampVariant,
     StampUncertaintyGroup,
+    MonthlyTransactionSummary,
 )
 from .forms import AxeForm, MeasurementForm, TransactionForm
-from .services.comments import build_comment_tree
+from .services import auction_cache, image_derivatives, manufacturer_tree
+from .services.axe_financials import profit_expression
+from .services.remote_images import failed_urls, ingest_axe_images
+from .services.site_cache import get_comment_tree, get_site_settings
+from .services.statistics import axe_totals, transaction_totals
+from .utils.zip_stream import image_zip_entries, zip_response
 from django.db.models import Sum, Count, Max
 from django.utils import timezone
-from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST, require_http_methods
-import requests
-import uuid
 import os
 import shutil
-from urllib.parse import urlparse
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_exempt
 from django.http import HttpResponse
 from django.db.models import Q, Count, Sum, Avg, Max, Min
+from django.db.models import F, OuterRef, Subquery
 from django.db import transaction
 from django.core.paginator import Paginator
 from django.template.loader import render_to_string
 from django.core.exceptions import ValidationError
 from django.db.models.functions import Coalesce
-from decimal import Decimal
 import json
 import re
 from datetime import datetime, timedelta
@@ -135,38 +137,106 @@ def move_images_to_unlinked_folder(axe_images, delete_images=False):
 # --- Yx-relaterade vyer ---
 
 
-def axe_list(request):
-    # Hämta filter från URL-parametrar
-    status_filter = request.GET.get("status", "")
-    manufacturer_filter = request.GET.get("manufacturer", "")
-    platform_filter = request.GET.get("platform", "")
-    measurements_filter = request.GET.get("measurements", "")
-
-    # Starta med alla yxor
-    axes = (
-        Axe.objects.all()
-        .select_related("manufacturer")
-        .prefetch_related("measurements", "images", "transactions__platform")
-    )
+def _get_axe_list_filters(request):
+    """Läser filterparametrarna för yxlistan från URL:en"""
+    return {
+        "status": request.GET.get("status", ""),
+        "manufacturer": request.GET.get("manufacturer", ""),
+        "platform": request.GET.get("platform", ""),
+        "measurements": request.GET.get("measurements", ""),
+    }
+
+
+def _filter_axes(request, filters):
+    """Bygger det filtrerade yx-querysetet för yxlistan.
+
+    Delas av axe_list (HTML-sidan) och axe_list_data (JSON-källan för
+    DataTables server-läge) så att båda alltid filtrerar likadant.
+    Querysetet är lat och saknar prefetch - anroparen väljer själv vad
+    som ska laddas för den del av resultatet som faktiskt visas.
+    """
+    axes = Axe.objects.all()
 
     # Applicera publik filtrering om användaren inte är inloggad
     if not request.user.is_authenticated:
-        from .models import Settings
-
         try:
-            settings = Settings.get_settings()
-            if settings.show_only_received_axes_public:
+            if get_site_settings().show_only_received_axes_public:
                 axes = axes.filter(status="MOTTAGEN")
         except Exception:
             # Fallback om Settings-modellen inte finns ännu
             pass
 
     # Applicera filter
-    if status_filter:
-        axes = axes.filter(status=status_filter)
+    if filters["status"]:
+        axes = axes.filter(status=filters["status"])
+
+    if filters["manufacturer"]:
+        # Filtrera på både huvud- och undertillverkare
+        try:
+            manufacturer_filter_id = int(filters["manufacturer"])
+        except (TypeError, ValueError):
+            manufacturer_filter_id = None
+        manufacturer = (
+            Manufacturer.objects.only("id", "parent_id")
+            .filter(pk=manufacturer_filter_id)
+            .first()
+            if manufacturer_filter_id is not None
+            else None
+        )
+        if manufacturer:
+            # Om det är en huvudtillverkare, inkludera alla undertillverkare
+            if manufacturer.parent_id is None:
+                axes = axes.filter(
+                    manufacturer__in=manufacturer_tree.subtree(manufacturer)
+                )
+            else:
+                # Om det är en undertillverkare, visa endast den
+                axes = axes.filter(manufacturer_id=manufacturer.id)
+
+    if filters["platform"]:
+        axes = axes.filter(transactions__platform_id=filters["platform"]).distinct()
+
+    if filters["measurements"] == "with":
+        axes = axes.filter(measurements__isnull=False).distinct()
+    elif filters["measurements"] == "without":
+        axes = axes.filter(measurements__isnull=True)
+
+    # Sortera efter ID (senaste först)
+    return axes.order_by("-id")
+
+
+def _show_platforms(request):
+    """Om plattformskolumnen ska visas för den aktuella användaren"""
+    if request.user.is_authenticated:
+        return True
+    try:
+        return get_site_settings().show_platforms_public
+    except Exception:
+        return True
+
+
+def _show_prices(request):
+    """Om priser ska visas för den aktuella användaren"""
+    if request.user.is_authenticated:
+        return True
+    try:
+        return get_site_settings().show_prices_public
+    except Exception:
+        return True
+
+
+def axe_list(request):
+    """Yxlistan. Själva tabellraderna hämtas sida för sida från
+    axe_list_data (DataTables server-läge), så sidan laddar aldrig hela
+    samlingen - bara filter-dropdowns och statistik renderas här."""
+    filters = _get_axe_list_filters(request)
+    status_filter = filters["status"]
+    manufacturer_filter = filters["manufacturer"]
+    platform_filter = filters["platform"]
+    measurements_filter = filters["measurements"]
 
     # Hämta alla tillverkare en gång och bygg en parent_id -> barn-karta.
-    # Både undertillverkar-uppslaget för filtret nedan och den hierarkiska
+    # Både undertillverkar-uppslaget för filtret och den hierarkiska
     # dropdown-sorteringen jobbar sedan helt in-memory via parent_id, utan
     # en DB-query per .parent-access (all_manufacturers hämtas utan
     # select_related, så varje .parent/.hierarchy_level/.all_sub_manufacturers
@@ -176,14 +246,6 @@ def axe_list(request):
     for m in all_manufacturers:
         children_by_parent_id.setdefault(m.parent_id, []).append(m)
 
-    def get_descendant_ids(manufacturer_id):
-        """Alla underliggande tillverkar-ID:n (rekursivt), i minnet"""
-        ids = []
-        for child in children_by_parent_id.get(manufacturer_id, []):
-            ids.append(child.id)
-            ids.extend(get_descendant_ids(child.id))
-        return ids
-
     def sort_hierarchically(manufacturers):
         """Sorterar tillverkare hierarkiskt: huvudtillverkare först, sedan undertillverkare i korrekt ordning"""
         for children in children_by_parent_id.values():
@@ -199,88 +261,18 @@ def axe_list(request):
 
         return build(None)
 
-    if manufacturer_filter:
-        # Filtrera på både huvud- och undertillverkare
-        try:
-            manufacturer_filter_id = int(manufacturer_filter)
-        except (TypeError, ValueError):
-            manufacturer_filter_id = None
-        manufacturer = (
-            next((m for m in all_manufacturers if m.id == manufacturer_filter_id), None)
-            if manufacturer_filter_id is not None
-            else None
-        )
-        if manufacturer:
-            # Om det är en huvudtillverkare, inkludera alla undertillverkare
-            if manufacturer.parent_id is None:
-                sub_manufacturer_ids = get_descendant_ids(manufacturer.id)
-                sub_manufacturer_ids.append(manufacturer.id)
-                axes = axes.filter(manufacturer_id__in=sub_manufacturer_ids)
-            else:
-                # Om det är en undertillverkare, visa endast den
-                axes = axes.filter(manufacturer_id=manufacturer_filter)
-
-    if platform_filter:
-        axes = axes.filter(transactions__platform_id=platform_filter).distinct()
-
-    if measurements_filter == "with":
-        axes = axes.filter(measurements__isnull=False).distinct()
-    elif measurements_filter == "without":
-        axes = axes.filter(measurements__isnull=True)
-
-    # Sortera efter ID (senaste först)
-    axes = axes.order_by("-id")
+    axes = _filter_axes(request, filters)
 
     manufacturers = sort_hierarchically(all_manufacturers)
 
     # Hämta alla plattformar för filter-dropdown
     platforms = Platform.objects.all().order_by("name")
 
-    # Statistik för filtrerade yxor
-    filtered_axe_ids = list(axes.values_list("id", flat=True))
-    filtered_transactions = Transaction.objects.filter(axe_id__in=filtered_axe_ids)
-
-    total_buys = filtered_transactions.filter(type="KÖP").count()
-    total_sales = filtered_transactions.filter(type="SÄLJ").count()
-    total_buy_value = (
-        filtered_transactions.filter(type="KÖP").aggregate(total=Sum("price"))["total"]
-        or 0
-    )
-    total_sale_value = (
-        filtered_transactions.filter(type="SÄLJ").aggregate(total=Sum("price"))["total"]
-        or 0
-    )
-    total_buy_shipping = (
-        filtered_transactions.filter(type="KÖP").aggregate(total=Sum("shipping_cost"))[
-            "total"
-        ]
-        or 0
-    )
-    total_sale_shipping = (
-        filtered_transactions.filter(type="SÄLJ").aggregate(total=Sum("shipping_cost"))[
-            "total"
-        ]
-        or 0
-    )
-    total_profit = total_sale_value - total_buy_value
-    total_profit_with_shipping = (total_sale_value + total_sale_shipping) - (
-        total_buy_value + total_buy_shipping
-    )
-
-    # Hitta sålda yxor bland filtrerade yxor (de som har minst en SÄLJ-transaktion)
-    sold_axe_ids = set(
-        filtered_transactions.filter(type="SÄLJ").values_list("axe_id", flat=True)
-    )
-
-    # Statistik för filtrerade yxor
-    filtered_count = axes.count()
-    bought_count = axes.filter(status="KÖPT").count()
-    received_count = axes.filter(status="MOTTAGEN").count()
+    # Statistik för filtrerade yxor (en enda aggregerings-query)
+    stats = axe_totals(axes)
 
     # Hämta inställningar för DataTables
-    from .models import Settings
-
-    settings = Settings.get_settings()
+    settings = get_site_settings()
     if request.user.is_authenticated:
         default_page_length = int(settings.default_axes_rows_private)
     else:
@@ -297,23 +289,176 @@ def axe_list(request):
             "manufacturer_filter": manufacturer_filter,
             "platform_filter": platform_filter,
             "measurements_filter": measurements_filter,
-            "filtered_count": filtered_count,
-            "bought_count": bought_count,
-            "received_count": received_count,
-            "total_buys": total_buys,
-            "total_sales": total_sales,
-            "total_buy_value": total_buy_value,
-            "total_sale_value": total_sale_value,
-            "total_buy_shipping": total_buy_shipping,
-            "total_sale_shipping": total_sale_shipping,
-            "total_profit": total_profit,
-            "total_profit_with_shipping": total_profit_with_shipping,
-            "sold_axe_ids": sold_axe_ids,
+            **stats,
             "default_page_length": default_page_length,
         },
     )
 
 
+# Avgränsare mellan cellerna i _axe_list_row.html. En HTML-kommentar kan
+# aldrig komma från användardata (autoescape gör om "<" till "&lt;"), så
+# det är säkert att dela den renderade raden på den.
+AXE_LIST_CELL_SEPARATOR = "<!--cell-->"
+
+# Kolumnnamn (DataTables columns[i][data]) -> ORDER BY-uttryck. Kolumner
+# som saknas här (plattform, bilder) går inte att sortera på.
+AXE_LIST_ORDERING = {
+    "id": ("id",),
+    "manufacturer": ("manufacturer__name", "id"),
+    "model": ("model", "id"),
+    "status": ("status", "id"),
+    "measurements": ("measurement_total", "id"),
+    "comment": ("comment", "id"),
+    "economy": ("profit", "id"),
+}
+
+
+def _search_axes_queryset(axes, search_value, show_platforms):
+    """Fritextsökning för yxlistan. Varje ord måste matcha något av
+    ID, tillverkare, modell, kommentar eller (om synlig) plattform."""
+    for term in search_value.split():
+        term_query = (
+            Q(manufacturer__name__icontains=term)
+            | Q(model__icontains=term)
+            | Q(comment__icontains=term)
+        )
+        if term.isdigit():
+            term_query |= Q(id=int(term))
+        if show_platforms:
+            term_query |= Q(
+                id__in=Transaction.objects.filter(
+                    platform__name__icontains=term
+                ).values("axe_id")
+            )
+        axes = axes.filter(term_query)
+    return axes
+
+
+def _order_axes_queryset(axes, request):
+    """Applicerar DataTables sortering (order[i][column]/order[i][dir]).
+
+    Måttkolumnen sorteras på en korrelerad subquery i stället för
+    JOIN+aggregat, så att den inte påverkas av att måttfiltret redan har
+    joinat in samma relation. Ekonomikolumnen sorteras på vinst/förlust
+    från yxans summeringsfält.
+    """
+    order_by = []
+    i = 0
+    while f"order[{i}][column]" in request.GET:
+        column_index = request.GET.get(f"order[{i}][column]")
+        column_name = request.GET.get(f"columns[{column_index}][data]", "")
+        descending = request.GET.get(f"order[{i}][dir]") == "desc"
+        for field in AXE_LIST_ORDERING.get(column_name, ()):
+            if field == "measurement_total":
+                axes = axes.annotate(
+                    measurement_total=Coalesce(
+                        Subquery(
+                            Measurement.objects.filter(axe=OuterRef("pk"))
+                            .values("axe")
+                            .annotate(total=Count("id"))
+                            .values("total")
+                        ),
+                        0,
+                    )
+                )
+            elif field == "profit":
+                axes = axes.annotate(profit=profit_expression())
+            order_by.append(f"-{field}" if descending else field)
+        i += 1
+    if not order_by:
+        return axes
+    return axes.order_by(*order_by)
+
+
+def _int_param(request, name, default):
+    try:
+        return int(request.GET.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def axe_list_data(request):
+    """JSON-källa för yxlistan i DataTables server-läge.
+
+    Tar samma filterparametrar som axe_list plus DataTables protokoll
+    (draw, start, length, search[value], order[i][...], columns[i][data])
+    och returnerar bara den efterfrågade sidan. Endast sidans yxor laddas
+    med mått, bilder och plattformar, så minnet och svarstiden beror på
+    sidstorleken i stället för samlingens storlek.
+    """
+    filters = _get_axe_list_filters(request)
+    axes = _filter_axes(request, filters)
+    show_platforms = _show_platforms(request)
+
+    records_total = axes.count()
+
+    search_value = request.GET.get("search[value]", "").strip()
+    if search_value:
+        axes = _search_axes_queryset(axes, search_value, show_platforms)
+        records_filtered = axes.count()
+    else:
+        records_filtered = records_total
+
+    axes = _order_axes_queryset(axes, request)
+
+    start = max(_int_param(request, "start", 0), 0)
+    length = _int_param(request, "length", 50)
+    if length >= 0:
+        axes = axes[start : start + length]
+    elif start:
+        axes = axes[start:]
+
+    page = list(
+        axes.select_related("manufacturer").prefetch_related("measurements", "images")
+    )
+    # Ekonomin läses från yxornas summeringsfält; transaktionerna behövs
+    # bara för plattformsmärkena
+    platforms_by_axe = {}
+    if show_platforms:
+        for platform in (
+            Platform.objects.filter(transaction__axe__in=[axe.id for axe in page])
+            .annotate(axe_id=F("transaction__axe_id"))
+            .order_by("transaction__id")
+        ):
+            platforms_by_axe.setdefault(platform.axe_id, []).append(platform)
+
+    from django.template.loader import get_template
+
+    # Renderas utan request så att context processors inte körs per rad
+    row_template = get_template("axes/_axe_list_row.html")
+    row_context = {
+        "user": request.user,
+        "show_platforms": show_platforms,
+        "show_prices": _show_prices(request),
+    }
+    columns = ["id", "manufacturer", "model", "status"]
+    if show_platforms:
+        columns.append("platform")
+    columns += ["measurements", "comment", "economy", "images"]
+
+    data = []
+    for axe in page:
+        cells = row_template.render(
+            dict(row_context, axe=axe, platforms=platforms_by_axe.get(axe.id, ()))
+        ).split(AXE_LIST_CELL_SEPARATOR)
+        row = {
+            "DT_RowId": f"axe-{axe.id}",
+            "DT_RowClass": "sold-axe" if axe.is_sold else "",
+            "DT_RowAttr": {"data-href": reverse("axe_detail", args=[axe.id])},
+        }
+        row.update(zip(columns, (cell.strip() for cell in cells)))
+        data.append(row)
+
+    return JsonResponse(
+        {
+            "draw": _int_param(request, "draw", 0),
+            "recordsTotal": records_total,
+            "recordsFiltered": records_filtered,
+            "data": data,
+        }
+    )
+
+
 def _build_og_context(request, axe):
     """Bygg Open Graph/Twitter Card-data för yxdetaljsidan.
 
@@ -324,9 +469,7 @@ def _build_og_context(request, axe):
     vi ett generiskt kort utan yxans namn/bild, så inget läcker via
     länkdelning.
     """
-    from .models import Settings
-
-    site_settings_obj = Settings.get_settings()
+    site_settings_obj = get_site_settings()
     axe_is_public = request.user.is_authenticated or not (
         site_settings_obj.show_only_received_axes_public and axe.status != "MOTTAGEN"
     )
@@ -404,21 +547,11 @@ def axe_detail(request, pk):
         .select_related("contact", "platform")
         .order_by("-transaction_date")
     )
-    # Beräkna totala kostnader och intäkter
-    total_cost = (
-        transactions.filter(type="KÖP").aggregate(total=Sum("price"))["total"] or 0
-    )
-    total_shipping_cost = (
-        transactions.filter(type="KÖP").aggregate(total=Sum("shipping_cost"))["total"]
-        or 0
-    )
-    total_revenue = (
-        transactions.filter(type="SÄLJ").aggregate(total=Sum("price"))["total"] or 0
-    )
-    total_shipping_revenue = (
-        transactions.filter(type="SÄLJ").aggregate(total=Sum("shipping_cost"))["total"]
-        or 0
-    )
+    # Totala kostnader och intäkter från yxans summeringsfält
+    total_cost = axe.total_buy_value
+    total_shipping_cost = axe.total_buy_shipping
+    total_revenue = axe.total_sale_value
+    total_shipping_revenue = axe.total_sale_shipping
     # Beräkna vinst/förlust
     total_investment = total_cost + total_shipping_cost
     total_income = total_revenue + total_shipping_revenue
@@ -509,7 +642,7 @@ def axe_detail(request, pk):
 
     from .models import Settings
 
-    comment_settings = Settings.get_settings()
+    comment_settings = get_site_settings()
 
     context = {
         "axe": axe,
@@ -532,7 +665,7 @@ def axe_detail(request, pk):
             },
             {"text": f"{axe.display_id} - {axe.model}"},
         ],
-        "comment_tree": build_comment_tree(axe, request.user.is_authenticated),
+        "comment_tree": get_comment_tree(axe, request.user.is_authenticated),
         "is_staff": request.user.is_authenticated,
         "comment_submit_url": reverse("submit_axe_comment", args=[axe.pk]),
         "comments_enabled": comment_settings.comments_enabled_public,
@@ -566,31 +699,18 @@ def _handle_uploaded_images(axe, request):
 def _handle_url_images(axe, request):
     """Hantera bilder från URL:er"""
     if "image_urls" in request.POST:
-        for image_url in request.POST.getlist("image_urls"):
-            if image_url and image_url.startswith("http"):
-                try:
-                    response = requests.get(image_url, timeout=10)
-                    if response.status_code == 200:
-                        file_extension = (
-                            os.path.splitext(urlparse(image_url).path)[1] or ".jpg"
-                        )
-                        filename = f"{axe.id}_{uuid.uuid4().hex[:8]}{file_extension}"
-                        image_file = ContentFile(response.content, name=filename)
-                        axe_image = AxeImage(axe=axe, image=image_file)
-                        axe_image.save()
-                    else:
-                        logger.error(
-                            "Kunde inte hämta bild från URL (status %s) för yxa %s: %s",
-                            response.status_code,
-                            getattr(axe, "id", "okänd"),
-                            image_url,
-                        )
-                except Exception as e:
-                    logger.exception(
-                        "Fel vid hämtning/sparning av URL-bild för yxa %s: %s",
-                        getattr(axe, "id", "okänd"),
-                        image_url,
-                    )
+        results = ingest_axe_images(axe, request.POST.getlist("image_urls"))
+        _warn_failed_image_urls(request, results)
+
+
+def _warn_failed_image_urls(request, results):
+    """Visa vilka bild-URL:er som inte gick att hämta"""
+    failed = failed_urls(results)
+    if failed:
+        messages.warning(
+            request,
+            f"{len(failed)} bilder kunde inte hämtas: {', '.join(failed)}",
+        )
 
 
 def _rename_axe_images(axe):
@@ -771,6 +891,8 @@ def axe_create(request):
             auction_url = request.POST.get("auction_url", "").strip()
             if not auction_url:
                 return JsonResponse({"success": False, "error": "Ingen URL angiven"})
+            # "Hämta på nytt" i formuläret går förbi cachen
+            force_refresh = request.POST.get("force_refresh") == "true"
 
             try:
                 # Bestäm vilken parser att använda baserat på URL
@@ -778,7 +900,12 @@ def axe_create(request):
                     from .utils.tradera_parser import TraderaParser
 
                     parser = TraderaParser()
-                    auction_data = parser.parse_tradera_page(auction_url)
+                    auction_data, from_cache = auction_cache.get_or_parse(
+                        "tradera",
+                        parser.extract_item_id(auction_url),
+                        lambda: parser.parse_tradera_page(auction_url),
+                        force_refresh=force_refresh,
+                    )
                     platform_name = "Tradera"
 
                     # Skapa Tradera-plattformen automatiskt om den inte finns
@@ -804,7 +931,12 @@ def axe_create(request):
                     from .utils.ebay_parser import EbayParser
 
                     parser = EbayParser()
-                    auction_data = parser.parse_ebay_page(auction_url)
+                    auction_data, from_cache = auction_cache.get_or_parse(
+                        "ebay",
+                        parser.extract_item_id(auction_url),
+                        lambda: parser.parse_ebay_page(auction_url),
+                        force_refresh=force_refresh,
+                    )
                     platform_name = "eBay"
 
                     # Skapa eBay-plattformen automatiskt om den inte finns
@@ -846,7 +978,14 @@ def axe_create(request):
                 auction_data["matching_contacts"] = list(matching_contacts)
                 auction_data["platform_id"] = platform_id
 
-                return JsonResponse({"success": True, "auction_data": auction_data})
+                logger.debug("Auktionscache: %s", auction_cache.stats())
+                return JsonResponse(
+                    {
+                        "success": True,
+                        "auction_data": auction_data,
+                        "from_cache": from_cache,
+                    }
+                )
             except Exception as e:
                 return JsonResponse(
                     {
@@ -858,15 +997,19 @@ def axe_create(request):
         form = AxeForm(request.POST, request.FILES)
         if form.is_valid():
             axe = _create_axe_from_form(form, request.user)
-            _handle_uploaded_images(axe, request)
-            _handle_url_images(axe, request)
-
-            # Hantera automatisk nedladdning av auktionsbilder
-            auction_images = request.POST.getlist("auction_images")
-            if auction_images:
-                _download_auction_images(axe, auction_images)
+            # Bildversionerna köas först när filerna fått sina slutliga namn
+            with image_derivatives.deferred():
+                _handle_uploaded_images(axe, request)
+                _handle_url_images(axe, request)
+
+                # Hantera automatisk nedladdning av auktionsbilder
+                auction_images = request.POST.getlist("auction_images")
+                if auction_images:
+                    _warn_failed_image_urls(
+                        request, _download_auction_images(axe, auction_images)
+                    )
 
-            _rename_axe_images(axe)
+                _rename_axe_images(axe)
             contact = _handle_contact_creation(axe, form)
             platform = _handle_platform_creation(axe, form)
             _handle_transaction_creation(axe, form, contact, platform)
@@ -941,33 +1084,10 @@ def _handle_url_images_for_edit(axe, request):
     """Hantera URL-bilder för redigering"""
     if "image_urls" in request.POST:
         max_order = axe.images.aggregate(Max("order"))["order__max"] or 0
-        for i, image_url in enumerate(request.POST.getlist("image_urls"), 1):
-            if image_url and image_url.startswith("http"):
-                try:
-                    response = requests.get(image_url, timeout=10)
-                    if response.status_code == 200:
-                        file_extension = (
-                            os.path.splitext(urlparse(image_url).path)[1] or ".jpg"
-                        )
-                        filename = f"{axe.id}_{uuid.uuid4().hex[:8]}{file_extension}"
-                        image_file = ContentFile(response.content, name=filename)
-                        axe_image = AxeImage(
-                            axe=axe, image=image_file, order=max_order + i
-                        )
-                        axe_image.save()
-                    else:
-                        logger.error(
-                            "Kunde inte hämta bild (edit) från URL (status %s) för yxa %s: %s",
-                            response.status_code,
-                            getattr(axe, "id", "okänd"),
-                            image_url,
-                        )
-                except Exception as e:
-                    logger.exception(
-                        "Fel vid URL-bilduppladdning (edit) för yxa %s: %s",
-                        getattr(axe, "id", "okänd"),
-                        image_url,
-                    )
+        results = ingest_axe_images(
+            axe, request.POST.getlist("image_urls"), start_order=max_order
+        )
+        _warn_failed_image_urls(request, results)
 
 
 def _handle_image_order_changes(axe, request):
@@ -1090,20 +1210,22 @@ def axe_edit(request, pk):
         if form.is_valid():
             axe = _update_axe_from_form(axe, form, request.user)
 
-            # Hantera nya bilder först
-            _handle_new_images_for_edit(axe, request)
-            _handle_url_images_for_edit(axe, request)
-            has_order_changes = _handle_image_order_changes(axe, request)
+            # Bildversionerna köas först när filerna fått sina slutliga namn
+            with image_derivatives.deferred():
+                # Hantera nya bilder först
+                _handle_new_images_for_edit(axe, request)
+                _handle_url_images_for_edit(axe, request)
+                has_order_changes = _handle_image_order_changes(axe, request)
 
-            # Kontrollera om omdöpning behövs (före borttagning)
-            needs_renaming = _should_rename_images(request, has_order_changes, axe)
+                # Kontrollera om omdöpning behövs (före borttagning)
+                needs_renaming = _should_rename_images(request, has_order_changes, axe)
 
-            # Omnumrera och döp om alla bilder endast om det behövs
-            if needs_renaming:
-                _rename_axe_images_for_edit(axe)
+                # Omnumrera och döp om alla bilder endast om det behövs
+                if needs_renaming:
+                    _rename_axe_images_for_edit(axe)
 
-            # Ta bort bilder sist (efter omdöpning)
-            _handle_image_removal(axe, request)
+                # Ta bort bilder sist (efter omdöpning)
+                _handle_image_removal(axe, request)
 
             return redirect("axe_detail", pk=axe.pk)
     else:
@@ -1142,11 +1264,8 @@ def axe_gallery(request, pk=None):
 
     # Applicera publik filtrering om användaren inte är inloggad
     if not request.user.is_authenticated:
-        from .models import Settings
-
         try:
-            settings = Settings.get_settings()
-            if settings.show_only_received_axes_public:
+            if get_site_settings().show_only_received_axes_public:
                 all_axes = all_axes.filter(status="MOTTAGEN")
         except Exception:
             # Fallback om Settings-modellen inte finns ännu
@@ -1172,24 +1291,10 @@ def axe_gallery(request, pk=None):
             .select_related("contact", "platform")
             .order_by("-transaction_date")
         )
-        total_cost = (
-            transactions.filter(type="KÖP").aggregate(total=Sum("price"))["total"] or 0
-        )
-        total_shipping_cost = (
-            transactions.filter(type="KÖP").aggregate(total=Sum("shipping_cost"))[
-                "total"
-            ]
-            or 0
-        )
-        total_revenue = (
-            transactions.filter(type="SÄLJ").aggregate(total=Sum("price"))["total"] or 0
-        )
-        total_shipping_revenue = (
-            transactions.filter(type="SÄLJ").aggregate(total=Sum("shipping_cost"))[
-                "total"
-            ]
-            or 0
-        )
+        total_cost = current_axe.total_buy_value
+        total_shipping_cost = current_axe.total_buy_shipping
+        total_revenue = current_axe.total_sale_value
+        total_shipping_revenue = current_axe.total_sale_shipping
         total_investment = total_cost + total_shipping_cost
         total_income = total_revenue + total_shipping_revenue
         profit_loss = total_income - total_investment
@@ -1274,31 +1379,10 @@ def receiving_workflow(request, pk):
             # Hantera URL-bilder
             if "image_urls" in request.POST:
                 max_order = axe.images.aggregate(Max("order"))["order__max"] or 0
-                for i, image_url in enumerate(request.POST.getlist("image_urls"), 1):
-                    if image_url and image_url.startswith("http"):
-                        try:
-                            response = requests.get(image_url, timeout=10)
-                            if response.status_code == 200:
-                                file_extension = (
-                                    os.path.splitext(urlparse(image_url).path)[1]
-                                    or ".jpg"
-                                )
-                                filename = (
-                                    f"{axe.id}_{uuid.uuid4().hex[:8]}{file_extension}"
-                                )
-                                image_file = ContentFile(
-                                    response.content, name=filename
-                                )
-                                axe_image = AxeImage(
-                                    axe=axe, image=image_file, order=max_order + i
-                                )
-                                axe_image.save()
-                        except Exception as e:
-                            logger.exception(
-                                "Fel vid URL-bilduppladdning i mottagningsflöde för yxa %s: %s",
-                                getattr(axe, "id", "okänd"),
-                                image_url,
-                            )
+                results = ingest_axe_images(
+                    axe, request.POST.getlist("image_urls"), start_order=max_order
+                )
+                _warn_failed_image_urls(request, results)
 
             # Omdöpning av bilder (samma logik som i axe_edit)
             remaining_images = list(axe.images.all().order_by("order"))
@@ -1527,23 +1611,14 @@ def statistics_dashboard(request):
     bought_axes = Axe.objects.filter(status="KÖPT").count()
     received_axes = Axe.objects.filter(status="MOTTAGEN").count()
 
-    # Transaktionsstatistik
-    buy_transactions = Transaction.objects.filter(type="KÖP")
-    sale_transactions = Transaction.objects.filter(type="SÄLJ")
-
-    total_buy_value = buy_transactions.aggregate(total=Sum("price"))["total"] or 0
-    total_sale_value = sale_transactions.aggregate(total=Sum("price"))["total"] or 0
-    total_buy_shipping = (
-        buy_transactions.aggregate(total=Sum("shipping_cost"))["total"] or 0
-    )
-    total_sale_shipping = (
-        sale_transactions.aggregate(total=Sum("shipping_cost"))["total"] or 0
-    )
-
-    total_profit = total_sale_value - total_buy_value
-    total_profit_with_shipping = (total_sale_value + total_sale_shipping) - (
-        total_buy_value + total_buy_shipping
-    )
+    # Transaktionsstatistik (en enda aggregerings-query)
+    transaction_stats = transaction_totals(Transaction.objects.all())
+    total_buy_value = transaction_stats["total_buy_value"]
+    total_sale_value = transaction_stats["total_sale_value"]
+    total_buy_shipping = transaction_stats["total_buy_shipping"]
+    total_sale_shipping = transaction_stats["total_sale_shipping"]
+    total_profit = transaction_stats["total_profit"]
+    total_profit_with_shipping = transaction_stats["total_profit_with_shipping"]
 
     # Mest populära tillverkare (top 5)
     top_manufacturers = Manufacturer.objects.annotate(total_axes=Count("axe")).order_by(
@@ -1594,124 +1669,45 @@ def statistics_dashboard(request):
     avg_transactions_per_axe = total_transactions / total_axes if total_axes > 0 else 0
 
     # Sålda yxor
-    sold_axes = Axe.objects.filter(transactions__type="SÄLJ").distinct().count()
+    sold_axes = Axe.objects.filter(is_sold=True).count()
     sold_axes_percentage = (sold_axes / total_axes * 100) if total_axes > 0 else 0
 
     # NAJ-medlemmar
     naj_members = Contact.objects.filter(is_naj_member=True).count()
     naj_percentage = (naj_members / total_contacts * 100) if total_contacts > 0 else 0
 
-    # Data för kombinerad tidslinje - inköp vs samling över tid
-    # Hämta alla transaktioner sorterade efter datum
-    all_transactions = Transaction.objects.select_related("axe").order_by(
-        "transaction_date"
-    )
-
-    # Skapa data för Chart.js
+    # Data för graferna (tidslinje, ekonomi per månad, aktivitet per månad)
+    # kommer direkt från den förberäknade månadssummeringen - en query
+    # över en rad per månad i stället för att gå igenom alla transaktioner.
     chart_labels = []
     bought_data = []
     collection_data = []
-
-    # Gruppera transaktioner per månad
-    current_month = None
-    monthly_buys = 0
-    monthly_sales = 0
-    cumulative_buys = 0
-    cumulative_sales = 0
-
-    for transaction in all_transactions:
-        # Gruppera per månad
-        transaction_month = transaction.transaction_date.replace(day=1)
-
-        if current_month is None:
-            current_month = transaction_month
-        elif transaction_month != current_month:
-            # Spara data för föregående månad
-            month_str = current_month.strftime("%b %Y")
-            chart_labels.append(month_str)
-            bought_data.append(cumulative_buys)
-            collection_data.append(cumulative_buys - cumulative_sales)
-
-            # Nollställ månadsräknare
-            monthly_buys = 0
-            monthly_sales = 0
-            current_month = transaction_month
-
-        # Räkna transaktioner
-        if transaction.type == "KÖP":
-            monthly_buys += 1
-            cumulative_buys += 1
-        elif transaction.type == "SÄLJ":
-            monthly_sales += 1
-            cumulative_sales += 1
-
-    # Lägg till sista månaden om det finns data
-    if current_month is not None:
-        month_str = current_month.strftime("%b %Y")
-        chart_labels.append(month_str)
-        bought_data.append(cumulative_buys)
-        collection_data.append(cumulative_buys - cumulative_sales)
+    buy_values = []
+    sale_values = []
+    activity_buys = []
+    activity_sales = []
+    for month in MonthlyTransactionSummary.objects.order_by("month"):
+        chart_labels.append(month.month.strftime("%b %Y"))
+        bought_data.append(month.cumulative_buys)
+        collection_data.append(month.collection_size)
+        buy_values.append(float(month.buy_value))
+        sale_values.append(float(month.sale_value))
+        activity_buys.append(month.buy_count)
+        activity_sales.append(month.sale_count)
 
     # Om vi inte har någon data, skapa en tom graf
     if not chart_labels:
         chart_labels = ["Ingen data"]
         bought_data = [0]
         collection_data = [0]
+        buy_values = [0]
+        sale_values = [0]
+        activity_buys = [0]
+        activity_sales = [0]
 
-    # Data för ekonomisk stapeldiagram - transaktionsvärden per månad
-    # Skapa en dictionary för att samla värden per månad
-    monthly_data = {}
-
-    for transaction in all_transactions:
-        # Gruppera per månad
-        month_key = transaction.transaction_date.strftime("%b %Y")
-
-        if month_key not in monthly_data:
-            monthly_data[month_key] = {"buy": 0, "sale": 0}
-
-        # Räkna ekonomiska värden per månad
-        if transaction.type == "KÖP":
-            monthly_data[month_key]["buy"] += float(transaction.price)
-        elif transaction.type == "SÄLJ":
-            monthly_data[month_key]["sale"] += float(transaction.price)
-
-    # Skapa arrays för Chart.js
-    financial_labels = []
-    buy_values = []
-    sale_values = []
-
-    # Använd samma månader som yxgrafen för konsistens
-    for month in chart_labels:
-        financial_labels.append(month)
-        if month in monthly_data:
-            buy_values.append(monthly_data[month]["buy"])
-            sale_values.append(monthly_data[month]["sale"])
-        else:
-            buy_values.append(0)
-            sale_values.append(0)
-
-    # Data för mest aktiva månader (antal transaktioner per månad, köp/sälj)
-    monthly_activity = {}
-    for transaction in all_transactions:
-        month_key = transaction.transaction_date.strftime("%b %Y")
-        if month_key not in monthly_activity:
-            monthly_activity[month_key] = {"buy": 0, "sale": 0}
-        if transaction.type == "KÖP":
-            monthly_activity[month_key]["buy"] += 1
-        elif transaction.type == "SÄLJ":
-            monthly_activity[month_key]["sale"] += 1
-    # Skapa arrays för Chart.js (använd samma ordning som övriga diagram)
-    activity_labels = []
-    activity_buys = []
-    activity_sales = []
-    for month in chart_labels:
-        activity_labels.append(month)
-        if month in monthly_activity:
-            activity_buys.append(monthly_activity[month]["buy"])
-            activity_sales.append(monthly_activity[month]["sale"])
-        else:
-            activity_buys.append(0)
-            activity_sales.append(0)
+    # Samma månader i alla diagram
+    financial_labels = chart_labels
+    activity_labels = chart_labels
 
     # Data för senaste aktivitet
     latest_purchases = Transaction.objects.filter(type="KÖP").order_by(
@@ -1732,8 +1728,8 @@ def statistics_dashboard(request):
         "bought_axes": bought_axes,
         "received_axes": received_axes,
         # Transaktionsstatistik
-        "buy_transactions": buy_transactions.count(),
-        "sale_transactions": sale_transactions.count(),
+        "buy_transactions": transaction_stats["total_buys"],
+        "sale_transactions": transaction_stats["total_sales"],
         "total_buy_value": total_buy_value,
         "total_sale_value": total_sale_value,
         "total_buy_shipping": total_buy_shipping,
@@ -2117,11 +2113,7 @@ def delete_unlinked_image(request):
 
 @require_POST
 def download_unlinked_images(request):
-    """Ladda ner valda eller alla okopplade bilder som ZIP-fil"""
-    import zipfile
-    import tempfile
-    from django.http import HttpResponse
-
+    """Ladda ner valda eller alla okopplade bilder som ZIP-fil (strömmas)"""
     try:
         unlinked_base_folder = os.path.join(settings.MEDIA_ROOT, "unlinked_images")
 
@@ -2136,56 +2128,34 @@ def download_unlinked_images(request):
             "selected_types"
         )  # 'axe' eller 'manufacturer'
 
-        # Skapa temporär ZIP-fil
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp_file:
-            with zipfile.ZipFile(tmp_file.name, "w") as zipf:
-                if selected_files and selected_types:
-                    # Ladda ner endast valda filer
-                    for i, filename in enumerate(selected_files):
-                        if i < len(selected_types):
-                            image_type = selected_types[i]
-                            if image_type == "manufacturer":
-                                folder = "manufacturers"
-                            else:
-                                folder = "axes"
-
-                            file_path = os.path.join(
-                                unlinked_base_folder, folder, filename
-                            )
-                            if os.path.exists(file_path) and not filename.endswith(
-                                ".webp"
-                            ):
-                                # Lägg till i ZIP med mappstruktur
-                                arcname = os.path.join(folder, filename)
-                                zipf.write(file_path, arcname)
-                else:
-                    # Ladda ner alla filer (fallback för GET-requests)
-                    for root, dirs, files in os.walk(unlinked_base_folder):
-                        for file in files:
-                            # Exkludera .webp-filer från ZIP-nedladdning
-                            if not file.endswith(".webp"):
-                                file_path = os.path.join(root, file)
-                                arcname = os.path.relpath(
-                                    file_path, unlinked_base_folder
-                                )
-                                zipf.write(file_path, arcname)
-
-        # Läs ZIP-filen och skicka som response
-        with open(tmp_file.name, "rb") as f:
-            response = HttpResponse(f.read(), content_type="application/zip")
-            if selected_files:
-                response["Content-Disposition"] = (
-                    'attachment; filename="valda_bilder.zip"'
-                )
-            else:
-                response["Content-Disposition"] = (
-                    'attachment; filename="okopplade_bilder.zip"'
-                )
-
-        # Ta bort temporär fil
-        os.unlink(tmp_file.name)
+        entries = []
+        if selected_files and selected_types:
+            # Ladda ner endast valda filer
+            for i, filename in enumerate(selected_files):
+                if i < len(selected_types):
+                    image_type = selected_types[i]
+                    if image_type == "manufacturer":
+                        folder = "manufacturers"
+                    else:
+                        folder = "axes"
 
-        return response
+                    file_path = os.path.join(unlinked_base_folder, folder, filename)
+                    if os.path.exists(file_path) and not filename.endswith(".webp"):
+                        # Lägg till i ZIP med mappstruktur
+                        entries.append((file_path, os.path.join(folder, filename)))
+        else:
+            # Ladda ner alla filer (fallback för GET-requests)
+            for root, dirs, files in os.walk(unlinked_base_folder):
+                for file in files:
+                    # Exkludera .webp-filer från ZIP-nedladdning
+                    if not file.endswith(".webp"):
+                        file_path = os.path.join(root, file)
+                        arcname = os.path.relpath(file_path, unlinked_base_folder)
+                        entries.append((file_path, arcname))
+
+        if selected_files:
+            return zip_response(entries, "valda_bilder.zip")
+        return zip_response(entries, "okopplade_bilder.zip")
 
     except Exception as e:
         return JsonResponse({"success": False, "error": str(e)})
@@ -2228,10 +2198,7 @@ def bulk_move_axe_images_to_unlinked(request):
 
 @require_POST
 def bulk_download_axe_images(request):
-    """Ladda ner valda yxbilder som ZIP-fil"""
-    import zipfile
-    import tempfile
-
+    """Ladda ner valda yxbilder som ZIP-fil (strömmas)"""
     try:
         image_ids = request.POST.getlist("image_ids")
         if not image_ids:
@@ -2245,27 +2212,7 @@ def bulk_download_axe_images(request):
                 {"success": False, "error": "Inga bilder hittades"}, status=404
             )
 
-        used_names = set()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp_file:
-            with zipfile.ZipFile(tmp_file.name, "w") as zipf:
-                for image in images:
-                    if (
-                        image.image
-                        and image.image.name
-                        and os.path.exists(image.image.path)
-                    ):
-                        arcname = os.path.basename(image.image.name)
-                        if arcname in used_names:
-                            arcname = f"{image.id}_{arcname}"
-                        used_names.add(arcname)
-                        zipf.write(image.image.path, arcname)
-
-        with open(tmp_file.name, "rb") as f:
-            response = HttpResponse(f.read(), content_type="application/zip")
-            response["Content-Disposition"] = 'attachment; filename="yxbilder.zip"'
-
-        os.unlink(tmp_file.name)
-        return response
+        return zip_response(image_zip_entries(images), "yxbilder.zip")
     except Exception as e:
         return JsonResponse({"success": False, "error": str(e)}, status=500)
 
@@ -2273,47 +2220,12 @@ def bulk_download_axe_images(request):
 def _download_auction_images(axe, image_urls):
     """Ladda ner och spara auktionsbilder automatiskt"""
     if not image_urls:
-        return
+        return []
 
     max_order = axe.images.aggregate(Max("order"))["order__max"] or 0
-
-    for i, image_url in enumerate(image_urls, 1):
-        if image_url and image_url.startswith("http"):
-            try:
-                response = requests.get(image_url, timeout=15)
-                if response.status_code == 200:
-                    # Bestäm filändelse baserat på URL eller Content-Type
-                    file_extension = os.path.splitext(urlparse(image_url).path)[1]
-                    if not file_extension:
-                        content_type = response.headers.get("content-type", "")
-                        if "jpeg" in content_type or "jpg" in content_type:
-                            file_extension = ".jpg"
-                        elif "png" in content_type:
-                            file_extension = ".png"
-                        elif "webp" in content_type:
-                            file_extension = ".webp"
-                        else:
-                            file_extension = ".jpg"  # Fallback
-
-                    # Skapa unikt filnamn
-                    filename = f"{axe.id}_{uuid.uuid4().hex[:8]}{file_extension}"
-                    image_file = ContentFile(response.content, name=filename)
-
-                    # Skapa AxeImage-objekt
-                    axe_image = AxeImage(
-                        axe=axe,
-                        image=image_file,
-                        order=max_order + i,
-                        description=f"Auktionsbild {i} från Tradera",
-                    )
-                    axe_image.save()
-
-                    logger.info(
-                        f"Laddade ner auktionsbild {i} för yxa {axe.id}: {image_url}"
-                    )
-
-            except Exception as e:
-                logger.error(
-                    f"Fel vid nedladdning av auktionsbild {i} för yxa {axe.id}: {e}"
-                )
-                continue
+    return ingest_axe_images(
+        axe,
+        image_urls,
+        start_order=max_order,
+        description="Auktionsbild {index} från Tradera",
+    )
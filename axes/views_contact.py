@@ -2,28 +2,106 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
+from django.db.models import F, Q
+from django.db.models.functions import Lower
+from django.http import JsonResponse
+from django.template.loader import get_template
+from django.urls import reverse
 from .models import Contact, Transaction
 from .forms import ContactForm
-from django.db.models import Sum
+from .services.statistics import contacts_with_totals
 
+# Fler kontakter än så laddas sida för sida från contact_list_data i
+# stället för att alla rader renderas i sidan
+CONTACT_LIST_SERVER_SIDE_THRESHOLD = 1000
 
-def contact_list(request):
-    sort = request.GET.get("sort")
-    contacts = list(Contact.objects.all())
-    # Lägg till latest_transaction_date som attribut för sortering
-    for c in contacts:
-        c._latest_transaction_date = c.latest_transaction_date
+# Avgränsare mellan cellerna i _contact_list_row.html (se
+# views_axe.AXE_LIST_CELL_SEPARATOR)
+CONTACT_LIST_CELL_SEPARATOR = "<!--cell-->"
+
+CONTACT_LIST_COLUMNS = [
+    "name",
+    "alias",
+    "email",
+    "phone",
+    "country",
+    "naj",
+    "transactions",
+    "economy",
+    "latest",
+]
+
+# Kolumnnamn (DataTables columns[i][data]) -> ORDER BY-uttryck
+CONTACT_LIST_ORDERING = {
+    "name": (Lower("name"), "id"),
+    "alias": ("alias", "id"),
+    "email": ("email", "id"),
+    "phone": ("phone", "id"),
+    "country": ("country_code", "country", "id"),
+    "naj": ("is_naj_member", "id"),
+    "transactions": ("total_transactions", "id"),
+    "economy": ("net_value", "id"),
+    "latest": ("latest_transaction_date", "id"),
+}
+
+
+def _int_param(request, name, default):
+    try:
+        return int(request.GET.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _sorted_contacts(contacts, sort):
     if sort == "senast":
-        contacts.sort(
-            key=lambda c: (
-                c._latest_transaction_date is not None,
-                c._latest_transaction_date,
-            ),
-            reverse=True,
+        return contacts.order_by(
+            F("latest_transaction_date").desc(nulls_last=True), Lower("name")
         )
+    return contacts.order_by(Lower("name"), "id")
+
+
+def _search_contacts_queryset(contacts, search_value):
+    """Fritextsökning för kontaktlistan. Varje ord måste matcha något av
+    namn, alias, e-post, telefon, ort eller land."""
+    for term in search_value.split():
+        contacts = contacts.filter(
+            Q(name__icontains=term)
+            | Q(alias__icontains=term)
+            | Q(email__icontains=term)
+            | Q(phone__icontains=term)
+            | Q(city__icontains=term)
+            | Q(country__icontains=term)
+            | Q(country_code__iexact=term)
+        )
+    return contacts
+
+
+def _order_contacts_queryset(contacts, request):
+    """Applicerar DataTables sortering (order[i][column]/order[i][dir])."""
+    order_by = []
+    i = 0
+    while f"order[{i}][column]" in request.GET:
+        column_index = request.GET.get(f"order[{i}][column]")
+        column_name = request.GET.get(f"columns[{column_index}][data]", "")
+        descending = request.GET.get(f"order[{i}][dir]") == "desc"
+        for field in CONTACT_LIST_ORDERING.get(column_name, ()):
+            expression = F(field) if isinstance(field, str) else field
+            order_by.append(expression.desc() if descending else expression.asc())
+        i += 1
+    if not order_by:
+        return contacts.order_by(Lower("name"), "id")
+    return contacts.order_by(*order_by)
+
+
+def contact_list(request):
+    sort = request.GET.get("sort")
+    total_contacts = Contact.objects.count()
+    server_side = total_contacts > CONTACT_LIST_SERVER_SIDE_THRESHOLD
+    if server_side:
+        # Raderna hämtas av DataTables från contact_list_data
+        contacts = []
     else:
-        contacts.sort(key=lambda c: c.name.lower())
-    total_contacts = len(contacts)
+        contacts = list(_sorted_contacts(contacts_with_totals(), sort))
     total_transactions_count = Transaction.objects.count()
     total_naj_members = Contact.objects.filter(is_naj_member=True).count()
     context = {
@@ -32,36 +110,83 @@ def contact_list(request):
         "total_transactions": total_transactions_count,
         "total_naj_members": total_naj_members,
         "sort": sort,
+        "server_side": server_side,
+        "contact_list_columns": CONTACT_LIST_COLUMNS,
     }
     return render(request, "axes/contact_list.html", context)
 
 
+def contact_list_data(request):
+    """JSON-källa för kontaktlistan i DataTables server-läge.
+
+    Tar DataTables protokoll (draw, start, length, search[value],
+    order[i][...], columns[i][data]) och returnerar bara den efterfrågade
+    sidan. Summeringarna kommer från samma annoterade query som
+    sorteringen, så svaret är en query för sidan plus två för antalen.
+    """
+    contacts = Contact.objects.all()
+    records_total = contacts.count()
+
+    search_value = request.GET.get("search[value]", "").strip()
+    if search_value:
+        contacts = _search_contacts_queryset(contacts, search_value)
+        records_filtered = contacts.count()
+    else:
+        records_filtered = records_total
+
+    contacts = _order_contacts_queryset(contacts_with_totals(contacts), request)
+
+    start = max(_int_param(request, "start", 0), 0)
+    length = _int_param(request, "length", 50)
+    if length >= 0:
+        contacts = contacts[start : start + length]
+    elif start:
+        contacts = contacts[start:]
+
+    # Renderas utan request så att context processors inte körs per rad
+    row_template = get_template("axes/_contact_list_row.html")
+    data = []
+    for contact in contacts:
+        cells = row_template.render({"contact": contact}).split(
+            CONTACT_LIST_CELL_SEPARATOR
+        )
+        url = reverse("contact_detail", args=[contact.id])
+        row = {"DT_RowId": f"contact-{contact.id}", "DT_RowAttr": {"data-href": url}}
+        row.update(zip(CONTACT_LIST_COLUMNS, (cell.strip() for cell in cells)))
+        data.append(row)
+
+    return JsonResponse(
+        {
+            "draw": _int_param(request, "draw", 0),
+            "recordsTotal": records_total,
+            "recordsFiltered": records_filtered,
+            "data": data,
+        }
+    )
+
+
 def contact_detail(request, pk):
-    contact = get_object_or_404(Contact, pk=pk)
-    transactions = (
+    contact = get_object_or_404(contacts_with_totals(), pk=pk)
+    transactions = list(
         Transaction.objects.filter(contact=contact)
         .select_related("axe__manufacturer", "platform")
+        .prefetch_related("axe__images")
         .order_by("-transaction_date")
     )
-    total_transactions = transactions.count()
-    buy_transactions = transactions.filter(type="KÖP")
-    sale_transactions = transactions.filter(type="SÄLJ")
-    total_buy_value = buy_transactions.aggregate(total=Sum("price"))["total"] or 0
-    total_sale_value = sale_transactions.aggregate(total=Sum("price"))["total"] or 0
-    total_profit = total_sale_value - total_buy_value
-    unique_axes = set()
+    # Yxorna finns redan i transaktionerna, senast handlade först
+    unique_axes = {}
     for transaction in transactions:
-        unique_axes.add(transaction.axe)
+        unique_axes.setdefault(transaction.axe_id, transaction.axe)
     context = {
         "contact": contact,
         "transactions": transactions,
-        "total_transactions": total_transactions,
-        "total_buy_value": total_buy_value,
-        "total_sale_value": total_sale_value,
-        "total_profit": total_profit,
-        "unique_axes": unique_axes,
-        "buy_count": buy_transactions.count(),
-        "sale_count": sale_transactions.count(),
+        "total_transactions": contact.total_transactions,
+        "total_buy_value": contact.total_buy_value,
+        "total_sale_value": contact.total_sale_value,
+        "total_profit": contact.net_value,
+        "unique_axes": list(unique_axes.values()),
+        "buy_count": contact.buy_count,
+        "sale_count": contact.sale_count,
     }
     return render(request, "axes/contact_detail.html", context)
 
@@ -14,15 +14,16 @@ from .models import (
     Transaction,
     Stamp,
 )
-from django.db.models import Sum, Max, Count
+from django.db.models import Sum, Max, Count, F, Q, Window
+from django.db.models.functions import RowNumber
 from django.db import transaction
 from decimal import Decimal
-from .services.comments import build_comment_tree
+from .services import manufacturer_tree
+from .services.site_cache import get_comment_tree, get_site_settings
+from .utils.zip_stream import image_zip_entries, zip_response
 import json
 import os
 import shutil
-import zipfile
-import tempfile
 from django.conf import settings
 
 
@@ -35,55 +36,14 @@ def get_available_parents(current_manufacturer=None):
         # För nya tillverkare, alla tillverkare är tillgängliga
         all_manufacturers = Manufacturer.objects.all()
     else:
-        # För befintliga tillverkare, exkludera sig själv och alla undertillverkare
-        excluded_ids = {current_manufacturer.id}
-
-        # Rekursivt hitta alla undertillverkare
-        def get_all_sub_manufacturer_ids(manufacturer):
-            for sub in manufacturer.sub_manufacturers.all():
-                excluded_ids.add(sub.id)
-                get_all_sub_manufacturer_ids(sub)
-
-        get_all_sub_manufacturer_ids(current_manufacturer)
-        all_manufacturers = Manufacturer.objects.exclude(id__in=excluded_ids)
+        # För befintliga tillverkare, exkludera hela delträdet (sig själv
+        # inräknat) med en join mot closure-tabellen
+        all_manufacturers = Manufacturer.objects.exclude(
+            ancestor_links__ancestor=current_manufacturer
+        )
 
     # Sortera hierarkiskt istället för alfabetiskt
-    def _is_descendant(manufacturer, ancestor):
-        """Kontrollera om manufacturer är en efterkommande till ancestor"""
-        current = manufacturer
-        while current.parent:
-            if current.parent == ancestor:
-                return True
-            current = current.parent
-        return False
-
-    def sort_hierarchically(manufacturers):
-        """Sorterar tillverkare hierarkiskt: huvudtillverkare först, sedan undertillverkare i korrekt ordning"""
-        main_manufacturers = [m for m in manufacturers if m.hierarchy_level == 0]
-        sorted_list = []
-
-        for main in main_manufacturers:
-            sorted_list.append(main)
-            # Sortera undertillverkare hierarkiskt
-
-            def sort_children_recursive(parent=None):
-                """Sorterar barn rekursivt under en förälder"""
-                children = [m for m in manufacturers if m.parent == parent]
-                children.sort(key=lambda x: x.name)  # Sortera barn alfabetiskt
-                result = []
-                for child in children:
-                    result.append(child)
-                    # Lägg till alla barn till detta barn rekursivt
-                    result.extend(sort_children_recursive(child))
-                return result
-
-            # Sortera alla undertillverkare rekursivt
-            sorted_subs = sort_children_recursive(main)
-            sorted_list.extend(sorted_subs)
-
-        return sorted_list
-
-    return sort_hierarchically(all_manufacturers)
+    return manufacturer_tree.sort_hierarchically(all_manufacturers)
 
 
 def manufacturer_list(request):
@@ -402,16 +362,7 @@ def manufacturer_edit(request, pk):
                     )
 
                 # Kontrollera att parent inte är en undertillverkare av denna tillverkare (rekursivt)
-                def check_circular_reference(check_manufacturer, target_id):
-                    if check_manufacturer.parent_id == target_id:
-                        return True
-                    if check_manufacturer.parent:
-                        return check_circular_reference(
-                            check_manufacturer.parent, target_id
-                        )
-                    return False
-
-                if check_circular_reference(parent, manufacturer.id):
+                if manufacturer_tree.is_descendant(parent, manufacturer):
                     messages.error(
                         request,
                         "En tillverkare kan inte vara överordnad tillverkare till sin egen överordnad tillverkare",
@@ -483,9 +434,51 @@ def manufacturer_edit(request, pk):
     )
 
 
+AXE_STATUS_CLASSES = {
+    "MOTTAGEN": "bg-success",
+    "KÖPT": "bg-warning",
+    "SÅLD": "bg-secondary",
+}
+
+
+def _latest_transaction_types(axes):
+    """{yxa-id: typ} för den senaste transaktionen per yxa i axes (queryset),
+    med en fönsterfunktion i stället för en query per yxa."""
+    latest = (
+        Transaction.objects.filter(axe__in=axes)
+        .annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F("axe_id"),
+                order_by=[F("transaction_date").desc(), F("id").desc()],
+            )
+        )
+        .filter(row_number=1)
+        .values_list("axe_id", "type")
+    )
+    return dict(latest)
+
+
+def _set_axe_status(axe, latest_types):
+    """Sätter status och status_class; tomt/okänt statusfält bestäms utifrån
+    senaste transaktionen."""
+    if axe.status in AXE_STATUS_CLASSES:
+        axe.status_class = AXE_STATUS_CLASSES[axe.status]
+        return
+    last_type = latest_types.get(axe.id)
+    if last_type == "SÄLJ":
+        axe.status = "SÅLD"
+    elif last_type == "KÖP":
+        axe.status = "KÖPT"
+    else:
+        axe.status = "OKÄND"
+    axe.status_class = AXE_STATUS_CLASSES.get(axe.status, "bg-light")
+
+
 def manufacturer_detail(request, pk):
-    manufacturer = get_object_or_404(Manufacturer, pk=pk)
-    axes = Axe.objects.filter(manufacturer=manufacturer).order_by("-id")
+    manufacturer = get_object_or_404(
+        Manufacturer.objects.select_related("parent"), pk=pk
+    )
 
     # Hämta ManufacturerImage för icke-stämpel bilder (övriga bilder)
     images = ManufacturerImage.objects.filter(
@@ -499,96 +492,72 @@ def manufacturer_detail(request, pk):
         "link_type", "order"
     )
 
-    # Hämta yxor från undertillverkare
+    # Alla undertillverkare (rekursivt) i trädordning, syskon på namn
+    all_sub_manufacturers = manufacturer_tree.sort_hierarchically(
+        manufacturer_tree.descendants(manufacturer), root=manufacturer
+    )
+    sub_positions = {m.id: i for i, m in enumerate(all_sub_manufacturers)}
+
+    # Alla yxor i delträdet med en query (plus en för bilderna) - delas
+    # sedan upp i egna yxor och undertillverkarnas yxor
+    subtree_axes = manufacturer_tree.subtree_axes(manufacturer)
+    latest_types = _latest_transaction_types(
+        subtree_axes.exclude(status__in=AXE_STATUS_CLASSES)
+    )
+    axes = []
     sub_manufacturer_axes = []
-    for sub_manufacturer in manufacturer.all_sub_manufacturers:
-        sub_axes = Axe.objects.filter(manufacturer=sub_manufacturer).order_by("-id")
-        for axe in sub_axes:
-            axe.sub_manufacturer_name = sub_manufacturer.name
-            axe.sub_manufacturer_id = sub_manufacturer.id
-            # Beräkna status_class för undertillverkare också
-            if axe.status == "MOTTAGEN":
-                axe.status_class = "bg-success"
-            elif axe.status == "KÖPT":
-                axe.status_class = "bg-warning"
-            elif axe.status == "SÅLD":
-                axe.status_class = "bg-secondary"
-            else:
-                # Om statusfältet är tomt eller okänt, bestäm utifrån senaste transaktion
-                last_transaction = (
-                    Transaction.objects.filter(axe=axe)
-                    .order_by("-transaction_date")
-                    .first()
-                )
-                if last_transaction:
-                    if last_transaction.type == "SÄLJ":
-                        axe.status = "SÅLD"
-                        axe.status_class = "bg-secondary"
-                    elif last_transaction.type == "KÖP":
-                        axe.status = "KÖPT"
-                        axe.status_class = "bg-warning"
-                    else:
-                        axe.status = "OKÄND"
-                        axe.status_class = "bg-light"
-                else:
-                    axe.status = "OKÄND"
-                    axe.status_class = "bg-light"
-        sub_manufacturer_axes.extend(sub_axes)
-
-    # Statistik för direkt kopplade yxor
-    total_axes = axes.count()
-    transactions = Transaction.objects.filter(axe__manufacturer=manufacturer)
-    total_transactions = transactions.count()
-    buy_transactions = transactions.filter(type="KÖP")
-    sale_transactions = transactions.filter(type="SÄLJ")
-    total_buy_value = buy_transactions.aggregate(total=Sum("price"))["total"] or 0
-    total_sale_value = sale_transactions.aggregate(total=Sum("price"))["total"] or 0
+    for axe in (
+        subtree_axes.select_related("manufacturer")
+        .prefetch_related("images")
+        .order_by("-id")
+    ):
+        _set_axe_status(axe, latest_types)
+        if axe.manufacturer_id == manufacturer.id:
+            axes.append(axe)
+        else:
+            axe.sub_manufacturer_name = axe.manufacturer.name
+            axe.sub_manufacturer_id = axe.manufacturer_id
+            sub_manufacturer_axes.append(axe)
+    # Per undertillverkare i trädordning, nyaste yxan först
+    sub_manufacturer_axes.sort(
+        key=lambda axe: (sub_positions.get(axe.manufacturer_id, 0), -axe.id)
+    )
+
+    # Statistik för direkt kopplade yxor och för hela delträdet i en query
+    own = Q(axe__manufacturer=manufacturer)
+    buy = Q(type="KÖP")
+    sale = Q(type="SÄLJ")
+    stats = manufacturer_tree.subtree_transactions(manufacturer).aggregate(
+        total_transactions=Count("id", filter=own),
+        buy_count=Count("id", filter=own & buy),
+        sale_count=Count("id", filter=own & sale),
+        total_buy_value=Sum("price", filter=own & buy),
+        total_sale_value=Sum("price", filter=own & sale),
+        buy_count_including_sub=Count("id", filter=buy),
+        sale_count_including_sub=Count("id", filter=sale),
+        total_buy_value_including_sub=Sum("price", filter=buy),
+        total_sale_value_including_sub=Sum("price", filter=sale),
+    )
+    total_axes = len(axes)
+    total_transactions = stats["total_transactions"]
+    total_buy_value = stats["total_buy_value"] or 0
+    total_sale_value = stats["total_sale_value"] or 0
     total_profit = total_sale_value - total_buy_value
     average_profit_per_axe = total_profit / total_axes if total_axes > 0 else 0
     # Köp/sälj-antal
-    buy_count = buy_transactions.count()
-    sale_count = sale_transactions.count()
+    buy_count = stats["buy_count"]
+    sale_count = stats["sale_count"]
 
     # Statistik inklusive undertillverkare
-    total_axes_including_sub = manufacturer.axe_count_including_sub_manufacturers
-    total_buy_value_including_sub = (
-        manufacturer.total_buy_value_including_sub_manufacturers
-    )
-    total_sale_value_including_sub = (
-        manufacturer.total_sale_value_including_sub_manufacturers
+    zero = Decimal("0")
+    total_axes_including_sub = total_axes + len(sub_manufacturer_axes)
+    total_buy_value_including_sub = stats["total_buy_value_including_sub"] or zero
+    total_sale_value_including_sub = stats["total_sale_value_including_sub"] or zero
+    total_profit_including_sub = (
+        total_sale_value_including_sub - total_buy_value_including_sub
     )
-    total_profit_including_sub = manufacturer.net_value_including_sub_manufacturers
-    buy_count_including_sub = manufacturer.buy_count_including_sub_manufacturers
-    sale_count_including_sub = manufacturer.sale_count_including_sub_manufacturers
-    # Status för varje yxa
-    for axe in axes:
-        # Prioritera statusfältet
-        if axe.status == "MOTTAGEN":
-            axe.status_class = "bg-success"
-        elif axe.status == "KÖPT":
-            axe.status_class = "bg-warning"
-        elif axe.status == "SÅLD":
-            axe.status_class = "bg-secondary"
-        else:
-            # Om statusfältet är tomt eller okänt, bestäm utifrån senaste transaktion
-            last_transaction = (
-                Transaction.objects.filter(axe=axe)
-                .order_by("-transaction_date")
-                .first()
-            )
-            if last_transaction:
-                if last_transaction.type == "SÄLJ":
-                    axe.status = "SÅLD"
-                    axe.status_class = "bg-secondary"
-                elif last_transaction.type == "KÖP":
-                    axe.status = "KÖPT"
-                    axe.status_class = "bg-warning"
-                else:
-                    axe.status = "OKÄND"
-                    axe.status_class = "bg-light"
-            else:
-                axe.status = "OKÄND"
-                axe.status_class = "bg-light"
+    buy_count_including_sub = stats["buy_count_including_sub"]
+    sale_count_including_sub = stats["sale_count_including_sub"]
     # Gruppera bilder efter typ
     images_by_type = {}
 
@@ -610,6 +579,7 @@ def manufacturer_detail(request, pk):
     transactions = (
         Transaction.objects.filter(axe__manufacturer=manufacturer)
         .select_related("axe", "contact", "platform")
+        .prefetch_related("axe__images")
         .order_by("-transaction_date")
     )
     # Unika kontakter
@@ -637,7 +607,9 @@ def manufacturer_detail(request, pk):
     breadcrumbs.append({"text": manufacturer.name, "url": None})
 
     # Förbereda separata listor för undertillverkare och smeder
-    sub_manufacturers = manufacturer.sub_manufacturers.all().order_by("name")
+    sub_manufacturers = [
+        m for m in all_sub_manufacturers if m.parent_id == manufacturer.id
+    ]
     sub_tillverkare = [
         m for m in sub_manufacturers if m.manufacturer_type == "TILLVERKARE"
     ]
@@ -645,12 +617,13 @@ def manufacturer_detail(request, pk):
 
     from .models import Settings
 
-    comment_settings = Settings.get_settings()
+    comment_settings = get_site_settings()
 
     context = {
         "manufacturer": manufacturer,
         "axes": axes,
         "sub_manufacturer_axes": sub_manufacturer_axes,
+        "all_sub_manufacturers": all_sub_manufacturers,
         "images": images,
         "stamps": stamps,
         "links": links,
@@ -675,7 +648,8 @@ def manufacturer_detail(request, pk):
         "breadcrumbs": breadcrumbs,
         "sub_tillverkare": sub_tillverkare,
         "sub_smeder": sub_smeder,
-        "comment_tree": build_comment_tree(manufacturer, request.user.is_authenticated),
+        "sub_manufacturer_count": len(sub_manufacturers),
+        "comment_tree": get_comment_tree(manufacturer, request.user.is_authenticated),
         "is_staff": request.user.is_authenticated,
         "comment_submit_url": reverse(
             "submit_manufacturer_comment", args=[manufacturer.pk]
@@ -872,7 +846,7 @@ def bulk_move_manufacturer_images_to_unlinked(request):
 
 @require_http_methods(["POST"])
 def bulk_download_manufacturer_images(request):
-    """Ladda ner valda tillverkarbilder som ZIP-fil"""
+    """Ladda ner valda tillverkarbilder som ZIP-fil (strömmas)"""
     try:
         image_ids = request.POST.getlist("image_ids")
         if not image_ids:
@@ -886,29 +860,7 @@ def bulk_download_manufacturer_images(request):
                 {"success": False, "error": "Inga bilder hittades"}, status=404
             )
 
-        used_names = set()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp_file:
-            with zipfile.ZipFile(tmp_file.name, "w") as zipf:
-                for image in images:
-                    if (
-                        image.image
-                        and image.image.name
-                        and os.path.exists(image.image.path)
-                    ):
-                        arcname = os.path.basename(image.image.name)
-                        if arcname in used_names:
-                            arcname = f"{image.id}_{arcname}"
-                        used_names.add(arcname)
-                        zipf.write(image.image.path, arcname)
-
-        with open(tmp_file.name, "rb") as f:
-            response = HttpResponse(f.read(), content_type="application/zip")
-            response["Content-Disposition"] = (
-                'attachment; filename="tillverkarbilder.zip"'
-            )
-
-        os.unlink(tmp_file.name)
-        return response
+        return zip_response(image_zip_entries(images), "tillverkarbilder.zip")
     except Exception as e:
         return JsonResponse({"success": False, "error": str(e)}, status=500)
 
@@ -1061,16 +1013,7 @@ def delete_manufacturer(request, pk):
                     )
 
                 # Kontrollera att mål-tillverkaren inte är en undertillverkare till den som ska tas bort
-                def is_descendant(check_manufacturer, ancestor):
-                    """Kontrollera om check_manufacturer är en efterkommande till ancestor"""
-                    current = check_manufacturer
-                    while current.parent:
-                        if current.parent == ancestor:
-                            return True
-                        current = current.parent
-                    return False
-
-                if is_descendant(target_manufacturer, manufacturer):
+                if manufacturer_tree.is_descendant(target_manufacturer, manufacturer):
                     return JsonResponse(
                         {
                             "success": False,
@@ -1230,48 +1173,7 @@ def get_manufacturers_for_dropdown(request):
     all_manufacturers = Manufacturer.objects.exclude(id=exclude_id)
 
     # Sortera hierarkiskt istället för alfabetiskt
-    def _is_descendant(manufacturer, ancestor):
-        """Kontrollera om manufacturer är en efterkommande till ancestor"""
-        current = manufacturer
-        while current.parent:
-            if current.parent == ancestor:
-                return True
-            current = current.parent
-        return False
-
-    def sort_hierarchically(manufacturers):
-        """Sorterar tillverkare hierarkiskt: huvudtillverkare först, sedan undertillverkare i korrekt ordning"""
-        main_manufacturers = [m for m in manufacturers if m.hierarchy_level == 0]
-        sorted_list = []
-
-        for main in main_manufacturers:
-            sorted_list.append(main)
-            # Hitta alla undertillverkare för denna huvudtillverkare
-            [
-                m
-                for m in manufacturers
-                if m.hierarchy_level > 0 and _is_descendant(m, main)
-            ]
-
-            # Sortera undertillverkare hierarkiskt
-            def sort_children_recursive(parent=None):
-                """Sorterar barn rekursivt under en förälder"""
-                children = [m for m in manufacturers if m.parent == parent]
-                children.sort(key=lambda x: x.name)  # Sortera barn alfabetiskt
-                result = []
-                for child in children:
-                    result.append(child)
-                    # Lägg till alla barn till detta barn rekursivt
-                    result.extend(sort_children_recursive(child))
-                return result
-
-            # Sortera alla undertillverkare rekursivt
-            sorted_subs = sort_children_recursive(main)
-            sorted_list.extend(sorted_subs)
-
-        return sorted_list
-
-    manufacturers = sort_hierarchically(all_manufacturers)
+    manufacturers = manufacturer_tree.sort_hierarchically(all_manufacturers)
 
     # Importera country_flag filtret
     from .templatetags.axe_filters import country_flag
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.contrib.auth.decorators import user_passes_test
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_http_methods
+
+from .services import request_metrics
+
+
+def _is_staff(user):
+    return user.is_active and user.is_staff
+
+
+@user_passes_test(_is_staff)
+@require_http_methods(["GET", "POST"])
+def request_timing(request):
+    """Svarstider per vy från RequestTimingMiddleware (bara för personal).
+
+    POST nollställer mätvärdena.
+    """
+    if request.method == "POST":
+        request_metrics.clear()
+        return redirect("request_timing")
+
+    return render(
+        request,
+        "axes/request_timing.html",
+        {
+            "rows": request_metrics.snapshot(),
+            "enabled": getattr(settings, "REQUEST_TIMING_ENABLED", False),
+            "slow_ms": getattr(settings, "REQUEST_TIMING_SLOW_MS", 500),
+            "window": getattr(settings, "REQUEST_TIMING_WINDOW", 500),
+        },
+    )
@@ -27,7 +27,8 @@ from .forms import (
     StampImageForm,
     StampImageMarkForm,
 )
-from .services.comments import build_comment_tree
+from .services.site_cache import get_comment_tree, get_site_settings
+from .services.stamp_symbol_search import filter_stamps_by_symbols
 import json
 
 
@@ -67,23 +68,8 @@ def stamp_list(request):
     search_logic = request.GET.get("search_logic", "and")  # and, or
 
     if symbols_filter:
-        # Hitta stämplar som har transkriberingar med de valda symbolerna
-        from .models import StampTranscription
-
-        if search_logic == "or":
-            # OR-logik: Minst en symbol måste matcha
-            transcription_ids = StampTranscription.objects.filter(
-                symbols__id__in=symbols_filter
-            ).values_list("id", flat=True)
-            stamps = stamps.filter(transcriptions__id__in=transcription_ids).distinct()
-        else:
-            # AND-logik: Alla valda symboler måste finnas (standard)
-            for symbol_id in symbols_filter:
-                transcription_ids = StampTranscription.objects.filter(
-                    symbols__id=symbol_id
-                ).values_list("id", flat=True)
-                stamps = stamps.filter(transcriptions__id__in=transcription_ids)
-            stamps = stamps.distinct()
+        # Stämplar vars transkriberingar har de valda symbolerna (and/or/not)
+        stamps = filter_stamps_by_symbols(stamps, symbols_filter, search_logic)
 
     if manufacturer_filter:
         stamps = stamps.filter(manufacturer_id=manufacturer_filter)
@@ -191,13 +177,13 @@ def stamp_detail(request, stamp_id):
 
     from .models import Settings
 
-    comment_settings = Settings.get_settings()
+    comment_settings = get_site_settings()
 
     context = {
         "stamp": stamp,
         "related_stamps": related_stamps,
         "stamp_images": stamp_images,
-        "comment_tree": build_comment_tree(stamp, request.user.is_authenticated),
+        "comment_tree": get_comment_tree(stamp, request.user.is_authenticated),
         "is_staff": request.user.is_authenticated,
         "comment_submit_url": reverse("submit_stamp_comment", args=[stamp.pk]),
         "comments_enabled": comment_settings.comments_enabled_public,
@@ -386,22 +372,8 @@ def stamp_search(request):
 
     # Symbol-sökning
     if symbols_filter:
-        from .models import StampTranscription
-
-        if search_logic == "or":
-            # OR-logik: Minst en symbol måste matcha
-            transcription_ids = StampTranscription.objects.filter(
-                symbols__id__in=symbols_filter
-            ).values_list("id", flat=True)
-            stamps = stamps.filter(transcriptions__id__in=transcription_ids).distinct()
-        else:
-            # AND-logik: Alla valda symboler måste finnas (standard)
-            for symbol_id in symbols_filter:
-                transcription_ids = StampTranscription.objects.filter(
-                    symbols__id=symbol_id
-                ).values_list("id", flat=True)
-                stamps = stamps.filter(transcriptions__id__in=transcription_ids)
-            stamps = stamps.distinct()
+        # Stämplar vars transkriberingar har de valda symbolerna (and/or/not)
+        stamps = filter_stamps_by_symbols(stamps, symbols_filter, search_logic)
 
     # Filtrering
     if manufacturer_filter:
@@ -1,10 +1,10 @@
 from django.shortcuts import render
 from django.http import JsonResponse, Http404
-from django.db.models import Sum
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
 from .models import Transaction, Contact, Platform
+from .services.statistics import transaction_totals
 
 
 def transaction_list(request):
@@ -18,6 +18,7 @@ def transaction_list(request):
     transactions = (
         Transaction.objects.all()
         .select_related("axe__manufacturer", "contact", "platform")
+        .prefetch_related("axe__images")
         .order_by("-transaction_date")
     )
 
@@ -33,19 +34,8 @@ def transaction_list(request):
     elif contact_filter == "without_contact":
         transactions = transactions.filter(contact__isnull=True)
 
-    # Beräkna totala statistik för filtrerade transaktioner
-    filtered_transactions = transactions
-    total_buys = filtered_transactions.filter(type="KÖP").count()
-    total_sales = filtered_transactions.filter(type="SÄLJ").count()
-    total_buy_value = (
-        filtered_transactions.filter(type="KÖP").aggregate(total=Sum("price"))["total"]
-        or 0
-    )
-    total_sale_value = (
-        filtered_transactions.filter(type="SÄLJ").aggregate(total=Sum("price"))["total"]
-        or 0
-    )
-    total_profit = total_sale_value - total_buy_value
+    # Beräkna totala statistik för filtrerade transaktioner (en enda query)
+    stats = transaction_totals(transactions)
 
     # Hämta data för filter-dropdowns
     from .models import Platform
@@ -67,12 +57,7 @@ def transaction_list(request):
         "type_filter": type_filter,
         "platform_filter": platform_filter,
         "contact_filter": contact_filter,
-        "total_buys": total_buys,
-        "total_sales": total_sales,
-        "total_buy_value": total_buy_value,
-        "total_sale_value": total_sale_value,
-        "total_profit": total_profit,
-        "filtered_count": transactions.count(),
+        **stats,
         "default_page_length": default_page_length,
     }
     return render(request, "axes/transaction_list.html", context)